@@ -4,6 +4,7 @@
 import argparse
 import sys
 import os
+import time
 from datetime import datetime, date
 from pathlib import Path
 from dotenv import load_dotenv
@@ -49,6 +50,19 @@ def main():
         choices=['ensemble', 'meguro', 'shibuya'],
         help='スクレイピング対象施設 (ensemble: あんさんぶるStudio, meguro: 目黒区施設, shibuya: 渋谷区施設)'
     )
+    har_group = parser.add_mutually_exclusive_group()
+    har_group.add_argument(
+        '--record-har',
+        type=str,
+        metavar='PATH',
+        help='実際のサイトへのアクセスをHARファイルに記録 (性能測定用。ブラウザコンテキストごとに PATH, name.2.har, ... に記録)'
+    )
+    har_group.add_argument(
+        '--replay-har',
+        type=str,
+        metavar='PATH',
+        help='記録したHARファイルを再生し、記録時と同じ処理をオフラインで実行 (保存は行わず、所要時間を表示)'
+    )
     
     args = parser.parse_args()
     
@@ -72,8 +86,8 @@ def main():
                 print(f"エラー: 日付は YYYY-MM-DD または YYYY/MM/DD 形式で指定してください: {date_str}")
                 sys.exit(1)
             
-            # 過去日付チェック
-            if parsed_date.date() < today:
+            # 過去日付チェック（HARの再生では記録時の日付を指定するためチェックしない）
+            if parsed_date.date() < today and not args.replay_har:
                 print(f"警告: 過去の日付はスキップされます: {date_str}")
                 continue
             
@@ -105,9 +119,9 @@ def main():
         # 正規化された日付文字列 (YYYY-MM-DD形式)
         normalized_date = parsed_date.strftime("%Y-%m-%d")
         
-        # 過去日付チェック
+        # 過去日付チェック（HARの再生では記録時の日付を指定するためチェックしない）
         today = date.today()
-        if parsed_date.date() < today:
+        if parsed_date.date() < today and not args.replay_har:
             print(f"エラー: 過去の日付は指定できません。")
             print(f"指定された日付: {normalized_date}")
             print(f"今日の日付: {today.strftime('%Y-%m-%d')}")
@@ -126,6 +140,17 @@ def main():
         print("対象施設: あんさんぶるStudio")
         scraper = EnsembleStudioScraper()
     
+    if args.record_har or args.replay_har:
+        try:
+            scraper.set_har_mode(args.record_har, args.replay_har)
+        except ValueError as e:
+            print(f"エラー: {e}")
+            sys.exit(1)
+    
+    if args.replay_har:
+        replay_har(scraper, dates_to_process if args.dates else [normalized_date], multiple=bool(args.dates))
+        return
+    
     try:
         if args.dates:
             # 複数日付モード: scrape_multiple_datesを使用
@@ -181,5 +206,40 @@ def main():
         sys.exit(1)
 
 
+def replay_har(scraper, dates, multiple=False):
+    """
+    HARを再生して記録時と同じ処理を実行し、所要時間を表示（再生中はCosmos DBに保存しない）
+    複数日付はscrape_multiple_dates、単一日付はscrape_and_saveを使う（記録時と同じブラウザコンテキストの順にHARを再生する）
+    
+    Args:
+        scraper: HARの再生を設定したスクレイパー
+        dates: YYYY-MM-DD形式の日付リスト
+        multiple: 複数日付モード（--dates）で記録したHARか
+    """
+    print(f"HARを再生: {scraper.replay_har_path}")
+    started = time.perf_counter()
+    if multiple:
+        results = scraper.scrape_multiple_dates(dates).get("results", {})
+    else:
+        results = {dates[0]: scraper.scrape_and_save(dates[0])}
+    elapsed = time.perf_counter() - started
+    
+    failed = False
+    for date_str in dates:
+        result = results.get(date_str, {})
+        if result.get("status") == "success":
+            data = result.get("data", [])
+            facilities = data.get(date_str, []) if isinstance(data, dict) else data
+            status = f"{len(facilities)}件"
+        else:
+            status = f"失敗 ({result.get('error_type') or result.get('message', '結果なし')})"
+            failed = True
+        print(f"  {date_str}: {status}")
+    
+    print(f"\n合計: {elapsed:.2f}秒 (平均 {elapsed / len(dates):.2f}秒/日付)")
+    if failed:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
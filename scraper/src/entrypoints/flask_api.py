@@ -7,11 +7,13 @@ import os
 import sys
 import json
 import logging
+import functools
 import traceback
 import threading
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from playwright.sync_api import Error as PlaywrightError
 
 # Add scraper directory to path (parent of src)
@@ -21,11 +23,39 @@ from src.scrapers.ensemble_studio import EnsembleStudioScraper
 from src.scrapers.meguro import MeguroScraper
 from src.scrapers.shibuya import ShibuyaScraper
 from src.services.scrape_service import ScrapeService
+from src.services.session_planner import SessionPlanner, is_session_planner_enabled
 from src.services.target_date_service import TargetDateService
 from src.services.warmup_scheduler import get_scheduler
+from src.types.availability_record import AvailabilityBatch
+from src.services.refresh_scheduler import get_refresh_scheduler
+from src.services.spool_replayer import get_spool_replayer
+from src.utils.adaptive_timeouts import get_adaptive_timeouts
+from src.utils.admission_control import admission_ticket, admitted, get_admission_controller
+from src.utils.availability_cache import get_availability_cache
+from src.utils.browser_profile import get_browser_profiles
+from src.utils.deadlines import Deadline, deadline_context, default_job_timeout_seconds
+from src.utils.debug_artifacts import get_debug_artifacts
+from src.utils.deep_links import get_deep_link_states, is_deep_links_enabled
+from src.utils.page_parking import get_page_parking
+from src.utils.circuit_breaker import get_circuit_breaker_states, is_circuit_breaker_enabled
+from src.utils.selector_cache import get_selector_cache
+from src.utils.scrape_jobs import (
+    CANCELLED, COMPLETED, FAILED, format_ndjson, format_sse, get_job_registry, job_context, publish_progress
+)
+
+class AvailabilityJSONProvider(DefaultJSONProvider):
+    """スクレイピング結果のバッチ（AvailabilityBatch）を現行のJSON形式のリストとして返す"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, AvailabilityBatch):
+            return o.to_dicts()
+        return DefaultJSONProvider.default(o)
+
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = AvailabilityJSONProvider(app)
 
 # Configure logging
 logging.basicConfig(
@@ -62,6 +92,49 @@ def get_services():
         }
     return target_date_service, scrape_service
 
+# 読み取り用の空き状況リポジトリ（/availability の初回アクセス時に初期化）
+availability_reader = None
+
+def get_availability_reader():
+    """読み取り用の空き状況リポジトリを遅延初期化（STORAGE_BACKENDに従う）"""
+    global availability_reader
+    if availability_reader is None:
+        from src.repositories.storage import create_availability_store
+        availability_reader = create_availability_store()
+    return availability_reader
+
+# gzip圧縮する本文の最小サイズ（これより小さい場合は圧縮しない）
+GZIP_MIN_BYTES = 256
+
+def admission_controlled(view):
+    """
+    /scrape/* の受付制御（ADMISSION_CONTROL_ENABLED=trueの場合のみ）
+    実行枠・待ち行列が埋まっている場合は429とRetry-Afterを返す。
+    受け付けた場合、スクレイピングのスレッドのtargetをadmittedで包むと実行枠が空くまで待ってから実行される
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        controller = get_admission_controller()
+        if controller is None:
+            return view(*args, **kwargs)
+        ticket = controller.try_admit(request.path)
+        if ticket is None:
+            retry_after = controller.retry_after_seconds()
+            logger.warning("Rejected %s: scraper is saturated (retry after %ss)", request.path, retry_after)
+            response = jsonify({
+                'success': False,
+                'message': '混雑しているため空き状況取得を開始できません。しばらくしてから再度お試しください',
+                'retryAfterSeconds': retry_after,
+                'estimatedWaitSeconds': controller.estimated_wait_seconds(),
+                'timestamp': datetime.now().isoformat()
+            })
+            response.status_code = 429
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        with admission_ticket(ticket):
+            return view(*args, **kwargs)
+    return wrapper
+
 # Initialize scraper (for backward compatibility)
 scraper = EnsembleStudioScraper()
 
@@ -96,8 +169,8 @@ def warm_up():
     
     try:
         # Cosmos DB接続を維持
-        from src.repositories.cosmos_repository import CosmosWriter
-        cosmos_writer = CosmosWriter()
+        from src.repositories.storage import create_availability_store
+        cosmos_writer = create_availability_store()
         
         # 軽量なヘルスチェッククエリを実行
         result = cosmos_writer.warm_up()
@@ -148,7 +221,236 @@ def warmup_status():
     })
 
 
-def async_scraping_task(dates, record_id, record_date, use_rate_limits, facility='both'):
+
+
+@app.route('/refresh/status')
+def refresh_status():
+    """
+    Check the status of the staleness-driven refresh scheduler
+    """
+    return jsonify({
+        'status': 'success',
+        **get_refresh_scheduler().get_status(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/spool/status')
+def spool_status():
+    """
+    Check the local availability spool and the replay of writes that failed to reach Cosmos DB
+    """
+    return jsonify({
+        'status': 'success',
+        **get_spool_replayer().get_status(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/circuit-breakers')
+def circuit_breakers():
+    """
+    Report the circuit breaker state of each facility
+    """
+    return jsonify({
+        'status': 'success',
+        'enabled': is_circuit_breaker_enabled(),
+        'breakers': get_circuit_breaker_states(['ensemble', 'meguro', 'shibuya']),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/adaptive-timeouts')
+def adaptive_timeouts():
+    """
+    Report per-facility step latency statistics used for adaptive timeouts
+    Steps whose recent median is well above their historical median are flagged as drifting
+    """
+    timeouts = get_adaptive_timeouts()
+    facility = request.args.get('facility')
+    steps = timeouts.get_stats(facility) if timeouts else []
+    return jsonify({
+        'status': 'success',
+        'enabled': timeouts is not None,
+        'steps': steps,
+        'drifting': [f"{s['facility']}:{s['step']}" for s in steps if s['drifting']],
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/browser-profiles')
+def browser_profiles():
+    """
+    Report the saved per-facility browser storage states and the static resource cache hit rate
+    """
+    profiles = get_browser_profiles()
+    return jsonify({
+        'status': 'success',
+        'enabled': profiles is not None,
+        **(profiles.get_stats() if profiles else {'storedStates': []}),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/deep-links')
+def deep_links():
+    """
+    Report the deep-link hit/miss rates of each facility with a configured URL template
+    """
+    return jsonify({
+        'status': 'success',
+        'enabled': is_deep_links_enabled(),
+        'deepLinks': get_deep_link_states(['meguro', 'shibuya']),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/session-plan')
+def session_plan():
+    """
+    Preview how /scrape would split the dates (?date=YYYY-MM-DD, repeatable) into browser sessions
+    across facilities, with the estimated wall time under the configured concurrency budget
+    """
+    dates = request.args.getlist('date')
+    facility = request.args.get('facility', 'both')
+    scrapers = {'ensemble': EnsembleStudioScraper, 'meguro': MeguroScraper, 'shibuya': ShibuyaScraper}
+    facilities = list(scrapers) if facility == 'both' else [facility]
+    try:
+        for date_str in dates:
+            datetime.strptime(date_str, '%Y-%m-%d')
+        if not dates:
+            raise ValueError('date query parameter is required')
+        plan = SessionPlanner(scrapers).plan(facilities, sorted(set(dates)))
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    return jsonify({
+        'status': 'success',
+        'enabled': is_session_planner_enabled(),
+        'plan': plan.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/debug-artifacts')
+def debug_artifacts():
+    """
+    List the debug artifacts (screenshot, HTML, step markers, trace) captured for failed or slow runs
+    """
+    artifacts = get_debug_artifacts()
+    return jsonify({
+        'status': 'success',
+        'enabled': artifacts is not None,
+        **(artifacts.get_stats() if artifacts else {'captures': []}),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/parked-pages')
+def parked_pages():
+    """
+    Report the per-facility pages kept parked at the post-search screen, with park/reuse/discard counts
+    """
+    parking = get_page_parking()
+    return jsonify({
+        'status': 'success',
+        'enabled': parking is not None,
+        **(parking.get_stats() if parking else {'facilities': []}),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/selector-cache')
+def selector_cache():
+    """
+    Report which selector last matched per facility step, with hit/miss counts
+    A falling hit rate or a non-zero failure count usually means the site layout changed
+    """
+    cache = get_selector_cache()
+    facility = request.args.get('facility')
+    steps = cache.get_stats(facility) if cache else []
+    return jsonify({
+        'status': 'success',
+        'enabled': cache is not None,
+        'steps': steps,
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/admission')
+def admission():
+    """
+    Report active and queued scrape runs, rejections, and the estimated wait for a new request
+    """
+    controller = get_admission_controller()
+    return jsonify({
+        'status': 'success',
+        'enabled': controller is not None,
+        **(controller.get_stats() if controller else {'active': [], 'queued': []}),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/availability')
+def availability():
+    """
+    Get availability data for a date (?date=YYYY-MM-DD)
+    
+    Responses are served from an in-process cache that is invalidated whenever the scraper
+    saves the same date, so repeated reads do not query Cosmos DB.
+    Supports conditional requests (ETag / If-None-Match) and gzip (Accept-Encoding).
+    """
+    date = request.args.get('date')
+    try:
+        datetime.strptime(date or '', '%Y-%m-%d')
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'date query parameter is required in YYYY-MM-DD format',
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    
+    try:
+        entry = get_availability_cache().get(date, lambda d: get_availability_reader().get_availability(d))
+    except Exception as e:
+        logger.error("Failed to read availability for %s: %s", date, e)
+        return jsonify({
+            'status': 'error',
+            'message': 'Service temporarily unavailable',
+            'details': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 503
+    
+    headers = {
+        'ETag': entry.etag,
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if request.if_none_match.contains_weak(entry.etag.strip('"')):
+        return Response(status=304, headers=headers)
+    
+    body = entry.body
+    if len(body) >= GZIP_MIN_BYTES and request.accept_encodings['gzip']:
+        body = entry.gzipped_body
+        headers['Content-Encoding'] = 'gzip'
+    return Response(body, mimetype='application/json', headers=headers)
+
+def _planned_browsers(facility, dates):
+    """
+    /scrape の実行が同時に開くブラウザの数（受付制御で確保する枠の数）
+    セッション計画で並行に実行する場合はその計画の並行数、それ以外は施設・日付を順に処理するため1
+    """
+    if len(dates) <= 1 or not is_session_planner_enabled():
+        return 1
+    scrapers = {'ensemble': EnsembleStudioScraper, 'meguro': MeguroScraper, 'shibuya': ShibuyaScraper}
+    facilities = [f for f in (list(scrapers) if facility == 'both' else [facility]) if f in scrapers]
+    if not facilities:
+        return 1
+    return SessionPlanner(scrapers).plan(facilities, sorted(set(dates))).max_browsers
+
+
+def async_scraping_task(dates, record_id, record_date, use_rate_limits, facility='both', job_id=None):
     """
     非同期でスクレイピングを実行するタスク
     別スレッドで実行される
@@ -160,6 +462,30 @@ def async_scraping_task(dates, record_id, record_date, use_rate_limits, facility
         record_date: Rate limit record date
         use_rate_limits: Rate limits使用フラグ
         facility: 施設名（'ensemble', 'meguro', 'shibuya', or 'both'）
+        job_id: 進捗を通知するジョブID（/jobs/<job_id>/events で配信。ジョブの期限・キャンセルに従う）
+    """
+    job = get_job_registry().get(job_id) if job_id else None
+    with job_context(job), deadline_context(job.deadline if job else None):
+        succeeded = _run_scraping_task(dates, record_id, record_date, use_rate_limits, facility)
+    if job is not None:
+        _finish_job(job, succeeded)
+
+
+def _finish_job(job, succeeded):
+    """タスクの結果からジョブを終了（期限切れ・キャンセルで止まった場合はその理由で終了）"""
+    stopped = job.deadline.error()
+    if not succeeded and stopped is not None:
+        job.finish(CANCELLED if stopped.error_type == 'CANCELLED' else FAILED, reason=str(stopped))
+    else:
+        job.finish(COMPLETED if succeeded else FAILED)
+
+
+def _run_scraping_task(dates, record_id, record_date, use_rate_limits, facility):
+    """
+    async_scraping_taskの本体
+    
+    Returns:
+        全施設・全日付が成功した場合True
     """
     rate_limits_repo = None
     has_error = False
@@ -168,8 +494,8 @@ def async_scraping_task(dates, record_id, record_date, use_rate_limits, facility
         # Rate limitsリポジトリの初期化
         if use_rate_limits:
             try:
-                from src.repositories.rate_limits_repository import RateLimitsRepository
-                rate_limits_repo = RateLimitsRepository()
+                from src.repositories.storage import create_rate_limits_store
+                rate_limits_repo = create_rate_limits_store()
             except Exception as e:
                 logger.warning(f"Rate limits repo unavailable in async task: {str(e)}")
                 use_rate_limits = False
@@ -207,6 +533,12 @@ def async_scraping_task(dates, record_id, record_date, use_rate_limits, facility
                 'shibuya': ShibuyaScraper
             }
             
+            # セッション計画が有効な場合は、施設をまたいで並行に実行した結果を施設ごとに評価する
+            planned_results = None
+            if len(normalized_dates) > 1 and is_session_planner_enabled():
+                planner = SessionPlanner(scrapers)
+                planned_results = planner.run([f for f in facilities_to_scrape if f in scrapers], normalized_dates)
+            
             # 各施設に対して複数日付を一括スクレイピング
             for current_facility in facilities_to_scrape:
                 try:
@@ -218,10 +550,23 @@ def async_scraping_task(dates, record_id, record_date, use_rate_limits, facility
                     
                     logger.info(f"[Async] Starting {current_facility} scraping for {len(normalized_dates)} dates")
                     
-                    # 複数日付の場合はscrape_multiple_datesを使用
+                    # 複数日付の場合はscrape_multiple_datesを使用（セッション計画が有効な場合は実行済み）
                     if len(normalized_dates) > 1:
-                        scraper = scraper_class()
-                        result = scraper.scrape_multiple_dates(normalized_dates)
+                        if planned_results is not None:
+                            result = planned_results.get(current_facility)
+                        else:
+                            scraper = scraper_class()
+                            result = scraper.scrape_multiple_dates(normalized_dates)
+                        
+                        # 施設ごとの結果を通知（日付ごとの保存結果は保存時に通知済み）
+                        if result and 'results' in result:
+                            publish_progress(
+                                "facility",
+                                facility=current_facility,
+                                summary=result.get('summary'),
+                                results={d: {'status': r.get('status'), 'error_type': r.get('error_type')}
+                                         for d, r in result['results'].items()}
+                            )
                         
                         # 結果の評価
                         if result and 'summary' in result:
@@ -266,6 +611,7 @@ def async_scraping_task(dates, record_id, record_date, use_rate_limits, facility
                 logger.error(f"[Async] Failed to update rate limit status: {str(e)}")
         
         logger.info(f"[Async] Scraping task completed for {len(dates)} dates")
+        return not has_error
         
     except Exception as e:
         logger.error(f"[Async] Fatal error in scraping task: {str(e)}")
@@ -277,20 +623,24 @@ def async_scraping_task(dates, record_id, record_date, use_rate_limits, facility
                 logger.info("[Async] Rate limit status updated to: failed (due to exception)")
             except:
                 pass
+        return False
 
 
-def async_ensemble_scraping_task(date, record_id, record_date, use_rate_limits):
+def async_ensemble_scraping_task(date, record_id, record_date, use_rate_limits, job_id=None):
     """
     あんさんぶるStudio専用の非同期スクレイピングタスク
+    job_idを指定した場合はジョブの期限・キャンセルに従い、結果をジョブに通知する
     """
     rate_limits_repo = None
+    job = get_job_registry().get(job_id) if job_id else None
+    succeeded = False
     
     try:
         # Rate limitsリポジトリの初期化
         if use_rate_limits:
             try:
-                from src.repositories.rate_limits_repository import RateLimitsRepository
-                rate_limits_repo = RateLimitsRepository()
+                from src.repositories.storage import create_rate_limits_store
+                rate_limits_repo = create_rate_limits_store()
             except Exception as e:
                 logger.warning(f"Rate limits repo unavailable in async ensemble task: {str(e)}")
                 use_rate_limits = False
@@ -299,7 +649,11 @@ def async_ensemble_scraping_task(date, record_id, record_date, use_rate_limits):
         
         # サービスを取得してスクレイピング実行
         _, scraping_service = get_services()
-        result = scraping_service.scrape_facility('ensemble', date)
+        with job_context(job):
+            result = scraping_service.scrape_facility(
+                'ensemble', date, deadline=job.deadline if job else Deadline(default_job_timeout_seconds())
+            )
+        succeeded = result.get('status') == 'success'
         
         # Rate limitsステータス更新
         if use_rate_limits and record_id and rate_limits_repo:
@@ -322,20 +676,26 @@ def async_ensemble_scraping_task(date, record_id, record_date, use_rate_limits):
                 logger.info("[Async Ensemble] Rate limit status updated to: failed")
             except:
                 pass
+    finally:
+        if job is not None:
+            _finish_job(job, succeeded)
 
 
-def async_meguro_scraping_task(date, record_id, record_date, use_rate_limits):
+def async_meguro_scraping_task(date, record_id, record_date, use_rate_limits, job_id=None):
     """
     目黒区施設専用の非同期スクレイピングタスク
+    job_idを指定した場合はジョブの期限・キャンセルに従い、結果をジョブに通知する
     """
     rate_limits_repo = None
+    job = get_job_registry().get(job_id) if job_id else None
+    succeeded = False
     
     try:
         # Rate limitsリポジトリの初期化
         if use_rate_limits:
             try:
-                from src.repositories.rate_limits_repository import RateLimitsRepository
-                rate_limits_repo = RateLimitsRepository()
+                from src.repositories.storage import create_rate_limits_store
+                rate_limits_repo = create_rate_limits_store()
             except Exception as e:
                 logger.warning(f"Rate limits repo unavailable in async meguro task: {str(e)}")
                 use_rate_limits = False
@@ -344,7 +704,11 @@ def async_meguro_scraping_task(date, record_id, record_date, use_rate_limits):
         
         # サービスを取得してスクレイピング実行
         _, scraping_service = get_services()
-        result = scraping_service.scrape_facility('meguro', date)
+        with job_context(job):
+            result = scraping_service.scrape_facility(
+                'meguro', date, deadline=job.deadline if job else Deadline(default_job_timeout_seconds())
+            )
+        succeeded = result.get('status') == 'success'
         
         # Rate limitsステータス更新
         if use_rate_limits and record_id and rate_limits_repo:
@@ -367,20 +731,26 @@ def async_meguro_scraping_task(date, record_id, record_date, use_rate_limits):
                 logger.info("[Async Meguro] Rate limit status updated to: failed")
             except:
                 pass
+    finally:
+        if job is not None:
+            _finish_job(job, succeeded)
 
 
-def async_shibuya_scraping_task(date, record_id, record_date, use_rate_limits):
+def async_shibuya_scraping_task(date, record_id, record_date, use_rate_limits, job_id=None):
     """
     渋谷区施設専用の非同期スクレイピングタスク
+    job_idを指定した場合はジョブの期限・キャンセルに従い、結果をジョブに通知する
     """
     rate_limits_repo = None
+    job = get_job_registry().get(job_id) if job_id else None
+    succeeded = False
     
     try:
         # Rate limitsリポジトリの初期化
         if use_rate_limits:
             try:
-                from src.repositories.rate_limits_repository import RateLimitsRepository
-                rate_limits_repo = RateLimitsRepository()
+                from src.repositories.storage import create_rate_limits_store
+                rate_limits_repo = create_rate_limits_store()
             except Exception as e:
                 logger.warning(f"Rate limits repo unavailable in async shibuya task: {str(e)}")
                 use_rate_limits = False
@@ -389,7 +759,11 @@ def async_shibuya_scraping_task(date, record_id, record_date, use_rate_limits):
         
         # サービスを取得してスクレイピング実行
         _, scraping_service = get_services()
-        result = scraping_service.scrape_facility('shibuya', date)
+        with job_context(job):
+            result = scraping_service.scrape_facility(
+                'shibuya', date, deadline=job.deadline if job else Deadline(default_job_timeout_seconds())
+            )
+        succeeded = result.get('status') == 'success'
         
         # Rate limitsステータス更新
         if use_rate_limits and record_id and rate_limits_repo:
@@ -412,9 +786,13 @@ def async_shibuya_scraping_task(date, record_id, record_date, use_rate_limits):
                 logger.info("[Async Shibuya] Rate limit status updated to: failed")
             except:
                 pass
+    finally:
+        if job is not None:
+            _finish_job(job, succeeded)
 
 
 @app.route('/scrape', methods=['POST'])
+@admission_controlled
 def scrape():
     """
     Unified scraper endpoint
@@ -442,8 +820,8 @@ def scrape():
         else:
             # Rate limits制御を試みる
             try:
-                from src.repositories.rate_limits_repository import RateLimitsRepository
-                rate_limits_repo = RateLimitsRepository()
+                from src.repositories.storage import create_rate_limits_store
+                rate_limits_repo = create_rate_limits_store()
                 rate_result = rate_limits_repo.create_or_update_record('running')
                 
                 if rate_result.get('is_already_running'):
@@ -502,20 +880,25 @@ def scrape():
         logger.info(f"Scraper triggered by: {triggered_by}")
         logger.info(f"Scraping {facility} for {len(dates)} dates: {dates}")
         
+        # 進捗配信用のジョブを作成
+        job = get_job_registry().create(facility, dates)
+        
         # スクレイピングタスクを別スレッドで実行（fire and forget）
         scraping_thread = threading.Thread(
-            target=async_scraping_task,
-            args=(dates, record_id, record_date, use_rate_limits, facility),
+            target=admitted(async_scraping_task, deadline=job.deadline, browsers=_planned_browsers(facility, dates)),
+            args=(dates, record_id, record_date, use_rate_limits, facility, job.id),
             daemon=True  # メインプロセスが終了しても続行
         )
         scraping_thread.start()
         
-        logger.info(f"Scraping task started asynchronously for {facility} with {len(dates)} dates")
+        logger.info("Scraping task started asynchronously for %s with %s dates (job %s)", facility, len(dates), job.id)
         
-        # 即座にシンプルなレスポンスを返す
+        # 即座にレスポンスを返す（進捗は eventsUrl をSSEで購読できる）
         return jsonify({
             'success': True,
-            'message': '空き状況取得を開始しました'
+            'message': '空き状況取得を開始しました',
+            'jobId': job.id,
+            'eventsUrl': f'/jobs/{job.id}/events'
         }), 202  # 202 Accepted
         
     except Exception as e:
@@ -534,10 +917,99 @@ def scrape():
         }), 500
 
 
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """
+    Get the status of a scraping job started by POST /scrape or /scrape/<facility>
+    """
+    job = get_job_registry().get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Job not found: {job_id}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'job': job.to_dict(),
+        'events': job.events_after(0),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancel a running scraping job
+    
+    The scrapers stop before the next date or step, keep the dates already saved and close their browser.
+    The job finishes with status "cancelled" once the run has wound down.
+    A job still waiting for an admission slot leaves the queue without launching a browser.
+    """
+    job = get_job_registry().get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Job not found: {job_id}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    if not job.cancel('Cancelled by DELETE /jobs/<id>'):
+        return jsonify({
+            'status': 'error',
+            'message': f'Job already finished: {job_id}',
+            'job': job.to_dict(),
+            'timestamp': datetime.now().isoformat()
+        }), 409
+    logger.info("Cancellation requested for job %s", job_id)
+    return jsonify({
+        'status': 'success',
+        'job': job.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    }), 202
+
+
+@app.route('/jobs/<job_id>/events')
+def stream_job_events(job_id):
+    """
+    Stream progress events of a scraping job
+    
+    Server-sent events by default (text/event-stream); ?format=ndjson returns newline-delimited JSON.
+    Reconnecting clients may send Last-Event-ID (or ?lastEventId=) to resume after the last received event.
+    The stream ends after the final "job" event.
+    """
+    job = get_job_registry().get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Job not found: {job_id}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.args.get('lastEventId') or 0)
+    except ValueError:
+        last_event_id = 0
+    
+    use_ndjson = request.args.get('format') == 'ndjson'
+    formatter = format_ndjson if use_ndjson else format_sse
+    heartbeat = float(os.environ.get('SCRAPE_EVENTS_HEARTBEAT_SECONDS', '15'))
+    
+    def generate():
+        for event in job.stream(last_event_id, heartbeat_seconds=heartbeat):
+            yield formatter(event)
+    
+    return Response(
+        generate(),
+        mimetype='application/x-ndjson' if use_ndjson else 'text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # Single date endpoint removed - use POST /scrape?date=YYYY-MM-DD instead
 
 
 @app.route('/scrape/ensemble', methods=['POST'])
+@admission_controlled
 def scrape_ensemble():
     """
     あんさんぶるStudio専用エンドポイント
@@ -560,8 +1032,8 @@ def scrape_ensemble():
         else:
             # Rate limits制御を試みる
             try:
-                from src.repositories.rate_limits_repository import RateLimitsRepository
-                rate_limits_repo = RateLimitsRepository()
+                from src.repositories.storage import create_rate_limits_store
+                rate_limits_repo = create_rate_limits_store()
                 rate_result = rate_limits_repo.create_or_update_record('running')
                 
                 if rate_result.get('is_already_running'):
@@ -611,19 +1083,22 @@ def scrape_ensemble():
         logger.info(f"Scraping ensemble with specified date: {date}")
         
         # スクレイピングタスクを別スレッドで実行（fire and forget）
+        job = get_job_registry().create('ensemble', [date])
         scraping_thread = threading.Thread(
-            target=async_ensemble_scraping_task,
-            args=(date, record_id, record_date, use_rate_limits),
+            target=admitted(async_ensemble_scraping_task, deadline=job.deadline),
+            args=(date, record_id, record_date, use_rate_limits, job.id),
             daemon=True
         )
         scraping_thread.start()
         
-        logger.info(f"Ensemble scraping task started asynchronously for {date}")
+        logger.info("Ensemble scraping task started asynchronously for %s (job %s)", date, job.id)
         
-        # 即座にシンプルなレスポンスを返す
+        # 即座にシンプルなレスポンスを返す（進捗の購読・キャンセルは /scrape と同じジョブのURLで行う）
         return jsonify({
             'success': True,
-            'message': '空き状況取得を開始しました'
+            'message': '空き状況取得を開始しました',
+            'jobId': job.id,
+            'eventsUrl': f'/jobs/{job.id}/events'
         }), 202
             
     except Exception as e:
@@ -644,6 +1119,7 @@ def scrape_ensemble():
 
 
 @app.route('/scrape/meguro', methods=['POST'])
+@admission_controlled
 def scrape_meguro():
     """
     目黒区施設専用エンドポイント
@@ -659,8 +1135,8 @@ def scrape_meguro():
     try:
         # Rate limits制御を試みる
         try:
-            from src.repositories.rate_limits_repository import RateLimitsRepository
-            rate_limits_repo = RateLimitsRepository()
+            from src.repositories.storage import create_rate_limits_store
+            rate_limits_repo = create_rate_limits_store()
             rate_result = rate_limits_repo.create_or_update_record('running')
             
             if rate_result.get('is_already_running'):
@@ -711,19 +1187,22 @@ def scrape_meguro():
         logger.info(f"Scraping meguro with specified date: {date}")
         
         # スクレイピングタスクを別スレッドで実行（fire and forget）
+        job = get_job_registry().create('meguro', [date])
         scraping_thread = threading.Thread(
-            target=async_meguro_scraping_task,
-            args=(date, record_id, record_date, use_rate_limits),
+            target=admitted(async_meguro_scraping_task, deadline=job.deadline),
+            args=(date, record_id, record_date, use_rate_limits, job.id),
             daemon=True
         )
         scraping_thread.start()
         
-        logger.info(f"Meguro scraping task started asynchronously for {date}")
+        logger.info("Meguro scraping task started asynchronously for %s (job %s)", date, job.id)
         
-        # 即座にシンプルなレスポンスを返す
+        # 即座にシンプルなレスポンスを返す（進捗の購読・キャンセルは /scrape と同じジョブのURLで行う）
         return jsonify({
             'success': True,
-            'message': '空き状況取得を開始しました'
+            'message': '空き状況取得を開始しました',
+            'jobId': job.id,
+            'eventsUrl': f'/jobs/{job.id}/events'
         }), 202
             
     except Exception as e:
@@ -744,6 +1223,7 @@ def scrape_meguro():
 
 
 @app.route('/scrape/shibuya', methods=['POST'])
+@admission_controlled
 def scrape_shibuya():
     """
     渋谷区施設専用エンドポイント
@@ -766,8 +1246,8 @@ def scrape_shibuya():
         else:
             # Rate limits制御を試みる
             try:
-                from src.repositories.rate_limits_repository import RateLimitsRepository
-                rate_limits_repo = RateLimitsRepository()
+                from src.repositories.storage import create_rate_limits_store
+                rate_limits_repo = create_rate_limits_store()
                 rate_result = rate_limits_repo.create_or_update_record('running')
                 
                 if rate_result.get('is_already_running'):
@@ -818,19 +1298,22 @@ def scrape_shibuya():
         logger.info(f"Scraping shibuya with specified date: {date}")
         
         # スクレイピングタスクを別スレッドで実行（fire and forget）
+        job = get_job_registry().create('shibuya', [date])
         scraping_thread = threading.Thread(
-            target=async_shibuya_scraping_task,
-            args=(date, record_id, record_date, use_rate_limits),
+            target=admitted(async_shibuya_scraping_task, deadline=job.deadline),
+            args=(date, record_id, record_date, use_rate_limits, job.id),
             daemon=True
         )
         scraping_thread.start()
         
-        logger.info(f"Shibuya scraping task started asynchronously for {date}")
+        logger.info("Shibuya scraping task started asynchronously for %s (job %s)", date, job.id)
         
-        # 即座にシンプルなレスポンスを返す
+        # 即座にシンプルなレスポンスを返す（進捗の購読・キャンセルは /scrape と同じジョブのURLで行う）
         return jsonify({
             'success': True,
-            'message': '空き状況取得を開始しました'
+            'message': '空き状況取得を開始しました',
+            'jobId': job.id,
+            'eventsUrl': f'/jobs/{job.id}/events'
         }), 202
             
     except Exception as e:
@@ -876,6 +1359,14 @@ warmup_scheduler = get_scheduler()
 warmup_scheduler.start()
 logger.info("Warmup scheduler initialized and started")
 
+# Start refresh scheduler (no-op unless AUTO_REFRESH_ENABLED=true)
+refresh_scheduler = get_refresh_scheduler()
+refresh_scheduler.start()
+
+# Start spool replayer (no-op unless AVAILABILITY_SPOOL_ENABLED=true)
+spool_replayer = get_spool_replayer()
+spool_replayer.start()
+
 
 if __name__ == '__main__':
     # For local testing only
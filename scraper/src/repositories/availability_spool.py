@@ -0,0 +1,254 @@
+"""
+空き状況の保存前スプール
+Cosmos DBへ保存する前に、日付ごとの施設データをローカルのSQLite（WALモード）に追記しておく。
+Cosmos DBが停止・遅延して保存に失敗しても、データは未送信のまま残り、再送ワーカーが復旧後に送信する
+（Cosmos DBのidは日付と施設名から決まり、upsertで保存するため、再送しても重複しない）
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..types.availability_record import json_default
+
+PENDING = "pending"
+UPLOADED = "uploaded"
+SUPERSEDED = "superseded"
+
+
+class AvailabilitySpool:
+    """保存前の空き状況データの追記ログ"""
+
+    def __init__(self, db_path: Optional[str] = None, retention_hours: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は環境変数 AVAILABILITY_SPOOL_PATH）
+            retention_hours: 送信済みの記録を残す時間（省略時は環境変数 AVAILABILITY_SPOOL_RETENTION_HOURS、デフォルト: 24）
+        """
+        self.db_path = db_path or os.getenv(
+            'AVAILABILITY_SPOOL_PATH',
+            str(Path(tempfile.gettempdir()) / 'aki-sta' / 'availability_spool.sqlite3')
+        )
+        if retention_hours is None:
+            retention_hours = int(os.getenv('AVAILABILITY_SPOOL_RETENTION_HOURS', '24'))
+        self.retention = timedelta(hours=retention_hours)
+        self._lock = threading.Lock()
+        # このプロセスで送信中の記録（再送ワーカーが同時に送らないようにする）
+        self._in_flight: Set[int] = set()
+
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._memory_connection = sqlite3.connect(':memory:', check_same_thread=False) if self.db_path == ':memory:' else None
+        self._initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を取得（スレッドごとに新しい接続を使う）"""
+        if self._memory_connection is not None:
+            return self._memory_connection
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """SQLを実行して結果を返す（呼び出し元でロックを取得すること）"""
+        connection = self._connect()
+        try:
+            with connection:
+                return connection.execute(sql, tuple(params)).fetchall()
+        finally:
+            if connection is not self._memory_connection:
+                connection.close()
+
+    def _initialize(self):
+        """テーブルを作成（ファイルの場合はWALモードにする）"""
+        with self._lock:
+            if self._memory_connection is None:
+                self._execute("PRAGMA journal_mode=WAL")
+            self._execute(
+                """
+                CREATE TABLE IF NOT EXISTS availability_spool (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    facilities TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            self._execute(
+                "CREATE INDEX IF NOT EXISTS idx_availability_spool_status ON availability_spool (status, id)"
+            )
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    @staticmethod
+    def _source(facilities: List[Dict]) -> str:
+        """データの出どころ（同じスクレイパーは同じセンター名の組み合わせを書き込む）"""
+        return ",".join(sorted({str(facility.get('centerName', '')) for facility in facilities}))
+
+    def append(self, date: str, facilities: List[Dict]) -> int:
+        """
+        送信前のデータを追記（送信中として扱う）
+        同じ日付・同じ出どころの未送信の古い記録は、新しいデータで置き換わるため再送しない
+
+        Args:
+            date: YYYY-MM-DD形式の日付
+            facilities: 施設データのリスト
+
+        Returns:
+            記録のID（complete に渡す）
+        """
+        source = self._source(facilities)
+        now = self._now().isoformat()
+        with self._lock:
+            connection = self._connect()
+            try:
+                # 置き換えと追記を1つのトランザクションで行う
+                with connection:
+                    connection.execute(
+                        "UPDATE availability_spool SET status = ?, updated_at = ? "
+                        "WHERE date = ? AND source = ? AND status = ?",
+                        (SUPERSEDED, now, date, source, PENDING)
+                    )
+                    cursor = connection.execute(
+                        """
+                        INSERT INTO availability_spool (date, source, facilities, status, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        (date, source, json.dumps(facilities, ensure_ascii=False, default=json_default), PENDING, now, now)
+                    )
+                    spool_id = cursor.lastrowid
+            finally:
+                if connection is not self._memory_connection:
+                    connection.close()
+            self._in_flight.add(spool_id)
+        return spool_id
+
+    def complete(self, spool_id: int, uploaded: bool, error: Optional[str] = None) -> None:
+        """
+        送信結果を記録
+
+        Args:
+            spool_id: appendで返されたID
+            uploaded: 送信に成功した場合True（失敗した場合は未送信のまま残り、再送の対象になる）
+            error: 失敗理由
+        """
+        now = self._now().isoformat()
+        with self._lock:
+            self._in_flight.discard(spool_id)
+            if uploaded:
+                self._execute(
+                    "UPDATE availability_spool SET status = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ? AND status = ?",
+                    (UPLOADED, now, spool_id, PENDING)
+                )
+            else:
+                self._execute(
+                    "UPDATE availability_spool SET attempts = attempts + 1, last_error = ?, updated_at = ? WHERE id = ?",
+                    (error, now, spool_id)
+                )
+
+    def claim_pending(self, limit: int = 50) -> List[Dict]:
+        """
+        再送する未送信の記録を古い順に取得し、送信中にする
+        （このプロセスで送信中のものは除く）
+        """
+        with self._lock:
+            rows = self._execute(
+                "SELECT id, date, facilities, attempts FROM availability_spool WHERE status = ? ORDER BY id",
+                (PENDING,)
+            )
+            claimed = []
+            for spool_id, date, facilities, attempts in rows:
+                if spool_id in self._in_flight:
+                    continue
+                self._in_flight.add(spool_id)
+                claimed.append({
+                    'id': spool_id,
+                    'date': date,
+                    'facilities': json.loads(facilities),
+                    'attempts': attempts
+                })
+                if len(claimed) >= limit:
+                    break
+        return claimed
+
+    def release(self, spool_ids: Iterable[int]) -> None:
+        """送信せずに送信中を解除（未送信のまま残す）"""
+        with self._lock:
+            self._in_flight.difference_update(spool_ids)
+
+    def purge(self) -> int:
+        """
+        保持期間を過ぎた送信済み・置き換え済みの記録を削除
+
+        Returns:
+            削除した件数
+        """
+        threshold = (self._now() - self.retention).isoformat()
+        with self._lock:
+            count = self._execute(
+                "SELECT COUNT(*) FROM availability_spool WHERE status != ? AND updated_at < ?",
+                (PENDING, threshold)
+            )[0][0]
+            self._execute(
+                "DELETE FROM availability_spool WHERE status != ? AND updated_at < ?",
+                (PENDING, threshold)
+            )
+        return count
+
+    def get_stats(self) -> Dict:
+        """状態ごとの件数と最も古い未送信の記録（API用）"""
+        with self._lock:
+            counts = dict(self._execute("SELECT status, COUNT(*) FROM availability_spool GROUP BY status"))
+            oldest = self._execute(
+                "SELECT date, created_at, attempts, last_error FROM availability_spool "
+                "WHERE status = ? ORDER BY id LIMIT 1",
+                (PENDING,)
+            )
+        return {
+            'pending': counts.get(PENDING, 0),
+            'uploaded': counts.get(UPLOADED, 0),
+            'superseded': counts.get(SUPERSEDED, 0),
+            'oldestPending': {
+                'date': oldest[0][0],
+                'createdAt': oldest[0][1],
+                'attempts': oldest[0][2],
+                'lastError': oldest[0][3]
+            } if oldest else None
+        }
+
+
+_spool_instance: Optional[AvailabilitySpool] = None
+_spool_lock = threading.Lock()
+
+
+def is_availability_spool_enabled() -> bool:
+    """スプールが有効か（環境変数 AVAILABILITY_SPOOL_ENABLED、デフォルト: false）"""
+    return os.getenv('AVAILABILITY_SPOOL_ENABLED', 'false').lower() == 'true'
+
+
+def get_availability_spool() -> Optional[AvailabilitySpool]:
+    """
+    スプールのシングルトンを取得
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _spool_instance
+    if not is_availability_spool_enabled():
+        return None
+    with _spool_lock:
+        if _spool_instance is None:
+            _spool_instance = AvailabilitySpool()
+    return _spool_instance
@@ -0,0 +1,196 @@
+"""
+スクレイピングのチェックポイント管理
+施設・日付ごとの保存完了をローカルのSQLiteに記録し、
+途中で中断した複数日付の処理を再実行したときに保存済みの日付をスキップできるようにする
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class CheckpointRepository:
+    """施設・日付単位のスクレイピング完了記録"""
+
+    def __init__(self, db_path: Optional[str] = None, freshness_minutes: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は環境変数 SCRAPE_CHECKPOINT_PATH）
+            freshness_minutes: 保存済みとみなす期間（分）（省略時は環境変数 SCRAPE_CHECKPOINT_FRESHNESS_MINUTES）
+        """
+        self.db_path = db_path or os.getenv(
+            'SCRAPE_CHECKPOINT_PATH',
+            str(Path(tempfile.gettempdir()) / 'aki-sta' / 'scrape_checkpoints.sqlite3')
+        )
+        if freshness_minutes is None:
+            freshness_minutes = int(os.getenv('SCRAPE_CHECKPOINT_FRESHNESS_MINUTES', '60'))
+        self.freshness = timedelta(minutes=freshness_minutes)
+        self._lock = threading.Lock()
+
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._memory_connection = sqlite3.connect(':memory:', check_same_thread=False) if self.db_path == ':memory:' else None
+        self._initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を取得（スレッドごとに新しい接続を使う）"""
+        if self._memory_connection is not None:
+            return self._memory_connection
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """SQLを実行して結果を返す"""
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    return connection.execute(sql, tuple(params)).fetchall()
+            finally:
+                if connection is not self._memory_connection:
+                    connection.close()
+
+    def _initialize(self):
+        """テーブルを作成"""
+        self._execute(
+            """
+            CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+                facility TEXT NOT NULL,
+                date TEXT NOT NULL,
+                completed_at TEXT NOT NULL,
+                run_id TEXT,
+                PRIMARY KEY (facility, date)
+            )
+            """
+        )
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    def mark_completed(self, facility: str, date: str, run_id: Optional[str] = None) -> None:
+        """
+        施設・日付の保存完了を記録
+
+        Args:
+            facility: 施設キー（ensemble/meguro/shibuya）
+            date: YYYY-MM-DD形式の日付
+            run_id: 実行ID（ログとの突き合わせ用）
+        """
+        self._execute(
+            """
+            INSERT INTO scrape_checkpoints (facility, date, completed_at, run_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(facility, date) DO UPDATE SET
+                completed_at = excluded.completed_at,
+                run_id = excluded.run_id
+            """,
+            (facility, date, self._now().isoformat(), run_id)
+        )
+
+    def get_completed_at(self, facility: str, date: str) -> Optional[datetime]:
+        """最後に保存が完了した日時を取得（記録がない場合はNone）"""
+        rows = self._execute(
+            "SELECT completed_at FROM scrape_checkpoints WHERE facility = ? AND date = ?",
+            (facility, date)
+        )
+        return datetime.fromisoformat(rows[0][0]) if rows else None
+
+    def get_fresh_dates(self, facility: str, dates: Iterable[str]) -> Set[str]:
+        """
+        鮮度期間内に保存済みの日付を取得
+
+        Args:
+            facility: 施設キー
+            dates: 確認する日付のリスト
+
+        Returns:
+            保存済みの日付の集合
+        """
+        dates = list(dates)
+        if not dates:
+            return set()
+
+        threshold = (self._now() - self.freshness).isoformat()
+        placeholders = ", ".join("?" for _ in dates)
+        rows = self._execute(
+            f"""
+            SELECT date FROM scrape_checkpoints
+            WHERE facility = ? AND completed_at >= ? AND date IN ({placeholders})
+            """,
+            (facility, threshold, *dates)
+        )
+        return {row[0] for row in rows}
+
+    def is_fresh(self, facility: str, date: str) -> bool:
+        """鮮度期間内に保存済みか"""
+        return date in self.get_fresh_dates(facility, [date])
+
+    def get_checkpoints(self, facility: Optional[str] = None) -> List[Dict[str, str]]:
+        """記録の一覧を取得（施設・日付順）"""
+        if facility:
+            rows = self._execute(
+                "SELECT facility, date, completed_at, run_id FROM scrape_checkpoints WHERE facility = ? ORDER BY date",
+                (facility,)
+            )
+        else:
+            rows = self._execute(
+                "SELECT facility, date, completed_at, run_id FROM scrape_checkpoints ORDER BY facility, date"
+            )
+        return [
+            {'facility': row[0], 'date': row[1], 'completedAt': row[2], 'runId': row[3]}
+            for row in rows
+        ]
+
+    def clear(self, facility: Optional[str] = None, date: Optional[str] = None) -> int:
+        """
+        記録を削除
+
+        Args:
+            facility: 指定した施設のみ削除（省略時は全施設）
+            date: 指定した日付のみ削除（省略時は全日付）
+
+        Returns:
+            削除した件数
+        """
+        conditions, params = [], []
+        if facility:
+            conditions.append("facility = ?")
+            params.append(facility)
+        if date:
+            conditions.append("date = ?")
+            params.append(date)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        count = self._execute(f"SELECT COUNT(*) FROM scrape_checkpoints{where}", params)[0][0]
+        self._execute(f"DELETE FROM scrape_checkpoints{where}", params)
+        return count
+
+
+_checkpoint_instance: Optional[CheckpointRepository] = None
+_checkpoint_lock = threading.Lock()
+
+
+def is_checkpoint_enabled() -> bool:
+    """チェックポイント機能が有効か（環境変数 SCRAPE_CHECKPOINT_ENABLED、デフォルト: false）"""
+    return os.getenv('SCRAPE_CHECKPOINT_ENABLED', 'false').lower() == 'true'
+
+
+def get_checkpoint_repository() -> Optional[CheckpointRepository]:
+    """
+    チェックポイントリポジトリのシングルトンを取得
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _checkpoint_instance
+    if not is_checkpoint_enabled():
+        return None
+    with _checkpoint_lock:
+        if _checkpoint_instance is None:
+            _checkpoint_instance = CheckpointRepository()
+    return _checkpoint_instance
@@ -12,6 +12,11 @@ from dotenv import load_dotenv
 root_env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(root_env_path)
 
+from ..utils.availability_cache import invalidate_availability
+from ..utils.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
 
 class CosmosWriter:
     """Cosmos DBへのデータ書き込みクラス"""
@@ -41,36 +46,75 @@ class CosmosWriter:
         """
         try:
             for facility in facilities:
-                # IDを3層構造に対応して生成
-                center_id = self._generate_center_id(facility['centerName'])
-                facility_id = self._generate_facility_id(facility['facilityName'])
-                room_id = self._generate_room_id(facility['roomName'])
-                
-                # Cosmos DB用のデータ構造
-                item = {
-                    'id': f"{date}_{center_id}_{facility_id}_{room_id}",
-                    'partitionKey': date,
-                    'date': date,
-                    'centerName': facility['centerName'],
-                    'facilityName': facility['facilityName'],
-                    'roomName': facility['roomName'],
-                    'timeSlots': facility['timeSlots'],
-                    'updatedAt': facility.get('lastUpdated', datetime.utcnow().isoformat() + 'Z'),
-                    'dataSource': 'scraping'
-                }
+                item = self._build_item(date, facility)
                 
                 # upsert（存在する場合は更新、なければ作成）
                 self.container.upsert_item(body=item)
-                print(f"Saved to Cosmos DB: {date} - {facility['centerName']} - {facility['facilityName']} - {facility['roomName']}")
+                logger.debug("Saved to Cosmos DB: %s - %s - %s - %s",
+                             date, facility['centerName'], facility['facilityName'], facility['roomName'])
             
+            logger.info("Saved %d rows to Cosmos DB for %s", len(facilities), date)
             return True
             
         except exceptions.CosmosHttpResponseError as e:
-            print(f"Cosmos DB error: {e.message}")
+            logger.error("Cosmos DB error: %s", e.message)
             return False
         except Exception as e:
-            print(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             return False
+        finally:
+            # 途中で失敗した場合も一部は書き込まれている可能性があるため、同じ日付の読み取りキャッシュを破棄
+            invalidate_availability(date)
+    
+    def _build_item(self, date: str, facility: Dict) -> Dict:
+        """保存用のデータ構造を作成（IDは日付と3層構造の名前から決まるため、同じ部屋の再保存は上書きになる）"""
+        # IDを3層構造に対応して生成
+        center_id = self._generate_center_id(facility['centerName'])
+        facility_id = self._generate_facility_id(facility['facilityName'])
+        room_id = self._generate_room_id(facility['roomName'])
+        
+        return {
+            'id': f"{date}_{center_id}_{facility_id}_{room_id}",
+            'partitionKey': date,
+            'date': date,
+            'centerName': facility['centerName'],
+            'facilityName': facility['facilityName'],
+            'roomName': facility['roomName'],
+            'timeSlots': facility['timeSlots'],
+            'updatedAt': facility.get('lastUpdated', datetime.utcnow().isoformat() + 'Z'),
+            'dataSource': 'scraping'
+        }
+    
+    def get_availability(self, date: str) -> List[Dict]:
+        """
+        日付の空き状況データを取得（1パーティションのみのクエリ）
+        
+        Args:
+            date: YYYY-MM-DD形式の日付
+        
+        Returns:
+            施設データのリスト（3層構造、APIの /availability/{date} と同じ形式）
+        
+        Raises:
+            exceptions.CosmosHttpResponseError: Cosmos DBのエラー
+        """
+        query = "SELECT * FROM c WHERE c.partitionKey = @date"
+        items = self.container.query_items(
+            query=query,
+            parameters=[{'name': '@date', 'value': date}],
+            partition_key=date
+        )
+        
+        return [
+            {
+                'centerName': item['centerName'],
+                'facilityName': item['facilityName'],
+                'roomName': item['roomName'],
+                'timeSlots': item['timeSlots'],
+                'lastUpdated': item.get('updatedAt')
+            }
+            for item in items
+        ]
     
     def _generate_center_id(self, center_name: str) -> str:
         """センター名からIDを生成"""
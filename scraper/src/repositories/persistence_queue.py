@@ -0,0 +1,254 @@
+"""
+空き状況の非同期保存キュー（write-behind）
+スクレイパーは取得済みの日付データをキューに積んですぐに次の日付の処理に進み、
+バックグラウンドのライターがまとめてCosmos DBに保存する（失敗時はリトライ）
+"""
+import contextvars
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from ..utils.structured_logging import get_logger
+from .availability_spool import get_availability_spool
+
+logger = get_logger(__name__)
+
+
+class PendingWrite:
+    """キューに積んだ1日付分の保存"""
+
+    def __init__(self, date: str, facilities: List[Dict],
+                 on_done: Optional[Callable[[bool], None]] = None):
+        self.date = date
+        self.facilities = facilities
+        self.saved = False
+        self.attempts = 0
+        self.error: Optional[str] = None
+        # スプールに追記した場合のID（保存に失敗しても再送される）
+        self.spool_id: Optional[int] = None
+        self._on_done = on_done
+        # 積んだ側のコンテキスト（ログのrun_id・実行中のジョブ）でコールバックを実行するため
+        self._context = contextvars.copy_context()
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        保存の完了を待つ
+
+        Returns:
+            保存に成功した場合True（失敗・タイムアウトの場合False）
+        """
+        return self._done.wait(timeout) and self.saved
+
+    def _complete(self, saved: bool, error: Optional[str] = None):
+        """保存結果を確定してコールバックを呼ぶ（ライタースレッドから呼ばれる）"""
+        self.saved = saved
+        self.error = error
+        try:
+            if self._on_done is not None:
+                self._context.run(self._on_done, saved)
+        except Exception as e:
+            logger.warning("Persistence callback failed for %s: %s", self.date, e)
+        finally:
+            self._done.set()
+
+
+class PersistenceQueue:
+    """上限付きのキューと、それを処理するバックグラウンドのライター"""
+
+    def __init__(self, writer_factory: Optional[Callable[[], object]] = None,
+                 max_size: Optional[int] = None, batch_size: Optional[int] = None,
+                 max_attempts: Optional[int] = None, backoff_seconds: Optional[float] = None):
+        """
+        初期化（省略した値は環境変数から取得）
+
+        Args:
+            writer_factory: save_availability(date, facilities)を持つライターを作る関数（デフォルト: STORAGE_BACKENDのリポジトリ）
+            max_size: キューの上限。満杯の場合submitは空くまで待つ（WRITE_BEHIND_QUEUE_SIZE、デフォルト: 100）
+            batch_size: 1回にまとめて処理する件数（WRITE_BEHIND_BATCH_SIZE、デフォルト: 10）
+            max_attempts: 1件あたりの最大試行回数（WRITE_BEHIND_MAX_ATTEMPTS、デフォルト: 3）
+            backoff_seconds: リトライ間隔の基準秒数（試行回数に比例して延ばす。WRITE_BEHIND_BACKOFF_SECONDS、デフォルト: 2）
+        """
+        self._writer_factory = writer_factory or self._default_writer
+        self.max_size = max_size or int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', '100'))
+        self.batch_size = batch_size or int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '10'))
+        self.max_attempts = max_attempts or int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', '3'))
+        if backoff_seconds is None:
+            backoff_seconds = float(os.getenv('WRITE_BEHIND_BACKOFF_SECONDS', '2'))
+        self.backoff_seconds = backoff_seconds
+
+        self._queue: "queue.Queue[PendingWrite]" = queue.Queue(maxsize=self.max_size)
+        self._writer = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.saved_count = 0
+        self.failed_count = 0
+
+    @staticmethod
+    def _default_writer():
+        from .storage import create_availability_store
+        return create_availability_store()
+
+    @staticmethod
+    def _sleep(seconds: float):
+        time.sleep(seconds)
+
+    def _ensure_worker(self):
+        """ライタースレッドを起動（起動済みの場合は何もしない）"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, date: str, facilities: List[Dict],
+               on_done: Optional[Callable[[bool], None]] = None) -> PendingWrite:
+        """
+        保存をキューに積む（キューが満杯の場合は空くまで待つ）
+
+        Args:
+            date: YYYY-MM-DD形式の日付
+            facilities: 施設データのリスト
+            on_done: 保存結果（bool）を受け取るコールバック。呼び出し元のコンテキストで実行される
+        """
+        pending = PendingWrite(date, facilities, on_done)
+        spool = get_availability_spool()
+        if spool is not None:
+            try:
+                pending.spool_id = spool.append(date, facilities)
+            except Exception as e:
+                # スプールに書けなくても保存は続ける
+                logger.warning("Failed to spool %s: %s", date, e)
+        self._ensure_worker()
+        self._queue.put(pending)
+        return pending
+
+    def save(self, date: str, facilities: List[Dict], timeout: Optional[float] = None) -> bool:
+        """保存して完了を待つ（ライターの再利用とリトライのみ利用する場合）"""
+        return self.submit(date, facilities).wait(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        キューに積まれた保存がすべて完了するまで待つ
+
+        Returns:
+            timeout内に完了した場合True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    @property
+    def pending(self) -> int:
+        """未完了の件数"""
+        return self._queue.unfinished_tasks
+
+    def _run(self):
+        """キューを処理し続ける"""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:  # pragma: no cover - _write_batch内で処理済み
+                logger.error("Unexpected error in persistence writer: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[PendingWrite]):
+        """
+        まとめて保存（同じ日付は1回の書き込みにまとめる）
+        同じ日付でも施設ごとに行が異なるため、上書きではなく結合する
+        """
+        by_date: Dict[str, List[PendingWrite]] = {}
+        for pending in batch:
+            by_date.setdefault(pending.date, []).append(pending)
+
+        for date, items in by_date.items():
+            facilities = [facility for item in items for facility in item.facilities]
+            saved, error = self._write_with_retry(date, facilities, items)
+            if saved:
+                self.saved_count += len(items)
+            else:
+                self.failed_count += len(items)
+                logger.error("Failed to save %s after %d attempt(s): %s", date, self.max_attempts, error)
+            self._complete_spool(items, saved, error)
+            for item in items:
+                item._complete(saved, error)
+
+    @staticmethod
+    def _complete_spool(items: List[PendingWrite], saved: bool, error: Optional[str]):
+        """スプールに送信結果を記録（失敗した分は再送ワーカーが送る）"""
+        spool = get_availability_spool()
+        if spool is None:
+            return
+        for item in items:
+            if item.spool_id is None:
+                continue
+            try:
+                spool.complete(item.spool_id, saved, error)
+            except Exception as e:
+                logger.warning("Failed to update spool entry %s: %s", item.spool_id, e)
+
+    def _write_with_retry(self, date: str, facilities: List[Dict], items: List[PendingWrite]):
+        """リトライ付きで保存し、(成功したか, 最後のエラー)を返す"""
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            for item in items:
+                item.attempts = attempt
+            try:
+                if self._writer is None:
+                    self._writer = self._writer_factory()
+                if self._writer.save_availability(date, facilities):
+                    return True, None
+                error = "save_availability returned False"
+            except Exception as e:
+                error = str(e)
+                # 接続設定の問題などでライターが壊れている可能性があるため作り直す
+                self._writer = None
+
+            if attempt < self.max_attempts:
+                logger.warning("Save of %s failed (attempt %d/%d), retrying: %s",
+                               date, attempt, self.max_attempts, error)
+                self._sleep(self.backoff_seconds * attempt)
+        return False, error
+
+
+_queue_instance: Optional[PersistenceQueue] = None
+_queue_lock = threading.Lock()
+
+
+def is_write_behind_enabled() -> bool:
+    """非同期保存が有効か（環境変数 WRITE_BEHIND_ENABLED、デフォルト: false）"""
+    return os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() == 'true'
+
+
+def get_persistence_queue() -> Optional[PersistenceQueue]:
+    """
+    非同期保存キューのシングルトンを取得（ライターはプロセス内で1つを使い回す）
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _queue_instance
+    if not is_write_behind_enabled():
+        return None
+    with _queue_lock:
+        if _queue_instance is None:
+            _queue_instance = PersistenceQueue()
+    return _queue_instance
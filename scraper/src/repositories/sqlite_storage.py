@@ -0,0 +1,311 @@
+"""
+ローカルSQLiteのストレージ
+Cosmos DBのコンテナ（availability / target_dates / rate_limits）と同じ形のドキュメントをSQLiteに保存する。
+Cosmos DBのアカウントなしでのローカル実行・ベンチマーク・単一ノード運用向け（STORAGE_BACKEND=sqlite）
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .cosmos_repository import CosmosWriter
+from .rate_limits_repository import RateLimitsRepository
+from .target_date_repository import TargetDateRepository
+from ..utils.availability_cache import invalidate_availability
+from ..utils.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class SQLiteDocumentStore:
+    """コンテナ・パーティションキー・IDでJSONドキュメントを保存するSQLiteのテーブル"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は環境変数 STORAGE_SQLITE_PATH）
+        """
+        self.db_path = db_path or os.getenv(
+            'STORAGE_SQLITE_PATH',
+            str(Path(tempfile.gettempdir()) / 'aki-sta' / 'storage.sqlite3')
+        )
+        self._lock = threading.Lock()
+
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._memory_connection = sqlite3.connect(':memory:', check_same_thread=False) if self.db_path == ':memory:' else None
+        self._initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を取得（スレッドごとに新しい接続を使う）"""
+        if self._memory_connection is not None:
+            return self._memory_connection
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _execute_many(self, statements: List[tuple]) -> List[tuple]:
+        """複数のSQLを1つのトランザクションで実行し、最後の結果を返す"""
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    rows: List[tuple] = []
+                    for sql, params in statements:
+                        rows = connection.execute(sql, tuple(params)).fetchall()
+                    return rows
+            finally:
+                if connection is not self._memory_connection:
+                    connection.close()
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """SQLを実行して結果を返す"""
+        return self._execute_many([(sql, params)])
+
+    def _initialize(self):
+        """テーブルを作成（ファイルの場合はWALモードにする）"""
+        statements = [
+            (
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    container TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    partition_key TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    PRIMARY KEY (container, id)
+                )
+                """,
+                ()
+            ),
+            ("CREATE INDEX IF NOT EXISTS idx_documents_partition ON documents (container, partition_key)", ()),
+        ]
+        if self._memory_connection is None:
+            statements.insert(0, ("PRAGMA journal_mode=WAL", ()))
+        self._execute_many(statements)
+
+    def upsert(self, container: str, item: Dict[str, Any], partition_key: str) -> None:
+        """ドキュメントを作成または置き換え"""
+        self.upsert_many(container, [item], [partition_key])
+
+    def upsert_many(self, container: str, items: List[Dict[str, Any]], partition_keys: List[str]) -> None:
+        """複数のドキュメントを1つのトランザクションで作成または置き換え"""
+        self._execute_many([
+            (
+                """
+                INSERT INTO documents (container, id, partition_key, body) VALUES (?, ?, ?, ?)
+                ON CONFLICT(container, id) DO UPDATE SET
+                    partition_key = excluded.partition_key,
+                    body = excluded.body
+                """,
+                (container, item['id'], partition_key, json.dumps(item, ensure_ascii=False))
+            )
+            for item, partition_key in zip(items, partition_keys)
+        ])
+
+    def read(self, container: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """IDでドキュメントを取得（存在しない場合はNone）"""
+        rows = self._execute("SELECT body FROM documents WHERE container = ? AND id = ?", (container, item_id))
+        return json.loads(rows[0][0]) if rows else None
+
+    def query(self, container: str, partition_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """コンテナ（またはそのパーティション）のドキュメントを取得"""
+        if partition_key is None:
+            rows = self._execute("SELECT body FROM documents WHERE container = ? ORDER BY id", (container,))
+        else:
+            rows = self._execute(
+                "SELECT body FROM documents WHERE container = ? AND partition_key = ? ORDER BY id",
+                (container, partition_key)
+            )
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self) -> int:
+        """ドキュメントの総数"""
+        return self._execute("SELECT COUNT(*) FROM documents")[0][0]
+
+
+class SQLiteAvailabilityRepository(CosmosWriter):
+    """availabilityコンテナのSQLite版（ID生成はCosmos版と共通）"""
+
+    def __init__(self, store: SQLiteDocumentStore):
+        self.store = store
+
+    def save_availability(self, date: str, facilities: List[Dict]) -> bool:
+        """
+        空き状況データを保存
+
+        Args:
+            date: YYYY-MM-DD形式の日付
+            facilities: 施設データのリスト（3層構造）
+
+        Returns:
+            成功時True
+        """
+        try:
+            items = [self._build_item(date, facility) for facility in facilities]
+            self.store.upsert_many('availability', items, [date] * len(items))
+            logger.info("Saved %d rows to SQLite for %s", len(facilities), date)
+            return True
+        except Exception as e:
+            logger.error("SQLite error: %s", e)
+            return False
+        finally:
+            invalidate_availability(date)
+
+    def get_availability(self, date: str) -> List[Dict]:
+        """日付の空き状況データを取得（Cosmos版と同じ形式）"""
+        return [
+            {
+                'centerName': item['centerName'],
+                'facilityName': item['facilityName'],
+                'roomName': item['roomName'],
+                'timeSlots': item['timeSlots'],
+                'lastUpdated': item.get('updatedAt')
+            }
+            for item in self.store.query('availability', date)
+        ]
+
+    def warm_up(self) -> Dict:
+        """接続確認（Cosmos版と同じ形式で返す）"""
+        try:
+            return {
+                'status': 'success',
+                'message': 'Connection warmed up successfully',
+                'items_found': min(1, self.store.count())
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': f'Unexpected error: {str(e)}'
+            }
+
+
+class SQLiteTargetDateRepository(TargetDateRepository):
+    """target_datesコンテナのSQLite版（デフォルト日付の生成はCosmos版と共通）"""
+
+    def __init__(self, store: SQLiteDocumentStore):
+        self.store = store
+
+    def get_target_dates(self) -> List[str]:
+        """有効な日付を日付順に取得（データがない場合はデフォルト日付）"""
+        items = [item for item in self.store.query('target_dates') if item.get('active')]
+        if items:
+            return [item['date'] for item in sorted(items, key=lambda item: item['date']) if 'date' in item]
+        return self._get_default_dates()
+
+    def add_target_date(self, date: str, priority: int = 1) -> bool:
+        """新しいターゲット日付を追加"""
+        try:
+            datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            logger.warning("Invalid date format: %s", date)
+            return False
+
+        self.store.upsert('target_dates', {
+            'id': f"target_{date}",
+            'partitionKey': date,
+            'date': date,
+            'priority': priority,
+            'active': True,
+            'isbooked': False,
+            'createdAt': datetime.utcnow().isoformat() + 'Z'
+        }, date)
+        return True
+
+    def remove_target_date(self, date: str) -> bool:
+        """ターゲット日付を非アクティブ化"""
+        item = self.store.read('target_dates', f"target_{date}")
+        if item is None:
+            logger.warning("Target date not found: %s", date)
+            return False
+
+        item['active'] = False
+        item['updatedAt'] = datetime.utcnow().isoformat() + 'Z'
+        self.store.upsert('target_dates', item, date)
+        return True
+
+
+class SQLiteRateLimitsRepository(RateLimitsRepository):
+    """rate_limitsコンテナのSQLite版（実行中の判定はCosmos版と共通）"""
+
+    # 同じプロセス内での取得〜更新の競合を防ぐ
+    _record_lock = threading.Lock()
+
+    def __init__(self, store: SQLiteDocumentStore):
+        self.store = store
+
+    def get_today_record(self) -> Optional[Dict[str, Any]]:
+        """本日のレコードを取得"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        items = self.store.query('rate_limits', today)
+        return items[0] if items else None
+
+    def create_or_update_record(self, status: str = 'running') -> Dict[str, Any]:
+        """レコードを作成または更新（戻り値はCosmos版と同じ）"""
+        with self._record_lock:
+            return self._create_or_update_record(status)
+
+    def _create_or_update_record(self, status: str) -> Dict[str, Any]:
+        today = datetime.now().strftime('%Y-%m-%d')
+        now = datetime.now().isoformat() + 'Z'
+        existing_record = self.get_today_record()
+
+        if existing_record:
+            if self.is_actually_running(existing_record):
+                return {
+                    'is_already_running': True,
+                    'record': existing_record
+                }
+            record = {
+                **existing_record,
+                'count': existing_record.get('count', 0) + 1,
+                'status': status,
+                'lastRequestedAt': now,
+                'updatedAt': now
+            }
+        else:
+            record = {
+                'id': today,
+                'date': today,
+                'count': 1,
+                'status': status,
+                'lastRequestedAt': now,
+                'createdAt': now,
+                'updatedAt': now
+            }
+
+        self.store.upsert('rate_limits', record, record['date'])
+        return {
+            'is_already_running': False,
+            'record': record
+        }
+
+    def update_status(self, record_id: str, date: str, status: str) -> Dict[str, Any]:
+        """ステータスを更新"""
+        existing_record = self.store.read('rate_limits', record_id)
+        if existing_record is None:
+            raise ValueError(f"Record not found: {record_id}")
+
+        updated_record = {
+            **existing_record,
+            'status': status,
+            'updatedAt': datetime.now().isoformat() + 'Z'
+        }
+        self.store.upsert('rate_limits', updated_record, date)
+        return updated_record
+
+
+_store_instance: Optional[SQLiteDocumentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_sqlite_store() -> SQLiteDocumentStore:
+    """SQLiteストレージのシングルトンを取得"""
+    global _store_instance
+    with _store_lock:
+        if _store_instance is None:
+            _store_instance = SQLiteDocumentStore()
+    return _store_instance
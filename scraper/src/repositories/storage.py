@@ -0,0 +1,83 @@
+"""
+ストレージのバックエンド選択
+環境変数 STORAGE_BACKEND で Cosmos DB（cosmos、デフォルト）とローカルSQLite（sqlite）を切り替え、
+空き状況・target_dates・rate_limits のリポジトリを作成する
+"""
+import os
+from typing import Any, Dict, List, Optional, Protocol
+
+COSMOS = "cosmos"
+SQLITE = "sqlite"
+BACKENDS = (COSMOS, SQLITE)
+
+
+class AvailabilityStore(Protocol):
+    """空き状況の保存先（CosmosWriter / SQLiteAvailabilityRepository）"""
+
+    def save_availability(self, date: str, facilities: List[Dict]) -> bool: ...
+
+    def get_availability(self, date: str) -> List[Dict]: ...
+
+    def warm_up(self) -> Dict: ...
+
+
+class TargetDateStore(Protocol):
+    """練習日程の保存先（TargetDateRepository / SQLiteTargetDateRepository）"""
+
+    def get_target_dates(self) -> List[str]: ...
+
+    def get_single_target_date(self) -> Optional[str]: ...
+
+    def add_target_date(self, date: str, priority: int = 1) -> bool: ...
+
+    def remove_target_date(self, date: str) -> bool: ...
+
+
+class RateLimitsStore(Protocol):
+    """実行制御の保存先（RateLimitsRepository / SQLiteRateLimitsRepository）"""
+
+    def get_today_record(self) -> Optional[Dict[str, Any]]: ...
+
+    def create_or_update_record(self, status: str = 'running') -> Dict[str, Any]: ...
+
+    def update_status(self, record_id: str, date: str, status: str) -> Dict[str, Any]: ...
+
+
+def get_storage_backend() -> str:
+    """
+    使用するバックエンド（環境変数 STORAGE_BACKEND、デフォルト: cosmos）
+
+    Raises:
+        ValueError: 未対応の値の場合
+    """
+    backend = os.getenv('STORAGE_BACKEND', COSMOS).strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported STORAGE_BACKEND: {backend} (expected one of {', '.join(BACKENDS)})")
+    return backend
+
+
+def create_availability_store() -> AvailabilityStore:
+    """空き状況のリポジトリを作成"""
+    if get_storage_backend() == SQLITE:
+        from .sqlite_storage import SQLiteAvailabilityRepository, get_sqlite_store
+        return SQLiteAvailabilityRepository(get_sqlite_store())
+    from . import cosmos_repository
+    return cosmos_repository.CosmosWriter()
+
+
+def create_target_date_store() -> TargetDateStore:
+    """target_datesのリポジトリを作成"""
+    if get_storage_backend() == SQLITE:
+        from .sqlite_storage import SQLiteTargetDateRepository, get_sqlite_store
+        return SQLiteTargetDateRepository(get_sqlite_store())
+    from . import target_date_repository
+    return target_date_repository.TargetDateRepository()
+
+
+def create_rate_limits_store() -> RateLimitsStore:
+    """rate_limitsのリポジトリを作成"""
+    if get_storage_backend() == SQLITE:
+        from .sqlite_storage import SQLiteRateLimitsRepository, get_sqlite_store
+        return SQLiteRateLimitsRepository(get_sqlite_store())
+    from . import rate_limits_repository
+    return rate_limits_repository.RateLimitsRepository()
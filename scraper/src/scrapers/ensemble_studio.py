@@ -7,12 +7,20 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple, cast
 from playwright.sync_api import Page, Locator, sync_playwright
 from .base import BaseScraper
+from . import html_parser
+from .status_classifier import classify_cell, strip_time_ranges
 from ..types.time_slots import TimeSlots, create_default_time_slots
+from ..utils.resource_governor import ResourceGovernor, playwright_driver_pid
 
 
 class EnsembleStudioScraper(BaseScraper):
     """人間の操作を模倣したスクレイパー"""
     
+    FACILITY_KEY = "ensemble"
+    
+    # ページの読み込みはセッションの最初の1回だけで、月ごとに各スタジオのカレンダーを移動する
+    SECONDS_PER_MONTH = 4.0
+    
     def get_base_url(self) -> str:
         """施設のベースURLを返す"""
         return "https://ensemble-studio.com/schedule/"
@@ -39,51 +47,51 @@ class EnsembleStudioScraper(BaseScraper):
         Returns:
             [(スタジオ名, カレンダー要素), ...]のリスト
         """
-        print("Finding studio calendars...")
+        self.log_info("Finding studio calendars...")
         calendars = []
         
         # ページ全体のHTMLを取得してデバッグ
         page_content = page.content()
         
         for studio_name in self.studios:
-            print(f"Looking for {studio_name}")
+            self.log_info("Looking for %s", studio_name)
             
             # より簡単な方法：すべてのtimetable-calendarを取得
             all_calendars = page.locator(".timetable-calendar")
             calendar_count = all_calendars.count()
-            print(f"Found {calendar_count} calendars on the page")
+            self.log_info("Found %s calendars on the page", calendar_count)
             
             # スタジオ名がHTMLに含まれているか確認
             if studio_name in page_content:
-                print(f"{studio_name} found in page content")
+                self.log_info("%s found in page content", studio_name)
                 
                 # カレンダーを順番に確認
                 if "和(本郷)" in studio_name and calendar_count > 0:
                     # 通常、最初のカレンダーが和(本郷)
                     calendar = all_calendars.nth(0)
-                    print(f"Using first calendar for {studio_name}")
+                    self.log_info("Using first calendar for %s", studio_name)
                     calendars.append((studio_name, calendar))
                 elif "音(初台)" in studio_name and calendar_count > 1:
                     # 通常、2番目のカレンダーが音(初台)
                     calendar = all_calendars.nth(1)
-                    print(f"Using second calendar for {studio_name}")
+                    self.log_info("Using second calendar for %s", studio_name)
                     calendars.append((studio_name, calendar))
                 elif calendar_count > 0:
                     # デフォルトで最初のカレンダーを使用
                     calendar = all_calendars.nth(0)
-                    print(f"Using first calendar for {studio_name} (default)")
+                    self.log_info("Using first calendar for %s (default)", studio_name)
                     calendars.append((studio_name, calendar))
             else:
-                print(f"Warning: {studio_name} not found in page content")
+                self.log_warning("%s not found in page content", studio_name)
         
         # カレンダーが見つからない場合の別の方法
         if not calendars and calendar_count > 0:
-            print("Fallback: Using position-based calendar assignment")
+            self.log_info("Fallback: Using position-based calendar assignment")
             for i, studio_name in enumerate(self.studios):
                 if i < calendar_count:
                     calendar = all_calendars.nth(i)
                     calendars.append((studio_name, calendar))
-                    print(f"Assigned calendar {i} to {studio_name}")
+                    self.log_info("Assigned calendar %s to %s", i, studio_name)
         
         return calendars
     
@@ -95,7 +103,7 @@ class EnsembleStudioScraper(BaseScraper):
             成功した場合True
         """
         target_year_month = f"{target_date.year}年{target_date.month}月"
-        print(f"Navigating to {target_year_month}")
+        self.log_info("Navigating to %s", target_year_month)
         
         max_iterations = 12  # 最大12ヶ月分移動
         
@@ -103,56 +111,56 @@ class EnsembleStudioScraper(BaseScraper):
             # 現在のcaptionを取得
             caption = calendar.locator(".calendar-caption").first
             if caption.count() == 0:
-                print("Warning: Could not find calendar caption")
+                self.log_warning("Could not find calendar caption")
                 return False
             
             caption_text = caption.text_content()
             if not caption_text:
-                print("Warning: Caption text is empty")
+                self.log_warning("Caption text is empty")
                 return False
             
             # "2025年8月"部分を取得
             current_year_month_match = re.match(r'(\d{4}年\d{1,2}月)', caption_text)
             if not current_year_month_match:
-                print(f"Warning: Could not parse year-month from caption: {caption_text}")
+                self.log_warning("Could not parse year-month from caption: %s", caption_text)
                 return False
             
             current_year_month = current_year_month_match.group(1)
-            print(f"Current calendar shows: {current_year_month}")
+            self.log_info("Current calendar shows: %s", current_year_month)
             
             if current_year_month == target_year_month:
-                print(f"Reached target month: {target_year_month}")
+                self.log_info("Reached target month: %s", target_year_month)
                 return True
             
             # 年月を比較して移動方向を決定
             current_dt = self.parse_japanese_year_month(current_year_month)
             if not current_dt:
-                print(f"Warning: Could not parse date from {current_year_month}")
+                self.log_warning("Could not parse date from %s", current_year_month)
                 return False
             
             if target_date.year > current_dt.year or \
                (target_date.year == current_dt.year and target_date.month > current_dt.month):
                 # 次月へ移動
-                print("Moving to next month...")
+                self.log_info("Moving to next month...")
                 next_link = calendar.locator(".monthly-next a").first
                 if next_link.count() > 0:
                     next_link.click()
                     page.wait_for_timeout(2000)  # 遷移を待つ
                 else:
-                    print("No next month link available")
+                    self.log_warning("No next month link available")
                     return False
             else:
                 # 前月へ移動
-                print("Moving to previous month...")
+                self.log_info("Moving to previous month...")
                 prev_link = calendar.locator(".monthly-prev a").first
                 if prev_link.count() > 0:
                     prev_link.click()
                     page.wait_for_timeout(2000)  # 遷移を待つ
                 else:
-                    print("No previous month link available")
+                    self.log_warning("No previous month link available")
                     return False
         
-        print(f"Could not reach {target_year_month} after {max_iterations} iterations")
+        self.log_warning("Could not reach %s after %s iterations", target_year_month, max_iterations)
         return False
     
     def find_date_cell(self, calendar: Locator, target_day: int) -> Optional[Locator]:
@@ -166,12 +174,12 @@ class EnsembleStudioScraper(BaseScraper):
         Returns:
             日付セル要素またはNone
         """
-        print(f"Looking for day {target_day}")
+        self.log_debug("Looking for day %d", target_day)
         
         # すべての日付ボックスを取得
         day_boxes = calendar.locator(".day-box")
         day_box_count = day_boxes.count()
-        print(f"Found {day_box_count} day boxes")
+        self.log_debug("Found %d day boxes", day_box_count)
         
         for i in range(day_box_count):
             day_box = day_boxes.nth(i)
@@ -182,10 +190,10 @@ class EnsembleStudioScraper(BaseScraper):
                 if day_text:
                     day_text = day_text.strip()
                     if day_text == str(target_day):
-                        print(f"Found day {target_day} cell")
+                        self.log_debug("Found day %d cell", target_day)
                         return day_box
         
-        print(f"Could not find day {target_day}")
+        self.log_warning("Could not find day %s", target_day)
         return None
     
     def extract_time_slots(self, day_box: Locator) -> TimeSlots:
@@ -201,7 +209,7 @@ class EnsembleStudioScraper(BaseScraper):
         # 営業していない日の判定
         if day_box.locator(".calendar-time-disable").count() > 0:
             disable_text = day_box.locator(".calendar-time-disable").first.text_content()
-            print(f"Day is disabled: {disable_text}")
+            self.log_debug("Day is disabled: %s", disable_text)
             return {
                 "morning": "unknown",
                 "afternoon": "unknown",
@@ -211,7 +219,7 @@ class EnsembleStudioScraper(BaseScraper):
         # 時刻マークを探す
         time_marks = day_box.locator(".calendar-time-mark")
         time_mark_count = time_marks.count()
-        print(f"Found {time_mark_count} time marks")
+        self.log_debug("Found %d time marks", time_mark_count)
         
         for i in range(time_mark_count):
             time_mark = time_marks.nth(i)
@@ -219,45 +227,64 @@ class EnsembleStudioScraper(BaseScraper):
             
             if time_string_elem.count() > 0:
                 time_string = time_string_elem.text_content()
-                print(f"Processing time: {time_string}")
+                self.log_cell("Processing time: %s", time_string)
                 
                 # 時刻を時間帯に変換
                 slot_key = self.convert_time_to_slot(time_string)
                 
                 if slot_key:
                     # 空き状況を判定
-                    # 方法1: リンクがあるかチェック（○の場合はリンクになっている）
+                    # 方法1: リンクがあるかチェック（○の場合はリンクになっている。△などのリンクは予約済み扱い）
                     link = time_mark.locator("a").first
                     if link.count() > 0:
                         link_text = link.text_content()
                         if link_text and "○" in link_text:
                             time_slots[slot_key] = "available"
-                            print(f"  {slot_key}: available (link found)")
+                            self.log_cell("  %s: available (link found)", slot_key)
                         else:
                             time_slots[slot_key] = "booked"
-                            print(f"  {slot_key}: booked (link without ○)")
+                            self.log_cell("  %s: booked (link without ○)", slot_key)
                     else:
-                        # 方法2: time_mark全体のテキストをチェック
-                        mark_text = time_mark.text_content()
-                        if mark_text:
-                            if "○" in mark_text:
-                                time_slots[slot_key] = "available"
-                                print(f"  {slot_key}: available (○ found)")
-                            elif "×" in mark_text:
-                                time_slots[slot_key] = "booked"
-                                print(f"  {slot_key}: booked (× found)")
-                            else:
-                                time_slots[slot_key] = "unknown"
-                                print(f"  {slot_key}: unknown")
+                        # 方法2: time_mark全体のテキストをチェック（時刻表記は除外）
+                        mark_text = strip_time_ranges(time_mark.text_content())
+                        time_slots[slot_key] = classify_cell(mark_text)
+                        self.log_cell("  %s: %s", slot_key, time_slots[slot_key])
         
         # 見つからない時間帯はすでにunknown（デフォルト値）
         # 明示的に確認のためログ出力
         for slot in ["morning", "afternoon", "evening"]:
             if time_slots.get(slot) == "unknown":
-                print(f"  {slot}: unknown (not found)")
+                self.log_cell("  %s: unknown (not found)", slot)
         
         return time_slots
     
+    def parse_calendar_days(self, calendar: Locator) -> Optional[Dict[int, TimeSlots]]:
+        """
+        カレンダー要素のHTMLを一度だけ取得し、lxmlで全日付の時刻情報を解析
+        
+        Args:
+            calendar: カレンダー要素（.timetable-calendar）
+        
+        Returns:
+            {日: TimeSlots}。locatorバックエンド指定時や解析失敗時はNone
+        """
+        if self.extraction_backend != 'lxml':
+            return None
+        
+        try:
+            html = calendar.evaluate("el => el.outerHTML")
+            parsed = html_parser.parse_ensemble_calendar(html)
+        except Exception as e:
+            self.log_warning("lxml extraction failed, falling back to locators: %s", e)
+            return None
+        
+        days = parsed["days"]
+        if not days:
+            return None
+        
+        self.log_debug("Parsed %s day cells from calendar HTML (%s)", len(days), parsed['caption'])
+        return days
+    
     def scrape_multiple_dates(self, dates: List[str]) -> Dict:
         """
         複数日付の空き状況を効率的にスクレイピング（Ensemble Studio用）
@@ -282,16 +309,72 @@ class EnsembleStudioScraper(BaseScraper):
         self.log_info(f"\n=== Starting Ensemble Studio multiple dates scraping for {len(dates)} dates ===")
         self.log_info(f"Dates: {', '.join(dates)}")
         
+        # 前回の実行で保存済みの日付はスキップ（すべて保存済みならブラウザを起動しない）
+        dates, results = self._skip_checkpointed_dates(dates)
+        if not dates:
+            return self._summarize_results(results)
+        
+        # サイト停止中はブラウザを起動しない
+        return self._with_circuit_breaker(dates, results, self._scrape_dates_in_session)
+    
+    def plan_sessions(self, dates: List[str], max_sessions: int = 1) -> List[List[str]]:
+        """
+        1回のページ読み込みで全月を処理する（月の移動は同じページのカレンダーで行う）
+        同じ施設に同時に複数のセッションを開ける場合だけ月ごとに分ける。それも、並行に実行して短くなる時間が
+        増えるセッションの準備（ブラウザの起動・ページの読み込み）の時間より長い場合に限る
+        """
+        if not dates:
+            return []
+        single = sorted(dates)
+        split = super().plan_sessions(dates, max_sessions)
+        saved = self.estimate_session_seconds(single) - max(map(self.estimate_session_seconds, split))
+        if saved > self.SESSION_SETUP_SECONDS * (len(split) - 1):
+            return split
+        return [single]
+    
+    def estimate_session_seconds(self, dates: List[str]) -> float:
+        """ページの読み込みは1回で、月ごとにカレンダーの移動が加わる"""
+        months = len({date[:7] for date in dates})
+        return self.SESSION_SETUP_SECONDS + self.SECONDS_PER_MONTH * months + self.SECONDS_PER_DATE * len(dates)
+    
+    def _recycle_calendar_page(self, browser, context, governor: ResourceGovernor):
+        """
+        コンテキストを作り直し、カレンダーを再取得する
+        
+        Returns:
+            (新しいコンテキスト, 新しいページ, スタジオのカレンダー一覧)
+        """
+        self.log_info("Recycling browser context (%s)", governor.last_reason)
+        try:
+            context.close()
+        except Exception as e:
+            self.log_warning("Failed to close old context: %s", e)
+        
+        context = self.create_browser_context(browser)
+        page = context.new_page()
+        self.timed_step("goto", 60000, lambda timeout: page.goto(self.base_url, wait_until="networkidle", timeout=timeout))
+        self.wait_for_calendar_load(page)
+        calendars = self.find_studio_calendars(page)
+        if not calendars:
+            raise RuntimeError("No calendars found after recycling the page")
+        governor.recycled()
+        return context, page, calendars
+    
+    def _scrape_dates_in_session(self, dates: List[str], results: Dict[str, Dict]) -> Dict:
+        """1つのブラウザセッションで複数日付を処理（scrape_multiple_datesの本体）"""
         # 日付を年月でグループ化
         grouped_dates = self._group_dates_by_month(dates)
         self.log_info(f"Grouped into {len(grouped_dates)} month(s)")
         
-        results = {}
+        # 月移動を繰り返すとChromiumのメモリが増えるため、しきい値でページを作り直す
+        governor = ResourceGovernor()
         
         try:
             with sync_playwright() as p:
                 # ブラウザを起動
                 browser = self.setup_browser(p)
+                # メモリはこのスクレイパーのドライバ・Chromiumのみを計測する
+                governor.watch(playwright_driver_pid(p))
                 
                 try:
                     context = self.create_browser_context(browser)
@@ -299,7 +382,7 @@ class EnsembleStudioScraper(BaseScraper):
                     
                     # ページにアクセス
                     self.log_info(f"Accessing: {self.base_url}")
-                    page.goto(self.base_url, wait_until="networkidle", timeout=60000)
+                    self.timed_step("goto", 60000, lambda timeout: page.goto(self.base_url, wait_until="networkidle", timeout=timeout))
                     
                     # カレンダーが読み込まれるまで待機
                     self.wait_for_calendar_load(page)
@@ -319,22 +402,33 @@ class EnsembleStudioScraper(BaseScraper):
                     
                     # 月ごとに処理
                     for year_month, month_dates in grouped_dates.items():
+                        # 期限切れ・キャンセル時は残りの日付を処理せずにブラウザを閉じる
+                        if self._stop_if_deadline(dates, results):
+                            break
                         self.log_info(f"\n--- Processing month: {year_month} ({len(month_dates)} dates) ---")
                         
                         # 最初の日付を使って月を特定
                         target_month_date = datetime.strptime(month_dates[0], "%Y-%m-%d")
                         
+                        # メモリ・操作回数がしきい値を超えていればページを作り直す（月移動は下で再度行う）
+                        if governor.should_recycle():
+                            context, page, calendars = self._recycle_calendar_page(browser, context, governor)
+                        
                         # 各スタジオのカレンダーを対象月に移動（一度だけ）
                         moved_calendars = []
                         for studio_name, calendar in calendars:
+                            governor.tick()
                             if self.navigate_to_month(page, calendar, target_month_date):
-                                moved_calendars.append((studio_name, calendar))
+                                # 移動後のカレンダーHTMLを一度だけ解析
+                                moved_calendars.append((studio_name, calendar, self.parse_calendar_days(calendar)))
                                 self.log_info(f"Moved {studio_name} calendar to {year_month}")
                             else:
                                 self.log_warning(f"Failed to navigate {studio_name} to {year_month}")
                         
                         # この月の各日付を処理
                         for date in month_dates:
+                            if self._stop_if_deadline(dates, results):
+                                break
                             target_date = datetime.strptime(date, "%Y-%m-%d")
                             target_day = target_date.day
                             self.log_info(f"\nProcessing date: {date} (day {target_day})")
@@ -342,42 +436,32 @@ class EnsembleStudioScraper(BaseScraper):
                             date_results = []
                             
                             # 各スタジオのデータを取得
-                            for studio_name, calendar in moved_calendars:
+                            for studio_name, calendar, parsed_days in moved_calendars:
                                 self.log_info(f"Extracting data for {studio_name} on {date}")
                                 
-                                # 日付セルを特定
-                                date_cell = self.find_date_cell(calendar, target_day)
+                                time_slots = parsed_days.get(target_day) if parsed_days else None
                                 
-                                if not date_cell:
-                                    self.log_warning(f"Date cell not found for {studio_name} on day {target_day}")
-                                    continue
-                                
-                                # 時刻情報を抽出
-                                time_slots = self.extract_time_slots(date_cell)
+                                if time_slots is None:
+                                    # 日付セルを特定
+                                    date_cell = self.find_date_cell(calendar, target_day)
+                                    
+                                    if not date_cell:
+                                        self.log_warning("Date cell not found for %s on day %s", studio_name, target_day)
+                                        continue
+                                    
+                                    # 時刻情報を抽出
+                                    time_slots = self.extract_time_slots(date_cell)
                                 
                                 # 結果を追加
-                                date_results.append({
-                                    "centerName": self.get_center_name(),
-                                    "facilityName": studio_name,
-                                    "roomName": self.get_room_name(studio_name),
-                                    "timeSlots": time_slots,
-                                    "lastUpdated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                                })
+                                date_results.append(self.create_facility_record(
+                                    studio_name, self.get_room_name(studio_name), time_slots
+                                ))
                             
                             # この日付のデータが取得できた場合、即座にDB保存
                             if date_results:
-                                if self._save_to_cosmos_immediately(date, date_results):
-                                    results[date] = {
-                                        "status": "success",
-                                        "data": date_results
-                                    }
+                                if self._save_date_result(date, date_results, results):
                                     self.log_info(f"✅ Successfully saved data for {date}")
                                 else:
-                                    results[date] = {
-                                        "status": "error",
-                                        "message": "Failed to save to database",
-                                        "error_type": "DATABASE_ERROR"
-                                    }
                                     self.log_warning(f"⚠️ Failed to save data for {date}")
                             else:
                                 results[date] = {
@@ -388,11 +472,13 @@ class EnsembleStudioScraper(BaseScraper):
                                 self.log_warning(f"No data found for {date}")
                     
                 finally:
-                    browser.close()
+                    self._log_memory_telemetry(governor)
+                    self.close_browser(browser)
                     
         except Exception as e:
             self.log_error(f"Error during multiple dates scraping: {e}")
-            # 処理されていない日付にエラーを設定
+            # 処理されていない日付にエラーを設定（期限切れ・キャンセルによる中断はその結果）
+            self._stop_if_deadline(dates, results)
             for date in dates:
                 if date not in results:
                     results[date] = {
@@ -402,6 +488,9 @@ class EnsembleStudioScraper(BaseScraper):
                         "details": str(e)
                     }
         
+        # 非同期保存の完了を待ち、保存に失敗した日付を反映
+        self._flush_pending_writes(results)
+        
         # 結果をサマリー化
         summary = self._summarize_results(results)
         
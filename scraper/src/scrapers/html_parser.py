@@ -0,0 +1,308 @@
+"""
+lxmlによるHTML一括解析モジュール
+画面遷移後に取得したHTML（page.content()など）をプロセス内で解析し、
+セルごとにブラウザと通信せずに空き状況を抽出する
+docs/scraping_fixture に保存されたページ（MHTML）にも同じ関数を適用できる
+"""
+import email
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import lxml.html
+from lxml.html import HtmlElement
+
+from ..types.time_slots import TimeSlots, create_default_time_slots
+from .status_classifier import build_room_slots, classify_cell, strip_time_ranges
+
+
+# 日付文字列のパターン（目黒区の時間帯別空き状況ヘッダー: "2025年10月5日(日)"）
+_JAPANESE_DATE_PATTERN = re.compile(r'(\d{4})年(\d{1,2})月(\d{1,2})日')
+_YEAR_MONTH_PATTERN = re.compile(r'(\d{4}年\d{1,2}月)')
+
+
+def _has_class(class_name: str) -> str:
+    """CSSのクラス指定に相当するXPath条件を返す"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# ===== 共通処理 =====
+
+def load_mhtml(path: Union[str, Path]) -> str:
+    """
+    MHTMLファイルから最初のHTMLパートを取り出す
+
+    Args:
+        path: MHTMLファイルのパス
+
+    Returns:
+        デコード済みのHTML文字列
+
+    Raises:
+        ValueError: HTMLパートが存在しない場合
+    """
+    with open(path, 'rb') as f:
+        message = email.message_from_binary_file(f)
+
+    for part in message.walk():
+        if part.get_content_type() == 'text/html':
+            payload = part.get_payload(decode=True)
+            charset = part.get_content_charset() or 'utf-8'
+            return payload.decode(charset, errors='replace')
+
+    raise ValueError(f"No HTML part found in {path}")
+
+
+def parse_document(html: str) -> HtmlElement:
+    """
+    HTML文字列をlxmlのDOMに変換
+
+    Raises:
+        ValueError: HTMLが空または文字列でない場合
+    """
+    if not isinstance(html, str) or not html.strip():
+        raise ValueError("HTML content is empty")
+    return lxml.html.fromstring(html)
+
+
+def element_text(element: HtmlElement) -> str:
+    """要素のテキストを取得（前後の空白を除去）"""
+    return (element.text_content() or "").strip()
+
+
+def text_without_spans(element: HtmlElement) -> str:
+    """
+    span要素を除外したテキストを取得し、改行・余分な空白を正規化する
+    （目黒区の部屋名セルは「15<span>人</span>」のような補足を含むため）
+    """
+    parts = [element.text or ""]
+    for child in element:
+        if child.tag != 'span':
+            parts.append(child.text_content() or "")
+        parts.append(child.tail or "")
+    return ' '.join("".join(parts).split())
+
+
+def time_to_slot(time_str: Optional[str]) -> Optional[str]:
+    """
+    時刻文字列を時間帯に変換
+    "09:00" → "morning", "13:00" → "afternoon", "18:00" → "evening"
+    """
+    if not time_str:
+        return None
+
+    if "09:00" in time_str or "9:00" in time_str:
+        return "morning"
+    elif "13:00" in time_str:
+        return "afternoon"
+    elif "18:00" in time_str:
+        return "evening"
+    return None
+
+
+# ===== あんさんぶるStudio =====
+
+def parse_ensemble_day_box(day_box: HtmlElement) -> TimeSlots:
+    """
+    日付セル（.day-box）から時刻情報を抽出
+    EnsembleStudioScraper.extract_time_slots と同じ判定規則
+    """
+    time_slots = create_default_time_slots()
+
+    # 営業していない日
+    if day_box.xpath(f".//*[{_has_class('calendar-time-disable')}]"):
+        return time_slots
+
+    for time_mark in day_box.xpath(f".//*[{_has_class('calendar-time-mark')}]"):
+        time_strings = time_mark.xpath(f".//*[{_has_class('time-string')}]")
+        if not time_strings:
+            continue
+
+        slot_key = time_to_slot(element_text(time_strings[0]))
+        if not slot_key:
+            continue
+
+        # リンクがある場合はリンクのテキストで判定（○の場合はリンクになっている）
+        # △などのリンクは従来どおり予約済みとして扱う
+        links = time_mark.xpath(".//a")
+        if links:
+            time_slots[slot_key] = "available" if "○" in element_text(links[0]) else "booked"
+        else:
+            # 時刻表記（"09:00-12:00"など）のハイフンを記号と誤判定しないよう除外
+            time_slots[slot_key] = classify_cell(strip_time_ranges(element_text(time_mark)))
+
+    return time_slots
+
+
+def parse_ensemble_calendar(calendar: Union[str, HtmlElement]) -> Dict[str, object]:
+    """
+    1つのカレンダー（.timetable-calendar）を解析
+
+    Args:
+        calendar: カレンダー要素のHTMLまたはlxml要素
+
+    Returns:
+        {"caption": "2025年8月" or None, "days": {日: TimeSlots}}
+    """
+    element = parse_document(calendar) if isinstance(calendar, str) else calendar
+
+    caption = None
+    captions = element.xpath(f"descendant-or-self::*[{_has_class('calendar-caption')}]")
+    if captions:
+        match = _YEAR_MONTH_PATTERN.match(element_text(captions[0]))
+        if match:
+            caption = match.group(1)
+
+    days: Dict[int, TimeSlots] = {}
+    for day_box in element.xpath(f"descendant-or-self::*[{_has_class('day-box')}]"):
+        day_numbers = day_box.xpath(f".//*[{_has_class('day-number')}]")
+        if not day_numbers:
+            continue
+        day_text = element_text(day_numbers[0])
+        if not day_text.isdigit():
+            continue
+        # 同じ日付が複数ある場合は最初のセルを優先（locator版と同じ挙動）
+        days.setdefault(int(day_text), parse_ensemble_day_box(day_box))
+
+    return {"caption": caption, "days": days}
+
+
+def parse_ensemble_calendars(html: str) -> List[Dict[str, object]]:
+    """
+    ページ内のすべてのカレンダーを文書順に解析
+
+    Returns:
+        parse_ensemble_calendar の結果のリスト
+    """
+    document = parse_document(html)
+    return [
+        parse_ensemble_calendar(calendar)
+        for calendar in document.xpath(f"//*[{_has_class('timetable-calendar')}]")
+    ]
+
+
+# ===== 目黒区 =====
+
+def _classify_meguro_cell(cell: HtmlElement) -> str:
+    """時間帯別空き状況のセルを判定（記号がなければチェックボックスの有無で判定）"""
+    return classify_cell(element_text(cell), bool(cell.xpath(".//input[@type='checkbox']")))
+
+
+def _meguro_header_to_slot(header_text: str) -> Optional[str]:
+    """時間帯ヘッダーのテキストを時間帯キーに変換"""
+    if "午前" in header_text:
+        return "morning"
+    elif "午後" in header_text and ("1" in header_text or "１" in header_text):
+        return "afternoon_1"
+    elif "午後" in header_text and ("2" in header_text or "２" in header_text):
+        return "afternoon_2"
+    elif "午後" in header_text:
+        return "afternoon"
+    elif "夜間" in header_text:
+        return "evening"
+    return None
+
+
+def _find_meguro_facility_name(table: HtmlElement) -> Optional[str]:
+    """テーブルの祖先要素から施設名（h3 a）を探す"""
+    for ancestor in table.iterancestors():
+        names = ancestor.xpath(".//h3/a")
+        if names:
+            return element_text(names[0])
+    return None
+
+
+def parse_meguro_time_slot_rows(html: str) -> List[Dict[str, object]]:
+    """
+    目黒区の時間帯別空き状況画面から全行の時間帯情報を抽出
+
+    Returns:
+        [{"facilityName": 施設名 or None, "roomName": 部屋名,
+          "date": "YYYY-MM-DD" or None, "timeSlots": {...}}, ...]（文書順）
+    """
+    document = parse_document(html)
+    rows = []
+
+    for table in document.xpath("//table[thead]"):
+        headers = table.xpath("./thead//th")
+
+        # 時間帯マッピングを作成（最初の2つは施設名と定員）
+        time_slots_map = {}
+        for j, header in enumerate(headers):
+            if j < 2:
+                continue
+            slot_key = _meguro_header_to_slot(element_text(header))
+            if slot_key:
+                time_slots_map[j] = slot_key
+
+        if not time_slots_map:
+            continue
+
+        # 先頭ヘッダーに表示日付がある（例: "2025年10月5日(日)"）
+        date = None
+        if headers:
+            match = _JAPANESE_DATE_PATTERN.search(element_text(headers[0]))
+            if match:
+                date = f"{int(match.group(1)):04d}-{int(match.group(2)):02d}-{int(match.group(3)):02d}"
+
+        facility_name = _find_meguro_facility_name(table)
+
+        for row in table.xpath("./tbody/tr"):
+            cells = row.xpath("./td")
+            if len(cells) < 3:  # 部屋名、定員、時間帯が最低限必要
+                continue
+
+            room_slots = {}
+            for cell_idx, slot_key in time_slots_map.items():
+                if cell_idx < len(cells):
+                    room_slots[slot_key] = _classify_meguro_cell(cells[cell_idx])
+
+            rows.append({
+                "facilityName": facility_name,
+                "roomName": text_without_spans(cells[0]),
+                "date": date,
+                "timeSlots": build_room_slots(room_slots)
+            })
+
+    return rows
+
+
+# ===== 渋谷区 =====
+
+def parse_shibuya_modal(html: str) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    渋谷区の「各部屋の空き状況」モーダルから空き時間帯を抽出
+    モーダルに表示されている時間帯＝予約可能な時間帯
+
+    Returns:
+        {部屋名: {"morning": "available", ...}}（表示されている時間帯のみ）
+        モーダルが存在しない場合はNone
+    """
+    document = parse_document(html)
+    modals = document.xpath(f"//*[{_has_class('ant-modal-content')}]")
+    if not modals:
+        return None
+
+    modal = modals[0]
+    rooms: Dict[str, Dict[str, str]] = {}
+
+    headers = modal.xpath(f".//h3[{_has_class('list-header')}]")
+    for i, room_header in enumerate(headers):
+        # 部屋名を抽出（例: "文化総合センター大和田（練習室） 練習室２" → "練習室２"）
+        full_room_name = element_text(room_header)
+        room_name = full_room_name.split(" ")[-1] if " " in full_room_name else full_room_name
+        room_slots = rooms.setdefault(room_name, {})
+
+        groups = modal.xpath(f".//*[@id='frameSelectForm_inputList_{i}_frameIndexes']")
+        if not groups:
+            continue
+
+        time_elements = groups[0].xpath(
+            f".//*[{_has_class('modal_timelist1')}]//p | .//*[{_has_class('modal_timelist1')}]//label"
+        )
+        for time_element in time_elements:
+            slot_key = time_to_slot(element_text(time_element))
+            if slot_key:
+                room_slots[slot_key] = "available"
+
+    return rooms
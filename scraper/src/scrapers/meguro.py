@@ -2,21 +2,46 @@
 目黒区施設予約システムのスクレイピング
 SPAシステムのため、画面遷移を含む複雑な操作を実装
 """
-from datetime import datetime
+import logging
+import os
+import time
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from playwright.sync_api import Page, Locator
 from .base import BaseScraper
+from . import html_parser
+from .step_pipeline import PipelineStep, StepAbortedError, StepPipeline
+from .status_classifier import build_room_slots, classify_cell, classify_text
 from ..types.time_slots import TimeSlots, validate_time_slots
+from ..utils.page_parking import get_page_parking
+
+
+class NoSelectableCellsError(StepAbortedError):
+    """対象日付のカラムはあるが、選択できるセルが1つもない（サイトの障害ではなくデータなし）"""
 
 
 class MeguroScraper(BaseScraper):
     """目黒区施設予約システム用スクレイパー"""
     
+    FACILITY_KEY = "meguro"
+    
+    # 施設別空き状況のカレンダーに表示される日数（表示開始日から）
+    DISPLAY_DAYS = 14
+    
+    # 施設の選択までのクリック操作が長く、日付ごとに時間帯別空き状況画面を開く
+    SESSION_SETUP_SECONDS = 45.0
+    SECONDS_PER_DATE = 10.0
+    # 同じ表示期間の日付をまとめて選択した場合の、2日付目以降の1日付あたり
+    SECONDS_PER_BATCHED_DATE = 3.0
+    
     def __init__(self, log_level=None):
         super().__init__(log_level)
         # クリックした部屋の情報を保存する辞書
         # key: (facility_name, room_name), value: table_index
         self.clicked_rooms = {}
+        # 複数日付をまとめて選択した場合の日付ごとのクリックした部屋
+        # key: "YYYY-MM-DD", value: clicked_roomsと同じ形式
+        self.clicked_rooms_by_date: Dict[str, Dict] = {}
     
     def get_base_url(self) -> str:
         """施設のベースURLを返す"""
@@ -61,7 +86,7 @@ class MeguroScraper(BaseScraper):
         try:
             # ページが完全に読み込まれるまで待つ
             self.log_info("Waiting for page to be fully loaded...")
-            page.wait_for_load_state("networkidle", timeout=10000)
+            self.timed_step("top_page", 10000, lambda timeout: page.wait_for_load_state("networkidle", timeout=timeout))
             
             # 「施設種類から探す」をクリック
             self.log_info("Looking for '施設種類から探す' button...")
@@ -75,21 +100,15 @@ class MeguroScraper(BaseScraper):
                 "//a[contains(text(), '施設種類から探す')]"
             ]
             
-            facility_type_button = None
-            for selector in selectors:
-                try:
-                    element = page.locator(selector).first
-                    if element.count() > 0:
-                        facility_type_button = element
-                        self.log_info(f"Found '施設種類から探す' button with selector: {selector}")
-                        break
-                except:
-                    continue
+            facility_type_button, selector = self.resolve_selector(page, "facility_type_button", selectors)
+            if facility_type_button:
+                self.log_info("Found '施設種類から探す' button with selector: %s", selector)
             
             if not facility_type_button:
                 self.log_error("Could not find '施設種類から探す' button")
-                self.log_info("Page title:", page.title())
-                self.log_info("Available buttons:", page.locator("button").all_text_contents()[:5])
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.log_debug("Page title: %s", page.title())
+                    self.log_debug("Available buttons: %s", page.locator("button").all_text_contents()[:5])
                 return False
             
             # クリック前に要素が表示されているか確認
@@ -112,20 +131,14 @@ class MeguroScraper(BaseScraper):
                 "label:has-text('集会施設・学校施設')"
             ]
             
-            meeting_facility_option = None
-            for selector in meeting_selectors:
-                try:
-                    element = page.locator(selector).first
-                    if element.count() > 0:
-                        meeting_facility_option = element
-                        self.log_info(f"Found '集会施設・学校施設' option with selector: {selector}")
-                        break
-                except:
-                    continue
+            meeting_facility_option, selector = self.resolve_selector(page, "meeting_facility_option", meeting_selectors)
+            if meeting_facility_option:
+                self.log_info("Found '集会施設・学校施設' option with selector: %s", selector)
             
             if not meeting_facility_option:
                 self.log_error("Could not find '集会施設・学校施設' option")
-                self.log_info("Available options:", page.locator("a, button, label").all_text_contents()[:10])
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.log_debug("Available options: %s", page.locator("a, button, label").all_text_contents()[:10])
                 return False
             
             # クリック前に要素が表示されているか確認
@@ -149,20 +162,14 @@ class MeguroScraper(BaseScraper):
                 "input[type='checkbox'] + label:has-text('音楽室')"
             ]
             
-            music_room_option = None
-            for selector in music_selectors:
-                try:
-                    element = page.locator(selector).first
-                    if element.count() > 0:
-                        music_room_option = element
-                        self.log_info(f"Found '音楽室' category with selector: {selector}")
-                        break
-                except:
-                    continue
+            music_room_option, selector = self.resolve_selector(page, "music_room_category", music_selectors)
+            if music_room_option:
+                self.log_info("Found '音楽室' category with selector: %s", selector)
             
             if not music_room_option:
                 self.log_error("Could not find '音楽室' category")
-                self.log_info("Available categories:", page.locator("label").all_text_contents()[:10])
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.log_debug("Available categories: %s", page.locator("label").all_text_contents()[:10])
                 return False
             
             # クリック前に要素が表示されているか確認
@@ -186,16 +193,11 @@ class MeguroScraper(BaseScraper):
                 "//button[text()='検索' and not(contains(@style,'display:none'))]"
             ]
             
-            search_button = None
-            for selector in search_selectors:
-                try:
-                    element = page.locator(selector).first
-                    if element.count() > 0 and element.is_visible():
-                        search_button = element
-                        self.log_info(f"Found search button with selector: {selector}")
-                        break
-                except:
-                    continue
+            search_button, selector = self.resolve_selector(
+                page, "search_button", search_selectors, predicate=lambda element: element.is_visible()
+            )
+            if search_button:
+                self.log_info("Found search button with selector: %s", selector)
             
             if search_button:
                 search_button.click()
@@ -225,7 +227,7 @@ class MeguroScraper(BaseScraper):
             
             # ページ遷移を待つ
             self.log_info("Waiting for page navigation after search...")
-            page.wait_for_load_state("networkidle", timeout=10000)
+            self.timed_step("facility_search", 10000, lambda timeout: page.wait_for_load_state("networkidle", timeout=timeout))
             page.wait_for_timeout(2000)  # 追加の待機
             
             # 施設検索画面に到達したか確認
@@ -264,17 +266,8 @@ class MeguroScraper(BaseScraper):
             
         except Exception as e:
             self.log_info(f"ERROR in navigate_to_facility_search: {e}")
-            self.log_info(f"Page title: {page.title()}")
             import traceback
-            self.log_info(f"Traceback: {traceback.format_exc()}")
-            
-            # デバッグ用: ページのスクリーンショットを保存
-            try:
-                screenshot_path = "/tmp/meguro_navigation_error.png"
-                page.screenshot(path=screenshot_path)
-                self.log_info(f"Screenshot saved to: {screenshot_path}")
-            except:
-                pass
+            self.log_debug("Traceback: %s", traceback.format_exc())
             
             return False
     
@@ -300,26 +293,25 @@ class MeguroScraper(BaseScraper):
                     f"input[type='checkbox'] + label:has-text('{facility_name}')"
                 ]
                 
-                for selector in checkbox_selectors:
+                element, selector = self.resolve_selector(page, f"facility_checkbox:{facility_name}", checkbox_selectors)
+                if element is None:
+                    self.log_debug("  Warning: Could not select %s", facility_name)
+                    continue
+                
+                try:
+                    element.click()
+                    selected_count += 1
+                    # チェックボックスの状態変更を待つ
                     try:
-                        element = page.locator(selector).first
-                        if element.count() > 0:
-                            element.click()
-                            selected_count += 1
-                            # チェックボックスの状態変更を待つ
-                            try:
-                                page.wait_for_function(
-                                    f"document.querySelector('{selector}').checked || document.querySelector('input[name=\"checkShisetsu\"]:checked') !== null",
-                                    timeout=1000
-                                )
-                            except:
-                                page.wait_for_timeout(200)  # フォールバック
-                            self.log_debug(f"  Selected {facility_name}")
-                            break
+                        page.wait_for_function(
+                            f"document.querySelector('{selector}').checked || document.querySelector('input[name=\"checkShisetsu\"]:checked') !== null",
+                            timeout=1000
+                        )
                     except:
-                        continue
-                else:
-                    self.log_debug(f"  Warning: Could not select {facility_name}")
+                        page.wait_for_timeout(200)  # フォールバック
+                    self.log_debug("  Selected %s", facility_name)
+                except:
+                    self.log_debug("  Warning: Could not select %s", facility_name)
             
             if selected_count == 0:
                 self.log_info("Error: No facilities were selected")
@@ -431,7 +423,9 @@ class MeguroScraper(BaseScraper):
                 self.log_info("Waiting for calendar page elements...")
                 try:
                     # 日付入力フィールドが存在するか確認（これが施設別空き状況画面の特徴）
-                    page.wait_for_selector("#dpStartDate, input[name='textDate'], .joken", timeout=10000)
+                    self.timed_step("calendar", 10000, lambda timeout: page.wait_for_selector(
+                        "#dpStartDate, input[name='textDate'], .joken", timeout=timeout
+                    ))
                     self.log_info("Date input field or .joken section appeared")
                 except:
                     self.log_warning("Date input field did not appear within timeout")
@@ -613,11 +607,6 @@ class MeguroScraper(BaseScraper):
                             try:
                                 self.log_info("\nDebugging page content...")
                                 
-                                # スクリーンショットを撮影
-                                screenshot_path = "/tmp/debug_calendar_page.png"
-                                page.screenshot(path=screenshot_path)
-                                self.log_info(f"Screenshot saved to {screenshot_path}")
-                                
                                 # .jokenセクションを探す
                                 joken = page.locator(".joken")
                                 if joken.count() > 0:
@@ -721,7 +710,7 @@ class MeguroScraper(BaseScraper):
             
             # ページのリロードを待つ
             self.log_info("Waiting for page reload...")
-            page.wait_for_load_state("networkidle", timeout=10000)
+            self.timed_step("target_month", 10000, lambda timeout: page.wait_for_load_state("networkidle", timeout=timeout))
             page.wait_for_timeout(2000)  # 追加の待機
             
             # 再度「施設別空き状況」画面が表示されていることを確認
@@ -745,18 +734,33 @@ class MeguroScraper(BaseScraper):
         Returns:
             成功した場合True
         """
-        target_day = target_date.day
-        self.log_info(f"Selecting date columns for day {target_day}...")
+        return self.select_dates_and_navigate(page, [target_date])
+    
+    def select_dates_and_navigate(self, page: Page, target_dates: List[datetime]) -> bool:
+        """
+        カレンダーヘッダーから対象日付（複数可）のカラムをまとめてクリックして時間帯別空き状況画面へ遷移
+        対象日付は表示中の期間（表示開始日からDISPLAY_DAYS日間）に含まれていること
+        
+        日付ごとにクリックした部屋は clicked_rooms_by_date に、先頭の日付の分は clicked_rooms に保存する
+        
+        Returns:
+            成功した場合True
+        """
+        # 表示期間は月をまたいでもDISPLAY_DAYS日間なので、日の数字だけで日付を特定できる
+        target_days = {target_date.day: target_date.strftime("%Y-%m-%d") for target_date in target_dates}
+        self.log_info("Selecting date columns for day(s) %s...", ', '.join(str(day) for day in target_days))
         
         try:
             # クリックした部屋情報をリセット
             self.clicked_rooms = {}
+            self.clicked_rooms_by_date = {date_key: {} for date_key in target_days.values()}
             
             # すべてのカレンダーテーブルを取得
             calendar_tables = page.locator("table").all()
             self.log_info(f"Found {len(calendar_tables)} calendar tables")
             
             selected_count = 0
+            found_columns = False
             
             # 各カレンダーテーブルで対象日のカラムを特定し、データセルをクリック
             for i, table in enumerate(calendar_tables):
@@ -770,7 +774,8 @@ class MeguroScraper(BaseScraper):
                     if i < 3:  # 最初の3つのテーブルだけデバッグ出力
                         self.log_info(f"Table {i} (class='{table_class}'): {len(headers)} header cells")
                     
-                    target_column_index = -1
+                    # カラムインデックス → 日付（YYYY-MM-DD）
+                    target_columns: Dict[int, str] = {}
                     
                     for j, header in enumerate(headers):
                         header_text = header.text_content() or ""
@@ -792,17 +797,18 @@ class MeguroScraper(BaseScraper):
                             for pattern in patterns:
                                 match = re.search(pattern, header_text.strip())
                                 if match:
-                                    day = int(match.group(1))
-                                    if day == target_day:
-                                        target_column_index = j
-                                        self.log_info(f"Found target date in table {i}, column {j}: '{header_text.strip()}'")
+                                    date_key = target_days.get(int(match.group(1)))
+                                    if date_key and date_key not in target_columns.values():
+                                        target_columns[j] = date_key
+                                        self.log_info("Found target date %s in table %s, column %s: '%s'", date_key, i, j, header_text.strip())
                                         break
                             
-                            if target_column_index >= 0:
+                            if len(target_columns) == len(target_days):
                                 break
                     
                     # 対象日のカラムが見つかった場合、そのカラムのデータセルをクリック
-                    if target_column_index >= 0:
+                    if target_columns:
+                        found_columns = True
                         # まず、このテーブルが属する施設名を特定
                         facility_name = None
                         try:
@@ -844,32 +850,39 @@ class MeguroScraper(BaseScraper):
                                 first_cell_text = cells[0].text_content().strip()
                                 self.log_debug(f"    Row 0, first cell: '{first_cell_text[:50] if len(first_cell_text) > 50 else first_cell_text}'")
                             
-                            if target_column_index < len(cells):
-                                # 部屋名を取得（最初のセル、spanタグを除外）
-                                room_name = None
-                                if len(cells) > 0:
-                                    room_name_cell = cells[0]
-                                    # spanタグを除外してテキストを取得
-                                    try:
-                                        # JavaScriptでspanタグを除去してテキストを取得
-                                        room_name = room_name_cell.evaluate("""
-                                            el => {
-                                                const clone = el.cloneNode(true);
-                                                clone.querySelectorAll('span').forEach(s => s.remove());
-                                                return clone.textContent.trim();
-                                            }
-                                        """)
-                                    except:
-                                        # フォールバック: 通常のテキスト取得
-                                        room_name = room_name_cell.text_content().strip()
-                                    
-                                    # 改行・余分な空白を正規化
-                                    room_name = ' '.join(room_name.split())
-                                    
-                                    if not room_name:
-                                        room_name = f"Room_{row_idx}"
-                                else:
+                            if not any(column_index < len(cells) for column_index in target_columns):
+                                continue
+                            
+                            # 部屋名を取得（最初のセル、spanタグを除外）
+                            room_name = None
+                            if len(cells) > 0:
+                                room_name_cell = cells[0]
+                                # spanタグを除外してテキストを取得
+                                try:
+                                    # JavaScriptでspanタグを除去してテキストを取得
+                                    room_name = room_name_cell.evaluate("""
+                                        el => {
+                                            const clone = el.cloneNode(true);
+                                            clone.querySelectorAll('span').forEach(s => s.remove());
+                                            return clone.textContent.trim();
+                                        }
+                                    """)
+                                except:
+                                    # フォールバック: 通常のテキスト取得
+                                    room_name = room_name_cell.text_content().strip()
+                                
+                                # 改行・余分な空白を正規化
+                                room_name = ' '.join(room_name.split())
+                                
+                                if not room_name:
                                     room_name = f"Room_{row_idx}"
+                            else:
+                                room_name = f"Room_{row_idx}"
+                            
+                            # 対象日ごとのカラムのセルを処理
+                            for target_column_index, date_key in sorted(target_columns.items()):
+                                if target_column_index >= len(cells):
+                                    continue
                                 
                                 target_cell = cells[target_column_index]
                                 cell_text = target_cell.text_content().strip()
@@ -931,7 +944,7 @@ class MeguroScraper(BaseScraper):
                                     if clicked:
                                         table_selections += 1
                                         selected_count += 1
-                                        self.clicked_rooms[(facility_name, room_name)] = {
+                                        self.clicked_rooms_by_date[date_key][(facility_name, room_name)] = {
                                             'table_idx': i,
                                             'is_closed': is_closed
                                         }
@@ -950,8 +963,14 @@ class MeguroScraper(BaseScraper):
                 except Exception as e:
                     self.log_info(f"Error processing table {i}: {e}")
             
+            self.clicked_rooms = self.clicked_rooms_by_date[target_dates[0].strftime("%Y-%m-%d")]
+            
             if selected_count == 0:
-                self.log_warning(f"No columns found for day {target_day}")
+                days = ', '.join(str(day) for day in target_days)
+                if found_columns:
+                    # カレンダーは表示できているため、再試行せずにデータなしとして扱う
+                    raise NoSelectableCellsError(f"No selectable cells for day(s) {days}")
+                self.log_warning("No columns found for day(s) %s", days)
                 return False
             
             self.log_info(f"Selected {selected_count} date columns")
@@ -1054,7 +1073,7 @@ class MeguroScraper(BaseScraper):
                 
                 # 方法1: ネットワークアイドルを待つ
                 try:
-                    page.wait_for_load_state("networkidle", timeout=10000)
+                    self.timed_step("time_slots", 10000, lambda timeout: page.wait_for_load_state("networkidle", timeout=timeout))
                 except:
                     self.log_debug("  Network idle timeout, continuing...")
                 
@@ -1133,12 +1152,6 @@ class MeguroScraper(BaseScraper):
             
             if is_on_time_slot_page:
                 self.log_info("Successfully reached time slot page!")
-                # スクリーンショットを保存（デバッグ用）
-                try:
-                    page.screenshot(path="/tmp/time_slot_page.png")
-                    self.log_debug("  Screenshot saved to /tmp/time_slot_page.png")
-                except:
-                    pass
                 return True
             else:
                 self.log_error("Failed to reach time slot page")
@@ -1171,15 +1184,10 @@ class MeguroScraper(BaseScraper):
                         except:
                             pass
                 
-                # スクリーンショット保存
-                try:
-                    page.screenshot(path="/tmp/failed_navigation.png")
-                    self.log_debug("  Debug screenshot saved to /tmp/failed_navigation.png")
-                except:
-                    pass
-                
                 return False
             
+        except NoSelectableCellsError:
+            raise
         except Exception as e:
             self.log_info(f"Error selecting date: {e}")
             return False
@@ -1202,52 +1210,16 @@ class MeguroScraper(BaseScraper):
             if cell_idx in time_slots_map:
                 cell = cells[cell_idx]
                 cell_text = cell.text_content().strip()
-                slot_key = time_slots_map[cell_idx]
-                
-                # 空き状況を判定
-                if "○" in cell_text or "◯" in cell_text:
-                    status = "available"
-                elif "×" in cell_text or "✕" in cell_text:
-                    status = "booked"
-                elif "－" in cell_text or "-" in cell_text or "−" in cell_text:
-                    status = "unknown"
-                else:
-                    # チェックボックスがある場合は空きと判定
-                    checkbox = cell.locator("input[type='checkbox']").first
-                    if checkbox.count() > 0:
-                        status = "available"
-                    else:
-                        status = "unknown"
-                
-                room_slots[slot_key] = status
-        
-        # 午後1と午後2を統合（パターンBの場合）
-        if "afternoon_1" in room_slots and "afternoon_2" in room_slots:
-            # 両方空いている場合
-            if room_slots["afternoon_1"] == "available" and room_slots["afternoon_2"] == "available":
-                room_slots["afternoon"] = "available"
-            # 午後1のみ予約済み
-            elif room_slots["afternoon_1"] == "booked" and room_slots["afternoon_2"] == "available":
-                room_slots["afternoon"] = "booked_1"
-            # 午後2のみ予約済み
-            elif room_slots["afternoon_1"] == "available" and room_slots["afternoon_2"] == "booked":
-                room_slots["afternoon"] = "booked_2"
-            # 両方予約済み
-            elif room_slots["afternoon_1"] == "booked" and room_slots["afternoon_2"] == "booked":
-                room_slots["afternoon"] = "booked"
-            else:
-                room_slots["afternoon"] = "unknown"
-            
-            # 個別の午後1、午後2を削除
-            del room_slots["afternoon_1"]
-            del room_slots["afternoon_2"]
-        
-        # 不足している時間帯を補完
-        for slot in ["morning", "afternoon", "evening"]:
-            if slot not in room_slots:
-                room_slots[slot] = "unknown"
+
+                # 記号がない場合のみチェックボックスの有無を確認
+                status = classify_text(cell_text)
+                if status is None:
+                    has_checkbox = cell.locator("input[type='checkbox']").first.count() > 0
+                    status = classify_cell(cell_text, has_checkbox)
+                room_slots[time_slots_map[cell_idx]] = status
         
-        return room_slots
+        # 午後1と午後2を統合し、不足している時間帯を補完
+        return build_room_slots(room_slots)
     
     def extract_all_time_slots(self, page: Page) -> Dict[str, Dict[str, Dict[str, str]]]:
         """
@@ -1278,6 +1250,13 @@ class MeguroScraper(BaseScraper):
                 self.log_error("No clicked rooms found. Cannot extract time slots.")
                 return {}
             
+            # HTMLを一度だけ取得してlxmlで解析（失敗時は従来のlocator抽出）
+            if self.extraction_backend == 'lxml':
+                try:
+                    return self._extract_all_time_slots_from_html(page.content())
+                except Exception as e:
+                    self.log_warning("lxml extraction failed, falling back to locators: %s", e)
+            
             # clicked_roomsの各部屋に対して直接検索
             for (facility_name, room_name), room_info in self.clicked_rooms.items():
                 self.log_info(f"\nSearching for room: {facility_name} - {room_name}")
@@ -1366,53 +1345,19 @@ class MeguroScraper(BaseScraper):
                                     cell_content = cell.text_content().strip()
                                     slot_key = time_slots_map[cell_idx]
                                     
-                                    # 空き状況を判定
-                                    if "－" in cell_content or "-" in cell_content or "−" in cell_content:
-                                        status = "unknown"
-                                    elif "○" in cell_content or "◯" in cell_content:
-                                        status = "available"
-                                    elif "×" in cell_content or "✕" in cell_content:
-                                        status = "booked"
-                                    elif "△" in cell_content:
-                                        # 三角は部分的に予約済み（とりあえずavailableとする）
-                                        status = "available"
-                                    else:
-                                        # チェックボックスの存在をチェック
-                                        checkbox = cell.locator("input[type='checkbox']").first
-                                        if checkbox.count() > 0:
-                                            status = "available"
-                                        else:
-                                            status = "unknown"
+                                    # 空き状況を判定（記号がなければチェックボックスの有無で判定）
+                                    status = classify_text(cell_content)
+                                    if status is None:
+                                        has_checkbox = cell.locator("input[type='checkbox']").first.count() > 0
+                                        status = classify_cell(cell_content, has_checkbox)
                                     
                                     room_slots[slot_key] = status
-                                    self.log_info(f"        Cell {cell_idx}: {slot_key} = {status} (content: '{cell_content}')")
+                                    self.log_cell("        Cell %d: %s = %s (content: '%s')", cell_idx, slot_key, status, cell_content)
                             
-                            # 午後1と午後2を統合
+                            # 午後1と午後2を統合し、不足している時間帯を補完
                             if "afternoon_1" in room_slots and "afternoon_2" in room_slots:
-                                self.log_info(f"        Merging afternoon slots: afternoon_1={room_slots['afternoon_1']}, afternoon_2={room_slots['afternoon_2']}")
-                                # 両方空いている場合
-                                if room_slots["afternoon_1"] == "available" and room_slots["afternoon_2"] == "available":
-                                    room_slots["afternoon"] = "available"
-                                # 午後1のみ予約済み
-                                elif room_slots["afternoon_1"] == "booked" and room_slots["afternoon_2"] == "available":
-                                    room_slots["afternoon"] = "booked_1"
-                                # 午後2のみ予約済み
-                                elif room_slots["afternoon_1"] == "available" and room_slots["afternoon_2"] == "booked":
-                                    room_slots["afternoon"] = "booked_2"
-                                # 両方予約済み
-                                elif room_slots["afternoon_1"] == "booked" and room_slots["afternoon_2"] == "booked":
-                                    room_slots["afternoon"] = "booked"
-                                else:
-                                    room_slots["afternoon"] = "unknown"
-                                
-                                self.log_info(f"        Result: afternoon={room_slots['afternoon']}")
-                                del room_slots["afternoon_1"]
-                                del room_slots["afternoon_2"]
-                            
-                            # 不足している時間帯を補完
-                            for slot in ["morning", "afternoon", "evening"]:
-                                if slot not in room_slots:
-                                    room_slots[slot] = "unknown"
+                                self.log_debug("        Merging afternoon slots: afternoon_1=%s, afternoon_2=%s", room_slots['afternoon_1'], room_slots['afternoon_2'])
+                            room_slots = build_room_slots(room_slots)
                             
                             # 結果に保存
                             results[facility_name][room_name] = room_slots
@@ -1434,9 +1379,93 @@ class MeguroScraper(BaseScraper):
             return results
             
         except Exception as e:
-            self.log_info(f"Error extracting time slots: {e}")
+            self.log_info("Error extracting time slots: %s", e)
             return {}
     
+    def _extract_all_time_slots_from_html(self, html: str) -> Dict[str, Dict[str, Dict[str, str]]]:
+        """
+        時間帯別空き状況画面のHTMLから全施設・全部屋の時間帯情報を抽出（lxml版）
+        
+        Args:
+            html: page.content()で取得したHTML
+        
+        Returns:
+            extract_all_time_slots と同じ形式の辞書
+        """
+        rows = html_parser.parse_meguro_time_slot_rows(html)
+        self.log_debug("  Parsed %s rows from page HTML", len(rows))
+        return self._time_slots_from_rows(rows, self.clicked_rooms)
+    
+    def extract_time_slots_by_date(self, page: Page) -> Dict[str, Dict[str, Dict[str, Dict[str, str]]]]:
+        """
+        複数日付をまとめて選択した時間帯別空き状況画面から、日付ごとに時間帯情報を抽出
+        行は各テーブルの先頭ヘッダーの日付で振り分ける（locator版は日付を区別できないため、常にHTMLを解析する）
+        
+        Returns:
+            {"YYYY-MM-DD": extract_all_time_slots と同じ形式の辞書}
+        """
+        self.log_info("Extracting time slots for %s dates...", len(self.clicked_rooms_by_date))
+        if not any(self.clicked_rooms_by_date.values()):
+            self.log_error("No clicked rooms found. Cannot extract time slots.")
+            return {}
+        
+        try:
+            rows = html_parser.parse_meguro_time_slot_rows(page.content())
+        except Exception as e:
+            self.log_info("Error extracting time slots: %s", e)
+            return {}
+        self.log_debug("  Parsed %s rows from page HTML", len(rows))
+        
+        return {
+            date: self._time_slots_from_rows(rows, clicked_rooms, date)
+            for date, clicked_rooms in self.clicked_rooms_by_date.items()
+            if clicked_rooms
+        }
+    
+    def _time_slots_from_rows(self, rows: List[Dict], clicked_rooms: Dict,
+                              date: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, str]]]:
+        """
+        解析済みの行から、クリックした部屋の時間帯情報を取り出す
+        
+        Args:
+            rows: html_parser.parse_meguro_time_slot_rows の結果
+            clicked_rooms: clicked_rooms と同じ形式の辞書
+            date: 指定した場合はその日付の行（日付が読み取れない行を含む）のみを対象にする
+        """
+        if date is not None:
+            rows = [row for row in rows if row["date"] in (None, date)]
+        
+        results = {}
+        for (facility_name, room_name), room_info in clicked_rooms.items():
+            facility_results = results.setdefault(facility_name, {})
+            
+            # 休館の部屋は直接bookedとして処理
+            if room_info.get('is_closed'):
+                facility_results[room_name] = {
+                    "morning": "booked",
+                    "afternoon": "booked",
+                    "evening": "booked"
+                }
+                continue
+            
+            # 完全一致または部分一致する最初の行を採用（locator版と同じ規則）
+            matched = next(
+                (row for row in rows if row["roomName"] == room_name or room_name in row["roomName"]),
+                None
+            )
+            if matched:
+                self.log_debug("    %s/%s: %s", facility_name, room_name, matched['timeSlots'])
+                facility_results[room_name] = dict(matched["timeSlots"])
+            else:
+                self.log_debug("    WARNING: Room '%s' not found on page", room_name)
+                facility_results[room_name] = {
+                    "morning": "unknown",
+                    "afternoon": "unknown",
+                    "evening": "unknown"
+                }
+        
+        return results
+    
     # BaseScraper抽象メソッドの実装（目黒区はSPAなので独自実装）
     
     def find_studio_calendars(self, page: Page) -> List[Tuple[str, Locator]]:
@@ -1466,6 +1495,129 @@ class MeguroScraper(BaseScraper):
         # 目黒区はSPAで画面遷移するため、このメソッドは使用されない
         return {}
     
+    def _current_screen(self, page: Page) -> str:
+        """パンくずリストから現在の画面名を取得（取得できない場合は空文字）"""
+        current = page.locator(".breadcrumbs li.current span").first
+        if current.count() == 0:
+            return ""
+        return (current.text_content() or "").strip()
+    
+    def is_top_page(self, page: Page) -> bool:
+        """トップページ（「施設種類から探す」がある画面）にいるか"""
+        return page.locator("text=施設種類から探す").count() > 0
+    
+    def is_facility_search_page(self, page: Page) -> bool:
+        """施設の検索画面にいるか"""
+        return "施設の検索" in self._current_screen(page)
+    
+    def is_calendar_page(self, page: Page) -> bool:
+        """施設別空き状況画面にいるか"""
+        return "施設別空き状況" in self._current_screen(page)
+    
+    def is_time_slot_page(self, page: Page) -> bool:
+        """時間帯別空き状況画面にいるか"""
+        return "時間帯別空き状況" in self._current_screen(page)
+    
+    def open_top_page(self, page: Page) -> bool:
+        """トップページにアクセス"""
+        self.log_info("Accessing: %s", self.base_url)
+        self.timed_step("goto", 60000, lambda timeout: page.goto(self.base_url, wait_until="networkidle", timeout=timeout))
+        return True
+    
+    def build_park_steps(self) -> List[PipelineStep]:
+        """トップページから施設別空き状況画面（日付に依存しない画面）までのステップ"""
+        error_message = "Scraping failed - no default data should be saved"
+        return [
+            PipelineStep("open_top", self.open_top_page,
+                         error_message=error_message),
+            PipelineStep("facility_search", self.navigate_to_facility_search,
+                         precondition=self.is_top_page, error_message=error_message),
+            PipelineStep("select_facilities", self.select_facilities,
+                         precondition=self.is_facility_search_page, retry_from="open_top",
+                         error_message=error_message),
+            PipelineStep("calendar", self.navigate_to_calendar,
+                         precondition=self.is_facility_search_page, error_message=error_message),
+        ]
+    
+    def build_date_steps(self, target_date: datetime,
+                         target_dates: Optional[List[datetime]] = None) -> List[PipelineStep]:
+        """施設別空き状況画面から、指定日付の時間帯別空き状況を取得するまでのステップ"""
+        error_message = "Scraping failed - no default data should be saved"
+        if target_dates:
+            select_date = lambda page: self.select_dates_and_navigate(page, target_dates)
+            extract = self.extract_time_slots_by_date
+        else:
+            select_date = lambda page: self.select_date_and_navigate(page, target_date)
+            extract = self.extract_all_time_slots
+        return [
+            PipelineStep("target_month", lambda page: self.navigate_to_target_month(page, target_date),
+                         precondition=self.is_calendar_page, error_message=error_message),
+            PipelineStep("select_date", select_date,
+                         precondition=self.is_calendar_page, retry_from="target_month",
+                         error_message=error_message),
+            PipelineStep("extract", extract,
+                         precondition=self.is_time_slot_page, error_message=error_message),
+        ]
+    
+    def build_steps(self, target_date: datetime, target_dates: Optional[List[datetime]] = None) -> StepPipeline:
+        """
+        指定日付の時間帯別空き状況を取得するまでのステップを作成
+        
+        施設の選択と日付の選択はクリックのたびに選択状態が切り替わるため、
+        失敗時はそれぞれトップページ・月の移動からやり直す
+        
+        Args:
+            target_date: 表示開始日にする日付
+            target_dates: 指定した場合は、表示期間内のこれらの日付をまとめて選択し、
+                extractステップは日付ごとの結果（extract_time_slots_by_date）を返す
+        """
+        return StepPipeline(
+            self.build_park_steps() + self.build_date_steps(target_date, target_dates),
+            logger=self.logger, observer=self.debug_recorder()
+        )
+    
+    # ページパーキング（PAGE_PARKING_ENABLED=true）のフック
+    
+    def park_page(self, page: Page) -> bool:
+        """施設別空き状況画面まで遷移して待機させる"""
+        if not self.try_deep_link(page, datetime.now(), self.is_calendar_page):
+            StepPipeline(self.build_park_steps(), logger=self.logger, observer=self.debug_recorder()).run(page)
+        return True
+    
+    def is_parked(self, page: Page) -> bool:
+        """待機させる画面（施設別空き状況画面）にいるか"""
+        return self.is_calendar_page(page)
+    
+    def return_to_parked(self, page: Page) -> bool:
+        """時間帯別空き状況画面から「前に戻る」で施設別空き状況画面に戻る"""
+        if self.is_calendar_page(page):
+            return True
+        back_button = page.locator("a.btnBlue:has-text('前に戻る')").first
+        if back_button.count() == 0:
+            return False
+        back_button.click()
+        page.wait_for_load_state("networkidle")
+        return self.is_calendar_page(page)
+    
+    def _run_date_steps(self, page: Page, target_date: datetime,
+                        target_dates: Optional[List[datetime]] = None):
+        """待機中のページで日付のステップだけを実行し、extractステップの結果を返す"""
+        return self._run_extract(StepPipeline(
+            self.build_date_steps(target_date, target_dates),
+            logger=self.logger, observer=self.debug_recorder()
+        ), page)
+    
+    def _run_extract(self, steps: StepPipeline, page: Page) -> Dict:
+        """
+        ステップを実行してextractステップの結果を返す
+        対象日付に選択できるセルがない場合は空の結果（呼び出し元でNO_DATA_FOUNDになる）
+        """
+        try:
+            return steps.run(page)["extract"]
+        except NoSelectableCellsError as e:
+            self.log_warning("%s", e)
+            return {}
+    
     def scrape_availability(self, date: str) -> List[Dict]:
         """
         指定日付の空き状況をスクレイピング（目黒区用にオーバーライド）
@@ -1482,6 +1634,12 @@ class MeguroScraper(BaseScraper):
         target_date = datetime.strptime(date, "%Y-%m-%d")
         
         try:
+            parking = None if self._har_mode() else get_page_parking()
+            if parking is not None:
+                # 施設別空き状況画面で待機中のページで日付のステップだけを実行
+                all_time_slots = parking.run(self, lambda page: self._run_date_steps(page, target_date))
+                return self._build_records(all_time_slots, date)
+            
             from playwright.sync_api import sync_playwright
             
             with sync_playwright() as p:
@@ -1492,71 +1650,16 @@ class MeguroScraper(BaseScraper):
                     context = self.create_browser_context(browser)
                     page = context.new_page()
                     
-                    # トップページにアクセス
-                    self.log_info(f"Accessing: {self.base_url}")
-                    response = page.goto(self.base_url, wait_until="networkidle", timeout=60000)
-                    
-                    # 施設検索画面へ遷移
-                    if not self.navigate_to_facility_search(page):
-                        self.log_info("Error: Failed to navigate to facility search")
-                        raise RuntimeError("Scraping failed - no default data should be saved")
-                    
-                    # 施設を選択
-                    if not self.select_facilities(page):
-                        self.log_info("Error: Failed to select facilities")
-                        raise RuntimeError("Scraping failed - no default data should be saved")
-                    
-                    # カレンダー画面へ遷移
-                    if not self.navigate_to_calendar(page):
-                        self.log_info("Error: Failed to navigate to calendar")
-                        raise RuntimeError("Scraping failed - no default data should be saved")
-                    
-                    # 目標月へ移動
-                    if not self.navigate_to_target_month(page, target_date):
-                        self.log_info("Error: Failed to navigate to target month")
-                        raise RuntimeError("Scraping failed - no default data should be saved")
-                    
-                    # 日付を選択して時間帯画面へ
-                    if not self.select_date_and_navigate(page, target_date):
-                        self.log_info("Error: Failed to select date")
-                        raise RuntimeError("Scraping failed - no default data should be saved")
-                    
-                    # 全施設の時間帯情報を取得
-                    all_time_slots = self.extract_all_time_slots(page)
-                    
-                    if not all_time_slots:
-                        self.log_warning("No time slot data extracted")
-                        raise RuntimeError("Scraping failed - no default data should be saved")
-                    
-                    # 結果を整形（3層構造で各部屋ごとに個別レコード）
-                    results = []
-                    for facility_name, rooms in all_time_slots.items():
-                        # 各部屋ごとに個別レコードを作成
-                        for room_name, room_slots in rooms.items():
-                            # 型検証を実行（booked_1, booked_2 はそのまま保持）
-                            try:
-                                validated_slots = validate_time_slots(room_slots)
-                            except ValueError as e:
-                                self.log_warning(f"Invalid time slots for {facility_name} - {room_name}: {e}")
-                                validated_slots = {
-                                    "morning": "unknown",
-                                    "afternoon": "unknown", 
-                                    "evening": "unknown"
-                                }
-                            
-                            results.append({
-                                "centerName": "目黒区民センター",
-                                "facilityName": facility_name,
-                                "roomName": room_name,
-                                "date": date,
-                                "timeSlots": validated_slots,
-                                "lastUpdated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                            })
-                    
-                    return results
+                    if self.try_deep_link(page, target_date, self.is_calendar_page):
+                        # deep linkで施設別空き状況画面に着いた場合は日付のステップだけを実行
+                        all_time_slots = self._run_date_steps(page, target_date)
+                    else:
+                        # 画面遷移〜抽出までをステップ単位で再試行しながら実行
+                        all_time_slots = self._run_extract(self.build_steps(target_date), page)
+                    return self._build_records(all_time_slots, date)
                     
                 finally:
-                    browser.close()
+                    self.close_browser(browser)
                     
         except Exception as e:
             self.log_info(f"Error during scraping: {e}")
@@ -1564,6 +1667,73 @@ class MeguroScraper(BaseScraper):
             traceback.print_exc()
             raise
     
+    def _build_records(self, all_time_slots: Dict[str, Dict[str, Dict[str, str]]], date: str) -> List[Dict]:
+        """抽出結果を整形（3層構造で各部屋ごとに個別レコード）"""
+        results = []
+        for facility_name, rooms in all_time_slots.items():
+            # 各部屋ごとに個別レコードを作成
+            for room_name, room_slots in rooms.items():
+                # 型検証を実行（booked_1, booked_2 はそのまま保持）
+                try:
+                    validated_slots = validate_time_slots(room_slots)
+                except ValueError as e:
+                    self.log_warning("Invalid time slots for %s - %s: %s", facility_name, room_name, e)
+                    validated_slots = {
+                        "morning": "unknown",
+                        "afternoon": "unknown", 
+                        "evening": "unknown"
+                    }
+                
+                results.append(self.create_facility_record(
+                    facility_name, room_name, validated_slots, date=date
+                ))
+        return results
+    
+    def scrape_availability_batch(self, dates: List[str]) -> Dict[str, List[Dict]]:
+        """
+        表示期間（表示開始日からDISPLAY_DAYS日間）に収まる複数日付の空き状況を1回のセッションでスクレイピング
+        カレンダーで全日付のカラムをまとめて選択し、時間帯別空き状況画面の行を日付ごとに振り分ける
+        
+        Args:
+            dates: "YYYY-MM-DD"形式の日付リスト（日付順。先頭の日付を表示開始日にする）
+        
+        Returns:
+            {"YYYY-MM-DD": スタジオ空き状況のリスト}（データが取れなかった日付は含まない）
+        """
+        self.log_info("\n=== Starting Meguro batch scraping for %s ===", ', '.join(dates))
+        target_dates = [datetime.strptime(date, "%Y-%m-%d") for date in dates]
+        
+        parking = None if self._har_mode() else get_page_parking()
+        if parking is not None:
+            time_slots_by_date = parking.run(
+                self, lambda page: self._run_date_steps(page, target_dates[0], target_dates)
+            )
+            return {
+                date: self._build_records(time_slots, date)
+                for date, time_slots in time_slots_by_date.items()
+            }
+        
+        from playwright.sync_api import sync_playwright
+        
+        with sync_playwright() as p:
+            browser = self.setup_browser(p)
+            
+            try:
+                context = self.create_browser_context(browser)
+                page = context.new_page()
+                
+                if self.try_deep_link(page, target_dates[0], self.is_calendar_page):
+                    time_slots_by_date = self._run_date_steps(page, target_dates[0], target_dates)
+                else:
+                    time_slots_by_date = self._run_extract(self.build_steps(target_dates[0], target_dates), page)
+                return {
+                    date: self._build_records(time_slots, date)
+                    for date, time_slots in time_slots_by_date.items()
+                }
+                
+            finally:
+                self.close_browser(browser)
+    
     def scrape_multiple_dates(self, dates: List[str]) -> Dict:
         """
         複数日付の空き状況をスクレイピング（目黒区用）
@@ -1587,12 +1757,19 @@ class MeguroScraper(BaseScraper):
         """
         self.log_info(f"\n=== Starting Meguro multiple dates scraping for {len(dates)} dates ===")
         self.log_info(f"Dates: {', '.join(dates)}")
-        self.log_info("Note: Meguro site requires separate sessions for each date")
         
-        results = {}
+        # 前回の実行で保存済みの日付はスキップ
+        dates, results = self._skip_checkpointed_dates(dates)
         
+        # 表示期間内の日付をまとめて1回のセッションで処理
+        if self.is_multi_date_enabled() and len(dates) > 1:
+            return self._with_circuit_breaker(dates, results, self._scrape_dates_in_batches)
+        
+        self.log_info("Note: Meguro site requires separate sessions for each date")
         # 目黒区は各日付で個別にセッションが必要
         for i, date in enumerate(dates, 1):
+            if self._stop_if_deadline(dates, results):
+                break
             self.log_info(f"\n--- Processing date {i}/{len(dates)}: {date} ---")
             
             try:
@@ -1601,7 +1778,7 @@ class MeguroScraper(BaseScraper):
                 results[date] = result
                 
                 if result.get("status") == "success":
-                    self.log_info(f"✅ Successfully processed {date}")
+                    self.log_info("✅ Successfully processed %s", date)
                 else:
                     self.log_warning(f"⚠️ Failed to process {date}: {result.get('message', 'Unknown error')}")
                     
@@ -1617,13 +1794,151 @@ class MeguroScraper(BaseScraper):
             # 次の日付処理前に少し待機（サーバー負荷軽減とセッション分離）
             if i < len(dates):
                 self.log_info("Waiting before next date (server load reduction)...")
-                import time
                 time.sleep(3)  # 目黒区サイト用に少し長めの待機
         
         # 結果をサマリー化
         summary = self._summarize_results(results)
         
-        self.log_info(f"\n=== Meguro multiple dates scraping completed ===")
-        self.log_info(f"Success: {summary['summary']['success']}/{summary['summary']['total']}")
+        self.log_info("\n=== Meguro multiple dates scraping completed ===")
+        self.log_info("Success: %s/%s", summary['summary']['success'], summary['summary']['total'])
         
-        return summary
\ No newline at end of file
+        return summary
+    
+    @staticmethod
+    def is_multi_date_enabled() -> bool:
+        """表示期間内の日付をまとめて処理するか（環境変数 MEGURO_MULTI_DATE_ENABLED、デフォルト: false）"""
+        return os.getenv('MEGURO_MULTI_DATE_ENABLED', 'false').lower() == 'true'
+    
+    def plan_sessions(self, dates: List[str], max_sessions: int = 1) -> List[List[str]]:
+        """
+        複数日付セッションが有効な場合は表示期間ごと、無効な場合は日付ごとに1セッション
+        （どちらも1セッションごとに検索をやり直すため、同時に開けるセッションの数によらない）
+        """
+        if self.is_multi_date_enabled():
+            return self._group_dates_by_display_period(dates)
+        return [[date] for date in sorted(dates)]
+    
+    def estimate_session_seconds(self, dates: List[str]) -> float:
+        """時間帯別空き状況画面は1回で、まとめた日付は行が増えるだけ"""
+        if not dates:
+            return self.SESSION_SETUP_SECONDS
+        return self.SESSION_SETUP_SECONDS + self.SECONDS_PER_DATE + self.SECONDS_PER_BATCHED_DATE * (len(dates) - 1)
+    
+    def _group_dates_by_display_period(self, dates: List[str]) -> List[List[str]]:
+        """
+        日付順に並べ、先頭の日付からDISPLAY_DAYS日間に収まる日付ごとにまとめる
+        
+        例: DISPLAY_DAYS=14の場合 ["2025-10-01", "2025-10-14", "2025-10-15"]
+            → [["2025-10-01", "2025-10-14"], ["2025-10-15"]]
+        """
+        batches: List[List[str]] = []
+        period_end = None
+        for date in sorted(dates):
+            current = datetime.strptime(date, "%Y-%m-%d")
+            if period_end is not None and current < period_end:
+                batches[-1].append(date)
+            else:
+                batches.append([date])
+                period_end = current + timedelta(days=self.DISPLAY_DAYS)
+        return batches
+    
+    @staticmethod
+    def _batch_error_result(error: Exception) -> Dict:
+        """まとめて処理したセッションの失敗を、日付ごとの結果の形式に変換（scrape_and_saveと同じ分類）"""
+        error_message = str(error)
+        if "no default data should be saved" in error_message:
+            return {
+                "status": "error",
+                "message": "Scraping failed - navigation error",
+                "error_type": "NAVIGATION_ERROR",
+                "details": "Failed to navigate to the required page"
+            }
+        if "Executable doesn't exist" in error_message or "playwright install" in error_message:
+            return {
+                "status": "error",
+                "message": "Playwright browser not installed",
+                "error_type": "BROWSER_NOT_INSTALLED",
+                "details": error_message
+            }
+        if "timeout" in error_message.lower():
+            return {
+                "status": "error",
+                "message": "Website request timed out",
+                "error_type": "TIMEOUT_ERROR",
+                "details": error_message
+            }
+        return {
+            "status": "error",
+            "message": "Scraping failed",
+            "error_type": "SCRAPING_ERROR",
+            "details": error_message
+        }
+    
+    def _save_batch_results(self, batch: List[str], facilities_by_date: Dict[str, List[Dict]],
+                            results: Dict[str, Dict]):
+        """まとめて取得した日付ごとのデータを保存（データがない日付はNO_DATA_FOUND）"""
+        for date in batch:
+            facilities = facilities_by_date.get(date)
+            if facilities:
+                if self._save_date_result(date, facilities, results):
+                    self.log_info("✅ Successfully processed %s", date)
+                continue
+            self.log_warning("⚠️ No data found for %s", date)
+            results[date] = {
+                "status": "error",
+                "message": f"No data found for date: {date}",
+                "error_type": "NO_DATA_FOUND",
+                "details": "No selectable cells for this date in the calendar"
+            }
+            self._report_date_result(date, results[date])
+    
+    def _scrape_dates_in_batches(self, dates: List[str], results: Dict[str, Dict]) -> Dict:
+        """
+        表示期間ごとにまとめた日付を、まとまりごとに1回のセッションで処理して保存
+        （N日付が同じ表示期間に収まれば、施設検索からの画面遷移は1回で済む）
+        """
+        valid_dates = []
+        for date in dates:
+            try:
+                datetime.strptime(date, "%Y-%m-%d")
+                valid_dates.append(date)
+            except ValueError:
+                results[date] = {
+                    "status": "error",
+                    "message": f"Invalid date format: {date}. Expected YYYY-MM-DD",
+                    "error_type": "VALIDATION_ERROR"
+                }
+        
+        batches = self._group_dates_by_display_period(valid_dates)
+        self.log_info("Processing %s dates in %s session(s)", len(valid_dates), len(batches))
+        
+        for i, batch in enumerate(batches, 1):
+            if self._stop_if_deadline(dates, results):
+                break
+            self.log_info("\n--- Processing session %s/%s: %s ---", i, len(batches), ', '.join(batch))
+            
+            with self.scrape_context():
+                try:
+                    facilities_by_date = self.scrape_availability_batch(batch)
+                except Exception as e:
+                    self.log_error("❌ Error processing %s: %s", ', '.join(batch), e)
+                    # 期限切れ・キャンセルによる中断はその結果
+                    error = self._deadline_result() or self._batch_error_result(e)
+                    for date in batch:
+                        results[date] = dict(error)
+                        self._report_date_result(date, results[date])
+                else:
+                    self._save_batch_results(batch, facilities_by_date, results)
+            
+            # 次のセッションの前に少し待機（サーバー負荷軽減）
+            if i < len(batches):
+                self.log_info("Waiting before next session (server load reduction)...")
+                time.sleep(3)
+        
+        # 非同期保存の完了を待ち、保存に失敗した日付を反映
+        self._flush_pending_writes(results)
+        
+        summary = self._summarize_results(results)
+        self.log_info("\n=== Meguro multiple dates scraping completed ===")
+        self.log_info("Success: %s/%s", summary['summary']['success'], summary['summary']['total'])
+        return summary
@@ -6,7 +6,12 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Literal
 from playwright.sync_api import Page, Locator, sync_playwright
 from .base import BaseScraper
+from . import html_parser
+from .step_pipeline import PipelineStep, StepPipeline
+from .status_classifier import classify_cell, classify_text, strip_time_ranges
 from ..types.time_slots import TimeSlots, validate_time_slots
+from ..utils.page_parking import get_page_parking
+from ..utils.resource_governor import ResourceGovernor, playwright_driver_pid
 import traceback
 import re
 
@@ -17,6 +22,12 @@ StatusValue = Literal['available', 'booked', 'booked_1', 'booked_2', 'lottery',
 class ShibuyaScraper(BaseScraper):
     """渋谷区施設予約システム用スクレイパー"""
     
+    FACILITY_KEY = "shibuya"
+    
+    # 検索までのクリック操作が長く、日付ごとはモーダルの開閉のみ
+    SESSION_SETUP_SECONDS = 40.0
+    SECONDS_PER_DATE = 8.0
+    
     # 文化総合センター大和田の練習室定義
     PRACTICE_ROOMS = [
         "大練習室",
@@ -57,7 +68,7 @@ class ShibuyaScraper(BaseScraper):
     def wait_for_react_load(self, page: Page):
         """Reactアプリケーションの読み込みを待つ"""
         # SPAの初期読み込みを待つ
-        page.wait_for_load_state("networkidle", timeout=30000)
+        self.timed_step("react_load", 30000, lambda timeout: page.wait_for_load_state("networkidle", timeout=timeout))
         page.wait_for_timeout(2000)  # 追加の待機
         
         # React rootが存在することを確認
@@ -135,16 +146,9 @@ class ShibuyaScraper(BaseScraper):
                 ".ant-select-selection-placeholder:has-text('目的を選択')"
             ]
             
-            purpose_select = None
-            for selector in purpose_selectors:
-                try:
-                    elem = page.locator(selector).first
-                    if elem.count() > 0:
-                        purpose_select = elem
-                        self.log_info(f"Found purpose select with selector: {selector}")
-                        break
-                except:
-                    continue
+            purpose_select, selector = self.resolve_selector(page, "purpose_select", purpose_selectors)
+            if purpose_select:
+                self.log_info("Found purpose select with selector: %s", selector)
             
             if not purpose_select:
                 # フォールバック: インデックスで取得
@@ -155,13 +159,6 @@ class ShibuyaScraper(BaseScraper):
                     self.log_error("Could not find any select elements")
                     return False
             
-            # デバッグ用スクリーンショット（セレクト前）
-            try:
-                page.screenshot(path="/tmp/shibuya_before_select.png")
-                self.log_info("Screenshot saved: /tmp/shibuya_before_select.png")
-            except:
-                pass
-            
             # セレクトボックスをクリック
             try:
                 purpose_select.scroll_into_view_if_needed()
@@ -169,12 +166,6 @@ class ShibuyaScraper(BaseScraper):
                 self.log_info("Clicked purpose select")
             except Exception as e:
                 self.log_error(f"Failed to click purpose select: {e}")
-                # スクリーンショットを保存
-                try:
-                    page.screenshot(path="/tmp/shibuya_click_error.png")
-                    self.log_info("Error screenshot saved: /tmp/shibuya_click_error.png")
-                except:
-                    pass
                 return False
             
             page.wait_for_timeout(1000)
@@ -483,7 +474,7 @@ class ShibuyaScraper(BaseScraper):
                 self.log_info("Found loading spinner")
                 # spinnerが消えるまで待つ（最大10秒）
                 try:
-                    spinner.wait_for(state="hidden", timeout=10000)
+                    self.timed_step("search_results", 10000, lambda timeout: spinner.wait_for(state="hidden", timeout=timeout))
                     self.log_info("Loading completed")
                 except:
                     # タイムアウトした場合も処理を続行
@@ -511,7 +502,9 @@ class ShibuyaScraper(BaseScraper):
         
         try:
             # カレンダーが表示されるまで待つ
-            page.wait_for_selector(".calendar, [class*='calendar'], table", timeout=10000)
+            self.timed_step("calendar", 10000, lambda timeout: page.wait_for_selector(
+                ".calendar, [class*='calendar'], table", timeout=timeout
+            ))
             
             # 月が正しいことを確認（#calendar_month または .calendar_month）
             month_display = page.locator("#calendar_month, .calendar_month").first
@@ -723,6 +716,71 @@ class ShibuyaScraper(BaseScraper):
             self.log_error(f"Error closing modal: {e}")
             return False
     
+    def _extract_modal_from_html(self, page: Page, room_availability: Dict[str, Dict[str, str]]) -> bool:
+        """
+        モーダルのHTMLをlxmlで解析し、空き時間帯をroom_availabilityに反映
+        
+        Returns:
+            解析できた場合True（locatorバックエンド指定時や解析失敗時はFalse）
+        """
+        if self.extraction_backend != 'lxml':
+            return False
+        
+        try:
+            parsed_rooms = html_parser.parse_shibuya_modal(page.content())
+        except Exception as e:
+            self.log_warning("lxml extraction failed, falling back to locators: %s", e)
+            return False
+        
+        if parsed_rooms is None:
+            return False
+        
+        for room_name, slots in parsed_rooms.items():
+            self.log_info("Found room: %s %s", room_name, sorted(slots))
+            if room_name in room_availability:
+                room_availability[room_name].update(slots)
+        return True
+    
+    def _extract_modal_with_locators(self, page: Page, room_availability: Dict[str, Dict[str, str]]):
+        """モーダル内の空き時間帯をlocatorで抽出し、room_availabilityに反映"""
+        # モーダル内のデータを抽出
+        modal = page.locator(".ant-modal-content").first
+        
+        # 各部屋の情報を抽出
+        room_sections = modal.locator("h3.list-header").all()
+        
+        for i, room_header in enumerate(room_sections):
+            # 部屋名を取得（例: "文化総合センター大和田（練習室） 練習室２"）
+            full_room_name = room_header.text_content().strip()
+            self.log_info("Found room: %s", full_room_name)
+            
+            # 部屋名を抽出（最後のスペース以降を取得）
+            room_name = full_room_name.split(" ")[-1] if " " in full_room_name else full_room_name
+            
+            # この部屋の時間帯情報を取得
+            # チェックボックスグループを探す
+            checkbox_group_id = f"frameSelectForm_inputList_{i}_frameIndexes"
+            checkbox_group = modal.locator(f"#{checkbox_group_id}").first
+            
+            if checkbox_group.count() > 0:
+                # 時間帯情報を取得（pタグとlabelタグの両方に対応）
+                time_slots = checkbox_group.locator(".modal_timelist1 p, .modal_timelist1 label").all()
+                
+                for time_slot in time_slots:
+                    time_text = time_slot.text_content().strip()
+                    self.log_cell("  Time slot: %s", time_text)
+                    
+                    # 時間帯を判定
+                    if "9:00" in time_text or "09:00" in time_text:
+                        if room_name in room_availability:
+                            room_availability[room_name]["morning"] = "available"
+                    elif "13:00" in time_text:
+                        if room_name in room_availability:
+                            room_availability[room_name]["afternoon"] = "available"
+                    elif "18:00" in time_text:
+                        if room_name in room_availability:
+                            room_availability[room_name]["evening"] = "available"
+    
     def extract_room_availability(self, page: Page, date: str) -> List[Dict]:
         """
         各部屋の空き状況を抽出
@@ -749,57 +807,18 @@ class ShibuyaScraper(BaseScraper):
         try:
             # モーダルが表示されるまで待つ
             try:
-                page.wait_for_selector(".ant-modal-content", timeout=5000)
+                self.timed_step("modal", 5000, lambda timeout: page.wait_for_selector(".ant-modal-content", timeout=timeout))
                 self.log_info("Modal detected, extracting availability from modal")
                 
-                # モーダル内のデータを抽出
-                modal = page.locator(".ant-modal-content").first
-                
-                # 各部屋の情報を抽出
-                room_sections = modal.locator("h3.list-header").all()
-                
-                for i, room_header in enumerate(room_sections):
-                    # 部屋名を取得（例: "文化総合センター大和田（練習室） 練習室２"）
-                    full_room_name = room_header.text_content().strip()
-                    self.log_info(f"Found room: {full_room_name}")
-                    
-                    # 部屋名を抽出（最後のスペース以降を取得）
-                    room_name = full_room_name.split(" ")[-1] if " " in full_room_name else full_room_name
-                    
-                    # この部屋の時間帯情報を取得
-                    # チェックボックスグループを探す
-                    checkbox_group_id = f"frameSelectForm_inputList_{i}_frameIndexes"
-                    checkbox_group = modal.locator(f"#{checkbox_group_id}").first
-                    
-                    if checkbox_group.count() > 0:
-                        # 時間帯情報を取得（pタグとlabelタグの両方に対応）
-                        time_slots = checkbox_group.locator(".modal_timelist1 p, .modal_timelist1 label").all()
-                        
-                        for time_slot in time_slots:
-                            time_text = time_slot.text_content().strip()
-                            self.log_info(f"  Time slot: {time_text}")
-                            
-                            # 時間帯を判定
-                            if "9:00" in time_text or "09:00" in time_text:
-                                if room_name in room_availability:
-                                    room_availability[room_name]["morning"] = "available"
-                            elif "13:00" in time_text:
-                                if room_name in room_availability:
-                                    room_availability[room_name]["afternoon"] = "available"
-                            elif "18:00" in time_text:
-                                if room_name in room_availability:
-                                    room_availability[room_name]["evening"] = "available"
+                # HTMLを一度だけ取得してlxmlで解析（失敗時は従来のlocator抽出）
+                if not self._extract_modal_from_html(page, room_availability):
+                    self._extract_modal_with_locators(page, room_availability)
                 
                 # 結果を作成
                 for room_name in self.PRACTICE_ROOMS:
-                    results.append({
-                        "centerName": self.get_center_name(),
-                        "facilityName": self.studios[0],
-                        "roomName": room_name,
-                        "date": date,
-                        "timeSlots": room_availability[room_name],
-                        "lastUpdated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                    })
+                    results.append(self.create_facility_record(
+                        self.studios[0], room_name, room_availability[room_name], date=date
+                    ))
                 
                 self.log_info(f"Extracted {len(results)} room records from modal")
                 return results
@@ -842,20 +861,11 @@ class ShibuyaScraper(BaseScraper):
                             # 各時間帯のセルを確認
                             for i, slot_key in enumerate(["morning", "afternoon", "evening"], start=1):
                                 if i < len(cells):
-                                    cell_text = cells[i].text_content().strip()
-                                    if "○" in cell_text or "◯" in cell_text or "空" in cell_text:
-                                        time_slots[slot_key] = "available"
-                                    elif "×" in cell_text or "✕" in cell_text or "満" in cell_text:
-                                        time_slots[slot_key] = "booked"
+                                    time_slots[slot_key] = classify_cell(cells[i].text_content().strip())
                             
-                            results.append({
-                                "centerName": self.get_center_name(),
-                                "facilityName": self.studios[0],
-                                "roomName": room_name_cell or self.get_room_name(self.studios[0]),
-                                "date": date,
-                                "timeSlots": time_slots,
-                                "lastUpdated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                            })
+                            results.append(self.create_facility_record(
+                                self.studios[0], room_name_cell or self.get_room_name(self.studios[0]), time_slots, date=date
+                            ))
             
             # カード形式の場合
             if not results:
@@ -875,37 +885,22 @@ class ShibuyaScraper(BaseScraper):
                         elem_text = elem.text_content().strip()
                         for time_key, slot_key in time_slot_map.items():
                             if time_key in elem_text:
-                                if "○" in elem_text or "◯" in elem_text or "空" in elem_text:
-                                    time_slots[slot_key] = "available"
-                                elif "×" in elem_text or "✕" in elem_text or "満" in elem_text:
-                                    time_slots[slot_key] = "booked"
+                                status = classify_text(strip_time_ranges(elem_text))
+                                if status in ("available", "booked"):
+                                    time_slots[slot_key] = status
                                 break
                     
-                    results.append({
-                        "centerName": self.get_center_name(),
-                        "facilityName": self.studios[0],
-                        "roomName": room_name,
-                        "date": date,
-                        "timeSlots": time_slots,
-                        "lastUpdated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                    })
+                    results.append(self.create_facility_record(
+                        self.studios[0], room_name, time_slots, date=date
+                    ))
             
             if not results:
                 self.log_warning("No room availability data found")
                 # 各練習室のbookedデータを返す
                 for room_name in self.PRACTICE_ROOMS:
-                    results.append({
-                        "centerName": self.get_center_name(),
-                        "facilityName": self.studios[0],
-                        "roomName": room_name,
-                        "date": date,
-                        "timeSlots": {
-                            "morning": "booked",
-                            "afternoon": "booked",
-                            "evening": "booked"
-                        },
-                        "lastUpdated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                    })
+                    results.append(self.create_facility_record(
+                        self.studios[0], room_name, {"morning": "booked", "afternoon": "booked", "evening": "booked"}, date=date
+                    ))
             
             return results
             
@@ -913,6 +908,91 @@ class ShibuyaScraper(BaseScraper):
             self.log_error(f"Error extracting room availability: {e}")
             return []
     
+    def is_app_loaded(self, page: Page) -> bool:
+        """Reactアプリのルート要素があるか"""
+        return page.locator("#root").count() > 0
+    
+    def is_search_form(self, page: Page) -> bool:
+        """検索ボタンのある検索画面にいるか"""
+        return page.locator("button:has-text('検索する'), .ant-btn:has-text('検索')").count() > 0
+    
+    def open_top_page(self, page: Page) -> bool:
+        """トップページにアクセス"""
+        self.log_info("Accessing: %s", self.base_url)
+        self.timed_step("goto", 60000, lambda timeout: page.goto(self.base_url, wait_until="networkidle", timeout=timeout))
+        return True
+    
+    def build_steps(self, target_date: datetime) -> StepPipeline:
+        """
+        検索結果のカレンダーを表示するまでのステップを作成
+        
+        日付の選択は「空きがない」ことも正常な結果のため、パイプラインには含めない
+        """
+        return StepPipeline([
+            PipelineStep("open_top", self.open_top_page,
+                         error_message="Scraping failed - navigation error"),
+            PipelineStep("search", self.navigate_to_search,
+                         precondition=self.is_app_loaded,
+                         error_message="Scraping failed - navigation error"),
+            PipelineStep("criteria", lambda page: self.select_search_criteria(page, target_date),
+                         precondition=self.is_search_form,
+                         error_message="Scraping failed - criteria selection error"),
+            PipelineStep("execute_search", self.execute_search,
+                         precondition=self.is_search_form,
+                         error_message="Scraping failed - search execution error"),
+        ], logger=self.logger, observer=self.debug_recorder())
+    
+    # ページパーキング（PAGE_PARKING_ENABLED=true）のフック
+    
+    def is_search_result(self, page: Page) -> bool:
+        """検索結果のカレンダー（モーダルを開いていない状態）にいるか"""
+        if page.locator("#calendar_month, .calendar_month").count() == 0:
+            return False
+        modal = page.locator(".ant-modal-content").first
+        return modal.count() == 0 or not modal.is_visible()
+    
+    def park_page(self, page: Page) -> bool:
+        """検索結果のカレンダーまで遷移して待機させる（検索条件は日付に依存しない）"""
+        if not self.try_deep_link(page, datetime.now(), self.is_search_result):
+            self.build_steps(datetime.now()).run(page)
+        return True
+    
+    def is_parked(self, page: Page) -> bool:
+        """待機させる画面（検索結果のカレンダー）にいるか"""
+        return self.is_search_result(page)
+    
+    def return_to_parked(self, page: Page) -> bool:
+        """日付のモーダルを閉じて検索結果のカレンダーに戻る"""
+        return self.close_modal(page) and self.is_search_result(page)
+    
+    def _scrape_date_from_result(self, page: Page, target_date: datetime, date: str) -> List[Dict]:
+        """検索結果のカレンダー（待機中のページ・deep linkで開いたページ）で目標月に移動し、日付のステップだけを実行"""
+        self._move_to_month(page, target_date)
+        self.need_month_change = True
+        return self._scrape_date_on_page(page, target_date, date)
+    
+    def _scrape_date_on_page(self, page: Page, target_date: datetime, date: str) -> List[Dict]:
+        """検索結果のカレンダーで日付を選択し、空き状況を抽出"""
+        # 日付を選択
+        if not self.navigate_to_date(page, target_date):
+            self.log_warning("Date %s is not available", target_date.day)
+            # 全ての練習室について予約済みとして記録
+            results = []
+            for room_name in self.get_room_names():
+                results.append(self.create_facility_record(
+                    self.studios[0], room_name, {"morning": "booked", "afternoon": "booked", "evening": "booked"}, date=date
+                ))
+            return results
+        
+        # 空き状況を抽出
+        results = self.extract_room_availability(page, date)
+        
+        if not results:
+            self.log_warning("No availability data extracted")
+            raise RuntimeError("Scraping failed - no data extracted")
+        
+        return results
+    
     def scrape_availability(self, date: str) -> List[Dict]:
         """
         指定日付の空き状況をスクレイピング（渋谷区用にオーバーライド）
@@ -929,6 +1009,11 @@ class ShibuyaScraper(BaseScraper):
         target_date = datetime.strptime(date, "%Y-%m-%d")
         
         try:
+            parking = None if self._har_mode() else get_page_parking()
+            if parking is not None:
+                # 検索結果のカレンダーで待機中のページで日付のステップだけを実行
+                return parking.run(self, lambda page: self._scrape_date_from_result(page, target_date, date))
+            
             with sync_playwright() as p:
                 # ブラウザを起動
                 browser = self.setup_browser(p)
@@ -937,56 +1022,17 @@ class ShibuyaScraper(BaseScraper):
                     context = self.create_browser_context(browser)
                     page = context.new_page()
                     
-                    # トップページにアクセス
-                    self.log_info(f"Accessing: {self.base_url}")
-                    page.goto(self.base_url, wait_until="networkidle", timeout=60000)
-                    
-                    # 検索画面へ遷移
-                    if not self.navigate_to_search(page):
-                        self.log_error("Failed to navigate to search")
-                        raise RuntimeError("Scraping failed - navigation error")
-                    
-                    # 検索条件を選択
-                    if not self.select_search_criteria(page, target_date):
-                        self.log_error("Failed to select search criteria")
-                        raise RuntimeError("Scraping failed - criteria selection error")
-                    
-                    # 検索を実行
-                    if not self.execute_search(page):
-                        self.log_error("Failed to execute search")
-                        raise RuntimeError("Scraping failed - search execution error")
-                    
-                    # 日付を選択
-                    if not self.navigate_to_date(page, target_date):
-                        self.log_warning(f"Date {target_date.day} is not available")
-                        # 全ての練習室について予約済みとして記録
-                        results = []
-                        for room_name in self.get_room_names():
-                            results.append({
-                                "centerName": self.get_center_name(),
-                                "facilityName": self.studios[0],
-                                "roomName": room_name,
-                                "date": date,
-                                "timeSlots": {
-                                    "morning": "booked",
-                                    "afternoon": "booked",
-                                    "evening": "booked"
-                                },
-                                "lastUpdated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                            })
-                        return results
+                    if self.try_deep_link(page, target_date, self.is_search_result):
+                        # deep linkで検索結果のカレンダーに着いた場合は月の移動から行う
+                        return self._scrape_date_from_result(page, target_date, date)
                     
-                    # 空き状況を抽出
-                    results = self.extract_room_availability(page, date)
+                    # 検索実行までをステップ単位で再試行しながら実行
+                    self.build_steps(target_date).run(page)
                     
-                    if not results:
-                        self.log_warning("No availability data extracted")
-                        raise RuntimeError("Scraping failed - no data extracted")
-                    
-                    return results
+                    return self._scrape_date_on_page(page, target_date, date)
                     
                 finally:
-                    browser.close()
+                    self.close_browser(browser)
                     
         except Exception as e:
             self.log_error(f"Error during scraping: {e}")
@@ -1069,16 +1115,83 @@ class ShibuyaScraper(BaseScraper):
         self.log_info(f"\n=== Starting Shibuya multiple dates scraping for {len(dates)} dates ===")
         self.log_info(f"Dates: {', '.join(dates)}")
         
+        # 前回の実行で保存済みの日付はスキップ（すべて保存済みならブラウザを起動しない）
+        dates, results = self._skip_checkpointed_dates(dates)
+        if not dates:
+            return self._summarize_results(results)
+        
+        # サイト停止中はブラウザを起動しない
+        return self._with_circuit_breaker(dates, results, self._scrape_dates_in_session)
+    
+    def plan_sessions(self, dates: List[str], max_sessions: int = 1) -> List[List[str]]:
+        """1回の検索で全日付を処理する（月の移動は検索結果のカレンダー上で行うため、分けると検索をやり直すだけになる）"""
+        return [sorted(dates)] if dates else []
+    
+    def _move_to_month(self, page: Page, target_month_date: datetime):
+        """検索結果のカレンダーを目標月に移動（表示中の月と同じ場合は何もしない）"""
+        target_year_month = f"{target_month_date.year}年{target_month_date.month}月"
+        
+        # 現在の月を確認
+        month_display = page.locator("#calendar_month, .calendar_month").first
+        if month_display.count() > 0:
+            current_month_text = month_display.text_content()
+            self.log_info("Current month: %s", current_month_text)
+            
+            # 月が異なる場合は移動
+            if target_year_month not in current_month_text:
+                self.log_info("Need to navigate to %s", target_year_month)
+                # 月移動ボタンで移動
+                months_to_move = self._calculate_months_difference(current_month_text, target_year_month)
+                if months_to_move > 0:
+                    next_button = page.locator("div.next_month[style*='cursor: pointer']").first
+                    for _ in range(months_to_move):
+                        if next_button.count() > 0:
+                            next_button.click()
+                            page.wait_for_timeout(2000)
+                            self.wait_for_loading_complete(page)
+                elif months_to_move < 0:
+                    prev_button = page.locator("div.prev_month[style*='cursor: pointer']").first
+                    for _ in range(abs(months_to_move)):
+                        if prev_button.count() > 0:
+                            prev_button.click()
+                            page.wait_for_timeout(2000)
+                            self.wait_for_loading_complete(page)
+    
+    def _recycle_search_page(self, browser, context, target_date: datetime, governor: ResourceGovernor):
+        """
+        コンテキストを作り直し、検索結果のカレンダーまで再度遷移する
+        
+        Returns:
+            (新しいコンテキスト, 新しいページ)
+        """
+        self.log_info("Recycling browser context (%s)", governor.last_reason)
+        try:
+            context.close()
+        except Exception as e:
+            self.log_warning("Failed to close old context: %s", e)
+        
+        context = self.create_browser_context(browser)
+        page = context.new_page()
+        self.build_steps(target_date).run(page)
+        self._move_to_month(page, target_date)
+        governor.recycled()
+        return context, page
+    
+    def _scrape_dates_in_session(self, dates: List[str], results: Dict[str, Dict]) -> Dict:
+        """1つのブラウザセッションで複数日付を処理（scrape_multiple_datesの本体）"""
         # 日付を年月でグループ化（base.pyから継承されたメソッドを使用）
         grouped_dates = self._group_dates_by_month(dates)
         self.log_info(f"Grouped into {len(grouped_dates)} month(s)")
         
-        results = {}
+        # モーダルの開閉を繰り返すとChromiumのメモリが増えるため、しきい値でページを作り直す
+        governor = ResourceGovernor()
         
         try:
             with sync_playwright() as p:
                 # ブラウザを起動
                 browser = self.setup_browser(p)
+                # メモリはこのスクレイパーのドライバ・Chromiumのみを計測する
+                governor.watch(playwright_driver_pid(p))
                 
                 try:
                     context = self.create_browser_context(browser)
@@ -1086,7 +1199,7 @@ class ShibuyaScraper(BaseScraper):
                     
                     # トップページにアクセス
                     self.log_info(f"Accessing: {self.base_url}")
-                    page.goto(self.base_url, wait_until="networkidle", timeout=60000)
+                    self.timed_step("goto", 60000, lambda timeout: page.goto(self.base_url, wait_until="networkidle", timeout=timeout))
                     
                     # 検索画面へ遷移
                     if not self.navigate_to_search(page):
@@ -1124,76 +1237,42 @@ class ShibuyaScraper(BaseScraper):
                     
                     # 月ごとに処理
                     for year_month, month_dates in grouped_dates.items():
+                        # 期限切れ・キャンセル時は残りの日付を処理せずにブラウザを閉じる
+                        if self._stop_if_deadline(dates, results):
+                            break
                         self.log_info(f"\n--- Processing month: {year_month} ({len(month_dates)} dates) ---")
                         
                         # 最初の日付を使って月に移動
                         target_month_date = datetime.strptime(month_dates[0], "%Y-%m-%d")
-                        target_year_month = f"{target_month_date.year}年{target_month_date.month}月"
-                        
-                        # 現在の月を確認
-                        month_display = page.locator("#calendar_month, .calendar_month").first
-                        if month_display.count() > 0:
-                            current_month_text = month_display.text_content()
-                            self.log_info(f"Current month: {current_month_text}")
-                            
-                            # 月が異なる場合は移動
-                            if target_year_month not in current_month_text:
-                                self.log_info(f"Need to navigate to {target_year_month}")
-                                # 月移動ボタンで移動
-                                months_to_move = self._calculate_months_difference(current_month_text, target_year_month)
-                                if months_to_move > 0:
-                                    next_button = page.locator("div.next_month[style*='cursor: pointer']").first
-                                    for _ in range(months_to_move):
-                                        if next_button.count() > 0:
-                                            next_button.click()
-                                            page.wait_for_timeout(2000)
-                                            self.wait_for_loading_complete(page)
-                                elif months_to_move < 0:
-                                    prev_button = page.locator("div.prev_month[style*='cursor: pointer']").first
-                                    for _ in range(abs(months_to_move)):
-                                        if prev_button.count() > 0:
-                                            prev_button.click()
-                                            page.wait_for_timeout(2000)
-                                            self.wait_for_loading_complete(page)
+                        self._move_to_month(page, target_month_date)
+                        governor.tick()
                         
                         # この月の各日付を処理
                         for date_str in month_dates:
+                            if self._stop_if_deadline(dates, results):
+                                break
                             target_date = datetime.strptime(date_str, "%Y-%m-%d")
                             self.log_info(f"\nProcessing date: {date_str}")
                             
                             try:
+                                # メモリ・操作回数がしきい値を超えていれば作り直して同じ画面に戻る
+                                if governor.should_recycle():
+                                    context, page = self._recycle_search_page(browser, context, target_date, governor)
+                                governor.tick()
+                                
                                 # 日付をクリック（モーダルが開く）
                                 if not self.navigate_to_date(page, target_date):
                                     self.log_warning(f"Date {date_str} is not available")
                                     # 全ての練習室について予約済みとして記録
                                     room_results = []
                                     for room_name in self.get_room_names():
-                                        room_results.append({
-                                            "centerName": self.get_center_name(),
-                                            "facilityName": self.studios[0],
-                                            "roomName": room_name,
-                                            "date": date_str,
-                                            "timeSlots": {
-                                                "morning": "booked",
-                                                "afternoon": "booked",
-                                                "evening": "booked"
-                                            },
-                                            "lastUpdated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                                        })
+                                        room_results.append(self.create_facility_record(
+                                            self.studios[0], room_name, {"morning": "booked", "afternoon": "booked", "evening": "booked"}, date=date_str
+                                        ))
                                     
                                     # Cosmos DBに保存
-                                    if self._save_to_cosmos_immediately(date_str, room_results):
-                                        results[date_str] = {
-                                            "status": "success",
-                                            "data": room_results
-                                        }
+                                    if self._save_date_result(date_str, room_results, results):
                                         self.log_info(f"✅ Saved booked status for {date_str}")
-                                    else:
-                                        results[date_str] = {
-                                            "status": "error",
-                                            "message": "Failed to save to database",
-                                            "error_type": "DATABASE_ERROR"
-                                        }
                                     continue
                                 
                                 # モーダルから空き状況を抽出
@@ -1201,18 +1280,9 @@ class ShibuyaScraper(BaseScraper):
                                 
                                 if room_availability:
                                     # Cosmos DBに即座に保存
-                                    if self._save_to_cosmos_immediately(date_str, room_availability):
-                                        results[date_str] = {
-                                            "status": "success",
-                                            "data": room_availability
-                                        }
+                                    if self._save_date_result(date_str, room_availability, results):
                                         self.log_info(f"✅ Successfully saved {len(room_availability)} rooms for {date_str}")
                                     else:
-                                        results[date_str] = {
-                                            "status": "error",
-                                            "message": "Failed to save to database",
-                                            "error_type": "DATABASE_ERROR"
-                                        }
                                         self.log_warning(f"⚠️ Failed to save data for {date_str}")
                                 else:
                                     results[date_str] = {
@@ -1238,7 +1308,7 @@ class ShibuyaScraper(BaseScraper):
                                 
                             except Exception as e:
                                 self.log_error(f"Error processing date {date_str}: {e}")
-                                results[date_str] = {
+                                results[date_str] = self._deadline_result() or {
                                     "status": "error",
                                     "message": f"Processing failed: {str(e)}",
                                     "error_type": "SCRAPING_ERROR",
@@ -1252,12 +1322,14 @@ class ShibuyaScraper(BaseScraper):
                                     pass
                     
                 finally:
-                    browser.close()
+                    self._log_memory_telemetry(governor)
+                    self.close_browser(browser)
                     
         except Exception as e:
             self.log_error(f"Fatal error during multiple dates scraping: {e}")
             self.log_error(traceback.format_exc())
-            # 処理されていない日付にエラーを設定
+            # 処理されていない日付にエラーを設定（期限切れ・キャンセルによる中断はその結果）
+            self._stop_if_deadline(dates, results)
             for date in dates:
                 if date not in results:
                     results[date] = {
@@ -1267,6 +1339,9 @@ class ShibuyaScraper(BaseScraper):
                         "details": str(e)
                     }
         
+        # 非同期保存の完了を待ち、保存に失敗した日付を反映
+        self._flush_pending_writes(results)
+        
         # 結果をサマリー化（base.pyから継承されたメソッドを使用）
         summary = self._summarize_results(results)
         
@@ -0,0 +1,153 @@
+"""
+セルの空き状況判定モジュール
+各施設サイトのセル表記（○/◯/×/✕/－/−/△ など）を事前に構築した文字テーブルで判定し、
+午後1・午後2の統合まで含めて全スクレイパーで同じ規則を使う
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+from ..types.time_slots import TIME_SLOT_KEYS
+
+
+# 記号 → (優先度, ステータス)
+# 1つのセルに複数の記号が含まれる場合は優先度の小さい方を採用する
+# （目黒区の時間帯別空き状況と同じく、ハイフン類を最優先で「判定不可」とする）
+_MARK_TABLE: Dict[str, tuple] = {
+    "－": (0, "unknown"),
+    "-": (0, "unknown"),
+    "−": (0, "unknown"),
+    "○": (1, "available"),
+    "◯": (1, "available"),
+    "×": (2, "booked"),
+    "✕": (2, "booked"),
+    # 三角は部分的に予約済み（とりあえずavailableとする）
+    "△": (3, "available"),
+    # 渋谷区のテーブル表示用
+    "空": (4, "available"),
+    "満": (5, "booked"),
+}
+
+_MARK_CHARS = frozenset(_MARK_TABLE)
+
+# 時刻表記（"9:00-12:00", "13:00〜17:00" など）。区切りのハイフンを記号と誤判定しないよう除外する
+_TIME_RANGE_PATTERN = re.compile(r'\d{1,2}:\d{2}(?:\s*[-−－〜~]\s*\d{1,2}:\d{2})?')
+
+
+class _KeepMarks(dict):
+    """
+    記号以外の文字をすべて削除するstr.translate用テーブル
+    初出の文字のみ判定し、以降は辞書引きで済ませる
+    """
+
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        value = char if char in _MARK_CHARS else None
+        self[codepoint] = value
+        return value
+
+
+_TRANSLATE_TABLE = _KeepMarks()
+
+
+def classify_text(text: Optional[str]) -> Optional[str]:
+    """
+    セルのテキストからステータスを判定
+
+    Args:
+        text: セルのテキスト
+
+    Returns:
+        "available" / "booked" / "unknown"。記号が含まれない場合はNone
+    """
+    if not text:
+        return None
+
+    marks = text.translate(_TRANSLATE_TABLE)
+    if not marks:
+        return None
+    return min(_MARK_TABLE[mark] for mark in marks)[1]
+
+
+def strip_time_ranges(text: Optional[str]) -> str:
+    """テキストから時刻表記を取り除く"""
+    return _TIME_RANGE_PATTERN.sub("", text or "")
+
+
+def classify_cell(text: Optional[str], has_checkbox: bool = False, default: str = "unknown") -> str:
+    """
+    セルのステータスを判定（記号がない場合はチェックボックスの有無で判定）
+
+    Args:
+        text: セルのテキスト
+        has_checkbox: セル内に選択用のチェックボックスがあるか
+        default: 記号もチェックボックスもない場合のステータス
+
+    Returns:
+        ステータス文字列
+    """
+    status = classify_text(text)
+    if status is not None:
+        return status
+    return "available" if has_checkbox else default
+
+
+def classify_cells(texts: Iterable[Optional[str]],
+                   checkboxes: Optional[Iterable[bool]] = None,
+                   default: str = "unknown") -> List[str]:
+    """
+    複数セルのステータスを一括判定
+
+    Args:
+        texts: セルのテキストのリスト
+        checkboxes: 各セルにチェックボックスがあるか（省略時はすべてFalse）
+        default: 記号もチェックボックスもない場合のステータス
+
+    Returns:
+        textsと同じ順序のステータスのリスト
+    """
+    texts = list(texts)
+    flags = list(checkboxes) if checkboxes is not None else [False] * len(texts)
+    return [classify_cell(text, flag, default) for text, flag in zip(texts, flags)]
+
+
+# 午後1・午後2 → 午後の統合規則
+_AFTERNOON_MERGE = {
+    ("available", "available"): "available",
+    ("booked", "available"): "booked_1",
+    ("available", "booked"): "booked_2",
+    ("booked", "booked"): "booked",
+}
+
+
+def merge_afternoon(afternoon_1: str, afternoon_2: str) -> str:
+    """
+    午後1と午後2のステータスを統合（目黒区）
+
+    Returns:
+        両方空き: available / 午後1のみ予約済み: booked_1 /
+        午後2のみ予約済み: booked_2 / 両方予約済み: booked / それ以外: unknown
+    """
+    return _AFTERNOON_MERGE.get((afternoon_1, afternoon_2), "unknown")
+
+
+def build_room_slots(room_slots: Dict[str, str]) -> Dict[str, str]:
+    """
+    時間帯ごとのステータスを morning/afternoon/evening の3区分に整える
+    afternoon_1/afternoon_2 がある場合は統合し、不足している時間帯はunknownで補完する
+
+    Args:
+        room_slots: {"morning": ..., "afternoon_1": ..., "afternoon_2": ..., "evening": ...}
+
+    Returns:
+        {"morning": ..., "afternoon": ..., "evening": ...}
+    """
+    if "afternoon_1" in room_slots and "afternoon_2" in room_slots:
+        room_slots["afternoon"] = merge_afternoon(
+            room_slots.pop("afternoon_1"), room_slots.pop("afternoon_2")
+        )
+
+    for slot in TIME_SLOT_KEYS:
+        if slot not in room_slots:
+            room_slots[slot] = "unknown"
+
+    return room_slots
@@ -0,0 +1,192 @@
+"""
+ステップ単位の再試行パイプライン
+画面遷移の各ステップに前提条件（どの画面にいるべきか）と再試行ポリシーを持たせ、
+失敗したステップを最初からではなく直近の正常な画面状態からやり直す
+"""
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils.deadlines import ScrapeCancelledError, check_deadline
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """ステップの再試行ポリシー"""
+    max_attempts: int = 2
+    backoff_ms: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """
+        環境変数から作成
+        SCRAPER_STEP_MAX_ATTEMPTS（デフォルト: 2）、SCRAPER_STEP_BACKOFF_MS（デフォルト: 1000）
+        """
+        return cls(
+            max_attempts=max(1, int(os.getenv('SCRAPER_STEP_MAX_ATTEMPTS', '2'))),
+            backoff_ms=max(0, int(os.getenv('SCRAPER_STEP_BACKOFF_MS', '1000')))
+        )
+
+    def backoff_seconds(self, attempt: int) -> float:
+        """attempt回目の失敗後の待機時間（秒）。失敗回数に比例して延ばす"""
+        return self.backoff_ms * attempt / 1000
+
+
+@dataclass
+class PipelineStep:
+    """
+    画面遷移の1ステップ
+
+    Attributes:
+        name: ステップ名（ログ・エラーメッセージ用）
+        action: ページを受け取り、成功時にTruthyな値を返す処理（例外も失敗として扱う）
+        precondition: ステップを実行できる画面にいるかを判定する関数（Noneの場合は常に実行可能）
+        retry: 再試行ポリシー（Noneの場合はパイプラインのデフォルト）
+        retry_from: 失敗時に必ず戻るステップ名（再実行すると状態が崩れる操作用）
+        error_message: 再試行を使い切ったときの例外メッセージ
+    """
+    name: str
+    action: Callable[[Any], Any]
+    precondition: Optional[Callable[[Any], bool]] = None
+    retry: Optional[RetryPolicy] = None
+    retry_from: Optional[str] = None
+    error_message: Optional[str] = None
+
+
+class StepFailedError(RuntimeError):
+    """ステップが再試行を使い切っても成功しなかった"""
+
+    def __init__(self, message: str, step_name: str, attempts: int):
+        super().__init__(message)
+        self.step_name = step_name
+        self.attempts = attempts
+
+
+class StepAbortedError(Exception):
+    """
+    再試行しても結果が変わらない失敗（例: 対象日付に選択できるセルがない）
+    ステップのactionが送出すると、再試行せずにそのまま呼び出し元へ伝える
+    """
+
+
+@dataclass
+class StepPipeline:
+    """
+    前提条件付きステップの実行器
+
+    ステップが失敗した場合は、失敗したステップから遡って前提条件を満たす
+    直近のステップを探し、そこから処理を再開する
+
+    observerを渡した場合は、次のメソッドで進行を通知する（例外は無視する）
+        step_finished(name, page, error, duration_ms): ステップの試行ごと（成功時のerrorはNone）
+        run_failed(page, step_name): 再試行を使い切ったとき
+        run_finished(page, elapsed_ms): 全ステップが成功したとき
+    """
+    steps: List[PipelineStep]
+    default_retry: RetryPolicy = field(default_factory=RetryPolicy.from_env)
+    logger: Optional[logging.Logger] = None
+    sleep: Callable[[float], None] = time.sleep
+    observer: Optional[Any] = None
+
+    def __post_init__(self):
+        names = [step.name for step in self.steps]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate step names: {names}")
+        for step in self.steps:
+            if step.retry_from is not None and step.retry_from not in names[:names.index(step.name) + 1]:
+                raise ValueError(f"retry_from of '{step.name}' must refer to itself or an earlier step: {step.retry_from}")
+        self._index = {name: index for index, name in enumerate(names)}
+        self._logger = self.logger or logging.getLogger(__name__)
+
+    def _precondition_holds(self, step: PipelineStep, page) -> bool:
+        """前提条件を判定（判定中の例外は満たしていないものとして扱う）"""
+        if step.precondition is None:
+            return True
+        try:
+            return bool(step.precondition(page))
+        except Exception as e:
+            self._logger.debug("Precondition check of '%s' raised: %s", step.name, e)
+            return False
+
+    def _resume_index(self, start: int, page) -> int:
+        """startから遡って前提条件を満たす直近のステップの位置を返す"""
+        for index in range(start, -1, -1):
+            if self._precondition_holds(self.steps[index], page):
+                return index
+        return 0
+
+    def _notify(self, event: str, *args):
+        """observerに通知（observerの失敗でステップを止めない）"""
+        if self.observer is None:
+            return
+        try:
+            getattr(self.observer, event)(*args)
+        except Exception as e:
+            self._logger.debug("Step observer %s raised: %s", event, e)
+
+    def run(self, page) -> Dict[str, Any]:
+        """
+        全ステップを実行
+
+        Args:
+            page: 各ステップに渡すページ
+
+        Returns:
+            ステップ名 → actionの戻り値
+
+        Raises:
+            StepFailedError: いずれかのステップが再試行を使い切った場合
+            ScrapeCancelledError: 実行の期限切れ・キャンセル（ステップの間で確認し、再試行しない）
+            StepAbortedError: ステップのactionが送出した場合（再試行しない）
+        """
+        results: Dict[str, Any] = {}
+        failures: Dict[str, int] = {}
+        index = 0
+        run_started = time.perf_counter()
+
+        while index < len(self.steps):
+            check_deadline()
+            step = self.steps[index]
+            retry = step.retry or self.default_retry
+
+            started = time.perf_counter()
+            if not self._precondition_holds(step, page):
+                outcome, error = None, "precondition not met"
+            else:
+                try:
+                    outcome, error = step.action(page), None
+                except (ScrapeCancelledError, StepAbortedError):
+                    raise
+                except Exception as e:
+                    outcome, error = None, str(e)
+            self._notify("step_finished", step.name, page,
+                         None if outcome else (error or "no result"), (time.perf_counter() - started) * 1000)
+
+            if outcome:
+                results[step.name] = outcome
+                index += 1
+                continue
+
+            failures[step.name] = failures.get(step.name, 0) + 1
+            attempts = failures[step.name]
+            self._logger.warning(
+                "Step '%s' failed (attempt %d/%d)%s",
+                step.name, attempts, retry.max_attempts, f": {error}" if error else ""
+            )
+            if attempts >= retry.max_attempts:
+                self._notify("run_failed", page, step.name)
+                raise StepFailedError(
+                    step.error_message or f"Step '{step.name}' failed after {attempts} attempts",
+                    step.name,
+                    attempts
+                )
+
+            self.sleep(retry.backoff_seconds(attempts))
+            start = self._index[step.retry_from] if step.retry_from else index
+            index = self._resume_index(start, page)
+            self._logger.info("Resuming from step '%s'", self.steps[index].name)
+
+        self._notify("run_finished", page, (time.perf_counter() - run_started) * 1000)
+        return results
@@ -0,0 +1,381 @@
+"""
+Refresh Scheduler for keeping availability data fresh without on-demand scraping
+"""
+import os
+import threading
+import time
+from datetime import date as date_type
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..repositories.checkpoint_repository import get_checkpoint_repository
+from ..utils.admission_control import admission_ticket, admitted, get_admission_controller
+from ..utils.deadlines import Deadline, deadline_context, default_job_timeout_seconds
+from ..utils.structured_logging import get_logger, log_context, new_run_id
+
+logger = get_logger(__name__)
+
+
+class RefreshScheduler:
+    """
+    target_datesの日付を、更新が古いもの・日付が近いものから順に定期的に再取得するスケジューラー
+    最終更新日時は施設・日付ごとのチェックポイント（有効な場合）とこのスケジューラー自身の成功記録から判定する
+    """
+
+    DEFAULT_FACILITIES = ['ensemble', 'meguro', 'shibuya']
+
+    def __init__(self, interval_minutes: Optional[int] = None,
+                 target_dates_provider: Optional[Callable[[], List[str]]] = None,
+                 scraper_factory: Optional[Callable[[str], object]] = None,
+                 rate_limits_factory: Optional[Callable[[], object]] = None):
+        """
+        Initialize the refresh scheduler
+
+        Args:
+            interval_minutes: Refresh cycle interval in minutes (default from env or 30)
+            target_dates_provider: Returns the target dates (default: TargetDateRepository.get_target_dates)
+            scraper_factory: Creates a scraper for a facility key (default: ScrapeService.SCRAPERS)
+            rate_limits_factory: Creates the rate limits store shared with /scrape (default: create_rate_limits_store)
+        """
+        self.enabled = os.getenv('AUTO_REFRESH_ENABLED', 'false').lower() == 'true'
+
+        if interval_minutes:
+            self.interval_seconds = interval_minutes * 60
+        else:
+            env_interval = os.getenv('AUTO_REFRESH_INTERVAL_MINUTES', '30')
+            try:
+                self.interval_seconds = int(env_interval) * 60
+            except ValueError:
+                logger.warning("Invalid AUTO_REFRESH_INTERVAL_MINUTES: %s, using default 30 minutes", env_interval)
+                self.interval_seconds = 30 * 60
+
+        # 1サイクルで再取得する（施設, 日付）の最大数
+        self.budget_per_cycle = int(os.getenv('AUTO_REFRESH_BUDGET_PER_CYCLE', '6'))
+        # この時間（分）以内に更新された（施設, 日付）は再取得しない
+        self.stale_after_minutes = int(os.getenv('AUTO_REFRESH_STALE_MINUTES', '60'))
+        facilities = os.getenv('AUTO_REFRESH_FACILITIES', ','.join(self.DEFAULT_FACILITIES))
+        self.facilities = [f.strip() for f in facilities.split(',') if f.strip()]
+
+        self._target_dates_provider = target_dates_provider or self._default_target_dates
+        self._scraper_factory = scraper_factory or self._default_scraper
+        self._rate_limits_factory = rate_limits_factory or self._default_rate_limits
+        self._last_success: Dict[Tuple[str, str], datetime] = {}
+        self._cycle_lock = threading.Lock()
+        self.last_cycle: Optional[Dict] = None
+
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+        logger.info(
+            "RefreshScheduler initialized - Enabled: %s, Interval: %s minutes, Budget: %s",
+            self.enabled, self.interval_seconds // 60, self.budget_per_cycle
+        )
+
+    @staticmethod
+    def _default_target_dates() -> List[str]:
+        from ..repositories.storage import create_target_date_store
+        return create_target_date_store().get_target_dates()
+
+    @staticmethod
+    def _default_scraper(facility: str):
+        from .scrape_service import ScrapeService
+        return ScrapeService.SCRAPERS[facility]()
+
+    @staticmethod
+    def _default_rate_limits():
+        from ..repositories.storage import create_rate_limits_store
+        return create_rate_limits_store()
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    def start(self):
+        """
+        Start the refresh scheduler in a background thread
+        """
+        if not self.enabled:
+            logger.info("RefreshScheduler is disabled by configuration")
+            return
+
+        if self.running:
+            logger.warning("RefreshScheduler is already running")
+            return
+
+        self.running = True
+        self._stop_event.clear()
+
+        self.thread = threading.Thread(target=self._run_refresh_loop, daemon=True)
+        self.thread.start()
+
+        logger.info("RefreshScheduler started - will run every %s minutes", self.interval_seconds//60)
+
+    def stop(self):
+        """
+        Stop the refresh scheduler gracefully
+        """
+        if not self.running:
+            return
+
+        logger.info("Stopping RefreshScheduler...")
+        self.running = False
+        self._stop_event.set()
+
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+
+        logger.info("RefreshScheduler stopped")
+
+    def _run_refresh_loop(self):
+        """
+        Main loop that refreshes the stalest target dates periodically
+        """
+        logger.info("RefreshScheduler loop started")
+
+        # アプリの起動とwarmupを待つ
+        initial_delay = 60
+        if self._stop_event.wait(initial_delay):
+            return
+
+        while self.running:
+            try:
+                self.run_cycle()
+            except Exception as e:
+                logger.error("Error in refresh cycle: %s", e, exc_info=True)
+
+            if self._stop_event.wait(self.interval_seconds):
+                break
+
+        logger.info("RefreshScheduler loop ended")
+
+    def _last_updates(self) -> Dict[Tuple[str, str], datetime]:
+        """（施設, 日付）ごとの最終更新日時"""
+        last_updates = dict(self._last_success)
+        checkpoints = get_checkpoint_repository()
+        if checkpoints is None:
+            return last_updates
+
+        try:
+            for checkpoint in checkpoints.get_checkpoints():
+                key = (checkpoint['facility'], checkpoint['date'])
+                completed_at = datetime.fromisoformat(checkpoint['completedAt'])
+                if key not in last_updates or completed_at > last_updates[key]:
+                    last_updates[key] = completed_at
+        except Exception as e:
+            logger.warning("Failed to read checkpoints for refresh planning: %s", e)
+        return last_updates
+
+    def plan(self, target_dates: Optional[List[str]] = None) -> List[Dict]:
+        """
+        再取得する（施設, 日付）を優先度順に選ぶ
+
+        優先度 = 最終更新からの経過分 ÷ (日付までの日数 + 1)
+        一度も更新されていないものは最優先。過去日付と更新が新しいものは除外する
+
+        Args:
+            target_dates: 対象日付（省略時はtarget_datesから取得）
+
+        Returns:
+            [{"facility", "date", "ageMinutes", "priority"}, ...]（予算の件数まで）
+        """
+        if target_dates is None:
+            target_dates = self._target_dates_provider()
+
+        now = self._now()
+        today = now.astimezone().date()
+        last_updates = self._last_updates()
+        candidates = []
+
+        for date_str in sorted(set(target_dates)):
+            try:
+                target_day = date_type.fromisoformat(date_str)
+            except ValueError:
+                logger.warning("Invalid target date: %s", date_str)
+                continue
+            if target_day < today:
+                continue
+
+            days_ahead = (target_day - today).days
+            for facility in self.facilities:
+                updated_at = last_updates.get((facility, date_str))
+                age_minutes = None if updated_at is None else (now - updated_at).total_seconds() / 60
+                if age_minutes is not None and age_minutes < self.stale_after_minutes:
+                    continue
+                priority = float('inf') if age_minutes is None else age_minutes / (days_ahead + 1)
+                candidates.append({
+                    "facility": facility,
+                    "date": date_str,
+                    "ageMinutes": None if age_minutes is None else round(age_minutes, 1),
+                    "priority": priority
+                })
+
+        # 優先度が同じ場合は日付が近い方を先にする
+        candidates.sort(key=lambda c: (-c["priority"], c["date"], c["facility"]))
+        return candidates[:max(0, self.budget_per_cycle)]
+
+    def run_cycle(self) -> Dict:
+        """
+        1サイクル分の再取得を実行（他のサイクルが実行中の場合はスキップ）
+
+        Returns:
+            {"status", "planned", "results"}
+        """
+        if not self._cycle_lock.acquire(blocking=False):
+            logger.info("Refresh cycle already in progress, skipping")
+            return {"status": "skipped", "planned": [], "results": {}}
+
+        try:
+            start_time = time.time()
+            planned = self.plan()
+            if not planned:
+                logger.info("All target dates are fresh, nothing to refresh")
+                self.last_cycle = {"status": "success", "planned": [], "results": {}}
+                return self.last_cycle
+
+            # 施設ごとにまとめて1回のスクレイピングで処理する
+            by_facility: Dict[str, List[str]] = {}
+            for item in planned:
+                by_facility.setdefault(item["facility"], []).append(item["date"])
+
+            # /scrape のジョブと同じ期限で実行する（期限を過ぎた日付はエラーになる）
+            deadline = Deadline(default_job_timeout_seconds())
+            # 受付制御が有効な場合は /scrape と同じ実行枠を取ってからブラウザを開く
+            controller = get_admission_controller()
+            if controller is None:
+                results = self._refresh_planned(by_facility, deadline)
+            else:
+                ticket = controller.try_admit('refresh')
+                if ticket is None:
+                    logger.info("Scraper is saturated, skipping refresh cycle")
+                    self.last_cycle = {"status": "skipped", "planned": [], "results": {}, "reason": "saturated"}
+                    return self.last_cycle
+                with admission_ticket(ticket):
+                    results = admitted(self._refresh_planned, deadline=deadline)(by_facility, deadline)
+
+            if results is None:
+                logger.info("Scraping is already running, skipping refresh cycle")
+                self.last_cycle = {"status": "skipped", "planned": [], "results": {}, "reason": "already_running"}
+                return self.last_cycle
+
+            logger.info("Refresh cycle completed in %.1fs: %s date(s) planned", time.time() - start_time, len(planned))
+            self.last_cycle = {
+                "status": "success",
+                "planned": [{k: v for k, v in item.items() if k != "priority"} for item in planned],
+                "results": results,
+                "finishedAt": self._now().isoformat()
+            }
+            return self.last_cycle
+        finally:
+            self._cycle_lock.release()
+
+    def _refresh_planned(self, by_facility: Dict[str, List[str]], deadline: Deadline) -> Optional[Dict[str, Dict]]:
+        """
+        施設ごとの日付を順に再取得する
+
+        Returns:
+            施設ごとの日付のステータス。他の実行が実行中の場合はNone
+        """
+        # /scrape と同じrate_limitsのレコードで、手動の実行と同時に走らないようにする
+        claim = self._claim_rate_limit()
+        if claim is None:
+            return None
+        rate_limits_repo, rate_limit_record = claim
+
+        results: Dict[str, Dict] = {}
+        succeeded = False
+        try:
+            with log_context(run_id=new_run_id()), deadline_context(deadline):
+                for facility, dates in by_facility.items():
+                    results[facility] = self._refresh_facility(facility, sorted(dates))
+            succeeded = all(
+                status == 'success' for statuses in results.values() for status in statuses.values()
+            )
+        finally:
+            self._finish_rate_limit(rate_limits_repo, rate_limit_record, succeeded)
+        return results
+
+    def _claim_rate_limit(self) -> Optional[Tuple[object, Optional[Dict]]]:
+        """
+        rate_limitsのレコードを実行中にする（/scrape と同じ判定）
+
+        Returns:
+            (リポジトリ, レコード)。Rate limitsが無効・利用できない場合は(None, None)、
+            他の実行が実行中の場合はNone
+        """
+        if os.getenv('DISABLE_RATE_LIMITS', '').lower() == 'true':
+            return None, None
+        try:
+            rate_limits_repo = self._rate_limits_factory()
+            rate_result = rate_limits_repo.create_or_update_record('running')
+        except Exception as e:
+            logger.warning("Rate limits unavailable, refreshing without rate limit control: %s", e)
+            return None, None
+        if rate_result.get('is_already_running'):
+            return None
+        return rate_limits_repo, rate_result['record']
+
+    @staticmethod
+    def _finish_rate_limit(rate_limits_repo, record: Optional[Dict], succeeded: bool) -> None:
+        """rate_limitsのレコードを完了・失敗にする"""
+        if rate_limits_repo is None or record is None:
+            return
+        final_status = 'completed' if succeeded else 'failed'
+        try:
+            rate_limits_repo.update_status(record['id'], record['date'], final_status)
+        except Exception as e:
+            logger.error("Failed to update rate limit status: %s", e)
+
+    def _refresh_facility(self, facility: str, dates: List[str]) -> Dict[str, str]:
+        """施設の複数日付を再取得し、日付ごとのステータスを返す"""
+        logger.info("Refreshing %s for %s date(s): %s", facility, len(dates), dates)
+        try:
+            with log_context(facility=facility):
+                scraper = self._scraper_factory(facility)
+                if len(dates) == 1:
+                    outcomes = {dates[0]: scraper.scrape_and_save(dates[0])}
+                else:
+                    outcomes = scraper.scrape_multiple_dates(dates).get('results', {})
+        except Exception as e:
+            logger.error("Refresh failed for %s: %s", facility, e)
+            return {date: 'error' for date in dates}
+
+        statuses = {}
+        for date in dates:
+            outcome = outcomes.get(date) or {}
+            status = outcome.get('status', 'error')
+            if status == 'success':
+                self._last_success[(facility, date)] = self._now()
+            else:
+                logger.warning("Refresh of %s %s failed: %s", facility, date, outcome.get('error_type', 'UNKNOWN'))
+            statuses[date] = status
+        return statuses
+
+    def get_status(self) -> Dict:
+        """スケジューラーの状態（API用）"""
+        return {
+            'enabled': self.enabled,
+            'running': self.running,
+            'interval_minutes': self.interval_seconds // 60,
+            'budget_per_cycle': self.budget_per_cycle,
+            'stale_after_minutes': self.stale_after_minutes,
+            'facilities': self.facilities,
+            'last_cycle': self.last_cycle
+        }
+
+
+# Global instance (singleton pattern)
+_refresh_scheduler_instance = None
+
+
+def get_refresh_scheduler() -> RefreshScheduler:
+    """
+    Get the global refresh scheduler instance (singleton)
+
+    Returns:
+        RefreshScheduler: The global scheduler instance
+    """
+    global _refresh_scheduler_instance
+    if _refresh_scheduler_instance is None:
+        _refresh_scheduler_instance = RefreshScheduler()
+    return _refresh_scheduler_instance
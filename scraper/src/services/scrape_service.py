@@ -1,18 +1,40 @@
 """
 スクレイピングビジネスロジックサービス
 """
+import functools
 from datetime import datetime
 from typing import Dict, List, Optional, Type
 from ..scrapers.base import BaseScraper
 from ..scrapers.ensemble_studio import EnsembleStudioScraper
 from ..scrapers.meguro import MeguroScraper
 from ..scrapers.shibuya import ShibuyaScraper
-from ..repositories.cosmos_repository import CosmosWriter
+from ..repositories.storage import AvailabilityStore, create_availability_store
+from ..utils.deadlines import Deadline, deadline_context
+from ..utils.structured_logging import get_logger, log_context, new_run_id
+from .session_planner import SessionPlanner, is_session_planner_enabled
 from .target_date_service import TargetDateService
 
+logger = get_logger(__name__)
+
+
+def _with_deadline(method):
+    """
+    deadline引数（Deadline）を受け取り、メソッドの実行中の期限として設定する
+    省略時は呼び出し元の期限（ジョブのdeadline_contextなど）を引き継ぐ
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, deadline: Optional[Deadline] = None, **kwargs):
+        with deadline_context(deadline):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class ScrapeService:
-    """スクレイピングのビジネスロジックを管理"""
+    """
+    スクレイピングのビジネスロジックを管理
+    
+    スクレイピングを行うメソッドはdeadline引数で期限・キャンセルを受け取り、各スクレイパーのステップまで渡す
+    """
     
     # 施設名とスクレイパークラスのマッピング
     SCRAPERS = {
@@ -29,19 +51,20 @@ class ScrapeService:
     
     def __init__(
         self,
-        cosmos_writer: Optional[CosmosWriter] = None,
+        cosmos_writer: Optional[AvailabilityStore] = None,
         target_date_service: Optional[TargetDateService] = None
     ):
         """
         初期化
         
         Args:
-            cosmos_writer: CosmosWriterインスタンス（DIパターン）
+            cosmos_writer: CosmosWriterインスタンス（DIパターン。省略時はSTORAGE_BACKENDに従う）
             target_date_service: TargetDateServiceインスタンス（DIパターン）
         """
-        self.cosmos_writer = cosmos_writer or CosmosWriter()
+        self.cosmos_writer = cosmos_writer or create_availability_store()
         self.target_date_service = target_date_service or TargetDateService()
     
+    @_with_deadline
     def scrape_facility(
         self,
         facility_name: str,
@@ -71,9 +94,10 @@ class ScrapeService:
         
         # スクレイピング実行
         try:
-            print(f"\n[ScrapeService] Starting {facility_name} scraping for date: {target_date}")
+            logger.info("[ScrapeService] Starting %s scraping for date: %s", facility_name, target_date)
             scraper = scraper_class()
-            result = scraper.scrape_and_save(target_date)
+            with log_context(run_id=new_run_id(), facility=facility_name):
+                result = scraper.scrape_and_save(target_date)
             
             # 結果にfacility情報を追加
             if result.get('status') == 'success':
@@ -90,6 +114,7 @@ class ScrapeService:
                 'details': str(e)
             }
     
+    @_with_deadline
     def scrape_all_facilities(
         self,
         dates: Optional[List[str]] = None
@@ -113,21 +138,29 @@ class ScrapeService:
             
             # 重複を除いた施設リスト
             unique_facilities = ['ensemble', 'meguro', 'shibuya']
+            run_id = new_run_id()
             
-            for facility_key in unique_facilities:
-                scraper_class = self._get_scraper_class(facility_key)
-                if scraper_class:
-                    try:
-                        print(f"\n[ScrapeService] Processing {facility_key} for {len(target_dates)} dates")
-                        scraper = scraper_class()
-                        facility_result = scraper.scrape_multiple_dates(target_dates)
-                        all_results[facility_key] = facility_result
-                    except Exception as e:
-                        all_results[facility_key] = {
-                            'status': 'error',
-                            'message': str(e),
-                            'error_type': 'SCRAPING_ERROR'
-                        }
+            if is_session_planner_enabled():
+                # 施設×日付をセッションに分け、施設をまたいで並行に実行
+                scraper_classes = {key: self._get_scraper_class(key) for key in unique_facilities}
+                planner = SessionPlanner({key: cls for key, cls in scraper_classes.items() if cls})
+                all_results = planner.run(list(planner.scraper_classes), target_dates, run_id)
+            else:
+                for facility_key in unique_facilities:
+                    scraper_class = self._get_scraper_class(facility_key)
+                    if scraper_class:
+                        try:
+                            logger.info("[ScrapeService] Processing %s for %d dates", facility_key, len(target_dates))
+                            scraper = scraper_class()
+                            with log_context(run_id=run_id, facility=facility_key):
+                                facility_result = scraper.scrape_multiple_dates(target_dates)
+                            all_results[facility_key] = facility_result
+                        except Exception as e:
+                            all_results[facility_key] = {
+                                'status': 'error',
+                                'message': str(e),
+                                'error_type': 'SCRAPING_ERROR'
+                            }
             
             # 結果を統合
             combined_results = {}
@@ -205,6 +238,7 @@ class ScrapeService:
                 'results': results
             }
     
+    @_with_deadline
     def scrape_with_dates(
         self,
         dates: List[str],
@@ -234,9 +268,10 @@ class ScrapeService:
             # 複数日付の場合は効率的なメソッドを使用
             if len(dates) > 1:
                 try:
-                    print(f"\n[ScrapeService] Using multiple dates scraping for {facility}: {dates}")
+                    logger.info("[ScrapeService] Using multiple dates scraping for %s: %s", facility, dates)
                     scraper = scraper_class()
-                    result = scraper.scrape_multiple_dates(dates)
+                    with log_context(run_id=new_run_id(), facility=facility):
+                        result = scraper.scrape_multiple_dates(dates)
                     
                     # 結果にfacility情報を追加
                     result['facility'] = facility
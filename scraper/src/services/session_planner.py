@@ -0,0 +1,254 @@
+"""
+施設×日付の一括スクレイピングのセッション計画
+各スクレイパーのコストモデル（日付のセッションへの分け方・推定所要時間）から実行計画を作り、
+全体の同時実行数の上限内で、推定所要時間の長いセッションから並行に実行して全体の所要時間を短くする
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Type
+
+from ..scrapers.base import BaseScraper
+from ..utils.deadlines import get_current_deadline
+from ..utils.structured_logging import get_logger, log_context, new_run_id
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class PlannedSession:
+    """1回のscrape_multiple_datesの呼び出し"""
+    facility: str
+    dates: List[str]
+    estimated_seconds: float
+    actual_seconds: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'facility': self.facility,
+            'dates': self.dates,
+            'estimatedSeconds': round(self.estimated_seconds, 1),
+            'actualSeconds': round(self.actual_seconds, 1) if self.actual_seconds is not None else None
+        }
+
+
+@dataclass
+class ExecutionPlan:
+    """
+    実行計画
+
+    Attributes:
+        sessions: 実行順（推定所要時間の長い順）のセッション
+        max_concurrency: 全体の同時実行数
+        max_per_facility: 1施設あたりの同時実行数
+        estimated_wall_seconds: 計画どおりに並行実行した場合の推定所要時間
+        estimated_serial_seconds: すべて順番に実行した場合の推定所要時間
+    """
+    sessions: List[PlannedSession]
+    max_concurrency: int
+    max_per_facility: int
+    estimated_wall_seconds: float = 0.0
+    estimated_serial_seconds: float = field(init=False)
+
+    def __post_init__(self):
+        self.estimated_serial_seconds = sum(session.estimated_seconds for session in self.sessions)
+
+    @property
+    def max_browsers(self) -> int:
+        """計画の実行中に同時に開くブラウザの最大数（受付制御で確保する枠の数）"""
+        per_facility = Counter(session.facility for session in self.sessions)
+        return min(self.max_concurrency, sum(min(count, self.max_per_facility) for count in per_facility.values()))
+
+    def to_dict(self) -> Dict:
+        return {
+            'sessions': [session.to_dict() for session in self.sessions],
+            'maxConcurrency': self.max_concurrency,
+            'maxPerFacility': self.max_per_facility,
+            'maxBrowsers': self.max_browsers,
+            'estimatedWallSeconds': round(self.estimated_wall_seconds, 1),
+            'estimatedSerialSeconds': round(self.estimated_serial_seconds, 1)
+        }
+
+
+class SessionPlanner:
+    """施設×日付の実行計画の作成と実行"""
+
+    def __init__(self, scraper_classes: Dict[str, Type[BaseScraper]],
+                 max_concurrency: Optional[int] = None, max_per_facility: Optional[int] = None):
+        """
+        初期化（省略した値は環境変数から取得）
+
+        Args:
+            scraper_classes: 施設キー → スクレイパークラス
+            max_concurrency: 全体で同時に開くブラウザセッションの数（SESSION_PLANNER_MAX_CONCURRENCY、デフォルト: 2）
+            max_per_facility: 同じ施設に同時に開くセッションの数（SESSION_PLANNER_MAX_PER_FACILITY、デフォルト: 1）
+        """
+        self.scraper_classes = scraper_classes
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv('SESSION_PLANNER_MAX_CONCURRENCY', '2')))
+        self.max_per_facility = max(1, max_per_facility or int(os.getenv('SESSION_PLANNER_MAX_PER_FACILITY', '1')))
+
+    def plan(self, facilities: List[str], dates: List[str]) -> ExecutionPlan:
+        """
+        実行計画を作成
+
+        Args:
+            facilities: 施設キーのリスト
+            dates: YYYY-MM-DD形式の日付リスト
+
+        Raises:
+            ValueError: 未知の施設キーが含まれる場合
+        """
+        sessions = []
+        for facility in facilities:
+            scraper_class = self.scraper_classes.get(facility)
+            if scraper_class is None:
+                raise ValueError(f"Unknown facility: {facility}")
+            scraper = scraper_class()
+            for session_dates in scraper.plan_sessions(dates, self.max_per_facility):
+                sessions.append(PlannedSession(facility, session_dates, scraper.estimate_session_seconds(session_dates)))
+
+        # 長いセッションから始める（最後に長いセッションだけが残るのを避ける）
+        sessions.sort(key=lambda session: session.estimated_seconds, reverse=True)
+        plan = ExecutionPlan(sessions, self.max_concurrency, self.max_per_facility)
+        plan.estimated_wall_seconds = self._simulate(sessions)
+        return plan
+
+    def _next_session(self, pending: List[PlannedSession], running: Counter) -> Optional[PlannedSession]:
+        """施設ごとの上限に空きがある、先頭のセッション"""
+        for session in pending:
+            if running[session.facility] < self.max_per_facility:
+                return session
+        return None
+
+    def _simulate(self, sessions: List[PlannedSession]) -> float:
+        """executeと同じ規則で割り当てた場合の推定所要時間"""
+        pending = list(sessions)
+        running = Counter()
+        in_flight: List[tuple] = []  # (終了時刻, 施設)
+        now = 0.0
+        while pending or in_flight:
+            while len(in_flight) < self.max_concurrency:
+                session = self._next_session(pending, running)
+                if session is None:
+                    break
+                pending.remove(session)
+                running[session.facility] += 1
+                in_flight.append((now + session.estimated_seconds, session.facility))
+            in_flight.sort()
+            now, facility = in_flight.pop(0)
+            running[facility] -= 1
+        return now
+
+    def execute(self, plan: ExecutionPlan, run_id: Optional[str] = None,
+                on_session_done: Optional[Callable[[PlannedSession, Dict], None]] = None) -> Dict[str, Dict]:
+        """
+        計画を並行に実行
+
+        Args:
+            plan: planで作成した実行計画
+            run_id: ログのrun_id（省略時は新規）
+            on_session_done: セッションごとの結果を受け取るコールバック
+
+        Returns:
+            施設キー → scrape_multiple_datesと同じ形式の結果（セッションの結果を結合したもの）
+        """
+        run_id = run_id or new_run_id()
+        pending = list(plan.sessions)
+        running = Counter()
+        condition = threading.Condition()
+        results: Dict[str, Dict[str, Dict]] = {}
+
+        def worker():
+            while True:
+                with condition:
+                    while True:
+                        session = self._next_session(pending, running)
+                        if session is not None or not pending:
+                            break
+                        condition.wait()
+                    if session is None:
+                        return
+                    pending.remove(session)
+                    running[session.facility] += 1
+                try:
+                    session_result = self._run_session(session, run_id)
+                    with condition:
+                        results.setdefault(session.facility, {}).update(session_result.get('results', {}))
+                    if on_session_done is not None:
+                        on_session_done(session, session_result)
+                finally:
+                    with condition:
+                        running[session.facility] -= 1
+                        condition.notify_all()
+
+        # 呼び出し元のコンテキスト（実行中のジョブ）をスレッドごとに引き継ぐ
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(worker,),
+                             name=f"session-planner-{index}", daemon=True)
+            for index in range(min(plan.max_concurrency, len(plan.sessions)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {facility: self._summarize(facility_results) for facility, facility_results in results.items()}
+
+    def _run_session(self, session: PlannedSession, run_id: str) -> Dict:
+        """1セッションを実行（例外はセッションの全日付の失敗として返す）"""
+        # 期限切れ・キャンセル後の残りのセッションはブラウザを起動せずに中断として返す
+        deadline = get_current_deadline()
+        stopped = deadline.error() if deadline is not None else None
+        if stopped is not None:
+            return {'results': {date: stopped.to_result() for date in session.dates}}
+
+        logger.info("[SessionPlanner] Starting %s session for %s (estimated %.0fs)",
+                    session.facility, ', '.join(session.dates), session.estimated_seconds)
+        started = time.perf_counter()
+        try:
+            scraper = self.scraper_classes[session.facility]()
+            with log_context(run_id=run_id, facility=session.facility):
+                result = scraper.scrape_multiple_dates(session.dates)
+        except Exception as e:
+            logger.error("[SessionPlanner] %s session failed: %s", session.facility, e)
+            result = {'results': {
+                date: {
+                    'status': 'error',
+                    'message': f'Scraping failed for {session.facility}',
+                    'error_type': 'SCRAPING_ERROR',
+                    'details': str(e)
+                }
+                for date in session.dates
+            }}
+        session.actual_seconds = time.perf_counter() - started
+        logger.info("[SessionPlanner] Finished %s session in %.1fs (estimated %.0fs)",
+                    session.facility, session.actual_seconds, session.estimated_seconds)
+        return result
+
+    @staticmethod
+    def _summarize(results: Dict[str, Dict]) -> Dict:
+        """BaseScraper._summarize_resultsと同じ形式"""
+        success_count = sum(1 for result in results.values() if result.get('status') == 'success')
+        return {
+            'results': dict(sorted(results.items())),
+            'summary': {
+                'total': len(results),
+                'success': success_count,
+                'failed': len(results) - success_count
+            }
+        }
+
+    def run(self, facilities: List[str], dates: List[str], run_id: Optional[str] = None) -> Dict[str, Dict]:
+        """計画を作成して実行"""
+        plan = self.plan(facilities, dates)
+        logger.info("[SessionPlanner] %d session(s), estimated %.0fs wall / %.0fs serial",
+                    len(plan.sessions), plan.estimated_wall_seconds, plan.estimated_serial_seconds)
+        return self.execute(plan, run_id)
+
+
+def is_session_planner_enabled() -> bool:
+    """セッション計画による並行実行が有効か（環境変数 SESSION_PLANNER_ENABLED、デフォルト: false）"""
+    return os.getenv('SESSION_PLANNER_ENABLED', 'false').lower() == 'true'
@@ -0,0 +1,199 @@
+"""
+Spool Replayer for uploading availability data that could not be saved to Cosmos DB
+"""
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from ..repositories.availability_spool import AvailabilitySpool, get_availability_spool
+from ..utils.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class SpoolReplayer:
+    """
+    ローカルのスプールに残った未送信のデータを、Cosmos DBが復旧したら古い順に送信する
+    1件でも失敗した場合はそのサイクルを打ち切り、次のサイクルで再試行する
+    """
+
+    def __init__(self, interval_seconds: Optional[int] = None,
+                 spool: Optional[AvailabilitySpool] = None,
+                 writer_factory: Optional[Callable[[], object]] = None):
+        """
+        Initialize the spool replayer
+
+        Args:
+            interval_seconds: Seconds between replay cycles (default from env or 60)
+            spool: Spool to drain (default: get_availability_spool())
+            writer_factory: Creates a writer with save_availability (default: the configured storage backend)
+        """
+        self._spool = spool
+        self.enabled = spool is not None or get_availability_spool() is not None
+
+        if interval_seconds:
+            self.interval_seconds = interval_seconds
+        else:
+            env_interval = os.getenv('AVAILABILITY_SPOOL_REPLAY_INTERVAL_SECONDS', '60')
+            try:
+                self.interval_seconds = int(env_interval)
+            except ValueError:
+                logger.warning("Invalid AVAILABILITY_SPOOL_REPLAY_INTERVAL_SECONDS: %s, using default 60 seconds", env_interval)
+                self.interval_seconds = 60
+
+        # 1サイクルで送信する最大件数
+        self.batch_size = int(os.getenv('AVAILABILITY_SPOOL_REPLAY_BATCH', '50'))
+        self._writer_factory = writer_factory or self._default_writer
+        self._writer = None
+        self._cycle_lock = threading.Lock()
+        self.last_cycle: Optional[Dict] = None
+
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def _default_writer():
+        from ..repositories.storage import create_availability_store
+        return create_availability_store()
+
+    @property
+    def spool(self) -> Optional[AvailabilitySpool]:
+        return self._spool or get_availability_spool()
+
+    def start(self):
+        """
+        Start the spool replayer in a background thread
+        """
+        if not self.enabled:
+            logger.info("SpoolReplayer is disabled by configuration")
+            return
+
+        if self.running:
+            logger.warning("SpoolReplayer is already running")
+            return
+
+        self.running = True
+        self._stop_event.clear()
+
+        self.thread = threading.Thread(target=self._run_replay_loop, daemon=True)
+        self.thread.start()
+
+        logger.info("SpoolReplayer started - will run every %s seconds", self.interval_seconds)
+
+    def stop(self):
+        """
+        Stop the spool replayer gracefully
+        """
+        if not self.running:
+            return
+
+        logger.info("Stopping SpoolReplayer...")
+        self.running = False
+        self._stop_event.set()
+
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+
+        logger.info("SpoolReplayer stopped")
+
+    def _run_replay_loop(self):
+        """
+        Main loop that drains the spool periodically
+        """
+        logger.info("SpoolReplayer loop started")
+
+        # 起動直後に前回のプロセスが残した分を送る
+        while self.running:
+            try:
+                self.replay_once()
+            except Exception as e:
+                logger.error("Error in spool replay: %s", e, exc_info=True)
+
+            if self._stop_event.wait(self.interval_seconds):
+                break
+
+        logger.info("SpoolReplayer loop ended")
+
+    def replay_once(self) -> Dict:
+        """
+        未送信の記録を古い順に送信（他のサイクルが実行中の場合はスキップ）
+
+        Returns:
+            {"status", "uploaded", "failed", "remaining"}
+        """
+        spool = self.spool
+        if spool is None:
+            return {"status": "disabled", "uploaded": 0, "failed": 0, "remaining": 0}
+        if not self._cycle_lock.acquire(blocking=False):
+            return {"status": "skipped", "uploaded": 0, "failed": 0, "remaining": spool.get_stats()['pending']}
+
+        try:
+            uploaded, failed, error = 0, 0, None
+            entries = spool.claim_pending(self.batch_size)
+            for index, entry in enumerate(entries):
+                saved = False
+                try:
+                    if self._writer is None:
+                        self._writer = self._writer_factory()
+                    saved = self._writer.save_availability(entry['date'], entry['facilities'])
+                    error = None if saved else "save_availability returned False"
+                except Exception as e:
+                    error = str(e)
+                    self._writer = None
+                spool.complete(entry['id'], saved, error)
+
+                if saved:
+                    uploaded += 1
+                    continue
+                # Cosmos DBがまだ復旧していないため、残りは次のサイクルに回す
+                failed += 1
+                spool.release(e['id'] for e in entries[index + 1:])
+                logger.warning("Spool replay of %s failed, retrying next cycle: %s", entry['date'], error)
+                break
+
+            purged = spool.purge()
+            remaining = spool.get_stats()['pending']
+            if uploaded or failed:
+                logger.info("Spool replay: %s uploaded, %s failed, %s remaining", uploaded, failed, remaining)
+            self.last_cycle = {
+                "status": "success" if not failed else "error",
+                "uploaded": uploaded,
+                "failed": failed,
+                "purged": purged,
+                "remaining": remaining,
+                "lastError": error if failed else None,
+                "finishedAt": datetime.now(timezone.utc).isoformat()
+            }
+            return self.last_cycle
+        finally:
+            self._cycle_lock.release()
+
+    def get_status(self) -> Dict:
+        """スプールと再送の状態（API用）"""
+        spool = self.spool
+        return {
+            'enabled': spool is not None,
+            'running': self.running,
+            'interval_seconds': self.interval_seconds,
+            'spool': spool.get_stats() if spool is not None else None,
+            'last_cycle': self.last_cycle
+        }
+
+
+# Global instance (singleton pattern)
+_spool_replayer_instance = None
+
+
+def get_spool_replayer() -> SpoolReplayer:
+    """
+    Get the global spool replayer instance (singleton)
+
+    Returns:
+        SpoolReplayer: The global replayer instance
+    """
+    global _spool_replayer_instance
+    if _spool_replayer_instance is None:
+        _spool_replayer_instance = SpoolReplayer()
+    return _spool_replayer_instance
@@ -3,20 +3,20 @@ target_date管理サービス
 """
 from datetime import datetime
 from typing import List, Optional
-from ..repositories.target_date_repository import TargetDateRepository
+from ..repositories.storage import TargetDateStore, create_target_date_store
 
 
 class TargetDateService:
     """target_dateの取得とデフォルト値管理"""
     
-    def __init__(self, repository: Optional[TargetDateRepository] = None):
+    def __init__(self, repository: Optional[TargetDateStore] = None):
         """
         初期化
         
         Args:
-            repository: TargetDateRepositoryインスタンス（DIパターン）
+            repository: TargetDateRepositoryインスタンス（DIパターン。省略時はSTORAGE_BACKENDに従う）
         """
-        self.repository = repository or TargetDateRepository()
+        self.repository = repository or create_target_date_store()
     
     def get_dates_to_scrape(self, requested_dates: Optional[List[str]] = None) -> List[str]:
         """
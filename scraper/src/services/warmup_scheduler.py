@@ -120,10 +120,10 @@ class WarmupScheduler:
         
         try:
             # Import here to avoid circular dependencies
-            from src.repositories.cosmos_repository import CosmosWriter
+            from src.repositories.storage import create_availability_store
             
-            # Create Cosmos DB connection and execute warmup
-            cosmos_writer = CosmosWriter()
+            # Create Cosmos DB connection (or the configured storage) and execute warmup
+            cosmos_writer = create_availability_store()
             result = cosmos_writer.warm_up()
             
             execution_time = time.time() - start_time
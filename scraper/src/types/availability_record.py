@@ -0,0 +1,248 @@
+"""
+空き状況レコードのコンパクトな表現
+部屋ごとの結果（centerName/facilityName/roomName/timeSlots/lastUpdated）を
+__slots__付きdataclass・配列ベースのバッチで保持し、現行のJSON形式と相互変換する
+"""
+import sys
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .time_slots import TIME_SLOT_KEYS, SlotStatus, TimeSlots
+
+# バッチに変換できる結果行のキー（dateは任意）
+_RECORD_KEYS = frozenset(("centerName", "facilityName", "roomName", "timeSlots", "lastUpdated"))
+_OPTIONAL_RECORD_KEYS = frozenset(("date",))
+
+# 1レコードあたりの文字列インデックス（center, facility, room, lastUpdated, date）とステータスの数
+_REFS_PER_RECORD = 5
+_STATUSES_PER_RECORD = len(TIME_SLOT_KEYS)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """繰り返し出現する名称を共有する（Noneはそのまま）"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True)
+class AvailabilityRecord:
+    """1部屋・1日分の空き状況"""
+    center_name: str
+    facility_name: str
+    room_name: str
+    morning: SlotStatus = SlotStatus.UNKNOWN
+    afternoon: SlotStatus = SlotStatus.UNKNOWN
+    evening: SlotStatus = SlotStatus.UNKNOWN
+    last_updated: Optional[str] = None
+    date: Optional[str] = None
+
+    def __post_init__(self):
+        self.center_name = _intern(self.center_name)
+        self.facility_name = _intern(self.facility_name)
+        self.room_name = _intern(self.room_name)
+        self.last_updated = _intern(self.last_updated)
+        self.date = _intern(self.date)
+
+    @property
+    def time_slots(self) -> TimeSlots:
+        """JSON形式のタイムスロットを返す"""
+        return {
+            "morning": self.morning.label,
+            "afternoon": self.afternoon.label,
+            "evening": self.evening.label
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AvailabilityRecord":
+        """
+        現行のJSON形式（スクレイパーの結果行）から変換
+
+        Raises:
+            KeyError: 必須項目（centerName/facilityName/roomName）がない場合
+            ValueError: 無効なステータスが含まれている場合
+        """
+        time_slots = data.get("timeSlots") or {}
+        return cls(
+            center_name=data["centerName"],
+            facility_name=data["facilityName"],
+            room_name=data["roomName"],
+            morning=SlotStatus.from_label(time_slots.get("morning", "unknown")),
+            afternoon=SlotStatus.from_label(time_slots.get("afternoon", "unknown")),
+            evening=SlotStatus.from_label(time_slots.get("evening", "unknown")),
+            last_updated=data.get("lastUpdated"),
+            date=data.get("date")
+        )
+
+    def to_dict(self) -> Dict:
+        """現行のJSON形式に変換（dateは設定されている場合のみ含める）"""
+        result = {
+            "centerName": self.center_name,
+            "facilityName": self.facility_name,
+            "roomName": self.room_name,
+            "timeSlots": self.time_slots,
+            "lastUpdated": self.last_updated
+        }
+        if self.date is not None:
+            result["date"] = self.date
+        return result
+
+
+class AvailabilityBatch(Sequence):
+    """
+    空き状況レコードの配列ベースのバッチ
+    名称は重複を除いたテーブルに1回だけ保持し、各レコードは整数のインデックスと
+    ステータスコード（1スロット1バイト）のみを持つ
+
+    要素は現行のJSON形式の辞書として取り出せるため、結果行のリストの代わりに
+    保存・集計・レスポンスの処理へそのまま渡せる（JSONへの変換はjson_defaultを使う）
+    """
+
+    def __init__(self, records: Optional[Iterable] = None):
+        self._strings: List[Optional[str]] = []
+        self._string_index: Dict[Optional[str], int] = {}
+        self._refs = array('I')
+        self._statuses = array('B')
+
+        if records:
+            self.extend(records)
+
+    def _string_ref(self, value: Optional[str]) -> int:
+        """文字列テーブルのインデックスを返す（未登録なら追加）"""
+        index = self._string_index.get(value)
+        if index is None:
+            index = len(self._strings)
+            self._strings.append(_intern(value))
+            self._string_index[value] = index
+        return index
+
+    def append(self, record) -> None:
+        """
+        レコードを追加
+
+        Args:
+            record: AvailabilityRecordまたは現行のJSON形式の辞書
+
+        Raises:
+            KeyError: 必須項目がない場合
+            ValueError: 無効なステータスが含まれている場合
+        """
+        if not isinstance(record, AvailabilityRecord):
+            record = AvailabilityRecord.from_dict(record)
+
+        self._refs.extend((
+            self._string_ref(record.center_name),
+            self._string_ref(record.facility_name),
+            self._string_ref(record.room_name),
+            self._string_ref(record.last_updated),
+            self._string_ref(record.date)
+        ))
+        self._statuses.extend((record.morning, record.afternoon, record.evening))
+
+    def extend(self, records: Iterable) -> None:
+        """複数のレコードを追加"""
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self._statuses) // _STATUSES_PER_RECORD
+
+    def record(self, index: int) -> AvailabilityRecord:
+        """index番目のレコードを取り出す"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("AvailabilityBatch index out of range")
+
+        refs = self._refs[index * _REFS_PER_RECORD:(index + 1) * _REFS_PER_RECORD]
+        statuses = self._statuses[index * _STATUSES_PER_RECORD:(index + 1) * _STATUSES_PER_RECORD]
+        center, facility, room, last_updated, date = (self._strings[ref] for ref in refs)
+        return AvailabilityRecord(
+            center_name=center,
+            facility_name=facility,
+            room_name=room,
+            morning=SlotStatus(statuses[0]),
+            afternoon=SlotStatus(statuses[1]),
+            evening=SlotStatus(statuses[2]),
+            last_updated=last_updated,
+            date=date
+        )
+
+    def records(self) -> Iterator[AvailabilityRecord]:
+        """レコードを順に取り出す"""
+        for index in range(len(self)):
+            yield self.record(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(i).to_dict() for i in range(*index.indices(len(self)))]
+        return self.record(index).to_dict()
+
+    def __iter__(self) -> Iterator[Dict]:
+        for record in self.records():
+            yield record.to_dict()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AvailabilityBatch):
+            return self.to_dicts() == other.to_dicts()
+        if isinstance(other, (list, tuple)):
+            return self.to_dicts() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"AvailabilityBatch({len(self)} records)"
+
+    def to_dicts(self) -> List[Dict]:
+        """現行のJSON形式のリストに変換"""
+        return list(self)
+
+    @classmethod
+    def compact(cls, rows: Iterable[Dict]):
+        """
+        結果行のリストをバッチに変換
+        すべての行がスクレイパーの結果行の形式（create_facility_recordで作成した行）の場合のみ変換し、
+        それ以外の行を含む場合は情報を落とさないよう元のリストを返す
+
+        Raises:
+            ValueError: 結果行の形式で、無効なステータスが含まれている場合
+        """
+        if isinstance(rows, cls):
+            return rows
+        rows = list(rows)
+        if all(_is_record_row(row) for row in rows):
+            return cls(rows)
+        return rows
+
+    @classmethod
+    def from_dicts(cls, rows: Iterable[Dict]) -> "AvailabilityBatch":
+        """現行のJSON形式のリストから作成（既にバッチの場合はそのまま返す）"""
+        if isinstance(rows, cls):
+            return rows
+        return cls(rows)
+
+
+def _is_record_row(row: Any) -> bool:
+    """バッチに変換しても内容が変わらない結果行か"""
+    if not isinstance(row, dict):
+        return False
+    keys = row.keys()
+    if not _RECORD_KEYS <= keys or not keys <= _RECORD_KEYS | _OPTIONAL_RECORD_KEYS:
+        return False
+    time_slots = row["timeSlots"]
+    return isinstance(time_slots, dict) and len(time_slots) == len(TIME_SLOT_KEYS) and all(
+        key in time_slots for key in TIME_SLOT_KEYS
+    ) and all(isinstance(row[key], str) for key in ("centerName", "facilityName", "roomName"))
+
+
+def json_default(value: Any) -> Any:
+    """
+    json.dumpsのdefault（AvailabilityBatchを現行のJSON形式のリストにする）
+
+    Raises:
+        TypeError: JSONに変換できない値の場合
+    """
+    if isinstance(value, AvailabilityBatch):
+        return value.to_dicts()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
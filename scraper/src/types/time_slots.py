@@ -2,6 +2,7 @@
 タイムスロット関連の型定義
 統一されたタイムスロット形式を保証するための型定義
 """
+from enum import IntEnum
 from typing import Literal, TypedDict, Dict
 
 # タイムスロットのキー（morning, afternoon, evening形式）
@@ -12,6 +13,46 @@ TimeSlotKey = Literal["morning", "afternoon", "evening"]
 # booked_2: 午後2のみ予約済み（目黒区）
 TimeSlotStatus = Literal["available", "booked", "booked_1", "booked_2", "lottery", "unknown"]
 
+# 検証用の定数（呼び出しごとにsetを生成しない）
+TIME_SLOT_KEYS = ("morning", "afternoon", "evening")
+VALID_TIME_SLOT_KEYS = frozenset(TIME_SLOT_KEYS)
+VALID_TIME_SLOT_STATUSES = frozenset(("available", "booked", "booked_1", "booked_2", "lottery", "unknown"))
+
+
+class SlotStatus(IntEnum):
+    """
+    タイムスロットのステータス（整数コード）
+    JSON上は文字列（TimeSlotStatus）のまま扱い、メモリ上のみ整数で保持する
+    """
+    UNKNOWN = 0
+    AVAILABLE = 1
+    BOOKED = 2
+    BOOKED_1 = 3
+    BOOKED_2 = 4
+    LOTTERY = 5
+
+    @property
+    def label(self) -> TimeSlotStatus:
+        """JSON形式の文字列を返す"""
+        return _STATUS_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label: str) -> "SlotStatus":
+        """
+        文字列からステータスに変換
+
+        Raises:
+            ValueError: 無効なステータスの場合
+        """
+        try:
+            return _LABEL_TO_STATUS[label]
+        except (KeyError, TypeError):
+            raise ValueError(f"Invalid time slot status: {label}")
+
+
+_STATUS_LABELS = {status: status.name.lower() for status in SlotStatus}
+_LABEL_TO_STATUS = {label: status for status, label in _STATUS_LABELS.items()}
+
 # タイムスロットの型定義
 class TimeSlots(TypedDict):
     """タイムスロットの型定義"""
@@ -40,23 +81,17 @@ def validate_time_slots(slots: Dict[str, str]) -> TimeSlots:
     Raises:
         ValueError: 無効なキーまたは値が含まれている場合
     """
-    valid_keys = {"morning", "afternoon", "evening"}
-    valid_statuses = {"available", "booked", "booked_1", "booked_2", "lottery", "unknown"}
-    
     # キーの検証
-    if not all(key in valid_keys for key in slots.keys()):
-        invalid_keys = set(slots.keys()) - valid_keys
+    if not VALID_TIME_SLOT_KEYS.issuperset(slots.keys()):
+        invalid_keys = set(slots.keys()) - VALID_TIME_SLOT_KEYS
         raise ValueError(f"Invalid time slot keys: {invalid_keys}")
     
     # 値の検証
-    if not all(value in valid_statuses for value in slots.values()):
-        invalid_values = {v for v in slots.values() if v not in valid_statuses}
+    if not VALID_TIME_SLOT_STATUSES.issuperset(slots.values()):
+        invalid_values = {v for v in slots.values() if v not in VALID_TIME_SLOT_STATUSES}
         raise ValueError(f"Invalid time slot statuses: {invalid_values}")
     
     # デフォルト値で初期化してから更新
     result = create_default_time_slots()
-    for key, value in slots.items():
-        if key in valid_keys:
-            result[key] = value  # type: ignore
-    
+    result.update(slots)  # type: ignore
     return result
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+ステップ所要時間に基づく適応タイムアウト
+施設・ステップごとの所要時間をローカルのSQLiteに記録し、
+高パーセンタイル＋マージンからタイムアウトを決める（下限・上限あり）
+記録はメモリに溜め、一定件数ごと・ブラウザのセッション終了時にまとめて書き込む
+"""
+import atexit
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: Iterable[float], ratio: float) -> float:
+    """
+    最近傍順位法によるパーセンタイル
+
+    Args:
+        values: 値のリスト（空でないこと）
+        ratio: 0〜1の割合（0.95なら95パーセンタイル）
+    """
+    ordered = sorted(values)
+    if not ordered:
+        raise ValueError("percentile of empty values")
+    rank = max(1, math.ceil(ratio * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class AdaptiveTimeouts:
+    """施設・ステップ単位の所要時間の記録とタイムアウトの算出"""
+
+    def __init__(self, db_path: Optional[str] = None, window: Optional[int] = None,
+                 min_samples: Optional[int] = None, percentile_ratio: Optional[float] = None,
+                 margin: Optional[float] = None, floor_ms: Optional[int] = None,
+                 drift_ratio: Optional[float] = None, flush_size: Optional[int] = None):
+        """
+        初期化（省略した値は環境変数から取得）
+
+        Args:
+            db_path: SQLiteファイルのパス（ADAPTIVE_TIMEOUT_PATH）
+            window: ステップごとに保持する直近のサンプル数（ADAPTIVE_TIMEOUT_WINDOW、デフォルト: 200）
+            min_samples: 適応タイムアウトを使い始めるサンプル数（ADAPTIVE_TIMEOUT_MIN_SAMPLES、デフォルト: 10）
+            percentile_ratio: 基準にするパーセンタイル（ADAPTIVE_TIMEOUT_PERCENTILE、デフォルト: 0.95）
+            margin: パーセンタイルに掛ける倍率（ADAPTIVE_TIMEOUT_MARGIN、デフォルト: 2.0）
+            floor_ms: タイムアウトの下限（ADAPTIVE_TIMEOUT_FLOOR_MS、デフォルト: 3000）
+            drift_ratio: 直近の中央値が過去の中央値の何倍を超えたら遅延とみなすか（ADAPTIVE_TIMEOUT_DRIFT_RATIO、デフォルト: 1.5）
+            flush_size: この件数が溜まったらSQLiteに書き込む（ADAPTIVE_TIMEOUT_FLUSH_SIZE、デフォルト: 50）
+        """
+        self.db_path = db_path or os.getenv(
+            'ADAPTIVE_TIMEOUT_PATH',
+            str(Path(tempfile.gettempdir()) / 'aki-sta' / 'step_latencies.sqlite3')
+        )
+        self.window = window or int(os.getenv('ADAPTIVE_TIMEOUT_WINDOW', '200'))
+        self.min_samples = min_samples or int(os.getenv('ADAPTIVE_TIMEOUT_MIN_SAMPLES', '10'))
+        self.percentile_ratio = percentile_ratio or float(os.getenv('ADAPTIVE_TIMEOUT_PERCENTILE', '0.95'))
+        self.margin = margin or float(os.getenv('ADAPTIVE_TIMEOUT_MARGIN', '2.0'))
+        self.floor_ms = floor_ms if floor_ms is not None else int(os.getenv('ADAPTIVE_TIMEOUT_FLOOR_MS', '3000'))
+        self.drift_ratio = drift_ratio or float(os.getenv('ADAPTIVE_TIMEOUT_DRIFT_RATIO', '1.5'))
+        self.flush_size = max(1, flush_size or int(os.getenv('ADAPTIVE_TIMEOUT_FLUSH_SIZE', '50')))
+
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._drifting: Dict[Tuple[str, str], bool] = {}
+        # SQLiteに未書き込みのサンプル（facility, step, duration_ms, recorded_at）
+        self._pending: List[Tuple[str, str, float, str]] = []
+
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._memory_connection = sqlite3.connect(':memory:', check_same_thread=False) if self.db_path == ':memory:' else None
+        self._initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を取得（スレッドごとに新しい接続を使う）"""
+        if self._memory_connection is not None:
+            return self._memory_connection
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """SQLを実行して結果を返す（呼び出し元でロックを取得すること）"""
+        connection = self._connect()
+        try:
+            with connection:
+                return connection.execute(sql, tuple(params)).fetchall()
+        finally:
+            if connection is not self._memory_connection:
+                connection.close()
+
+    def _initialize(self):
+        """テーブルを作成"""
+        with self._lock:
+            self._execute(
+                """
+                CREATE TABLE IF NOT EXISTS step_latencies (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    facility TEXT NOT NULL,
+                    step TEXT NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    recorded_at TEXT NOT NULL
+                )
+                """
+            )
+            self._execute(
+                "CREATE INDEX IF NOT EXISTS idx_step_latencies_key ON step_latencies (facility, step, id)"
+            )
+
+    def _load(self, key: Tuple[str, str]) -> Deque[float]:
+        """サンプルを取得（初回はSQLiteから直近window件を読み込む。呼び出し元でロックを取得すること）"""
+        samples = self._samples.get(key)
+        if samples is None:
+            rows = self._execute(
+                "SELECT duration_ms FROM step_latencies WHERE facility = ? AND step = ? ORDER BY id DESC LIMIT ?",
+                (*key, self.window)
+            )
+            samples = deque((row[0] for row in reversed(rows)), maxlen=self.window)
+            self._samples[key] = samples
+        return samples
+
+    def record(self, facility: str, step: str, duration_ms: float) -> None:
+        """
+        成功したステップの所要時間を記録
+
+        Args:
+            facility: 施設キー
+            step: ステップ名（goto/calendar/modal など）
+            duration_ms: 所要時間（ミリ秒）
+        """
+        key = (facility, step)
+        with self._lock:
+            samples = self._load(key)
+            samples.append(duration_ms)
+            self._pending.append((facility, step, duration_ms, datetime.now(timezone.utc).isoformat()))
+            if len(self._pending) >= self.flush_size:
+                self._flush_pending()
+            drifting = self._is_drifting(samples)
+            was_drifting = self._drifting.get(key, False)
+            self._drifting[key] = drifting
+
+        if drifting and not was_drifting:
+            logger.warning(
+                "Step '%s' of %s is drifting slower: recent median is over %.1fx the historical median",
+                step, facility, self.drift_ratio
+            )
+        elif was_drifting and not drifting:
+            logger.info("Step '%s' of %s is back to its usual latency", step, facility)
+
+    def flush(self) -> None:
+        """溜まっているサンプルをSQLiteに書き込む（ブラウザのセッション終了時・プロセス終了時に呼ぶ）"""
+        with self._lock:
+            self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        """
+        溜まっているサンプルを1つのトランザクションで書き込み、書き込んだステップの
+        保持件数を超えた古いサンプルを削除する（呼び出し元でロックを取得すること）
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        keys = sorted({(facility, step) for facility, step, _, _ in pending})
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO step_latencies (facility, step, duration_ms, recorded_at) VALUES (?, ?, ?, ?)",
+                    pending
+                )
+                connection.executemany(
+                    """
+                    DELETE FROM step_latencies WHERE facility = ? AND step = ? AND id NOT IN (
+                        SELECT id FROM step_latencies WHERE facility = ? AND step = ? ORDER BY id DESC LIMIT ?
+                    )
+                    """,
+                    [(facility, step, facility, step, self.window) for facility, step in keys]
+                )
+        except sqlite3.Error as e:
+            # 記録できなくてもタイムアウトの算出（メモリ上のサンプル）は続けられる
+            logger.warning("Failed to write %d step latency sample(s): %s", len(pending), e)
+        finally:
+            if connection is not self._memory_connection:
+                connection.close()
+
+    def _is_drifting(self, samples: Deque[float]) -> bool:
+        """直近のサンプルの中央値が過去の中央値より明らかに遅いか"""
+        recent_size = self.min_samples
+        if len(samples) < recent_size * 2:
+            return False
+        values = list(samples)
+        recent = percentile(values[-recent_size:], 0.5)
+        historical = percentile(values[:-recent_size], 0.5)
+        return historical > 0 and recent > historical * self.drift_ratio
+
+    def timeout_ms(self, facility: str, step: str, default_ms: float) -> float:
+        """
+        ステップのタイムアウトを算出
+
+        Args:
+            facility: 施設キー
+            step: ステップ名
+            default_ms: 従来の固定タイムアウト（サンプル不足時の値、かつ上限）
+
+        Returns:
+            パーセンタイル×マージンを下限・上限で丸めた値（ミリ秒）
+        """
+        with self._lock:
+            samples = list(self._load((facility, step)))
+        if len(samples) < self.min_samples:
+            return default_ms
+        adaptive = percentile(samples, self.percentile_ratio) * self.margin
+        return float(min(default_ms, max(self.floor_ms, adaptive)))
+
+    def get_stats(self, facility: Optional[str] = None) -> List[Dict]:
+        """
+        記録済みのステップの統計（API・レポート用）
+
+        Args:
+            facility: 指定した施設のみ（省略時は全施設）
+        """
+        with self._lock:
+            self._flush_pending()
+            if facility:
+                keys = self._execute("SELECT DISTINCT facility, step FROM step_latencies WHERE facility = ?", (facility,))
+            else:
+                keys = self._execute("SELECT DISTINCT facility, step FROM step_latencies")
+            snapshot = {tuple(key): list(self._load(tuple(key))) for key in keys}
+            drifting = {key: self._is_drifting(self._load(key)) for key in snapshot}
+
+        stats = []
+        for (key_facility, step), samples in sorted(snapshot.items()):
+            if not samples:
+                continue
+            stats.append({
+                "facility": key_facility,
+                "step": step,
+                "samples": len(samples),
+                "p50Ms": round(percentile(samples, 0.5), 1),
+                "p95Ms": round(percentile(samples, 0.95), 1),
+                "maxMs": round(max(samples), 1),
+                "drifting": drifting[(key_facility, step)]
+            })
+        return stats
+
+
+_adaptive_instance: Optional[AdaptiveTimeouts] = None
+_adaptive_lock = threading.Lock()
+
+
+def is_adaptive_timeouts_enabled() -> bool:
+    """適応タイムアウトが有効か（環境変数 ADAPTIVE_TIMEOUTS_ENABLED、デフォルト: false）"""
+    return os.getenv('ADAPTIVE_TIMEOUTS_ENABLED', 'false').lower() == 'true'
+
+
+def get_adaptive_timeouts() -> Optional[AdaptiveTimeouts]:
+    """
+    適応タイムアウトのシングルトンを取得
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _adaptive_instance
+    if not is_adaptive_timeouts_enabled():
+        return None
+    with _adaptive_lock:
+        if _adaptive_instance is None:
+            _adaptive_instance = AdaptiveTimeouts()
+            atexit.register(_adaptive_instance.flush)
+    return _adaptive_instance
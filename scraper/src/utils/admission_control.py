@@ -0,0 +1,304 @@
+"""
+スクレイピングの受付制御（バックプレッシャー）
+/scrape/* と定期更新（RefreshScheduler）で開始する実行が同時に開くブラウザの数と待ち行列の長さを制限する。
+実行ごとに同時に開くブラウザの数（セッション計画の並行数）を枠として確保し、
+待機ページが開いたままにしているブラウザも使用中として数える。
+枠が空くまでは待ち行列で待たせ（空きメモリが少ない間も開始しない）、
+待ち行列も埋まっている場合は受け付けずに、再試行までの目安の秒数を返す
+"""
+import contextvars
+import functools
+import heapq
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .deadlines import Deadline
+from .page_parking import get_page_parking
+from .resource_governor import available_memory_mb
+
+
+# 処理中のリクエストで受け付けたチケット（スクレイピングのスレッドに引き渡すため）
+_current_ticket: contextvars.ContextVar[Optional["AdmissionTicket"]] = contextvars.ContextVar(
+    "admission_ticket", default=None
+)
+
+
+class AdmissionTicket:
+    """受け付けた1回の実行（待ち行列 → 実行中 → 解放）"""
+
+    def __init__(self, controller: "AdmissionController", label: str):
+        self.controller = controller
+        self.label = label
+        self.queued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        # 実行が同時に開くブラウザの数（スレッドに引き渡す時に決まる）
+        self.browsers = 1
+        # スクレイピングのスレッドに引き渡した場合True（リクエストの終了時に解放しない）
+        self.handed_off = False
+        # 実行するジョブの期限（実行枠を取得した時点から数え直し、待っている間のキャンセルで待ち行列を離れる）
+        self.deadline: Optional[Deadline] = None
+        self.waited_for_memory = False
+        self._released = False
+
+    def run(self, target: Callable, *args, **kwargs):
+        """
+        実行枠が空くまで待ってからtargetを実行し、終了後に枠を解放する
+        待っている間にキャンセルされた場合は枠を取らずにtargetを実行する
+        （スクレイパーはブラウザを起動する前に期限を確認して止まるため、ジョブ・Rate limitsの後処理だけが行われる）
+        """
+        try:
+            self.controller._acquire(self)
+            return target(*args, **kwargs)
+        finally:
+            self.release()
+
+    def release(self) -> None:
+        """枠（または待ち行列の位置）を解放（2回目以降は何もしない）"""
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    """同時に開くブラウザの数・待機中の実行の数と空きメモリによる受付制御"""
+
+    def __init__(self, max_browsers: Optional[int] = None, max_queued: Optional[int] = None,
+                 min_free_memory_mb: Optional[float] = None, default_run_seconds: Optional[float] = None,
+                 memory_reader: Callable[[], Optional[float]] = available_memory_mb,
+                 parked_browser_reader: Optional[Callable[[], int]] = None):
+        """
+        初期化（省略した値は環境変数から取得）
+
+        Args:
+            max_browsers: 同時に開くブラウザの数（ADMISSION_MAX_BROWSERS、デフォルト: 2）
+            max_queued: 枠を待てる数。超えたら受け付けない（ADMISSION_MAX_QUEUED、デフォルト: 4）
+            min_free_memory_mb: 新しい実行を開始するのに必要な空きメモリ（ADMISSION_MIN_FREE_MEMORY_MB、デフォルト: 400。0で無効）
+            default_run_seconds: 実績がない間の1回の実行の所要時間の目安（ADMISSION_DEFAULT_RUN_SECONDS、デフォルト: 120）
+            memory_reader: 空きメモリ（MB）を返す関数（テスト用に差し替え可能）
+            parked_browser_reader: 実行に使われずに開いている待機ページのブラウザの数を返す関数（省略時はページパーキングから取得）
+        """
+        if max_browsers is None:
+            max_browsers = int(os.getenv('ADMISSION_MAX_BROWSERS', '2'))
+        if max_queued is None:
+            max_queued = int(os.getenv('ADMISSION_MAX_QUEUED', '4'))
+        if min_free_memory_mb is None:
+            min_free_memory_mb = float(os.getenv('ADMISSION_MIN_FREE_MEMORY_MB', '400'))
+        if default_run_seconds is None:
+            default_run_seconds = float(os.getenv('ADMISSION_DEFAULT_RUN_SECONDS', '120'))
+        self.max_browsers = max(1, max_browsers)
+        self.max_queued = max(0, max_queued)
+        self.min_free_memory_mb = min_free_memory_mb
+        self._read_memory = memory_reader
+        self._read_parked_browsers = parked_browser_reader or idle_parked_browsers
+
+        self._condition = threading.Condition()
+        self._active: List[AdmissionTicket] = []
+        self._queued: List[AdmissionTicket] = []
+        # 所要時間の指数移動平均（待ち時間の見積もり用）
+        self.average_run_seconds = default_run_seconds
+        self.admitted = 0
+        self.rejected = 0
+        self.memory_waits = 0
+        self.cancelled_in_queue = 0
+
+    def try_admit(self, label: str) -> Optional[AdmissionTicket]:
+        """
+        実行を受け付けて待ち行列に入れる
+
+        Returns:
+            受け付けた場合はチケット、ブラウザの枠も待ち行列も埋まっている場合はNone
+        """
+        with self._condition:
+            free = max(0, self.max_browsers - self._browsers_in_use())
+            if len(self._queued) >= self.max_queued + free:
+                self.rejected += 1
+                return None
+            ticket = AdmissionTicket(self, label)
+            self._queued.append(ticket)
+            self.admitted += 1
+            return ticket
+
+    def set_browsers(self, ticket: AdmissionTicket, browsers: int) -> None:
+        """実行が同時に開くブラウザの数を設定（上限を超える分は上限に収める）"""
+        with self._condition:
+            ticket.browsers = min(max(1, browsers), self.max_browsers)
+
+    def _browsers_in_use(self) -> int:
+        """実行中の実行が確保した枠と、実行に使われずに開いている待機ページのブラウザの数"""
+        return sum(ticket.browsers for ticket in self._active) + self._read_parked_browsers()
+
+    def _memory_low(self) -> bool:
+        if self.min_free_memory_mb <= 0:
+            return False
+        available = self._read_memory()
+        return available is not None and available < self.min_free_memory_mb
+
+    def _can_start(self, ticket: AdmissionTicket) -> bool:
+        """
+        受け付けた順に、ブラウザの枠が空いていて空きメモリが足りれば開始する
+        実行中がなければ待機ページ・メモリに関わらず開始する（待機ページはその実行が再利用するか、アイドル時間が経つと閉じられる）
+        """
+        if self._queued[0] is not ticket:
+            return False
+        if not self._active:
+            return True
+        if self._browsers_in_use() + ticket.browsers > self.max_browsers:
+            return False
+        if self._memory_low():
+            if not ticket.waited_for_memory:
+                ticket.waited_for_memory = True
+                self.memory_waits += 1
+            return False
+        return True
+
+    def _acquire(self, ticket: AdmissionTicket) -> bool:
+        """
+        実行枠が空くまで待つ（空きメモリ・キャンセルは実行の終了を待たずに1秒ごとに確認する）
+
+        Returns:
+            実行枠を取得した場合True、待っている間にキャンセルされて待ち行列を離れた場合False
+        """
+        with self._condition:
+            while not self._can_start(ticket):
+                if ticket.deadline is not None and ticket.deadline.cancelled:
+                    self._queued.remove(ticket)
+                    self.cancelled_in_queue += 1
+                    self._condition.notify_all()
+                    return False
+                self._condition.wait(timeout=1.0)
+            self._queued.remove(ticket)
+            self._active.append(ticket)
+            ticket.started_at = time.monotonic()
+        if ticket.deadline is not None:
+            ticket.deadline.restart()
+        return True
+
+    def _release(self, ticket: AdmissionTicket) -> None:
+        with self._condition:
+            if ticket in self._active:
+                self._active.remove(ticket)
+                elapsed = time.monotonic() - ticket.started_at
+                self.average_run_seconds = 0.8 * self.average_run_seconds + 0.2 * elapsed
+            elif ticket in self._queued:
+                self._queued.remove(ticket)
+            self._condition.notify_all()
+
+    def _start_times(self, now: float) -> List[float]:
+        """
+        待ち行列の各実行が始まるまでの見積もり秒数と、その次に受け付けた実行（ブラウザ1つ）の開始までの秒数
+        ブラウザの枠ごとに空く時刻を見積もり、実行は必要な数の枠が空いた時点で始まるものとする
+        """
+        average = self.average_run_seconds
+        free_at = []
+        for ticket in self._active:
+            free_at += [max(0.0, average - (now - ticket.started_at))] * ticket.browsers
+        free_at += [0.0] * max(0, self.max_browsers - len(free_at))
+        heapq.heapify(free_at)
+        starts = []
+        for browsers in [ticket.browsers for ticket in self._queued] + [1]:
+            start = max(heapq.heappop(free_at) for _ in range(browsers))
+            starts.append(start)
+            for _ in range(browsers):
+                heapq.heappush(free_at, start + average)
+        return starts
+
+    def estimated_wait_seconds(self) -> int:
+        """今受け付けた場合に実行が始まるまでの見積もり秒数"""
+        with self._condition:
+            return math.ceil(self._start_times(time.monotonic())[-1])
+
+    def retry_after_seconds(self) -> int:
+        """受け付けられなかった場合に、待ち行列に空きができるまでの見積もり秒数（1秒以上）"""
+        with self._condition:
+            return max(1, math.ceil(self._start_times(time.monotonic())[0]))
+
+    def get_stats(self) -> Dict:
+        """受付状況（API用）"""
+        available = self._read_memory()
+        with self._condition:
+            starts = self._start_times(time.monotonic())
+            return {
+                'maxBrowsers': self.max_browsers,
+                'maxQueued': self.max_queued,
+                'browsersInUse': self._browsers_in_use(),
+                'parkedBrowsers': self._read_parked_browsers(),
+                'active': [ticket.label for ticket in self._active],
+                'queued': [ticket.label for ticket in self._queued],
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'memoryWaits': self.memory_waits,
+                'cancelledInQueue': self.cancelled_in_queue,
+                'averageRunSeconds': round(self.average_run_seconds, 1),
+                'estimatedWaitSeconds': math.ceil(starts[-1]),
+                'availableMemoryMb': round(available) if available is not None else None,
+                'minFreeMemoryMb': self.min_free_memory_mb
+            }
+
+
+def idle_parked_browsers() -> int:
+    """実行に使われずに開いている待機ページのブラウザの数（ページパーキングが無効な場合は0）"""
+    parking = get_page_parking()
+    return parking.idle_browsers() if parking is not None else 0
+
+
+_controller_instance: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def is_admission_control_enabled() -> bool:
+    """受付制御が有効か（環境変数 ADMISSION_CONTROL_ENABLED、デフォルト: false）"""
+    return os.getenv('ADMISSION_CONTROL_ENABLED', 'false').lower() == 'true'
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    受付制御のシングルトンを取得
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _controller_instance
+    if not is_admission_control_enabled():
+        return None
+    with _controller_lock:
+        if _controller_instance is None:
+            _controller_instance = AdmissionController()
+    return _controller_instance
+
+
+@contextmanager
+def admission_ticket(ticket: AdmissionTicket) -> Iterator[AdmissionTicket]:
+    """
+    処理中のリクエストで受け付けたチケットを設定
+    この中でadmittedを通した処理だけが実行枠を使い、引き渡されなかったチケットは終了時に解放する
+    """
+    token = _current_ticket.set(ticket)
+    try:
+        yield ticket
+    finally:
+        _current_ticket.reset(token)
+        if not ticket.handed_off:
+            ticket.release()
+
+
+def admitted(target: Callable, deadline: Optional[Deadline] = None, browsers: int = 1) -> Callable:
+    """
+    現在のリクエストのチケットで実行する関数を返す（スクレイピングのスレッドのtargetに渡す）
+    チケットがない場合（受付制御が無効な場合）はtargetをそのまま返す
+
+    Args:
+        target: スクレイピングのタスク
+        deadline: タスクのジョブの期限（実行枠を取得した時点から数え直し、キャンセルされたら待ち行列を離れる）
+        browsers: タスクが同時に開くブラウザの数（セッション計画で並行に実行する場合はその並行数）
+    """
+    ticket = _current_ticket.get()
+    if ticket is None:
+        return target
+    ticket.handed_off = True
+    ticket.deadline = deadline
+    ticket.controller.set_browsers(ticket, browsers)
+    return functools.partial(ticket.run, target)
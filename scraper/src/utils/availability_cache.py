@@ -0,0 +1,157 @@
+"""
+空き状況の読み取りキャッシュ
+GET /availability の応答を日付ごとにプロセス内で保持し、同じ日付の再読み込みでCosmos DBに問い合わせない。
+CosmosWriter.save_availability が同じ日付を書き込んだ時点で破棄する（TTLは書き込み経路を通らない更新への保険）
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+
+class CachedAvailability:
+    """1日付分のキャッシュエントリ（シリアライズ済みの本文とETag）"""
+
+    def __init__(self, date: str, payload: Dict):
+        self.date = date
+        self.payload = payload
+        self.body = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.loaded_at = time.monotonic()
+        self._gzipped: Optional[bytes] = None
+
+    @property
+    def gzipped_body(self) -> bytes:
+        """gzip圧縮した本文（初回のみ圧縮する）"""
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body)
+        return self._gzipped
+
+
+class AvailabilityCache:
+    """日付ごとの空き状況のキャッシュ"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            ttl_seconds: エントリの有効期間（省略時は環境変数 AVAILABILITY_CACHE_TTL_SECONDS、デフォルト: 300。0でキャッシュしない）
+            max_entries: 保持する日付数の上限（省略時は環境変数 AVAILABILITY_CACHE_MAX_ENTRIES、デフォルト: 120）
+        """
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv('AVAILABILITY_CACHE_TTL_SECONDS', '300'))
+        if max_entries is None:
+            max_entries = int(os.getenv('AVAILABILITY_CACHE_MAX_ENTRIES', '120'))
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, CachedAvailability]" = OrderedDict()
+        # 日付ごとの世代（読み込み中に破棄された場合、古い結果を保存しないため）
+        self._generations: Dict[str, int] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _monotonic() -> float:
+        return time.monotonic()
+
+    def _fresh_entry(self, date: str) -> Optional[CachedAvailability]:
+        """有効なエントリ（呼び出し元でロックを取得すること）"""
+        entry = self._entries.get(date)
+        if entry is None:
+            return None
+        if self._monotonic() - entry.loaded_at >= self.ttl_seconds:
+            del self._entries[date]
+            return None
+        self._entries.move_to_end(date)
+        return entry
+
+    def get(self, date: str, loader: Callable[[str], List[Dict]]) -> CachedAvailability:
+        """
+        日付の空き状況を取得（キャッシュがなければloaderで読み込む）
+        同じ日付の読み込みが同時に来た場合は1回だけloaderを呼ぶ
+
+        Args:
+            date: YYYY-MM-DD形式の日付
+            loader: 日付の施設データのリストを返す関数（例外はそのまま呼び出し元へ）
+        """
+        with self._lock:
+            entry = self._fresh_entry(date)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            load_lock = self._load_locks.setdefault(date, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # 待っている間に他のスレッドが読み込んだ場合
+                entry = self._fresh_entry(date)
+                if entry is not None:
+                    self.hits += 1
+                    return entry
+                self.misses += 1
+                generation = self._generations.get(date, 0)
+
+            entry = CachedAvailability(date, {'date': date, 'facilities': loader(date)})
+
+            with self._lock:
+                if self.ttl_seconds > 0 and self._generations.get(date, 0) == generation:
+                    entry.loaded_at = self._monotonic()
+                    self._entries[date] = entry
+                    self._entries.move_to_end(date)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return entry
+
+    def invalidate(self, date: Optional[str] = None) -> None:
+        """
+        エントリを破棄
+
+        Args:
+            date: 破棄する日付（省略時は全件）
+        """
+        with self._lock:
+            if date is None:
+                self._entries.clear()
+                for key in self._generations:
+                    self._generations[key] += 1
+                return
+            self._entries.pop(date, None)
+            self._generations[date] = self._generations.get(date, 0) + 1
+
+    def get_stats(self) -> Dict:
+        """キャッシュの状態（API用）"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_cache_instance: Optional[AvailabilityCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_availability_cache() -> AvailabilityCache:
+    """空き状況キャッシュのシングルトンを取得"""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = AvailabilityCache()
+    return _cache_instance
+
+
+def invalidate_availability(date: str) -> None:
+    """日付のキャッシュを破棄（書き込み側から呼ぶ。キャッシュ未使用の場合は何もしない）"""
+    if _cache_instance is not None:
+        _cache_instance.invalidate(date)
@@ -0,0 +1,258 @@
+"""
+ブラウザのプロファイル（ストレージの状態・HTTPキャッシュ）の保存と再利用
+施設ごとにCookie・localStorage（storage_state）をローカルに保存して次回のコンテキストに読み込み、
+SPAのスクリプト・スタイルシートなどの静的リソースはディスクのキャッシュから返す。
+古くなった状態や期限切れのCookieを含む状態は読み込まずに破棄する
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# ディスクにキャッシュするリソースの種類（SPAのバンドル・画像など）
+STATIC_RESOURCE_TYPES = frozenset({'script', 'stylesheet', 'font', 'image'})
+
+# キャッシュから返すときに除くヘッダー（本文は展開済みで保存するため）
+DROPPED_HEADERS = frozenset({'content-encoding', 'content-length', 'transfer-encoding', 'set-cookie'})
+
+
+class BrowserProfiles:
+    """施設ごとのストレージの状態と、施設共通のHTTPキャッシュ"""
+
+    def __init__(self, directory: Optional[str] = None, max_age_seconds: Optional[int] = None,
+                 cache_max_mb: Optional[int] = None, cache_max_age_seconds: Optional[int] = None):
+        """
+        初期化（省略した値は環境変数から取得）
+
+        Args:
+            directory: 保存先（BROWSER_PROFILE_DIR、デフォルト: <tmp>/aki-sta/browser_profiles）
+            max_age_seconds: ストレージの状態を再利用する最大秒数（BROWSER_PROFILE_MAX_AGE_SECONDS、デフォルト: 21600）
+            cache_max_mb: HTTPキャッシュの上限。超えたら古いものから削除する（BROWSER_CACHE_MAX_MB、デフォルト: 200）
+            cache_max_age_seconds: キャッシュしたリソースを返す最大秒数（BROWSER_CACHE_MAX_AGE_SECONDS、デフォルト: 86400）
+        """
+        self.directory = Path(directory or os.getenv(
+            'BROWSER_PROFILE_DIR',
+            str(Path(tempfile.gettempdir()) / 'aki-sta' / 'browser_profiles')
+        ))
+        self.max_age_seconds = max_age_seconds or int(os.getenv('BROWSER_PROFILE_MAX_AGE_SECONDS', '21600'))
+        self.cache_max_bytes = (cache_max_mb or int(os.getenv('BROWSER_CACHE_MAX_MB', '200'))) * 1024 * 1024
+        self.cache_max_age_seconds = cache_max_age_seconds or int(os.getenv('BROWSER_CACHE_MAX_AGE_SECONDS', '86400'))
+
+        self.cache_directory = self.directory / 'http_cache'
+        self.cache_directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache_bytes = sum(path.stat().st_size for path in self.cache_directory.glob('*.body'))
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.invalidations = 0
+
+    # ストレージの状態（Cookie・localStorage）
+
+    def state_path(self, facility: str) -> Path:
+        return self.directory / facility / 'storage_state.json'
+
+    def load_state(self, facility: str) -> Optional[Dict]:
+        """
+        保存済みのストレージの状態を取得
+
+        Returns:
+            new_contextのstorage_stateに渡せる辞書（ない・古い・セッションが切れている場合はNone）
+        """
+        path = self.state_path(facility)
+        try:
+            age = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if age > self.max_age_seconds:
+            self.invalidate(facility, f"older than {self.max_age_seconds}s")
+            return None
+
+        try:
+            state = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            self.invalidate(facility, f"unreadable ({e})")
+            return None
+
+        now = time.time()
+        # expiresが-1のCookieはブラウザを閉じるまで有効なセッションCookie
+        expired = [cookie.get('name') for cookie in state.get('cookies', [])
+                   if 0 < cookie.get('expires', -1) < now]
+        if expired:
+            self.invalidate(facility, f"session cookie expired: {', '.join(map(str, expired))}")
+            return None
+        return state
+
+    def save_state(self, facility: str, context) -> None:
+        """コンテキストのストレージの状態を保存（書き込み途中のファイルを読まないよう置き換えで保存）"""
+        try:
+            state = context.storage_state()
+        except Exception as e:
+            logger.debug("Failed to read storage state of %s: %s", facility, e)
+            return
+        path = self.state_path(facility)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(state, ensure_ascii=False), encoding='utf-8')
+        os.replace(temporary, path)
+
+    def invalidate(self, facility: str, reason: str) -> None:
+        """保存済みのストレージの状態を破棄（次回は空のプロファイルから始める）"""
+        path = self.state_path(facility)
+        if not path.exists():
+            return
+        path.unlink(missing_ok=True)
+        self.invalidations += 1
+        logger.info("Discarded saved browser storage state of %s: %s", facility, reason)
+
+    # HTTPキャッシュ
+
+    def attach_cache(self, context) -> None:
+        """コンテキストの静的リソースのリクエストをディスクのキャッシュ経由にする"""
+        context.route("**/*", self._handle_route)
+
+    @staticmethod
+    def _cache_key(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _handle_route(self, route) -> None:
+        request = route.request
+        if request.method != 'GET' or request.resource_type not in STATIC_RESOURCE_TYPES:
+            route.fallback()
+            return
+
+        key = self._cache_key(request.url)
+        cached = self._read_cache(key)
+        if cached is not None:
+            status, headers, body = cached
+            with self._lock:
+                self.cache_hits += 1
+            route.fulfill(status=status, headers=headers, body=body)
+            return
+
+        try:
+            response = route.fetch()
+            body = response.body()
+        except Exception as e:
+            logger.debug("Failed to fetch %s for the cache: %s", request.url, e)
+            route.fallback()
+            return
+        with self._lock:
+            self.cache_misses += 1
+        if self._cacheable(response.status, response.headers, body):
+            self._write_cache(key, request.url, response.status, response.headers, body)
+        route.fulfill(response=response, body=body)
+
+    def _cacheable(self, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        """キャッシュしてよいレスポンスか（正常・no-storeでない・上限の1割以下）"""
+        cache_control = headers.get('cache-control', '').lower()
+        return status == 200 and 'no-store' not in cache_control and len(body) <= self.cache_max_bytes // 10
+
+    def _read_cache(self, key: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """キャッシュしたレスポンス（ない・古い場合はNone）"""
+        meta_path = self.cache_directory / f"{key}.json"
+        body_path = self.cache_directory / f"{key}.body"
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            if time.time() - meta['storedAt'] > self.cache_max_age_seconds:
+                self._remove_cache_entry(key)
+                return None
+            body = body_path.read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+        # 使われたものを新しい扱いにする（上限を超えたら使われていないものから削除するため）
+        os.utime(body_path)
+        return meta['status'], meta['headers'], body
+
+    def _write_cache(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        meta = {
+            'url': url,
+            'status': status,
+            'headers': {name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS},
+            'storedAt': time.time()
+        }
+        body_path = self.cache_directory / f"{key}.body"
+        try:
+            temporary = body_path.with_suffix('.tmp')
+            temporary.write_bytes(body)
+            os.replace(temporary, body_path)
+            (self.cache_directory / f"{key}.json").write_text(json.dumps(meta), encoding='utf-8')
+        except OSError as e:
+            logger.debug("Failed to write cache entry for %s: %s", url, e)
+            return
+        with self._lock:
+            self._cache_bytes += len(body)
+            over_limit = self._cache_bytes > self.cache_max_bytes
+        if over_limit:
+            self._prune()
+
+    def _remove_cache_entry(self, key: str) -> None:
+        body_path = self.cache_directory / f"{key}.body"
+        try:
+            size = body_path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        body_path.unlink(missing_ok=True)
+        (self.cache_directory / f"{key}.json").unlink(missing_ok=True)
+        with self._lock:
+            self._cache_bytes = max(0, self._cache_bytes - size)
+
+    def _prune(self) -> None:
+        """上限の8割になるまで、使われていないものから削除"""
+        entries = sorted(self.cache_directory.glob('*.body'), key=lambda path: path.stat().st_mtime)
+        target = self.cache_max_bytes * 0.8
+        for path in entries:
+            if self._cache_bytes <= target:
+                break
+            self._remove_cache_entry(path.stem)
+
+    def get_stats(self) -> Dict:
+        """保存済みの状態とキャッシュの利用状況（API用）"""
+        facilities = sorted(path.parent.name for path in self.directory.glob('*/storage_state.json'))
+        total = self.cache_hits + self.cache_misses
+        return {
+            'directory': str(self.directory),
+            'storedStates': facilities,
+            'invalidations': self.invalidations,
+            'cache': {
+                'entries': len(list(self.cache_directory.glob('*.body'))),
+                'bytes': self._cache_bytes,
+                'maxBytes': self.cache_max_bytes,
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hitRate': round(self.cache_hits / total, 3) if total else None
+            }
+        }
+
+
+_profiles_instance: Optional[BrowserProfiles] = None
+_profiles_lock = threading.Lock()
+
+
+def is_browser_profile_enabled() -> bool:
+    """ブラウザのプロファイルの再利用が有効か（環境変数 BROWSER_PROFILE_ENABLED、デフォルト: false）"""
+    return os.getenv('BROWSER_PROFILE_ENABLED', 'false').lower() == 'true'
+
+
+def get_browser_profiles() -> Optional[BrowserProfiles]:
+    """
+    ブラウザのプロファイルのシングルトンを取得
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _profiles_instance
+    if not is_browser_profile_enabled():
+        return None
+    with _profiles_lock:
+        if _profiles_instance is None:
+            _profiles_instance = BrowserProfiles()
+    return _profiles_instance
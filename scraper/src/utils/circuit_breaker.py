@@ -0,0 +1,209 @@
+"""
+施設ごとのサーキットブレーカー
+メンテナンス中などで施設サイトに繋がらない状態が続いた場合、
+一定時間はブラウザを起動せずに即座に失敗させ、軽量なリクエストで復旧を確認してから再開する
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# サイトに到達できていないことを示すエラー種別（scrape_and_saveのerror_type）
+TRIPPING_ERROR_TYPES = frozenset({"TIMEOUT_ERROR", "NAVIGATION_ERROR"})
+
+# サイトの状態と無関係で、記録しない結果（ブレーカー自身による失敗・期限切れ・キャンセル）
+IGNORED_ERROR_TYPES = frozenset({"CIRCUIT_OPEN", "CANCELLED", "DEADLINE_EXCEEDED"})
+
+
+class CircuitBreaker:
+    """
+    1施設分のサーキットブレーカー
+
+    closed: 通常どおりスクレイピングする
+    open: 失敗が続いたため、reset_timeout経過まで即座に失敗させる
+    half_open: reset_timeout経過後、プローブが成功した1回だけスクレイピングを許可する
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 reset_timeout_seconds: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            name: 施設キー
+            failure_threshold: openにする連続失敗回数（省略時は環境変数 CIRCUIT_BREAKER_FAILURE_THRESHOLD）
+            reset_timeout_seconds: openからhalf_openに移るまでの秒数（省略時は環境変数 CIRCUIT_BREAKER_RESET_SECONDS）
+        """
+        self.name = name
+        if failure_threshold is None:
+            failure_threshold = int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', '3'))
+        if reset_timeout_seconds is None:
+            reset_timeout_seconds = float(os.getenv('CIRCUIT_BREAKER_RESET_SECONDS', '600'))
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.last_error_type: Optional[str] = None
+        self.opened_at: Optional[datetime] = None
+        self._opened_monotonic: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _monotonic() -> float:
+        return time.monotonic()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = datetime.now(timezone.utc)
+        self._opened_monotonic = self._monotonic()
+
+    def retry_after_seconds(self) -> float:
+        """openの場合、half_openに移るまでの残り秒数（それ以外は0）"""
+        if self.state != OPEN or self._opened_monotonic is None:
+            return 0.0
+        elapsed = self._monotonic() - self._opened_monotonic
+        return max(0.0, self.reset_timeout_seconds - elapsed)
+
+    def allow_request(self, probe: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        スクレイピングを実行してよいか判定
+
+        Args:
+            probe: half_openに移ったときに実行する軽量な疎通確認（Noneの場合は確認せずに1回許可する）
+
+        Returns:
+            実行してよい場合True
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self._trial_in_flight or self.retry_after_seconds() > 0:
+                return False
+            self.state = HALF_OPEN
+            self._trial_in_flight = True
+
+        try:
+            reachable = probe() if probe is not None else True
+        except Exception:
+            reachable = False
+
+        if not reachable:
+            with self._lock:
+                self._trial_in_flight = False
+                self._open()
+            return False
+        return True
+
+    def record_result(self, status: Optional[str], error_type: Optional[str] = None) -> None:
+        """
+        スクレイピング結果を記録
+
+        Args:
+            status: "success" または "error"
+            error_type: エラー種別（TIMEOUT_ERROR/NAVIGATION_ERRORのみ失敗として数える）
+        """
+        with self._lock:
+            self._trial_in_flight = False
+            if status == "success":
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                self.last_error_type = None
+            elif error_type in TRIPPING_ERROR_TYPES:
+                self.consecutive_failures += 1
+                self.last_error_type = error_type
+                if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                    self._open()
+            elif self.state == HALF_OPEN:
+                # サイトには到達できている（DB保存失敗など）ため閉じる
+                self.state = CLOSED
+
+    def record_results(self, results: Iterable[Dict]) -> None:
+        """
+        1セッション分（複数日付）の結果をまとめて1回として記録
+        いずれかの日付が成功していれば成功、すべて失敗ならサイト到達不可の失敗があるかで判定する
+        """
+        results = [result for result in results
+                   if not result.get("skipped") and result.get("error_type") not in IGNORED_ERROR_TYPES]
+        if not results:
+            return
+        if any(result.get("status") == "success" for result in results):
+            self.record_result("success")
+            return
+        error_types = [classify_error_type(result) for result in results]
+        tripping = next((error_type for error_type in error_types if error_type in TRIPPING_ERROR_TYPES), None)
+        self.record_result("error", tripping or error_types[0])
+
+    def reset(self) -> None:
+        """closedに戻す"""
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.last_error_type = None
+            self.opened_at = None
+            self._opened_monotonic = None
+            self._trial_in_flight = False
+
+    def to_dict(self) -> Dict:
+        """API用の状態表現"""
+        with self._lock:
+            return {
+                "facility": self.name,
+                "state": self.state,
+                "consecutiveFailures": self.consecutive_failures,
+                "failureThreshold": self.failure_threshold,
+                "lastErrorType": self.last_error_type,
+                "openedAt": self.opened_at.isoformat() if self.opened_at else None,
+                "retryAfterSeconds": round(self.retry_after_seconds(), 1)
+            }
+
+
+def classify_error_type(result: Dict) -> Optional[str]:
+    """
+    結果のエラー種別を取得
+    複数日付処理の例外（SCRAPING_ERROR/FATAL_ERROR）でもタイムアウトが原因ならTIMEOUT_ERRORとして扱う
+    """
+    error_type = result.get("error_type")
+    if error_type in TRIPPING_ERROR_TYPES:
+        return error_type
+    detail = f"{result.get('details', '')} {result.get('message', '')}".lower()
+    if "timeout" in detail:
+        return "TIMEOUT_ERROR"
+    return error_type
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def is_circuit_breaker_enabled() -> bool:
+    """サーキットブレーカーが有効か（環境変数 CIRCUIT_BREAKER_ENABLED、デフォルト: false）"""
+    return os.getenv('CIRCUIT_BREAKER_ENABLED', 'false').lower() == 'true'
+
+
+def get_circuit_breaker(facility: str) -> Optional[CircuitBreaker]:
+    """
+    施設のサーキットブレーカーを取得（施設ごとのシングルトン）
+
+    Returns:
+        無効化されている場合はNone
+    """
+    if not is_circuit_breaker_enabled():
+        return None
+    with _breakers_lock:
+        if facility not in _breakers:
+            _breakers[facility] = CircuitBreaker(facility)
+        return _breakers[facility]
+
+
+def get_circuit_breaker_states(facilities: Iterable[str]) -> List[Dict]:
+    """指定した施設のブレーカーの状態一覧（無効化されている場合は空）"""
+    breakers = [get_circuit_breaker(facility) for facility in facilities]
+    return [breaker.to_dict() for breaker in breakers if breaker is not None]
@@ -0,0 +1,163 @@
+"""
+スクレイピングの期限とキャンセル
+ジョブごとの期限（残り時間）とキャンセル要求をコンテキスト経由でスクレイパーの各ステップに渡す。
+スクレイパーは日付・ステップの間で確認して途中で止まり（保存済みの日付はそのまま）、
+待機のタイムアウトは期限に収まるように短くする
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+# 現在のスレッドで有効な期限（ジョブ・ScrapeServiceの呼び出しごとに設定する）
+_current_deadline: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar("scrape_deadline", default=None)
+
+CANCELLED = "CANCELLED"
+DEADLINE_EXCEEDED = "DEADLINE_EXCEEDED"
+
+
+class ScrapeCancelledError(Exception):
+    """期限切れ・キャンセル要求によりスクレイピングを中断した"""
+
+    def __init__(self, message: str, error_type: str):
+        super().__init__(message)
+        self.error_type = error_type
+
+    def to_result(self) -> Dict:
+        """中断した日付の結果（日付ごとの結果の形式）"""
+        return {
+            "status": "error",
+            "message": "Scraping cancelled" if self.error_type == CANCELLED else "Scraping deadline exceeded",
+            "error_type": self.error_type,
+            "details": str(self)
+        }
+
+
+class Deadline:
+    """1回の実行の期限とキャンセル要求"""
+
+    def __init__(self, timeout_seconds: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            timeout_seconds: 期限までの秒数（None・0以下の場合は期限なしで、キャンセルのみ）
+        """
+        self.timeout_seconds = timeout_seconds if timeout_seconds and timeout_seconds > 0 else None
+        self._expires_at = time.monotonic() + self.timeout_seconds if self.timeout_seconds else None
+        self._cancelled = threading.Event()
+        self.cancel_reason: Optional[str] = None
+
+    def restart(self) -> None:
+        """期限を今から数え直す（実行枠を待っていた時間を期限に含めないため）"""
+        if self.timeout_seconds:
+            self._expires_at = time.monotonic() + self.timeout_seconds
+
+    def cancel(self, reason: str = "Cancelled") -> None:
+        """キャンセルを要求（実行中のスクレイパーは次の確認時に止まる）"""
+        if not self._cancelled.is_set():
+            self.cancel_reason = reason
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """期限までの残り秒数（期限なしの場合はNone）"""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    @property
+    def done(self) -> bool:
+        """キャンセル済み・期限切れで、これ以上処理を続けないか"""
+        return self.cancelled or self.expired
+
+    def error(self) -> Optional[ScrapeCancelledError]:
+        """キャンセル済み・期限切れの場合はその理由の例外（続けてよい場合はNone）"""
+        if self.cancelled:
+            return ScrapeCancelledError(self.cancel_reason or "Cancelled", CANCELLED)
+        if self.expired:
+            return ScrapeCancelledError(f"Deadline of {self.timeout_seconds:.0f}s exceeded", DEADLINE_EXCEEDED)
+        return None
+
+    def check(self) -> None:
+        """
+        キャンセル済み・期限切れなら例外を投げる
+
+        Raises:
+            ScrapeCancelledError: 処理を続けない場合
+        """
+        error = self.error()
+        if error is not None:
+            raise error
+
+    def clamp_ms(self, timeout_ms: float) -> float:
+        """
+        待機のタイムアウト（ミリ秒）を期限までの残り時間に収める
+
+        Raises:
+            ScrapeCancelledError: キャンセル済み・期限切れの場合
+        """
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout_ms
+        return max(1.0, min(timeout_ms, remaining * 1000))
+
+    def to_dict(self) -> Dict:
+        """API用の状態表現"""
+        remaining = self.remaining()
+        return {
+            "timeoutSeconds": self.timeout_seconds,
+            "remainingSeconds": round(remaining, 1) if remaining is not None else None,
+            "cancelled": self.cancelled,
+            "cancelReason": self.cancel_reason
+        }
+
+
+def default_job_timeout_seconds() -> float:
+    """ジョブの期限の秒数（環境変数 SCRAPE_JOB_TIMEOUT_SECONDS、デフォルト: 540。0で期限なし）"""
+    return float(os.getenv('SCRAPE_JOB_TIMEOUT_SECONDS', '540'))
+
+
+@contextmanager
+def deadline_context(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """
+    現在のスレッドで有効な期限を設定（Noneの場合は呼び出し元の期限を引き継ぐ）
+    この中で呼ばれたスクレイパーは期限切れ・キャンセル時に途中で止まる
+    """
+    if deadline is None:
+        yield _current_deadline.get()
+        return
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def get_current_deadline() -> Optional[Deadline]:
+    """現在有効な期限（設定されていない場合はNone）"""
+    return _current_deadline.get()
+
+
+def check_deadline() -> None:
+    """
+    現在の期限を確認（期限が設定されていない場合は何もしない）
+
+    Raises:
+        ScrapeCancelledError: キャンセル済み・期限切れの場合
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
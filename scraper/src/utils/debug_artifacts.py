@@ -0,0 +1,289 @@
+"""
+デバッグ用の成果物（スクリーンショット・HTML・トレース）の取得
+正常時はステップごとの軽量なマーカー（URL・DOMのハッシュ）をメモリ上のリングバッファに残すだけにし、
+ステップが失敗した場合や実行が閾値より遅かった場合にのみ成果物を取得する。
+ファイルへの書き込みはバックグラウンドのスレッドで行い、ブラウザ操作を止めない
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# DOMの要約（1回の問い合わせで取得できる範囲に留める）
+DOM_SUMMARY_SCRIPT = (
+    "() => [document.title, document.getElementsByTagName('*').length,"
+    " document.body ? document.body.innerText.length : 0].join('|')"
+)
+
+
+class ArtifactRecorder:
+    """1つのスクレイパーの直近のステップのマーカーと、成果物の取得"""
+
+    def __init__(self, artifacts: "DebugArtifacts", facility: str):
+        self.artifacts = artifacts
+        self.facility = facility
+        self.markers: Deque[Dict] = deque(maxlen=artifacts.ring_size)
+
+    @staticmethod
+    def _dom_hash(page) -> Optional[str]:
+        """DOMの要約のハッシュ（取得できない場合はNone）"""
+        try:
+            return hashlib.sha1(str(page.evaluate(DOM_SUMMARY_SCRIPT)).encode('utf-8')).hexdigest()[:12]
+        except Exception:
+            return None
+
+    def mark(self, page, step: str, error: Optional[str] = None, duration_ms: Optional[float] = None) -> None:
+        """ステップのマーカーをリングバッファに追加"""
+        try:
+            url = page.url
+        except Exception:
+            url = None
+        self.markers.append({
+            'step': step,
+            'url': url,
+            'domHash': self._dom_hash(page),
+            'durationMs': round(duration_ms, 1) if duration_ms is not None else None,
+            'error': error,
+            'at': datetime.now(timezone.utc).isoformat()
+        })
+
+    def capture(self, page, reason: str) -> Optional[str]:
+        """
+        スクリーンショット・HTML・トレースを取得し、書き込みをバックグラウンドに積む
+        ページからの取得だけは呼び出し元のスレッドで行う（Playwrightの同期APIはスレッドをまたげない）
+
+        Args:
+            page: 対象のページ
+            reason: 取得理由（ディレクトリ名に使う）
+
+        Returns:
+            書き込み先のディレクトリ（取得しなかった場合はNone）
+        """
+        if not self.artifacts.try_acquire_capture():
+            logger.debug("Skipping debug capture for %s: capture limit reached", self.facility)
+            return None
+
+        directory = self.artifacts.new_capture_dir(self.facility, reason)
+        files: Dict[str, bytes] = {}
+        try:
+            files['page.html'] = page.content().encode('utf-8')
+        except Exception as e:
+            logger.debug("Failed to capture HTML: %s", e)
+        try:
+            files['screenshot.png'] = page.screenshot(full_page=True)
+        except Exception as e:
+            logger.debug("Failed to capture screenshot: %s", e)
+        files['markers.json'] = json.dumps({
+            'facility': self.facility,
+            'reason': reason,
+            'markers': list(self.markers)
+        }, ensure_ascii=False, indent=2).encode('utf-8')
+
+        if self.artifacts.trace:
+            self._save_trace(page, directory)
+
+        self.artifacts.enqueue(directory, files)
+        logger.info("Debug artifacts for %s (%s) will be written to %s", self.facility, reason, directory)
+        return str(directory)
+
+    def _save_trace(self, page, directory: Path) -> None:
+        """トレースを保存して記録をやり直す（トレースのzipはPlaywrightが書き込む）"""
+        try:
+            tracing = page.context.tracing
+            directory.mkdir(parents=True, exist_ok=True)
+            tracing.stop(path=str(directory / 'trace.zip'))
+            tracing.start(screenshots=True, snapshots=True)
+        except Exception as e:
+            logger.debug("Failed to save trace: %s", e)
+
+    def start_trace(self, context) -> None:
+        """コンテキストのトレースを開始（DEBUG_ARTIFACTS_TRACE=trueの場合のみ）"""
+        if not self.artifacts.trace:
+            return
+        try:
+            context.tracing.start(screenshots=True, snapshots=True)
+        except Exception as e:
+            logger.debug("Failed to start trace: %s", e)
+
+    # StepPipelineのobserver
+
+    def step_finished(self, name: str, page, error: Optional[str], duration_ms: float) -> None:
+        """ステップの試行ごとにマーカーを残す"""
+        self.mark(page, name, error, duration_ms)
+
+    def run_failed(self, page, step_name: str) -> None:
+        """再試行を使い切ったステップの成果物を取得"""
+        self.capture(page, f"{step_name}_failed")
+
+    def run_finished(self, page, elapsed_ms: float) -> None:
+        """実行が閾値より遅かった場合は成果物を取得"""
+        threshold = self.artifacts.slow_run_ms
+        if threshold > 0 and elapsed_ms > threshold:
+            logger.warning("Run of %s took %.0fms (threshold %dms), capturing debug artifacts",
+                           self.facility, elapsed_ms, threshold)
+            self.capture(page, "slow_run")
+
+
+class DebugArtifacts:
+    """成果物の保存先・上限と、書き込み用のバックグラウンドスレッド"""
+
+    def __init__(self, directory: Optional[str] = None, ring_size: Optional[int] = None,
+                 max_captures: Optional[int] = None, slow_run_ms: Optional[int] = None,
+                 trace: Optional[bool] = None):
+        """
+        初期化（省略した値は環境変数から取得）
+
+        Args:
+            directory: 保存先（DEBUG_ARTIFACTS_DIR、デフォルト: <tmp>/aki-sta/debug_artifacts）
+            ring_size: 保持するマーカーの数（DEBUG_ARTIFACTS_RING_SIZE、デフォルト: 50）
+            max_captures: 残す取得結果の数。古いものから削除する（DEBUG_ARTIFACTS_MAX_CAPTURES、デフォルト: 20）
+            slow_run_ms: これより遅い実行は成功しても取得する。0で無効（DEBUG_ARTIFACTS_SLOW_RUN_MS、デフォルト: 0）
+            trace: Playwrightのトレースも記録するか（DEBUG_ARTIFACTS_TRACE、デフォルト: false）
+        """
+        self.directory = Path(directory or os.getenv(
+            'DEBUG_ARTIFACTS_DIR',
+            str(Path(tempfile.gettempdir()) / 'aki-sta' / 'debug_artifacts')
+        ))
+        self.ring_size = ring_size or int(os.getenv('DEBUG_ARTIFACTS_RING_SIZE', '50'))
+        self.max_captures = max_captures or int(os.getenv('DEBUG_ARTIFACTS_MAX_CAPTURES', '20'))
+        if slow_run_ms is None:
+            slow_run_ms = int(os.getenv('DEBUG_ARTIFACTS_SLOW_RUN_MS', '0'))
+        self.slow_run_ms = slow_run_ms
+        if trace is None:
+            trace = os.getenv('DEBUG_ARTIFACTS_TRACE', 'false').lower() == 'true'
+        self.trace = trace
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # 書き込み待ちの件数（上限を超える取得はページから取得する前に断る）
+        self._in_progress = 0
+        self.captured_count = 0
+
+    def recorder(self, facility: str) -> ArtifactRecorder:
+        """スクレイパー用のレコーダーを作成"""
+        return ArtifactRecorder(self, facility)
+
+    def try_acquire_capture(self) -> bool:
+        """書き込み待ちが上限未満なら取得を予約する"""
+        with self._lock:
+            if self._in_progress >= self.max_captures:
+                return False
+            self._in_progress += 1
+            return True
+
+    def new_capture_dir(self, facility: str, reason: str) -> Path:
+        """取得結果のディレクトリ名（時刻順に並ぶ）"""
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        safe_reason = re.sub(r'[^A-Za-z0-9_-]+', '_', reason)
+        return self.directory / f"{stamp}_{facility}_{safe_reason}"
+
+    def _ensure_worker(self):
+        """書き込みスレッドを起動（起動済みの場合は何もしない）"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="debug-artifacts-writer", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, directory: Path, files: Dict[str, bytes]) -> None:
+        """書き込みをバックグラウンドに積む"""
+        self._ensure_worker()
+        self._queue.put((directory, files))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        積まれた書き込みがすべて完了するまで待つ
+
+        Returns:
+            timeout内に完了した場合True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _run(self):
+        """書き込みを処理し続ける"""
+        while True:
+            directory, files = self._queue.get()
+            try:
+                self._write(directory, files)
+                self._prune()
+            except Exception as e:
+                logger.warning("Failed to write debug artifacts to %s: %s", directory, e)
+            finally:
+                with self._lock:
+                    self._in_progress -= 1
+                self._queue.task_done()
+
+    def _write(self, directory: Path, files: Dict[str, bytes]):
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, content in files.items():
+            (directory / name).write_bytes(content)
+        self.captured_count += 1
+
+    def _prune(self):
+        """上限を超えた古い取得結果を削除"""
+        for directory in self.list_captures()[self.max_captures:]:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def list_captures(self) -> List[Path]:
+        """取得結果のディレクトリ（新しい順）"""
+        if not self.directory.exists():
+            return []
+        return sorted((path for path in self.directory.iterdir() if path.is_dir()), reverse=True)
+
+    def get_stats(self) -> Dict:
+        """保存済みの取得結果（API用）"""
+        return {
+            'directory': str(self.directory),
+            'maxCaptures': self.max_captures,
+            'slowRunMs': self.slow_run_ms,
+            'trace': self.trace,
+            'captures': [
+                {'name': path.name, 'files': sorted(child.name for child in path.iterdir())}
+                for path in self.list_captures()
+            ]
+        }
+
+
+_artifacts_instance: Optional[DebugArtifacts] = None
+_artifacts_lock = threading.Lock()
+
+
+def is_debug_artifacts_enabled() -> bool:
+    """デバッグ成果物の取得が有効か（環境変数 DEBUG_ARTIFACTS_ENABLED、デフォルト: false）"""
+    return os.getenv('DEBUG_ARTIFACTS_ENABLED', 'false').lower() == 'true'
+
+
+def get_debug_artifacts() -> Optional[DebugArtifacts]:
+    """
+    デバッグ成果物のシングルトンを取得
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _artifacts_instance
+    if not is_debug_artifacts_enabled():
+        return None
+    with _artifacts_lock:
+        if _artifacts_instance is None:
+            _artifacts_instance = DebugArtifacts()
+    return _artifacts_instance
@@ -0,0 +1,133 @@
+"""
+施設ごとのdeep link（URLテンプレート）による画面遷移の短縮
+トップページからのクリック操作の代わりに、日付を埋め込んだURLで検索後の画面を直接開く。
+期待する画面に着かなかった場合は通常の画面遷移に戻り、命中率を記録する。
+外れが続いた施設はしばらくdeep linkを試さない
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+class DeepLink:
+    """1施設分のURLテンプレートと命中率"""
+
+    def __init__(self, facility: str, template: str, max_consecutive_misses: Optional[int] = None,
+                 retry_seconds: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            facility: 施設キー
+            template: URLテンプレート。{date}（YYYY-MM-DD）・{date_slash}（YYYY/MM/DD）・{ymd}（YYYYMMDD）・
+                {year}・{month}・{day}を日付で置き換える
+            max_consecutive_misses: この回数続けて外れたら試すのを止める（省略時は環境変数 DEEP_LINK_MAX_MISSES、デフォルト: 3）
+            retry_seconds: 止めてから再び試すまでの秒数（省略時は環境変数 DEEP_LINK_RETRY_SECONDS、デフォルト: 3600）
+        """
+        self.facility = facility
+        self.template = template
+        if max_consecutive_misses is None:
+            max_consecutive_misses = int(os.getenv('DEEP_LINK_MAX_MISSES', '3'))
+        if retry_seconds is None:
+            retry_seconds = float(os.getenv('DEEP_LINK_RETRY_SECONDS', '3600'))
+        self.max_consecutive_misses = max(1, max_consecutive_misses)
+        self.retry_seconds = retry_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.consecutive_misses = 0
+        self.last_error: Optional[str] = None
+        self._suspended_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _monotonic() -> float:
+        return time.monotonic()
+
+    def url(self, target_date: datetime) -> str:
+        """日付を埋め込んだURL"""
+        return self.template.format(
+            date=target_date.strftime('%Y-%m-%d'),
+            date_slash=target_date.strftime('%Y/%m/%d'),
+            ymd=target_date.strftime('%Y%m%d'),
+            year=target_date.year,
+            month=target_date.month,
+            day=target_date.day
+        )
+
+    def should_try(self) -> bool:
+        """deep linkを試すか（外れが続いている場合はretry_seconds経過まで試さない）"""
+        with self._lock:
+            if self._suspended_at is None:
+                return True
+            if self._monotonic() - self._suspended_at < self.retry_seconds:
+                return False
+            # 再び1回だけ試し、外れたらまた止める
+            self._suspended_at = None
+            self.consecutive_misses = self.max_consecutive_misses - 1
+            return True
+
+    def record(self, hit: bool, error: Optional[str] = None) -> None:
+        """試した結果を記録"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.consecutive_misses = 0
+                return
+            self.misses += 1
+            self.consecutive_misses += 1
+            self.last_error = error
+            if self.consecutive_misses >= self.max_consecutive_misses:
+                self._suspended_at = self._monotonic()
+
+    def to_dict(self) -> Dict:
+        """APIレスポンス用の状態"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "facility": self.facility,
+                "template": self.template,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / total, 3) if total else None,
+                "consecutiveMisses": self.consecutive_misses,
+                "suspended": self._suspended_at is not None,
+                "lastError": self.last_error
+            }
+
+
+_deep_links: Dict[str, DeepLink] = {}
+_deep_links_lock = threading.Lock()
+
+
+def is_deep_links_enabled() -> bool:
+    """deep linkが有効か（環境変数 DEEP_LINKS_ENABLED、デフォルト: false）"""
+    return os.getenv('DEEP_LINKS_ENABLED', 'false').lower() == 'true'
+
+
+def get_deep_link(facility: str) -> Optional[DeepLink]:
+    """
+    施設のdeep linkを取得（施設ごとのシングルトン）
+    テンプレートは環境変数 DEEP_LINK_TEMPLATE_<施設キーの大文字>（例: DEEP_LINK_TEMPLATE_MEGURO）
+
+    Returns:
+        無効化されている場合・テンプレートが設定されていない場合はNone
+    """
+    if not is_deep_links_enabled():
+        return None
+    template = os.getenv(f'DEEP_LINK_TEMPLATE_{facility.upper()}')
+    if not template:
+        return None
+    with _deep_links_lock:
+        deep_link = _deep_links.get(facility)
+        if deep_link is None or deep_link.template != template:
+            deep_link = _deep_links[facility] = DeepLink(facility, template)
+        return deep_link
+
+
+def get_deep_link_states(facilities: Iterable[str]) -> List[Dict]:
+    """指定した施設のdeep linkの状態一覧（無効化・未設定の施設は含まない）"""
+    deep_links = [get_deep_link(facility) for facility in facilities]
+    return [deep_link.to_dict() for deep_link in deep_links if deep_link is not None]
@@ -0,0 +1,340 @@
+"""
+ホットページの待機（ページパーキング）
+施設ごとに1つのブラウザページを検索条件を入力し終えた画面で待機させておき、
+新しいリクエストでは日付に依存するステップだけを実行する。
+
+Playwrightの同期APIは作成したスレッドからしか操作できないため、施設ごとに専用のスレッドが
+ブラウザを所有し、リクエストの処理はそのスレッドに依頼して結果を待つ。
+
+スクレイパーは次のメソッドを実装する
+    FACILITY_KEY: 施設キー（施設ごとに1ページ）
+    setup_browser(playwright) / create_browser_context(browser): ブラウザ・コンテキストの作成
+    park_page(page): 待機させる画面まで遷移する
+    is_parked(page): 待機させる画面にいるか
+    return_to_parked(page): 日付のステップの後に待機させる画面へ戻る（成功時True）
+    close_browser_context(context) / close_browser(browser): 待機ページ・ブラウザを閉じる
+        （ストレージの状態・適応タイムアウト・トレースの後処理はスクレイパーの実行と同じ経路で行う）
+"""
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from .deadlines import ScrapeCancelledError, check_deadline, get_current_deadline
+
+
+logger = logging.getLogger(__name__)
+
+
+class PageHost:
+    """1施設分の待機ページと、それを所有するスレッド"""
+
+    def __init__(self, facility: str, max_age_seconds: float, idle_seconds: float):
+        self.facility = facility
+        self.max_age_seconds = max_age_seconds
+        self.idle_seconds = idle_seconds
+
+        self._jobs: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # 以下は所有スレッドからのみ操作する
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        # ブラウザ・コンテキストを作成したスクレイパー（閉じる時にそのスクレイパーの後処理を使う）
+        self._owner = None
+        self._parked_at: Optional[float] = None
+        # 依頼を処理中か（処理中のブラウザは依頼した実行のものとして数える）
+        self._busy = False
+
+        self.parks = 0
+        self.reuses = 0
+        self.discards = 0
+        self.last_error: Optional[str] = None
+
+    def _ensure_worker(self):
+        """所有スレッドを起動（起動済みの場合は何もしない）"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"page-parking-{self.facility}", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, scraper, action: Callable[[Any], Any]) -> Future:
+        """
+        待機ページでの処理を依頼する
+
+        Args:
+            scraper: 処理を依頼するスクレイパー（ページの作成・待機画面への遷移に使う）
+            action: 待機画面にいるページを受け取り、結果を返す処理
+        """
+        future: Future = Future()
+        # 依頼した側のコンテキスト（ログのrun_id・実行中のジョブ）で処理を実行するため
+        self._jobs.put((scraper, action, future, contextvars.copy_context()))
+        self._ensure_worker()
+        return future
+
+    @property
+    def parked(self) -> bool:
+        return self._page is not None
+
+    @property
+    def idle_browser(self) -> bool:
+        """依頼を処理しておらず、待ちの依頼もないままブラウザを開いているか"""
+        return self._browser is not None and not self._busy and self._jobs.empty()
+
+    def _run(self):
+        """依頼を処理し続け、しばらく依頼がなければブラウザを閉じる"""
+        while True:
+            try:
+                scraper, action, future, context = self._jobs.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                if self._browser is not None:
+                    logger.info("Closing idle parked page for %s", self.facility)
+                    self._close_browser()
+                continue
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            # 結果を返す前に処理中を解除する（結果を受け取った実行が終わった時点でアイドルとして数えるため）
+            self._busy = True
+            try:
+                result = context.run(self._handle, scraper, action)
+            except BaseException as e:
+                self._busy = False
+                future.set_exception(e)
+                continue
+            self._busy = False
+            future.set_result(result)
+
+    def _handle(self, scraper, action: Callable[[Any], Any]):
+        """待機ページで処理を実行（再利用したページで失敗した場合は待機し直して1回だけやり直す）"""
+        # 順番待ちの間に期限切れ・キャンセルされた依頼は実行しない
+        check_deadline()
+        reused = self._ensure_parked(scraper)
+        try:
+            result = action(self._page)
+        except ScrapeCancelledError as e:
+            # 途中で止めた画面は状態が分からないため破棄し、やり直さない
+            self._discard(f"cancelled: {e}")
+            raise
+        except Exception as e:
+            self.last_error = str(e)
+            self._discard(f"action failed: {e}")
+            if not reused:
+                raise
+            logger.warning("Parked page for %s failed, re-parking and retrying once: %s", self.facility, e)
+            self._ensure_parked(scraper)
+            try:
+                result = action(self._page)
+            except Exception as retry_error:
+                self.last_error = str(retry_error)
+                self._discard(f"retry failed: {retry_error}")
+                raise
+
+        try:
+            returned = scraper.return_to_parked(self._page)
+        except Exception as e:
+            logger.debug("return_to_parked raised for %s: %s", self.facility, e)
+            returned = False
+        if not returned:
+            self._discard("could not return to the parked screen")
+        return result
+
+    def _is_live(self, scraper) -> bool:
+        """待機ページがまだ使えるか（閉じられていない・古すぎない・待機画面にいる）"""
+        if self._page is None:
+            return False
+        if time.monotonic() - self._parked_at > self.max_age_seconds:
+            logger.info("Parked page for %s is older than %ss, re-parking", self.facility, self.max_age_seconds)
+            return False
+        try:
+            if self._page.is_closed():
+                return False
+            return bool(scraper.is_parked(self._page))
+        except Exception as e:
+            logger.info("Parked page for %s is no longer usable: %s", self.facility, e)
+            return False
+
+    def _ensure_parked(self, scraper) -> bool:
+        """
+        待機ページを用意する
+
+        Returns:
+            既存の待機ページを再利用した場合True
+        """
+        if self._is_live(scraper):
+            self.reuses += 1
+            return True
+
+        self._discard_page()
+        if self._browser is None or not self._browser.is_connected():
+            self._close_browser()
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+            self._owner = scraper
+            self._browser = scraper.setup_browser(self._playwright)
+
+        self._owner = scraper
+        self._context = scraper.create_browser_context(self._browser)
+        self._page = self._context.new_page()
+        try:
+            scraper.park_page(self._page)
+        except Exception as e:
+            self.last_error = str(e)
+            self._discard(f"parking failed: {e}")
+            raise
+        self._parked_at = time.monotonic()
+        self.parks += 1
+        logger.info("Parked a page for %s", self.facility)
+        return False
+
+    def _discard(self, reason: str):
+        """待機ページを破棄（次の依頼で待機し直す）"""
+        if self._page is None and self._context is None:
+            return
+        logger.info("Discarding parked page for %s: %s", self.facility, reason)
+        self.discards += 1
+        self._discard_page()
+
+    def _discard_page(self):
+        if self._context is not None:
+            try:
+                self._owner.close_browser_context(self._context)
+            except Exception as e:
+                logger.debug("Failed to close parked context for %s: %s", self.facility, e)
+        self._context = None
+        self._page = None
+        self._parked_at = None
+
+    def _close_browser(self):
+        """ブラウザとPlaywrightを停止"""
+        self._discard_page()
+        if self._browser is not None:
+            try:
+                self._owner.close_browser(self._browser)
+            except Exception as e:
+                logger.debug("Failed to close parked browser for %s: %s", self.facility, e)
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.debug("Failed to stop Playwright for %s: %s", self.facility, e)
+        self._browser = None
+        self._playwright = None
+        self._owner = None
+
+    def get_stats(self) -> Dict:
+        parked_at = self._parked_at
+        return {
+            'facility': self.facility,
+            'parked': self.parked,
+            'ageSeconds': round(time.monotonic() - parked_at, 1) if parked_at is not None else None,
+            'parks': self.parks,
+            'reuses': self.reuses,
+            'discards': self.discards,
+            'pendingJobs': self._jobs.qsize(),
+            'lastError': self.last_error
+        }
+
+
+class PageParking:
+    """施設ごとの待機ページ"""
+
+    def __init__(self, max_age_seconds: Optional[float] = None, idle_seconds: Optional[float] = None):
+        """
+        初期化（省略した値は環境変数から取得）
+
+        Args:
+            max_age_seconds: 待機ページを使い続ける最大秒数。超えたら待機し直す（PAGE_PARKING_MAX_AGE_SECONDS、デフォルト: 1800）
+            idle_seconds: 依頼がないままこの秒数が経つとブラウザを閉じる（PAGE_PARKING_IDLE_SECONDS、デフォルト: 600）
+        """
+        self.max_age_seconds = max_age_seconds or float(os.getenv('PAGE_PARKING_MAX_AGE_SECONDS', '1800'))
+        self.idle_seconds = idle_seconds or float(os.getenv('PAGE_PARKING_IDLE_SECONDS', '600'))
+        self._hosts: Dict[str, PageHost] = {}
+        self._lock = threading.Lock()
+
+    def host(self, facility: str) -> PageHost:
+        """施設の待機ページ（初回のみ作成）"""
+        with self._lock:
+            if facility not in self._hosts:
+                self._hosts[facility] = PageHost(facility, self.max_age_seconds, self.idle_seconds)
+            return self._hosts[facility]
+
+    def run(self, scraper, action: Callable[[Any], Any], timeout: Optional[float] = None) -> Any:
+        """
+        スクレイパーの施設の待機ページで処理を実行し、結果を返す
+        同じ施設への依頼は1つずつ順番に処理する
+
+        Args:
+            scraper: 待機ページのフックを実装したスクレイパー
+            action: 待機画面にいるページを受け取り、結果を返す処理
+            timeout: 結果を待つ最大秒数（省略時は実行の期限までの残り時間。期限がない場合は無制限）
+
+        Raises:
+            ScrapeCancelledError: 結果を待っている間に期限切れ・キャンセルされた場合
+            concurrent.futures.TimeoutError: 指定したtimeoutまでに結果が返らなかった場合
+            actionが送出した例外
+        """
+        deadline = get_current_deadline()
+        if timeout is None and deadline is not None:
+            timeout = deadline.remaining()
+        facility = scraper.FACILITY_KEY or scraper.__class__.__name__
+        future = self.host(facility).submit(scraper, action)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # 順番待ちの依頼は取り消す（処理中の依頼は所有スレッドで期限を確認して止まる）
+            future.cancel()
+            error = deadline.error() if deadline is not None else None
+            if error is not None:
+                raise error
+            raise
+
+    def idle_browsers(self) -> int:
+        """依頼を処理せずに開いているブラウザの数（受付制御で使用中の枠として数える）"""
+        with self._lock:
+            hosts = list(self._hosts.values())
+        return sum(1 for host in hosts if host.idle_browser)
+
+    def get_stats(self) -> Dict:
+        """施設ごとの待機ページの状態（API用）"""
+        with self._lock:
+            hosts = list(self._hosts.values())
+        return {
+            'maxAgeSeconds': self.max_age_seconds,
+            'idleSeconds': self.idle_seconds,
+            'facilities': [host.get_stats() for host in hosts]
+        }
+
+
+_parking_instance: Optional[PageParking] = None
+_parking_lock = threading.Lock()
+
+
+def is_page_parking_enabled() -> bool:
+    """ページパーキングが有効か（環境変数 PAGE_PARKING_ENABLED、デフォルト: false）"""
+    return os.getenv('PAGE_PARKING_ENABLED', 'false').lower() == 'true'
+
+
+def get_page_parking() -> Optional[PageParking]:
+    """
+    ページパーキングのシングルトンを取得
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _parking_instance
+    if not is_page_parking_enabled():
+        return None
+    with _parking_lock:
+        if _parking_instance is None:
+            _parking_instance = PageParking()
+    return _parking_instance
@@ -0,0 +1,164 @@
+"""
+ブラウザのリソース管理
+複数日付を1セッションで処理する際に、スクレイパー自身のブラウザプロセスのメモリ（RSS）と操作回数を監視し、
+しきい値を超えたらページ・コンテキストの作り直しを指示する。実行ごとのメモリ使用量も集計する
+
+psutilがインストールされていない場合はRSSを計測せず、操作回数のみで判定する
+"""
+import os
+from typing import Callable, Dict, Optional
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutilは任意
+    psutil = None
+
+
+def playwright_driver_pid(playwright) -> Optional[int]:
+    """
+    Playwrightドライバ（node）のPID
+    Chromiumはドライバの子プロセスとして起動されるため、このPID以下のプロセスツリーが
+    1つのスクレイパーが使っているブラウザになる
+
+    Args:
+        playwright: sync_playwright()で取得したPlaywright
+
+    Returns:
+        取得できない場合（接続方式が異なる・モックなど）はNone
+    """
+    try:
+        pid = playwright._impl_obj._connection._transport._proc.pid
+    except AttributeError:
+        return None
+    return pid if isinstance(pid, int) else None
+
+
+def browser_rss_mb(root_pid: Optional[int]) -> Optional[float]:
+    """
+    指定したプロセスとその子孫（Playwrightドライバ・Chromium）のRSS合計（MB）
+    同じワーカーで動いている他のスクレイパーのブラウザは含めない
+
+    Args:
+        root_pid: 計測するプロセスツリーの起点（playwright_driver_pidの値）
+
+    Returns:
+        psutilがない場合、root_pidがNoneの場合や取得できない場合はNone
+    """
+    if psutil is None or root_pid is None:
+        return None
+    try:
+        root = psutil.Process(root_pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            # 計測中に終了したプロセスは無視
+            continue
+    return total / (1024 * 1024)
+
+
+def available_memory_mb() -> Optional[float]:
+    """
+    ホストの空きメモリ（MB）
+
+    Returns:
+        psutilがない場合や取得できない場合はNone
+    """
+    if psutil is None:
+        return None
+    try:
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except (psutil.Error, OSError):
+        return None
+
+
+class ResourceGovernor:
+    """ページ・コンテキストの作り直しを判定するカウンタとメモリ計測"""
+
+    def __init__(self, max_rss_mb: Optional[float] = None, max_steps: Optional[int] = None,
+                 rss_reader: Optional[Callable[[], Optional[float]]] = None,
+                 browser_pid: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            max_rss_mb: 作り直すRSSのしきい値（省略時は環境変数 BROWSER_MAX_RSS_MB、デフォルト: 768。0で無効）
+            max_steps: 作り直すまでの操作回数（省略時は環境変数 BROWSER_MAX_STEPS_PER_PAGE、デフォルト: 40。0で無効）
+            rss_reader: RSSを返す関数（テスト用に差し替え可能。省略時はbrowser_pidのプロセスツリーを計測）
+            browser_pid: 計測するPlaywrightドライバのPID（省略時はwatchで設定するまでRSSを計測しない）
+        """
+        if max_rss_mb is None:
+            max_rss_mb = float(os.getenv('BROWSER_MAX_RSS_MB', '768'))
+        if max_steps is None:
+            max_steps = int(os.getenv('BROWSER_MAX_STEPS_PER_PAGE', '40'))
+        self.max_rss_mb = max_rss_mb
+        self.max_steps = max_steps
+        self._read_rss = rss_reader
+        self.browser_pid = browser_pid
+
+        self.steps_since_recycle = 0
+        self.total_steps = 0
+        self.recycles = 0
+        self.samples = 0
+        self.peak_rss_mb: Optional[float] = None
+        self.last_rss_mb: Optional[float] = None
+        self.last_reason: Optional[str] = None
+
+    def watch(self, browser_pid: Optional[int]) -> None:
+        """計測するPlaywrightドライバのPIDを設定（ブラウザ起動後に呼ぶ）"""
+        self.browser_pid = browser_pid
+
+    def tick(self, count: int = 1) -> None:
+        """ページ上の操作（月移動・モーダル表示など）を数える"""
+        self.steps_since_recycle += count
+        self.total_steps += count
+
+    def sample(self) -> Optional[float]:
+        """RSSを計測して集計に反映"""
+        rss = self._read_rss() if self._read_rss is not None else browser_rss_mb(self.browser_pid)
+        if rss is not None:
+            self.samples += 1
+            self.last_rss_mb = rss
+            self.peak_rss_mb = rss if self.peak_rss_mb is None else max(self.peak_rss_mb, rss)
+        return rss
+
+    def should_recycle(self) -> bool:
+        """
+        ページ・コンテキストを作り直すべきか
+
+        Returns:
+            操作回数またはRSSがしきい値以上の場合True（理由はlast_reasonに残す）
+        """
+        if self.max_steps and self.steps_since_recycle >= self.max_steps:
+            self.last_reason = f"steps {self.steps_since_recycle} >= {self.max_steps}"
+            return True
+
+        rss = self.sample()
+        if self.max_rss_mb and rss is not None and rss >= self.max_rss_mb:
+            self.last_reason = f"rss {rss:.0f}MB >= {self.max_rss_mb:.0f}MB"
+            return True
+        return False
+
+    def recycled(self) -> None:
+        """作り直したことを記録"""
+        self.recycles += 1
+        self.steps_since_recycle = 0
+
+    def summary(self) -> Dict:
+        """実行単位のメモリ使用量の集計（ログ出力用）"""
+        self.sample()
+        return {
+            "steps": self.total_steps,
+            "recycles": self.recycles,
+            "rssSamples": self.samples,
+            "peakRssMb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+            "lastRssMb": round(self.last_rss_mb, 1) if self.last_rss_mb is not None else None,
+            "maxRssMb": self.max_rss_mb,
+            "maxSteps": self.max_steps,
+            "rssAvailable": psutil is not None
+        }
@@ -0,0 +1,232 @@
+"""
+スクレイピングジョブの進捗管理
+/scrape で開始したジョブごとに進捗イベント（日付ごとの保存結果など）を記録し、
+SSE/NDJSONのストリームで購読できるようにする
+"""
+import contextvars
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..types.availability_record import json_default
+from .deadlines import Deadline, default_job_timeout_seconds
+
+# 現在のスレッドで実行中のジョブ（スクレイパーから進捗を通知するため）
+_current_job: contextvars.ContextVar[Optional["ScrapeJob"]] = contextvars.ContextVar("scrape_job", default=None)
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class ScrapeJob:
+    """1回の /scrape 呼び出しに対応するジョブ"""
+
+    def __init__(self, facility: str, dates: List[str], job_id: Optional[str] = None,
+                 timeout_seconds: Optional[float] = None):
+        self.id = job_id or uuid.uuid4().hex[:16]
+        self.facility = facility
+        self.dates = list(dates)
+        # 実行の期限とキャンセル要求（タスクのdeadline_contextに渡す）
+        self.deadline = Deadline(default_job_timeout_seconds() if timeout_seconds is None else timeout_seconds)
+        self.status = RUNNING
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self._events: List[Dict] = []
+        self._condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status != RUNNING
+
+    def publish(self, event_type: str, **payload) -> Dict:
+        """
+        イベントを追加して購読者に通知
+
+        Args:
+            event_type: date（日付ごとの結果）/ facility（施設ごとの完了）/ job（ジョブの完了）など
+            payload: イベントの内容
+        """
+        with self._condition:
+            event = {
+                "id": len(self._events) + 1,
+                "type": event_type,
+                "jobId": self.id,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                **payload
+            }
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def cancel(self, reason: str = "Cancelled by request") -> bool:
+        """
+        キャンセルを要求（スクレイパーは次の日付・ステップの前で止まり、ブラウザを閉じる）
+
+        Returns:
+            要求を受け付けた場合True（終了済みの場合はFalse）
+        """
+        with self._condition:
+            if self.finished:
+                return False
+        self.deadline.cancel(reason)
+        self.publish("cancel", reason=reason)
+        return True
+
+    def finish(self, status: str, **payload) -> None:
+        """ジョブを終了し、最後にjobイベントを送る"""
+        with self._condition:
+            if self.finished:
+                return
+            self.status = status
+            self.finished_at = datetime.now(timezone.utc)
+        self.publish("job", status=status, **payload)
+
+    def events_after(self, last_event_id: int = 0) -> List[Dict]:
+        """指定したID以降のイベント"""
+        with self._condition:
+            return self._events[last_event_id:]
+
+    def wait_for_events(self, last_event_id: int, timeout: float) -> List[Dict]:
+        """
+        新しいイベントを待つ
+
+        Returns:
+            新しいイベント（タイムアウトした場合や終了済みで新しいイベントがない場合は空）
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: len(self._events) > last_event_id or self.finished,
+                timeout=timeout
+            )
+            return self._events[last_event_id:]
+
+    def stream(self, last_event_id: int = 0, heartbeat_seconds: float = 15.0) -> Iterator[Optional[Dict]]:
+        """
+        イベントを順に返すジェネレータ（ジョブが終了し、全イベントを返したら終わる）
+        heartbeat_seconds の間イベントがない場合はNoneを返す（接続維持用）
+        """
+        while True:
+            events = self.wait_for_events(last_event_id, heartbeat_seconds)
+            if events:
+                for event in events:
+                    last_event_id = event["id"]
+                    yield event
+                continue
+            if self.finished:
+                return
+            yield None
+
+    def to_dict(self) -> Dict:
+        """API用の状態表現"""
+        with self._condition:
+            return {
+                "jobId": self.id,
+                "facility": self.facility,
+                "dates": self.dates,
+                "status": self.status,
+                "createdAt": self.created_at.isoformat(),
+                "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+                "deadline": self.deadline.to_dict(),
+                "events": len(self._events)
+            }
+
+
+class JobRegistry:
+    """直近のジョブを保持するレジストリ（古い終了済みジョブから破棄する）"""
+
+    def __init__(self, max_jobs: Optional[int] = None):
+        self.max_jobs = max_jobs or int(os.getenv('SCRAPE_JOBS_MAX', '50'))
+        self._jobs: "OrderedDict[str, ScrapeJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, facility: str, dates: List[str], timeout_seconds: Optional[float] = None) -> ScrapeJob:
+        """ジョブを作成して登録（timeout_secondsの省略時は SCRAPE_JOB_TIMEOUT_SECONDS）"""
+        job = ScrapeJob(facility, dates, timeout_seconds=timeout_seconds)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        return job
+
+    def _evict(self):
+        """保持数を超えた分を古い終了済みジョブから削除（呼び出し元でロックを取得すること）"""
+        overflow = len(self._jobs) - self.max_jobs
+        if overflow <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:overflow]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[ScrapeJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+
+_registry_instance: Optional[JobRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_job_registry() -> JobRegistry:
+    """ジョブレジストリのシングルトンを取得"""
+    global _registry_instance
+    with _registry_lock:
+        if _registry_instance is None:
+            _registry_instance = JobRegistry()
+    return _registry_instance
+
+
+@contextmanager
+def job_context(job: Optional[ScrapeJob]) -> Iterator[Optional[ScrapeJob]]:
+    """
+    現在のスレッドで実行中のジョブを設定
+    この中で呼ばれたスクレイパーの進捗はjobに通知される
+    """
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
+
+
+def get_current_job() -> Optional[ScrapeJob]:
+    """実行中のジョブ（ジョブ外の場合はNone）"""
+    return _current_job.get()
+
+
+def publish_progress(event_type: str, **payload) -> None:
+    """実行中のジョブがあれば進捗イベントを送る（なければ何もしない）"""
+    job = _current_job.get()
+    if job is not None:
+        job.publish(event_type, **payload)
+
+
+def _json_default(value: Any) -> Any:
+    """イベントのJSON変換（結果のバッチは行のリストに、それ以外は文字列にする）"""
+    try:
+        return json_default(value)
+    except TypeError:
+        return str(value)
+
+
+def format_sse(event: Optional[Dict]) -> str:
+    """イベントをSSE形式に変換（Noneはハートビートのコメント行）"""
+    if event is None:
+        return ": keep-alive\n\n"
+    data = json.dumps(event, ensure_ascii=False, default=_json_default)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+def format_ndjson(event: Optional[Dict]) -> str:
+    """イベントをNDJSON形式に変換（Noneはハートビートの空行）"""
+    if event is None:
+        return "\n"
+    return json.dumps(event, ensure_ascii=False, default=_json_default) + "\n"
@@ -0,0 +1,201 @@
+"""
+学習型セレクタキャッシュ
+複数のセレクタを順に試すフォールバックで、施設・ステップごとに最後に一致したセレクタをローカルのSQLiteに記録し、
+次回以降はそのセレクタから試す。記録したセレクタが一致しなくなった（サイトの変更）場合はミスとして数え、警告を出す
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorCache:
+    """施設・ステップ単位の一致したセレクタの記録"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は環境変数 SELECTOR_CACHE_PATH）
+        """
+        self.db_path = db_path or os.getenv(
+            'SELECTOR_CACHE_PATH',
+            str(Path(tempfile.gettempdir()) / 'aki-sta' / 'selector_cache.sqlite3')
+        )
+        self._lock = threading.Lock()
+        self._winners: Optional[Dict[Tuple[str, str], str]] = None
+
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._memory_connection = sqlite3.connect(':memory:', check_same_thread=False) if self.db_path == ':memory:' else None
+        self._initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を取得（スレッドごとに新しい接続を使う）"""
+        if self._memory_connection is not None:
+            return self._memory_connection
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """SQLを実行して結果を返す（呼び出し元でロックを取得すること）"""
+        connection = self._connect()
+        try:
+            with connection:
+                return connection.execute(sql, tuple(params)).fetchall()
+        finally:
+            if connection is not self._memory_connection:
+                connection.close()
+
+    def _initialize(self):
+        """テーブルを作成"""
+        with self._lock:
+            self._execute(
+                """
+                CREATE TABLE IF NOT EXISTS selector_wins (
+                    facility TEXT NOT NULL,
+                    step TEXT NOT NULL,
+                    selector TEXT,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (facility, step)
+                )
+                """
+            )
+
+    def _load(self) -> Dict[Tuple[str, str], str]:
+        """記録済みのセレクタ（初回のみSQLiteから読み込む。呼び出し元でロックを取得すること）"""
+        if self._winners is None:
+            rows = self._execute("SELECT facility, step, selector FROM selector_wins WHERE selector IS NOT NULL")
+            self._winners = {(facility, step): selector for facility, step, selector in rows}
+        return self._winners
+
+    def remembered(self, facility: str, step: str) -> Optional[str]:
+        """最後に一致したセレクタ（記録がない場合はNone）"""
+        with self._lock:
+            return self._load().get((facility, step))
+
+    def order(self, facility: str, step: str, candidates: Iterable[str]) -> List[str]:
+        """
+        試す順番を返す（記録済みのセレクタを先頭に移し、残りは元の順番のまま）
+
+        Args:
+            facility: 施設キー
+            step: ステップ名
+            candidates: 元の順番のセレクタ
+        """
+        candidates = list(candidates)
+        winner = self.remembered(facility, step)
+        if winner not in candidates:
+            return candidates
+        return [winner] + [selector for selector in candidates if selector != winner]
+
+    def _upsert(self, facility: str, step: str, selector: Optional[str],
+                hits: int = 0, misses: int = 0, failures: int = 0):
+        """記録を更新（selectorがNoneの場合は記録済みのセレクタを残す。呼び出し元でロックを取得すること）"""
+        self._execute(
+            """
+            INSERT INTO selector_wins (facility, step, selector, hits, misses, failures, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(facility, step) DO UPDATE SET
+                selector = COALESCE(excluded.selector, selector),
+                hits = hits + excluded.hits,
+                misses = misses + excluded.misses,
+                failures = failures + excluded.failures,
+                updated_at = excluded.updated_at
+            """,
+            (facility, step, selector, hits, misses, failures, datetime.now(timezone.utc).isoformat())
+        )
+
+    def record_match(self, facility: str, step: str, selector: str) -> None:
+        """
+        一致したセレクタを記録
+        記録済みのセレクタと同じならヒット、異なる（または未記録）ならミスとして数えて記録を置き換える
+
+        Args:
+            facility: 施設キー
+            step: ステップ名
+            selector: 一致したセレクタ
+        """
+        key = (facility, step)
+        with self._lock:
+            winners = self._load()
+            previous = winners.get(key)
+            hit = previous == selector
+            winners[key] = selector
+            self._upsert(facility, step, selector, hits=int(hit), misses=int(not hit))
+
+        if previous is not None and not hit:
+            logger.warning(
+                "Selector for step '%s' of %s changed: '%s' no longer matched first, now using '%s'",
+                step, facility, previous, selector
+            )
+
+    def record_failure(self, facility: str, step: str) -> None:
+        """どのセレクタも一致しなかったことを記録（記録済みのセレクタは残す）"""
+        with self._lock:
+            self._upsert(facility, step, None, misses=1, failures=1)
+        logger.warning("No selector matched for step '%s' of %s", step, facility)
+
+    def get_stats(self, facility: Optional[str] = None) -> List[Dict]:
+        """
+        記録済みのステップの統計（API・レポート用）
+
+        Args:
+            facility: 指定した施設のみ（省略時は全施設）
+        """
+        sql = "SELECT facility, step, selector, hits, misses, failures, updated_at FROM selector_wins"
+        with self._lock:
+            if facility:
+                rows = self._execute(sql + " WHERE facility = ? ORDER BY facility, step", (facility,))
+            else:
+                rows = self._execute(sql + " ORDER BY facility, step")
+
+        stats = []
+        for key_facility, step, selector, hits, misses, failures, updated_at in rows:
+            total = hits + misses
+            stats.append({
+                "facility": key_facility,
+                "step": step,
+                "selector": selector,
+                "hits": hits,
+                "misses": misses,
+                "failures": failures,
+                "hitRate": round(hits / total, 3) if total else None,
+                "updatedAt": updated_at
+            })
+        return stats
+
+
+_selector_cache_instance: Optional[SelectorCache] = None
+_selector_cache_lock = threading.Lock()
+
+
+def is_selector_cache_enabled() -> bool:
+    """セレクタキャッシュが有効か（環境変数 SELECTOR_CACHE_ENABLED、デフォルト: false）"""
+    return os.getenv('SELECTOR_CACHE_ENABLED', 'false').lower() == 'true'
+
+
+def get_selector_cache() -> Optional[SelectorCache]:
+    """
+    セレクタキャッシュのシングルトンを取得
+
+    Returns:
+        無効化されている場合はNone
+    """
+    global _selector_cache_instance
+    if not is_selector_cache_enabled():
+        return None
+    with _selector_cache_lock:
+        if _selector_cache_instance is None:
+            _selector_cache_instance = SelectorCache()
+    return _selector_cache_instance
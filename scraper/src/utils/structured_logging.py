@@ -0,0 +1,202 @@
+"""
+構造化ログモジュール
+スクレイパーのログをキュー経由で非同期に出力し、
+実行単位（run/facility/date）のフィールド付きJSONまたはテキストで書き出す
+"""
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+
+
+# ログに付与するコンテキスト（スレッドごとに独立）
+_log_context: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("scraper_log_context", default={})
+
+# テキスト形式のフォーマット（従来のBaseScraperと同じ）
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecordの標準属性（JSON出力時に追加フィールドと区別するため）
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def new_run_id() -> str:
+    """実行IDを生成"""
+    return uuid.uuid4().hex[:12]
+
+
+def get_log_context() -> Dict[str, str]:
+    """現在のログコンテキストを取得"""
+    return dict(_log_context.get())
+
+
+@contextmanager
+def log_context(**fields) -> Iterator[Dict[str, str]]:
+    """
+    ログコンテキストを一時的に設定
+
+    使用例:
+        with log_context(run_id=new_run_id(), facility="meguro", date="2025-10-05"):
+            scraper.log_info("...")
+    """
+    merged = {**_log_context.get(), **{k: v for k, v in fields.items() if v is not None}}
+    token = _log_context.set(merged)
+    try:
+        yield merged
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """ログレコードにrun_id/facility/dateなどのコンテキストを付与"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    セル単位など大量に出るログを間引く
+    extra={"sampled": True} が付いたレコードのみ対象とし、N件に1件だけ通す
+    """
+
+    def __init__(self, every: int = 1):
+        super().__init__()
+        self.every = max(1, every)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        return next(self._counter) % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """1行1レコードのJSON形式で出力"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def create_formatter(log_format: Optional[str] = None) -> logging.Formatter:
+    """
+    出力形式に応じたフォーマッタを作成
+
+    Args:
+        log_format: "json" または "text"。Noneの場合は環境変数 SCRAPER_LOG_FORMAT（デフォルト: text）
+    """
+    log_format = (log_format or os.getenv('SCRAPER_LOG_FORMAT', 'text')).lower()
+    if log_format == 'json':
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+class StructuredLogPipeline:
+    """
+    キューを介した非ブロッキングなログ出力
+    各ロガーにはQueueHandlerのみを追加し、実際の出力はQueueListenerのスレッドで行う
+    """
+
+    def __init__(self, handler: Optional[logging.Handler] = None, sample_every: Optional[int] = None):
+        self.queue: queue.Queue = queue.Queue(-1)
+        self.handler = handler or logging.StreamHandler()
+        if handler is None:
+            self.handler.setFormatter(create_formatter())
+        if sample_every is None:
+            sample_every = int(os.getenv('SCRAPER_LOG_SAMPLE_EVERY', '20'))
+        self.handler.addFilter(SamplingFilter(sample_every))
+        self.listener = logging.handlers.QueueListener(self.queue, self.handler, respect_handler_level=True)
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """出力スレッドを開始"""
+        with self._lock:
+            if not self._started:
+                self.listener.start()
+                self._started = True
+
+    def stop(self):
+        """キューに残っているログを書き出して停止"""
+        with self._lock:
+            if self._started:
+                self.listener.stop()
+                self._started = False
+
+    def create_queue_handler(self, level: int) -> logging.Handler:
+        """ロガーに追加するQueueHandlerを作成（コンテキストは呼び出し元スレッドで付与）"""
+        handler = logging.handlers.QueueHandler(self.queue)
+        handler.setLevel(level)
+        handler.addFilter(ContextFilter())
+        return handler
+
+
+_pipeline_instance: Optional[StructuredLogPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_log_pipeline() -> StructuredLogPipeline:
+    """ログパイプラインのシングルトンを取得（初回呼び出し時に開始）"""
+    global _pipeline_instance
+    with _pipeline_lock:
+        if _pipeline_instance is None:
+            _pipeline_instance = StructuredLogPipeline()
+            _pipeline_instance.start()
+            atexit.register(_pipeline_instance.stop)
+    return _pipeline_instance
+
+
+def configure_logger(logger: logging.Logger, level: int) -> logging.Logger:
+    """
+    ロガーにキュー経由のハンドラを設定（設定済みの場合はレベルのみ更新）
+
+    SCRAPER_LOG_ASYNC=false の場合は従来どおり同期のStreamHandlerを使用する
+    """
+    logger.setLevel(level)
+
+    if logger.handlers:
+        for handler in logger.handlers:
+            handler.setLevel(level)
+        return logger
+
+    if os.getenv('SCRAPER_LOG_ASYNC', 'true').lower() == 'false':
+        handler = logging.StreamHandler()
+        handler.setLevel(level)
+        handler.setFormatter(create_formatter())
+        handler.addFilter(ContextFilter())
+        handler.addFilter(SamplingFilter(int(os.getenv('SCRAPER_LOG_SAMPLE_EVERY', '20'))))
+    else:
+        handler = get_log_pipeline().create_queue_handler(level)
+
+    logger.addHandler(handler)
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    モジュール用のロガーを取得（レベルは環境変数 SCRAPER_LOG_LEVEL、デフォルト: INFO）
+    """
+    level = getattr(logging, os.getenv('SCRAPER_LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    return configure_logger(logging.getLogger(name), level)
@@ -2,6 +2,7 @@
 日付形式の柔軟性と過去日付バリデーションをテスト
 """
 import subprocess
+import pytest
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -193,4 +194,69 @@ class TestDateFormat:
         assert is_past_date(yesterday_str) == True, "昨日は過去日付として判定されるべき"
         assert is_past_date(today_str) == False, "今日は過去日付ではない"
         assert is_past_date(tomorrow_str) == False, "明日は過去日付ではない"
-        assert is_past_date("invalid-date") == False, "無効な日付はFalseを返すべき"
\ No newline at end of file
+        assert is_past_date("invalid-date") == False, "無効な日付はFalseを返すべき"
+
+class TestHarOptions:
+    """HARの記録・再生オプションのテスト"""
+    
+    cli_py = Path(__file__).parent.parent.parent / "src" / "entrypoints" / "cli.py"
+    
+    def test_record_and_replay_are_exclusive(self, tmp_path):
+        """--record-harと--replay-harは同時に指定できない"""
+        result = subprocess.run(
+            [sys.executable, str(self.cli_py), "--facility", "meguro",
+             "--record-har", str(tmp_path / "a.har"), "--replay-har", str(tmp_path / "b.har")],
+            capture_output=True,
+            text=True
+        )
+        
+        assert result.returncode != 0
+        assert "not allowed with argument" in result.stderr
+    
+    def test_replay_missing_har(self, tmp_path):
+        """存在しないHARの再生はエラー（過去日付も再生では指定できる）"""
+        result = subprocess.run(
+            [sys.executable, str(self.cli_py), "--facility", "meguro", "--date", "2025-01-10",
+             "--replay-har", str(tmp_path / "missing.har")],
+            capture_output=True,
+            text=True
+        )
+        
+        assert result.returncode != 0
+        assert "HAR file not found" in result.stdout
+    
+    def test_replay_reports_elapsed_time(self, tmp_path, capsys):
+        """単一日付の再生は記録時と同じscrape_and_saveで実行し、所要時間を表示する"""
+        sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+        from src.entrypoints.cli import replay_har
+        
+        scraper = Mock()
+        scraper.replay_har_path = str(tmp_path / "meguro.har")
+        scraper.scrape_and_save.return_value = {
+            "status": "success", "data": {"2025-01-10": [{"facilityName": "A"}, {"facilityName": "B"}]}
+        }
+        replay_har(scraper, ["2025-01-10"])
+        
+        output = capsys.readouterr().out
+        assert "2025-01-10: 2件" in output
+        assert "合計:" in output
+        scraper.scrape_availability.assert_not_called()
+    
+    def test_replay_multiple_dates_uses_same_flow(self, tmp_path, capsys):
+        """複数日付の再生は記録時と同じscrape_multiple_datesで実行する"""
+        sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+        from src.entrypoints.cli import replay_har
+        
+        scraper = Mock()
+        scraper.replay_har_path = str(tmp_path / "meguro.har")
+        scraper.scrape_multiple_dates.return_value = {"results": {
+            "2025-01-10": {"status": "success", "data": [{"facilityName": "A"}]},
+            "2025-01-11": {"status": "error", "error_type": "NO_DATA_FOUND"}
+        }}
+        with pytest.raises(SystemExit):
+            replay_har(scraper, ["2025-01-10", "2025-01-11"], multiple=True)
+        
+        output = capsys.readouterr().out
+        scraper.scrape_multiple_dates.assert_called_once_with(["2025-01-10", "2025-01-11"])
+        assert "2025-01-10: 1件" in output
+        assert "2025-01-11: 失敗 (NO_DATA_FOUND)" in output
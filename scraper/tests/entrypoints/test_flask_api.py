@@ -101,6 +101,15 @@ class TestBasicEndpoints:
         assert 'Connection failed' in data['message']
         assert 'timestamp' in data
     
+    def test_json_serializes_availability_batch(self):
+        """スクレイピング結果のバッチはJSON形式のリストとして返す"""
+        from src.types.availability_record import AvailabilityBatch
+        row = {"centerName": "c", "facilityName": "f", "roomName": "r",
+               "timeSlots": {"morning": "available", "afternoon": "booked", "evening": "unknown"},
+               "lastUpdated": "2025-10-05T00:00:00Z"}
+        with app.app_context():
+            assert json.loads(app.json.dumps({"data": AvailabilityBatch([row])})) == {"data": [row]}
+    
     def test_404_error(self, client):
         """存在しないエンドポイントのテスト"""
         response = client.get('/nonexistent')
@@ -648,5 +657,433 @@ class TestShibuyaEndpoint:
         assert '過去の日付' in data['message']
 
 
+# 機能ごとの状態エンドポイント: (パス, 有効化する環境変数, 無効時に空の一覧を返すキー)
+FEATURE_STATS_ENDPOINTS = [
+    ('/circuit-breakers', 'CIRCUIT_BREAKER_ENABLED', 'breakers'),
+    ('/adaptive-timeouts', 'ADAPTIVE_TIMEOUTS_ENABLED', 'steps'),
+    ('/browser-profiles', 'BROWSER_PROFILE_ENABLED', 'storedStates'),
+    ('/deep-links', 'DEEP_LINKS_ENABLED', 'deepLinks'),
+    ('/debug-artifacts', 'DEBUG_ARTIFACTS_ENABLED', 'captures'),
+    ('/parked-pages', 'PAGE_PARKING_ENABLED', 'facilities'),
+    ('/selector-cache', 'SELECTOR_CACHE_ENABLED', 'steps'),
+    ('/admission', 'ADMISSION_CONTROL_ENABLED', 'queued'),
+]
+
+
+class TestFeatureStatsEndpoints:
+    """機能ごとの状態エンドポイント（無効時の共通の挙動と有効時の内容）のテスト"""
+
+    @pytest.mark.parametrize('path,env_name,list_key', FEATURE_STATS_ENDPOINTS)
+    def test_disabled_returns_empty(self, client, monkeypatch, path, env_name, list_key):
+        """無効時はenabled=Falseで空の一覧を返す"""
+        monkeypatch.delenv(env_name, raising=False)
+        response = client.get(path)
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert data['status'] == 'success'
+        assert data['enabled'] is False
+        assert data[list_key] == []
+        assert 'timestamp' in data
+
+    def test_circuit_breakers_enabled(self, client, monkeypatch):
+        """有効時は施設ごとの状態を返す"""
+        monkeypatch.setenv('CIRCUIT_BREAKER_ENABLED', 'true')
+        response = client.get('/circuit-breakers')
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert data['enabled'] is True
+        assert [b['facility'] for b in data['breakers']] == ['ensemble', 'meguro', 'shibuya']
+        assert all('state' in b for b in data['breakers'])
+
+    @patch('src.entrypoints.flask_api.get_adaptive_timeouts')
+    def test_adaptive_timeouts_reports_drift(self, mock_get_timeouts, client):
+        """遅延しているステップを一覧で返す"""
+        mock_get_timeouts.return_value.get_stats.return_value = [
+            {'facility': 'meguro', 'step': 'goto', 'samples': 30, 'p50Ms': 900.0,
+             'p95Ms': 1500.0, 'maxMs': 2000.0, 'drifting': True}
+        ]
+        response = client.get('/adaptive-timeouts?facility=meguro')
+        data = json.loads(response.data)
+
+        mock_get_timeouts.return_value.get_stats.assert_called_once_with('meguro')
+        assert data['drifting'] == ['meguro:goto']
+
+    @patch('src.entrypoints.flask_api.get_browser_profiles')
+    def test_browser_profiles_reports_cache(self, mock_get_profiles, client):
+        """保存済みの状態とキャッシュの利用状況を返す"""
+        mock_get_profiles.return_value.get_stats.return_value = {
+            'directory': '/tmp/aki-sta/browser_profiles',
+            'storedStates': ['meguro', 'shibuya'],
+            'invalidations': 1,
+            'cache': {'entries': 12, 'bytes': 2048, 'maxBytes': 209715200,
+                      'hits': 30, 'misses': 10, 'hitRate': 0.75}
+        }
+        response = client.get('/browser-profiles')
+        data = json.loads(response.data)
+
+        assert data['enabled'] is True
+        assert data['storedStates'] == ['meguro', 'shibuya']
+        assert data['cache']['hitRate'] == 0.75
+
+    def test_deep_links_lists_configured_facilities(self, client, monkeypatch):
+        """テンプレートが設定された施設だけを返す"""
+        monkeypatch.setenv('DEEP_LINKS_ENABLED', 'true')
+        monkeypatch.setenv('DEEP_LINK_TEMPLATE_MEGURO', 'https://example.com/calendar?date={date_slash}')
+        monkeypatch.delenv('DEEP_LINK_TEMPLATE_SHIBUYA', raising=False)
+        response = client.get('/deep-links')
+        data = json.loads(response.data)
+
+        assert data['enabled'] is True
+        assert [link['facility'] for link in data['deepLinks']] == ['meguro']
+        assert data['deepLinks'][0]['hitRate'] is None
+
+    @patch('src.entrypoints.flask_api.get_debug_artifacts')
+    def test_debug_artifacts_lists_captures(self, mock_get_artifacts, client):
+        """保存済みの取得結果を返す"""
+        mock_get_artifacts.return_value.get_stats.return_value = {
+            'directory': '/tmp/aki-sta/debug_artifacts',
+            'maxCaptures': 20,
+            'slowRunMs': 0,
+            'trace': False,
+            'captures': [{'name': '20250101T000000000000Z_meguro_extract_failed',
+                          'files': ['markers.json', 'page.html', 'screenshot.png']}]
+        }
+        response = client.get('/debug-artifacts')
+        data = json.loads(response.data)
+
+        assert data['enabled'] is True
+        assert data['captures'][0]['name'].endswith('meguro_extract_failed')
+
+    @patch('src.entrypoints.flask_api.get_page_parking')
+    def test_parked_pages_lists_facilities(self, mock_get_parking, client):
+        """施設ごとの待機ページの状態を返す"""
+        mock_get_parking.return_value.get_stats.return_value = {
+            'maxAgeSeconds': 1800.0,
+            'idleSeconds': 600.0,
+            'facilities': [{'facility': 'meguro', 'parked': True, 'ageSeconds': 12.5,
+                            'parks': 1, 'reuses': 3, 'discards': 0, 'pendingJobs': 0, 'lastError': None}]
+        }
+        response = client.get('/parked-pages')
+        data = json.loads(response.data)
+
+        assert data['enabled'] is True
+        assert data['facilities'][0]['reuses'] == 3
+
+    @patch('src.entrypoints.flask_api.get_selector_cache')
+    def test_selector_cache_stats(self, mock_get_cache, client):
+        """施設を指定して統計を返す"""
+        mock_get_cache.return_value.get_stats.return_value = [
+            {'facility': 'meguro', 'step': 'search_button', 'selector': "button:has-text('検索'):visible",
+             'hits': 9, 'misses': 1, 'failures': 0, 'hitRate': 0.9, 'updatedAt': '2025-01-01T00:00:00+00:00'}
+        ]
+        response = client.get('/selector-cache?facility=meguro')
+        data = json.loads(response.data)
+
+        mock_get_cache.return_value.get_stats.assert_called_once_with('meguro')
+        assert data['enabled'] is True
+        assert data['steps'][0]['hitRate'] == 0.9
+
+
+class TestSessionPlanEndpoint:
+    """セッション計画のプレビューエンドポイントのテスト"""
+
+    def test_session_plan(self, client, monkeypatch):
+        """施設×日付のセッションと推定所要時間を返す"""
+        monkeypatch.setenv('MEGURO_MULTI_DATE_ENABLED', 'false')
+        response = client.get('/session-plan?date=2099-11-01&date=2099-11-02&facility=meguro')
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert [session['dates'] for session in data['plan']['sessions']] == [['2099-11-01'], ['2099-11-02']]
+        assert data['plan']['estimatedWallSeconds'] == data['plan']['estimatedSerialSeconds']
+
+    def test_session_plan_requires_valid_dates(self, client):
+        """日付がない・形式が不正・未知の施設の場合は400"""
+        assert client.get('/session-plan').status_code == 400
+        assert client.get('/session-plan?date=2099/11/01').status_code == 400
+        assert client.get('/session-plan?date=2099-11-01&facility=unknown').status_code == 400
+
+
+class TestAdmissionControl:
+    """/scrape/* の受付制御のテスト"""
+
+    @patch('src.entrypoints.flask_api.threading')
+    @patch('src.entrypoints.flask_api.get_admission_controller')
+    def test_saturated_returns_429(self, mock_get_controller, mock_threading, client, monkeypatch):
+        """実行枠も待ち行列も埋まっている場合は429とRetry-Afterを返し、スレッドを開始しない"""
+        from src.utils.admission_control import AdmissionController
+        monkeypatch.setenv('DISABLE_RATE_LIMITS', 'true')
+        controller = AdmissionController(max_browsers=1, max_queued=0, min_free_memory_mb=0, default_run_seconds=30)
+        mock_get_controller.return_value = controller
+        future_date = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+
+        first = client.post(f'/scrape/meguro?date={future_date}')
+        assert first.status_code == 202
+        assert controller.get_stats()['queued'] == ['/scrape/meguro']
+
+        response = client.post(f'/scrape/shibuya?date={future_date}')
+        data = json.loads(response.data)
+
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == str(data['retryAfterSeconds'])
+        assert data['estimatedWaitSeconds'] == 30
+        assert mock_threading.Thread.call_count == 1
+
+    @patch('src.entrypoints.flask_api.get_admission_controller')
+    def test_ticket_released_on_error_response(self, mock_get_controller, client, monkeypatch):
+        """スレッドを開始しなかったリクエストの枠はレスポンス時に解放する"""
+        from src.utils.admission_control import AdmissionController
+        monkeypatch.setenv('DISABLE_RATE_LIMITS', 'true')
+        controller = AdmissionController(max_browsers=1, max_queued=0, min_free_memory_mb=0)
+        mock_get_controller.return_value = controller
+
+        response = client.post('/scrape/meguro', json={})
+
+        assert response.status_code == 400
+        assert controller.get_stats()['queued'] == []
+        assert controller.get_stats()['active'] == []
+
+
+class TestRefreshStatusEndpoint:
+    """自動更新スケジューラー状態エンドポイントのテスト"""
+
+    def test_refresh_status(self, client):
+        """スケジューラーの設定と直近のサイクルを返す"""
+        response = client.get('/refresh/status')
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert data['status'] == 'success'
+        assert 'budget_per_cycle' in data
+        assert 'last_cycle' in data
+
+
+class TestJobEndpoints:
+    """スクレイピングジョブの進捗エンドポイントのテスト"""
+
+    @patch('src.entrypoints.flask_api.threading')
+    def test_scrape_returns_job_id(self, mock_threading, client, monkeypatch):
+        """/scrapeはジョブIDと購読URLを返す"""
+        monkeypatch.setenv('DISABLE_RATE_LIMITS', 'true')
+        future_date = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+        response = client.post(f'/scrape?date={future_date}&facility=meguro')
+        data = json.loads(response.data)
+
+        assert response.status_code == 202
+        assert data['eventsUrl'] == f"/jobs/{data['jobId']}/events"
+        # async_scraping_taskにジョブIDが渡される
+        assert mock_threading.Thread.call_args[1]['args'][5] == data['jobId']
+
+    def test_stream_job_events_sse(self, client):
+        """終了済みジョブのイベントをSSEで返す"""
+        from src.utils.scrape_jobs import COMPLETED, get_job_registry
+        job = get_job_registry().create('meguro', ['2025-10-05'])
+        job.publish('date', facility='meguro', date='2025-10-05', status='success')
+        job.finish(COMPLETED)
+
+        response = client.get(f'/jobs/{job.id}/events')
+        body = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert 'event: date' in body
+        assert 'event: job' in body
+
+    def test_stream_job_events_ndjson_with_last_event_id(self, client):
+        """NDJSON形式とLast-Event-IDによる再開"""
+        from src.utils.scrape_jobs import COMPLETED, get_job_registry
+        job = get_job_registry().create('meguro', ['2025-10-05'])
+        job.publish('date', facility='meguro', date='2025-10-05', status='success')
+        job.finish(COMPLETED)
+
+        response = client.get(f'/jobs/{job.id}/events?format=ndjson', headers={'Last-Event-ID': '1'})
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+        assert response.mimetype == 'application/x-ndjson'
+        assert [line['type'] for line in lines] == ['job']
+
+    def test_job_status_and_not_found(self, client):
+        """ジョブの状態取得と存在しないジョブ"""
+        from src.utils.scrape_jobs import get_job_registry
+        job = get_job_registry().create('shibuya', ['2025-10-05'])
+
+        response = client.get(f'/jobs/{job.id}')
+        assert json.loads(response.data)['job']['status'] == 'running'
+
+        assert client.get('/jobs/unknown').status_code == 404
+        assert client.get('/jobs/unknown/events').status_code == 404
+
+    def test_cancel_job(self, client):
+        """DELETE /jobs/<id>で実行中のジョブをキャンセルし、終了済み・存在しないジョブは409・404"""
+        from src.utils.scrape_jobs import COMPLETED, get_job_registry
+        job = get_job_registry().create('meguro', ['2025-10-05'])
+
+        response = client.delete(f'/jobs/{job.id}')
+        assert response.status_code == 202
+        assert json.loads(response.data)['job']['deadline']['cancelled'] is True
+        assert job.deadline.cancelled
+
+        job.finish(COMPLETED)
+        assert client.delete(f'/jobs/{job.id}').status_code == 409
+        assert client.delete('/jobs/unknown').status_code == 404
+
+    @patch('src.entrypoints.flask_api.MeguroScraper')
+    def test_async_task_finishes_cancelled_job(self, mock_scraper_class):
+        """キャンセルされたジョブはcancelledで終了し、スクレイパーには期限が渡される"""
+        from src.entrypoints.flask_api import async_scraping_task
+        from src.utils.deadlines import get_current_deadline
+        from src.utils.scrape_jobs import get_job_registry
+        job = get_job_registry().create('meguro', ['2025-10-05', '2025-10-06'])
+        seen = []
+
+        def scrape_multiple_dates(dates):
+            seen.append(get_current_deadline())
+            job.cancel('stop')
+            return {
+                'results': {date: {'status': 'error', 'error_type': 'CANCELLED'} for date in dates},
+                'summary': {'total': 2, 'success': 0, 'failed': 2}
+            }
+        mock_scraper_class.return_value.scrape_multiple_dates.side_effect = scrape_multiple_dates
+
+        async_scraping_task(['2025-10-05', '2025-10-06'], None, None, False, 'meguro', job.id)
+
+        assert seen == [job.deadline]
+        assert job.status == 'cancelled'
+        assert job.events_after(0)[-1]['reason'] == 'stop'
+
+    @patch('src.entrypoints.flask_api.threading')
+    def test_facility_endpoint_returns_job(self, mock_threading, client):
+        """施設別エンドポイントもジョブを作成し、ジョブIDと期限をタスクに渡す"""
+        future_date = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+        response = client.post(f'/scrape/shibuya?date={future_date}')
+        data = json.loads(response.data)
+
+        assert response.status_code == 202
+        assert data['eventsUrl'] == f"/jobs/{data['jobId']}/events"
+        assert mock_threading.Thread.call_args[1]['args'][4] == data['jobId']
+
+    @patch('src.entrypoints.flask_api.get_services')
+    def test_facility_task_uses_job_deadline(self, mock_get_services):
+        """施設別タスクはジョブの期限でスクレイピングし、キャンセルされたジョブはcancelledで終了する"""
+        from src.entrypoints.flask_api import async_meguro_scraping_task
+        from src.utils.scrape_jobs import get_job_registry
+        job = get_job_registry().create('meguro', ['2025-10-05'])
+        job.cancel('stop')
+        mock_scrape_service = Mock()
+        mock_get_services.return_value = (Mock(), mock_scrape_service)
+        scrape_facility = mock_scrape_service.scrape_facility
+        scrape_facility.return_value = {'status': 'error', 'error_type': 'CANCELLED'}
+
+        async_meguro_scraping_task('2025-10-05', None, None, False, job.id)
+
+        assert scrape_facility.call_args[1]['deadline'] is job.deadline
+        assert job.status == 'cancelled'
+
+    @patch('src.entrypoints.flask_api.MeguroScraper')
+    def test_async_task_publishes_and_finishes_job(self, mock_scraper_class):
+        """非同期タスクは施設ごとの結果を通知し、最後にジョブを終了する"""
+        from src.entrypoints.flask_api import async_scraping_task
+        from src.utils.scrape_jobs import get_job_registry
+        mock_scraper_class.return_value.scrape_multiple_dates.return_value = {
+            'results': {'2025-10-05': {'status': 'success'}, '2025-10-06': {'status': 'error', 'error_type': 'NO_DATA_FOUND'}},
+            'summary': {'total': 2, 'success': 1, 'failed': 1}
+        }
+        job = get_job_registry().create('meguro', ['2025-10-05', '2025-10-06'])
+
+        async_scraping_task(['2025-10-05', '2025-10-06'], None, None, False, 'meguro', job.id)
+
+        events = job.events_after(0)
+        assert events[0]['type'] == 'facility'
+        assert events[0]['results']['2025-10-06']['error_type'] == 'NO_DATA_FOUND'
+        assert events[-1]['type'] == 'job'
+        assert events[-1]['status'] == 'failed'
+
+
+class TestAvailabilityEndpoint:
+    """GET /availability のテスト"""
+
+    @pytest.fixture(autouse=True)
+    def reader(self):
+        from src.utils.availability_cache import get_availability_cache
+        get_availability_cache().invalidate()
+        reader = Mock()
+        reader.get_availability.return_value = [
+            {'centerName': 'Ensemble Studio', 'roomName': f'Room {i}', 'timeSlots': {'morning': 'available'}}
+            for i in range(10)
+        ]
+        with patch('src.entrypoints.flask_api.get_availability_reader', return_value=reader):
+            yield reader
+        get_availability_cache().invalidate()
+
+    def test_returns_availability_with_etag(self, client, reader):
+        """日付の空き状況とETagを返し、2回目はCosmos DBを読まない"""
+        response = client.get('/availability?date=2025-11-15')
+        client.get('/availability?date=2025-11-15')
+
+        assert response.status_code == 200
+        assert response.headers['ETag']
+        data = json.loads(response.data)
+        assert data['date'] == '2025-11-15'
+        assert len(data['facilities']) == 10
+        reader.get_availability.assert_called_once_with('2025-11-15')
+
+    def test_if_none_match_returns_304(self, client):
+        """ETagが一致すれば304を返す"""
+        etag = client.get('/availability?date=2025-11-15').headers['ETag']
+
+        response = client.get('/availability?date=2025-11-15', headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_gzip(self, client):
+        """Accept-Encodingにgzipがあれば圧縮して返す"""
+        import gzip
+        response = client.get('/availability?date=2025-11-15', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.data))['date'] == '2025-11-15'
+
+    def test_save_invalidates(self, client, reader):
+        """同じ日付が保存されるとキャッシュが破棄される"""
+        from src.utils.availability_cache import invalidate_availability
+        etag = client.get('/availability?date=2025-11-15').headers['ETag']
+        reader.get_availability.return_value = []
+
+        invalidate_availability('2025-11-15')
+        response = client.get('/availability?date=2025-11-15', headers={'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert json.loads(response.data)['facilities'] == []
+
+    def test_invalid_date(self, client):
+        """日付がない・形式が不正な場合は400"""
+        assert client.get('/availability').status_code == 400
+        assert client.get('/availability?date=2025/11/15').status_code == 400
+
+    def test_read_error_returns_503(self, client, reader):
+        """Cosmos DBの読み込みに失敗した場合は503"""
+        reader.get_availability.side_effect = RuntimeError('cosmos down')
+
+        assert client.get('/availability?date=2025-11-15').status_code == 503
+
+
+class TestSpoolStatusEndpoint:
+    """スプール状態エンドポイントのテスト"""
+
+    def test_spool_status(self, client, monkeypatch):
+        """無効時もスプールの有効・無効と直近の再送結果を返す"""
+        monkeypatch.delenv('AVAILABILITY_SPOOL_ENABLED', raising=False)
+        response = client.get('/spool/status')
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert data['enabled'] is False
+        assert data['spool'] is None
+        assert 'last_cycle' in data
+
+
 if __name__ == '__main__':
-    pytest.main([__file__, '-v'])
\ No newline at end of file
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,137 @@
+"""
+AvailabilitySpoolのテスト
+"""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.repositories.availability_spool import AvailabilitySpool, get_availability_spool
+from src.repositories.persistence_queue import PersistenceQueue
+from src.scrapers.ensemble_studio import EnsembleStudioScraper
+
+
+ROWS = [{"centerName": "Ensemble Studio", "facilityName": "本郷", "roomName": "A", "timeSlots": {}}]
+OTHER_ROWS = [{"centerName": "目黒区民センター", "facilityName": "音楽室", "roomName": "1", "timeSlots": {}}]
+
+
+@pytest.fixture
+def spool(tmp_path):
+    """一時ディレクトリのSQLiteを使うスプール"""
+    return AvailabilitySpool(db_path=str(tmp_path / "spool.sqlite3"), retention_hours=24)
+
+
+class TestAvailabilitySpool:
+    """AvailabilitySpoolのテスト"""
+
+    def test_uses_wal_mode(self, spool):
+        """ファイルはWALモードで作成される"""
+        connection = sqlite3.connect(spool.db_path)
+        try:
+            assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        finally:
+            connection.close()
+
+    def test_failed_upload_is_replayable(self, spool):
+        """送信に失敗した記録は未送信として残り、再送対象になる"""
+        uploaded_id = spool.append("2025-11-15", ROWS)
+        failed_id = spool.append("2025-11-16", ROWS)
+        spool.complete(uploaded_id, True)
+        spool.complete(failed_id, False, "Service Unavailable")
+
+        claimed = spool.claim_pending()
+
+        assert [entry["id"] for entry in claimed] == [failed_id]
+        assert claimed[0]["facilities"] == ROWS
+        assert spool.get_stats()["oldestPending"]["lastError"] == "Service Unavailable"
+
+    def test_in_flight_entries_are_not_claimed(self, spool):
+        """送信中の記録は再送ワーカーに渡さない"""
+        spool_id = spool.append("2025-11-15", ROWS)
+        assert spool.claim_pending() == []
+
+        spool.complete(spool_id, False)
+        assert len(spool.claim_pending()) == 1
+        # 取得済みの記録は解除するまで再度取得しない
+        assert spool.claim_pending() == []
+
+    def test_newer_data_supersedes_pending(self, spool):
+        """同じ日付・同じ出どころの新しいデータがあれば、古い未送信の記録は再送しない"""
+        old_id = spool.append("2025-11-15", ROWS)
+        other_id = spool.append("2025-11-15", OTHER_ROWS)
+        spool.complete(old_id, False)
+        spool.complete(other_id, False)
+        new_id = spool.append("2025-11-15", ROWS)
+        spool.complete(new_id, False)
+
+        assert sorted(entry["id"] for entry in spool.claim_pending()) == [other_id, new_id]
+        assert spool.get_stats()["superseded"] == 1
+
+    def test_survives_reopen(self, spool):
+        """別のプロセス（インスタンス）からも未送信の記録を読める"""
+        spool.append("2025-11-15", ROWS)
+
+        reopened = AvailabilitySpool(db_path=spool.db_path)
+
+        assert [entry["date"] for entry in reopened.claim_pending()] == ["2025-11-15"]
+
+    def test_purge_keeps_pending(self, spool):
+        """保持期間を過ぎた送信済みの記録のみ削除する"""
+        past = datetime.now(timezone.utc) - timedelta(hours=25)
+        with patch.object(AvailabilitySpool, "_now", return_value=past):
+            uploaded_id = spool.append("2025-11-15", ROWS)
+            spool.complete(uploaded_id, True)
+            pending_id = spool.append("2025-11-16", ROWS)
+            spool.complete(pending_id, False)
+
+        assert spool.purge() == 1
+        assert spool.get_stats()["pending"] == 1
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトでは無効"""
+        monkeypatch.delenv('AVAILABILITY_SPOOL_ENABLED', raising=False)
+        assert get_availability_spool() is None
+
+
+class TestSpoolIntegration:
+    """保存経路との連携のテスト"""
+
+    @patch("src.repositories.cosmos_repository.CosmosWriter")
+    def test_failed_save_stays_in_spool(self, mock_writer_class, spool):
+        """同期保存に失敗したデータはスプールに残り、チェックポイントが記録される"""
+        mock_writer_class.return_value.save_availability.return_value = False
+        scraper = EnsembleStudioScraper()
+
+        with patch("src.scrapers.base.get_availability_spool", return_value=spool), \
+                patch("src.scrapers.base.get_persistence_queue", return_value=None), \
+                patch.object(scraper, "_mark_checkpoint") as mock_checkpoint:
+            assert not scraper._save_to_cosmos_immediately("2025-11-15", ROWS)
+
+        mock_checkpoint.assert_called_once_with("2025-11-15")
+        assert [entry["date"] for entry in spool.claim_pending()] == ["2025-11-15"]
+
+    @patch("src.repositories.cosmos_repository.CosmosWriter")
+    def test_successful_save_is_marked_uploaded(self, mock_writer_class, spool):
+        """保存に成功したデータは送信済みになる"""
+        mock_writer_class.return_value.save_availability.return_value = True
+
+        with patch("src.scrapers.base.get_availability_spool", return_value=spool), \
+                patch("src.scrapers.base.get_persistence_queue", return_value=None):
+            assert EnsembleStudioScraper()._save_to_cosmos_immediately("2025-11-15", ROWS)
+
+        assert spool.get_stats()["uploaded"] == 1
+        assert spool.get_stats()["pending"] == 0
+
+    def test_queue_spools_before_upload(self, spool):
+        """非同期保存キューは積んだ時点でスプールに追記し、失敗した分は未送信のまま残す"""
+        writer = Mock()
+        writer.save_availability.return_value = False
+        persistence_queue = PersistenceQueue(writer_factory=lambda: writer, max_attempts=1)
+
+        with patch("src.repositories.persistence_queue.get_availability_spool", return_value=spool):
+            pending = persistence_queue.submit("2025-11-15", ROWS)
+            assert not pending.wait(5)
+
+        assert pending.spool_id is not None
+        assert [entry["id"] for entry in spool.claim_pending()] == [pending.spool_id]
@@ -0,0 +1,108 @@
+"""
+CheckpointRepositoryのテスト
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src.repositories.checkpoint_repository import (
+    CheckpointRepository,
+    get_checkpoint_repository,
+)
+from src.scrapers.meguro import MeguroScraper
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """一時ディレクトリのSQLiteを使うリポジトリ"""
+    return CheckpointRepository(db_path=str(tmp_path / "checkpoints.sqlite3"), freshness_minutes=60)
+
+
+class TestCheckpointRepository:
+    """CheckpointRepositoryのテスト"""
+
+    def test_mark_and_get_fresh_dates(self, repo):
+        """保存完了を記録した日付のみ鮮度期間内として返す"""
+        repo.mark_completed("meguro", "2025-10-05", run_id="run1")
+
+        assert repo.get_fresh_dates("meguro", ["2025-10-05", "2025-10-06"]) == {"2025-10-05"}
+        assert repo.is_fresh("meguro", "2025-10-05")
+        # 施設ごとに独立
+        assert not repo.is_fresh("shibuya", "2025-10-05")
+
+    def test_stale_dates_are_not_fresh(self, repo):
+        """鮮度期間を過ぎた記録はスキップ対象にならない"""
+        past = datetime.now(timezone.utc) - timedelta(hours=2)
+        with patch.object(CheckpointRepository, "_now", return_value=past):
+            repo.mark_completed("ensemble", "2025-10-05")
+
+        assert repo.get_completed_at("ensemble", "2025-10-05") == past
+        assert repo.get_fresh_dates("ensemble", ["2025-10-05"]) == set()
+
+    def test_mark_completed_overwrites(self, repo):
+        """同じ施設・日付の記録は上書き"""
+        repo.mark_completed("meguro", "2025-10-05", run_id="run1")
+        repo.mark_completed("meguro", "2025-10-05", run_id="run2")
+
+        checkpoints = repo.get_checkpoints("meguro")
+        assert len(checkpoints) == 1
+        assert checkpoints[0]["runId"] == "run2"
+
+    def test_persisted_across_instances(self, tmp_path):
+        """別インスタンス（プロセス再起動後）からも参照できる"""
+        path = str(tmp_path / "checkpoints.sqlite3")
+        CheckpointRepository(db_path=path).mark_completed("shibuya", "2025-12-18")
+
+        assert CheckpointRepository(db_path=path).is_fresh("shibuya", "2025-12-18")
+
+    def test_clear(self, repo):
+        """条件を指定して削除"""
+        repo.mark_completed("meguro", "2025-10-05")
+        repo.mark_completed("meguro", "2025-10-06")
+        repo.mark_completed("shibuya", "2025-10-05")
+
+        assert repo.clear(facility="meguro", date="2025-10-05") == 1
+        assert repo.clear(facility="meguro") == 1
+        assert [c["facility"] for c in repo.get_checkpoints()] == ["shibuya"]
+
+    def test_in_memory(self):
+        """:memory: 指定でも動作する"""
+        repo = CheckpointRepository(db_path=":memory:")
+        repo.mark_completed("meguro", "2025-10-05")
+        assert repo.is_fresh("meguro", "2025-10-05")
+
+    def test_disabled_by_default(self):
+        """環境変数で有効化しない限りNone"""
+        with patch.dict(os.environ, {"SCRAPE_CHECKPOINT_ENABLED": "false"}):
+            assert get_checkpoint_repository() is None
+
+
+class TestScraperCheckpointIntegration:
+    """スクレイパーからのチェックポイント利用のテスト"""
+
+    @patch("time.sleep")
+    @patch.object(MeguroScraper, "scrape_and_save")
+    def test_checkpointed_dates_are_skipped(self, mock_scrape_and_save, mock_sleep, repo):
+        """保存済みの日付はスクレイピングせず成功扱いにする"""
+        repo.mark_completed("meguro", "2025-10-05")
+        mock_scrape_and_save.return_value = {"status": "success", "data": {}}
+
+        with patch("src.scrapers.base.get_checkpoint_repository", return_value=repo):
+            result = MeguroScraper().scrape_multiple_dates(["2025-10-05", "2025-10-06"])
+
+        mock_scrape_and_save.assert_called_once_with("2025-10-06")
+        assert result["results"]["2025-10-05"]["skipped"] is True
+        assert result["summary"] == {"total": 2, "success": 2, "failed": 0}
+
+    @patch("src.repositories.cosmos_repository.CosmosWriter")
+    def test_successful_save_is_checkpointed(self, mock_writer_class, repo):
+        """DB保存に成功した日付を記録"""
+        mock_writer_class.return_value.save_availability.return_value = True
+        scraper = MeguroScraper()
+
+        with patch("src.scrapers.base.get_checkpoint_repository", return_value=repo):
+            assert scraper._save_to_cosmos_immediately("2025-10-05", [{"roomName": "test"}])
+
+        assert repo.is_fresh("meguro", "2025-10-05")
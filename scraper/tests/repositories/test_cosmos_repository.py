@@ -146,6 +146,39 @@ class TestCosmosWriter(unittest.TestCase):
         self.assertEqual(result['status'], 'error')
         self.assertIn('Unexpected error', result['message'])
     
+    def test_get_availability(self):
+        """get_availabilityは日付のパーティションのみを検索し、APIと同じ形式で返す"""
+        self.mock_container.query_items.return_value = [{
+            'id': '2025-11-15_ensemble',
+            'centerName': 'Ensemble Studio',
+            'facilityName': '本郷',
+            'roomName': 'A',
+            'timeSlots': {'morning': 'available'},
+            'updatedAt': '2025-11-01T00:00:00Z'
+        }]
+        
+        result = self.writer.get_availability('2025-11-15')
+        
+        self.assertEqual(result, [{
+            'centerName': 'Ensemble Studio',
+            'facilityName': '本郷',
+            'roomName': 'A',
+            'timeSlots': {'morning': 'available'},
+            'lastUpdated': '2025-11-01T00:00:00Z'
+        }])
+        self.assertEqual(self.mock_container.query_items.call_args.kwargs['partition_key'], '2025-11-15')
+    
+    @patch('src.repositories.cosmos_repository.invalidate_availability')
+    def test_save_availability_invalidates_cache(self, mock_invalidate):
+        """保存すると成功・失敗にかかわらず同じ日付の読み取りキャッシュを破棄する"""
+        facility = {'centerName': 'c', 'facilityName': 'f', 'roomName': 'r', 'timeSlots': {}}
+        self.writer.save_availability('2025-11-15', [facility])
+        
+        self.mock_container.upsert_item.side_effect = Exception("write failed")
+        self.writer.save_availability('2025-11-16', [facility])
+        
+        self.assertEqual([c.args[0] for c in mock_invalidate.call_args_list], ['2025-11-15', '2025-11-16'])
+    
     @patch.dict(os.environ, {}, clear=True)
     @patch('src.repositories.cosmos_repository.load_dotenv')
     def test_missing_connection_settings(self, mock_load_dotenv):
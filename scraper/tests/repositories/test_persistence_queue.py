@@ -0,0 +1,144 @@
+"""
+非同期保存キューのテスト
+"""
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.repositories.persistence_queue import PersistenceQueue, get_persistence_queue
+from src.scrapers.ensemble_studio import EnsembleStudioScraper
+from src.utils.scrape_jobs import get_current_job, job_context
+from src.utils.structured_logging import get_log_context, log_context
+
+
+FACILITIES = [{"centerName": "c", "facilityName": "f", "roomName": "r", "timeSlots": {}}]
+
+
+@pytest.fixture
+def writer():
+    writer = Mock()
+    writer.save_availability.return_value = True
+    return writer
+
+
+@pytest.fixture
+def persistence_queue(writer):
+    persistence_queue = PersistenceQueue(writer_factory=lambda: writer, max_size=10, batch_size=10,
+                                         max_attempts=3, backoff_seconds=0)
+    with patch.object(PersistenceQueue, "_sleep"):
+        yield persistence_queue
+
+
+class TestPersistenceQueue:
+    """PersistenceQueueのテスト"""
+
+    def test_submit_and_wait(self, persistence_queue, writer):
+        """積んだ保存はバックグラウンドで実行され、完了を待てる"""
+        pending = persistence_queue.submit("2025-11-15", FACILITIES)
+
+        assert pending.wait(5)
+        assert persistence_queue.flush(5)
+        writer.save_availability.assert_called_once_with("2025-11-15", FACILITIES)
+        assert persistence_queue.pending == 0
+
+    def test_writer_is_reused(self, writer):
+        """ライターは1つを使い回す"""
+        factory = Mock(return_value=writer)
+        persistence_queue = PersistenceQueue(writer_factory=factory, max_attempts=1)
+
+        for date in ["2025-11-15", "2025-11-16", "2025-11-17"]:
+            assert persistence_queue.save(date, FACILITIES, timeout=5)
+
+        factory.assert_called_once()
+
+    def test_retry_then_success(self, persistence_queue, writer):
+        """失敗した保存はリトライする"""
+        writer.save_availability.side_effect = [False, Exception("throttled"), True]
+
+        pending = persistence_queue.submit("2025-11-15", FACILITIES)
+
+        assert pending.wait(5)
+        assert pending.attempts == 3
+
+    def test_gives_up_after_max_attempts(self, persistence_queue, writer):
+        """最大試行回数まで失敗した場合は失敗として完了する"""
+        writer.save_availability.return_value = False
+        on_done = Mock()
+
+        pending = persistence_queue.submit("2025-11-15", FACILITIES, on_done)
+
+        assert not pending.wait(5)
+        assert pending.done
+        assert writer.save_availability.call_count == 3
+        on_done.assert_called_once_with(False)
+        assert persistence_queue.failed_count == 1
+
+    def test_same_date_is_written_once_per_batch(self, writer):
+        """同じバッチ内の同じ日付は行を結合して1回で保存する"""
+        release = threading.Event()
+        writer.save_availability.side_effect = lambda date, rows: release.wait(5)
+        persistence_queue = PersistenceQueue(writer_factory=lambda: writer, max_attempts=1)
+        # 1件目の保存中に残りを積み、2件目以降を1バッチにする
+        blocker = persistence_queue.submit("2025-11-14", FACILITIES)
+        other_rows = [{"centerName": "c2", "facilityName": "f2", "roomName": "r2", "timeSlots": {}}]
+        first = persistence_queue.submit("2025-11-15", FACILITIES)
+        second = persistence_queue.submit("2025-11-15", other_rows)
+        release.set()
+
+        assert blocker.wait(5) and first.wait(5) and second.wait(5)
+        assert writer.save_availability.call_count == 2
+        writer.save_availability.assert_called_with("2025-11-15", FACILITIES + other_rows)
+
+    def test_callback_runs_in_submitter_context(self, persistence_queue):
+        """コールバックは積んだ側のコンテキスト（run_id・ジョブ）で実行される"""
+        job = Mock()
+        seen = {}
+
+        def on_done(saved):
+            seen["run_id"] = get_log_context().get("run_id")
+            seen["job"] = get_current_job()
+
+        with log_context(run_id="run-1"), job_context(job):
+            pending = persistence_queue.submit("2025-11-15", FACILITIES, on_done)
+        pending.wait(5)
+
+        assert seen == {"run_id": "run-1", "job": job}
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトでは無効"""
+        monkeypatch.delenv('WRITE_BEHIND_ENABLED', raising=False)
+        assert get_persistence_queue() is None
+
+
+class TestScraperWriteBehind:
+    """BaseScraperの非同期保存のテスト"""
+
+    def test_save_date_result_is_deferred_until_flush(self, persistence_queue, writer):
+        """キューに積んだ日付は仮に成功とし、flushで保存失敗を反映する"""
+        writer.save_availability.side_effect = lambda date, rows: date == "2025-11-15"
+        scraper = EnsembleStudioScraper()
+        results = {}
+
+        with patch("src.scrapers.base.get_persistence_queue", return_value=persistence_queue):
+            assert scraper._save_date_result("2025-11-15", FACILITIES, results)
+            assert scraper._save_date_result("2025-11-16", FACILITIES, results)
+            assert results["2025-11-16"]["status"] == "success"
+
+            scraper._flush_pending_writes(results)
+
+        assert results["2025-11-15"] == {"status": "success", "data": FACILITIES}
+        assert results["2025-11-16"]["error_type"] == "DATABASE_ERROR"
+        assert scraper._pending_writes == []
+
+    @patch("src.repositories.cosmos_repository.CosmosWriter")
+    def test_save_date_result_without_queue(self, mock_writer_class):
+        """無効時はその場で保存して結果を記録する"""
+        mock_writer_class.return_value.save_availability.return_value = False
+        scraper = EnsembleStudioScraper()
+        results = {}
+
+        with patch("src.scrapers.base.get_persistence_queue", return_value=None):
+            assert not scraper._save_date_result("2025-11-15", FACILITIES, results)
+
+        assert results["2025-11-15"]["error_type"] == "DATABASE_ERROR"
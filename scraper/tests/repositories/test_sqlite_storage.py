@@ -0,0 +1,161 @@
+"""
+SQLiteストレージとバックエンド選択のテスト
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.repositories.sqlite_storage import (
+    SQLiteAvailabilityRepository,
+    SQLiteDocumentStore,
+    SQLiteRateLimitsRepository,
+    SQLiteTargetDateRepository,
+)
+from src.repositories.storage import (
+    create_availability_store,
+    create_rate_limits_store,
+    create_target_date_store,
+    get_storage_backend,
+)
+
+
+ROWS = [
+    {"centerName": "Ensemble Studio", "facilityName": "本郷", "roomName": "A(大)", "timeSlots": {"morning": "available"}},
+    {"centerName": "Ensemble Studio", "facilityName": "初台", "roomName": "B", "timeSlots": {"morning": "booked"}},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """一時ディレクトリのSQLiteを使うストレージ"""
+    return SQLiteDocumentStore(db_path=str(tmp_path / "storage.sqlite3"))
+
+
+class TestSQLiteAvailabilityRepository:
+    """空き状況のSQLite版のテスト"""
+
+    def test_save_and_get(self, store):
+        """保存したデータをCosmos版と同じ形式で取得できる"""
+        repository = SQLiteAvailabilityRepository(store)
+
+        assert repository.save_availability("2025-11-15", ROWS)
+        rows = repository.get_availability("2025-11-15")
+
+        assert sorted(row["roomName"] for row in rows) == ["A(大)", "B"]
+        assert set(rows[0]) == {"centerName", "facilityName", "roomName", "timeSlots", "lastUpdated"}
+        assert repository.get_availability("2025-11-16") == []
+
+    def test_resave_overwrites_same_room(self, store):
+        """同じ部屋の再保存はCosmos版と同じIDで上書きされる"""
+        repository = SQLiteAvailabilityRepository(store)
+        repository.save_availability("2025-11-15", ROWS)
+        updated = dict(ROWS[0], timeSlots={"morning": "booked"})
+
+        repository.save_availability("2025-11-15", [updated])
+        rows = {row["roomName"]: row for row in repository.get_availability("2025-11-15")}
+
+        assert len(rows) == 2
+        assert rows["A(大)"]["timeSlots"] == {"morning": "booked"}
+        assert store.read("availability", "2025-11-15_ensemble-studio_本郷_a大") is not None
+
+    @patch("src.repositories.sqlite_storage.invalidate_availability")
+    def test_save_invalidates_read_cache(self, mock_invalidate, store):
+        """保存すると読み取りキャッシュを破棄する"""
+        SQLiteAvailabilityRepository(store).save_availability("2025-11-15", ROWS)
+
+        mock_invalidate.assert_called_once_with("2025-11-15")
+
+    def test_warm_up(self, store):
+        """warm_upはCosmos版と同じ形式で返す"""
+        assert SQLiteAvailabilityRepository(store).warm_up()["status"] == "success"
+
+
+class TestSQLiteTargetDateRepository:
+    """target_datesのSQLite版のテスト"""
+
+    def test_add_and_remove(self, store):
+        """追加した日付を日付順に返し、削除した日付は返さない"""
+        repository = SQLiteTargetDateRepository(store)
+        assert repository.add_target_date("2025-11-20")
+        assert repository.add_target_date("2025-11-15")
+        assert repository.remove_target_date("2025-11-20")
+
+        assert repository.get_target_dates() == ["2025-11-15"]
+        assert repository.get_single_target_date() == "2025-11-15"
+
+    def test_defaults_and_invalid_input(self, store):
+        """データがない場合はデフォルト日付、不正な日付・存在しない日付はFalse"""
+        repository = SQLiteTargetDateRepository(store)
+
+        assert len(repository.get_target_dates()) == 7
+        assert not repository.add_target_date("2025/11/15")
+        assert not repository.remove_target_date("2025-11-15")
+
+
+class TestSQLiteRateLimitsRepository:
+    """rate_limitsのSQLite版のテスト"""
+
+    def test_running_record_blocks_second_request(self, store):
+        """実行中のレコードがある場合はis_already_running"""
+        repository = SQLiteRateLimitsRepository(store)
+
+        first = repository.create_or_update_record('running')
+        second = repository.create_or_update_record('running')
+
+        assert not first['is_already_running']
+        assert second['is_already_running']
+        assert second['record']['id'] == first['record']['id']
+
+    def test_completed_record_counts_up(self, store):
+        """完了後の再実行はcountを増やす"""
+        repository = SQLiteRateLimitsRepository(store)
+        record = repository.create_or_update_record('running')['record']
+
+        repository.update_status(record['id'], record['date'], 'completed')
+        result = repository.create_or_update_record('running')
+
+        assert not result['is_already_running']
+        assert result['record']['count'] == 2
+        assert repository.get_today_record()['status'] == 'running'
+
+    def test_stale_running_record_is_not_running(self, store):
+        """30分以上更新のない実行中レコードは実行中とみなさない"""
+        repository = SQLiteRateLimitsRepository(store)
+        record = repository.create_or_update_record('running')['record']
+        record['updatedAt'] = (datetime.now() - timedelta(minutes=31)).isoformat()
+        store.upsert('rate_limits', record, record['date'])
+
+        assert not repository.create_or_update_record('running')['is_already_running']
+
+    def test_update_missing_record(self, store):
+        """存在しないレコードの更新はValueError"""
+        with pytest.raises(ValueError):
+            SQLiteRateLimitsRepository(store).update_status('2000-01-01', '2000-01-01', 'completed')
+
+
+class TestStorageBackend:
+    """STORAGE_BACKENDによる切り替えのテスト"""
+
+    def test_default_is_cosmos(self, monkeypatch):
+        """デフォルトはCosmos DB"""
+        monkeypatch.delenv('STORAGE_BACKEND', raising=False)
+        assert get_storage_backend() == 'cosmos'
+
+        with patch('src.repositories.cosmos_repository.CosmosWriter') as mock_writer_class:
+            assert create_availability_store() is mock_writer_class.return_value
+
+    def test_sqlite_backend(self, monkeypatch, tmp_path):
+        """sqliteの場合はすべてのリポジトリがSQLite版になる"""
+        monkeypatch.setenv('STORAGE_BACKEND', 'SQLite')
+        monkeypatch.setattr('src.repositories.sqlite_storage._store_instance', SQLiteDocumentStore(str(tmp_path / "s.sqlite3")))
+
+        assert isinstance(create_availability_store(), SQLiteAvailabilityRepository)
+        assert isinstance(create_target_date_store(), SQLiteTargetDateRepository)
+        assert isinstance(create_rate_limits_store(), SQLiteRateLimitsRepository)
+
+    def test_unknown_backend(self, monkeypatch):
+        """未対応の値はValueError"""
+        monkeypatch.setenv('STORAGE_BACKEND', 'mongodb')
+        with pytest.raises(ValueError):
+            get_storage_backend()
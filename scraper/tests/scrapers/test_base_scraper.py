@@ -81,6 +81,43 @@ class TestBaseScraperUtilities:
         
         assert saved_data == data
     
+    def test_create_facility_record(self, scraper):
+        """結果行は現行のJSON形式で作成される"""
+        record = scraper.create_facility_record(
+            "あんさんぶるStudio和(本郷)", "練習室",
+            {"morning": "available", "afternoon": "booked"}, date="2025-11-15"
+        )
+        assert record["centerName"] == "あんさんぶるStudio"
+        assert record["roomName"] == "練習室"
+        assert record["timeSlots"] == {"morning": "available", "afternoon": "booked", "evening": "unknown"}
+        assert record["date"] == "2025-11-15"
+        assert "date" not in scraper.create_facility_record("あんさんぶるStudio和(本郷)", "練習室", {})
+    
+    def test_create_facility_record_invalid_status(self, scraper):
+        """無効なステータスはValueError（スクレイパーの不具合を隠さない）"""
+        with pytest.raises(ValueError):
+            scraper.create_facility_record("あんさんぶるStudio和(本郷)", "練習室", {"morning": "full"})
+    
+    def test_create_facility_record_shares_names(self, scraper):
+        """同じ名称は同一オブジェクトを共有"""
+        first = scraper.create_facility_record("".join(["あんさんぶる", "Studio和"]), "練習室", {})
+        second = scraper.create_facility_record("".join(["あんさんぶるStudio", "和"]), "練習室", {})
+        assert first["facilityName"] is second["facilityName"]
+    
+    def test_save_date_result_keeps_compact_batch(self, scraper):
+        """保存・結果の保持には結果行のバッチを使う"""
+        from src.types.availability_record import AvailabilityBatch
+        rows = [scraper.create_facility_record("あんさんぶるStudio和(本郷)", "練習室", {"morning": "available"})]
+        results = {}
+        with patch('src.scrapers.base.get_persistence_queue', return_value=None), \
+             patch.object(scraper, '_save_to_cosmos_immediately', return_value=True) as mock_save:
+            assert scraper._save_date_result("2025-11-15", rows, results)
+        
+        saved = mock_save.call_args.args[1]
+        assert isinstance(saved, AvailabilityBatch)
+        assert results["2025-11-15"]["data"] is saved
+        assert saved == rows
+    
     @patch('src.scrapers.base.sync_playwright')
     def test_scrape_availability_error_handling(self, mock_playwright, scraper):
         """エラー時の例外再発生テスト"""
@@ -91,4 +128,102 @@ class TestBaseScraperUtilities:
         with pytest.raises(Exception) as exc_info:
             scraper.scrape_availability("2025-11-15")
         
-        assert str(exc_info.value) == "Connection error"
\ No newline at end of file
+        assert str(exc_info.value) == "Connection error"
+
+class TestHarMode:
+    """HARの記録・再生のテスト"""
+    
+    @pytest.fixture
+    def scraper(self, monkeypatch):
+        monkeypatch.delenv('SCRAPER_RECORD_HAR', raising=False)
+        monkeypatch.delenv('SCRAPER_REPLAY_HAR', raising=False)
+        return EnsembleStudioScraper()
+    
+    def test_disabled_by_default(self, scraper):
+        """デフォルトではHARを記録・再生しない"""
+        browser = Mock()
+        context = scraper.create_browser_context(browser)
+        
+        assert 'record_har_path' not in browser.new_context.call_args.kwargs
+        context.route_from_har.assert_not_called()
+    
+    def test_record_writes_har_on_close(self, scraper, tmp_path):
+        """記録時はHARのパスを渡し、ブラウザを閉じる前にコンテキストを閉じて書き込む"""
+        har_path = str(tmp_path / "hars" / "ensemble.har")
+        scraper.set_har_mode(record_path=har_path)
+        browser = Mock()
+        context = scraper.create_browser_context(browser)
+        scraper.close_browser(browser)
+        
+        assert browser.new_context.call_args.kwargs['record_har_path'] == har_path
+        assert (tmp_path / "hars").is_dir()
+        context.close.assert_called_once()
+        browser.close.assert_called_once()
+    
+    def test_replay_routes_from_har(self, scraper, tmp_path):
+        """再生時はHARにないリクエストを中止し、プロファイルは使わない"""
+        har_path = tmp_path / "ensemble.har"
+        har_path.write_text('{"log": {"entries": []}}')
+        scraper.set_har_mode(replay_path=str(har_path))
+        browser = Mock()
+        profiles = Mock()
+        with patch('src.scrapers.base.get_browser_profiles', return_value=profiles):
+            context = scraper.create_browser_context(browser)
+        
+        context.route_from_har.assert_called_once_with(str(har_path), not_found="abort")
+        profiles.load_state.assert_not_called()
+        assert browser.new_context.call_args.kwargs['storage_state'] is None
+    
+    def test_one_har_per_context(self, scraper, tmp_path):
+        """ブラウザコンテキストごとに1つのHARを記録し、再生でも同じ順に使う"""
+        (tmp_path / "ensemble.7.har").write_text("stale")
+        scraper.set_har_mode(record_path=str(tmp_path / "ensemble.har"))
+        browser = Mock()
+        scraper.create_browser_context(browser)
+        scraper.create_browser_context(browser)
+        
+        recorded = [call.kwargs['record_har_path'] for call in browser.new_context.call_args_list]
+        assert recorded == [str(tmp_path / "ensemble.har"), str(tmp_path / "ensemble.2.har")]
+        assert not (tmp_path / "ensemble.7.har").exists()
+        
+        for name in ("ensemble.har", "ensemble.2.har"):
+            (tmp_path / name).write_text('{"log": {"entries": []}}')
+        scraper.set_har_mode(replay_path=str(tmp_path / "ensemble.har"))
+        replayed = [scraper.create_browser_context(Mock()).route_from_har.call_args.args[0] for _ in range(2)]
+        assert replayed == recorded
+        with pytest.raises(RuntimeError, match="does not follow the recorded flow"):
+            scraper.create_browser_context(Mock())
+    
+    def test_har_mode_skips_learning_and_saving(self, scraper, tmp_path):
+        """HARの記録・再生中は適応タイムアウト・セレクタキャッシュを使わず、再生では保存しない"""
+        har_path = tmp_path / "ensemble.har"
+        har_path.write_text('{"log": {"entries": []}}')
+        scraper.set_har_mode(replay_path=str(har_path))
+        timeouts = Mock()
+        cache = Mock()
+        page = Mock()
+        page.locator.return_value.first.count.return_value = 1
+        with patch('src.scrapers.base.get_adaptive_timeouts', return_value=timeouts), \
+                patch('src.scrapers.base.get_selector_cache', return_value=cache), \
+                patch('src.repositories.storage.create_availability_store') as create_store:
+            assert scraper.timed_step("goto", 1000, lambda timeout: timeout) == 1000
+            scraper.resolve_selector(page, "calendar", [".timetable-calendar"])
+            assert scraper._write_availability("2025-01-10", [])
+        
+        timeouts.record.assert_not_called()
+        cache.record_match.assert_not_called()
+        create_store.assert_not_called()
+    
+    def test_invalid_modes(self, scraper, tmp_path):
+        """記録と再生の同時指定・存在しないHARの再生はエラー"""
+        with pytest.raises(ValueError):
+            scraper.set_har_mode(record_path=str(tmp_path / "a.har"), replay_path=str(tmp_path / "b.har"))
+        with pytest.raises(ValueError, match="HAR file not found"):
+            scraper.set_har_mode(replay_path=str(tmp_path / "missing.har"))
+    
+    def test_mode_from_env(self, monkeypatch, tmp_path):
+        """環境変数で記録を有効にできる"""
+        har_path = str(tmp_path / "meguro.har")
+        monkeypatch.setenv('SCRAPER_RECORD_HAR', har_path)
+        
+        assert EnsembleStudioScraper().record_har_path == har_path
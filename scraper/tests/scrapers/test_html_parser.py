@@ -0,0 +1,242 @@
+"""
+lxmlによるHTML一括解析のテスト
+docs/scraping_fixture の保存済みページを使用
+"""
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock, Mock
+
+from src.scrapers import html_parser
+from src.scrapers.ensemble_studio import EnsembleStudioScraper
+from src.scrapers.meguro import MeguroScraper
+
+
+FIXTURE_DIR = Path(__file__).resolve().parents[3] / "docs" / "scraping_fixture"
+
+
+def load_fixture(relative_path: str) -> str:
+    """フィクスチャのMHTMLを読み込む（存在しない場合はスキップ）"""
+    path = FIXTURE_DIR / relative_path
+    if not path.exists():
+        pytest.skip(f"Fixture not found: {path}")
+    return html_parser.load_mhtml(path)
+
+
+ENSEMBLE_CALENDAR_HTML = """
+<div class="timetable-calendar">
+  <div class="calendar-caption">2025年8月</div>
+  <div class="day-box">
+    <div class="day-number">1</div>
+    <div class="calendar-time-mark"><span class="time-string">09:00</span><a>○</a></div>
+    <div class="calendar-time-mark"><span class="time-string">13:00</span>×</div>
+    <div class="calendar-time-mark"><span class="time-string">18:00</span>－</div>
+  </div>
+  <div class="day-box">
+    <div class="day-number">2</div>
+    <div class="calendar-time-disable">休業日</div>
+  </div>
+  <div class="day-box">
+    <div class="day-number">3</div>
+    <div class="calendar-time-mark"><span class="time-string">09:00</span><a>×</a></div>
+    <div class="calendar-time-mark"><span class="time-string">13:00</span>○</div>
+  </div>
+</div>
+"""
+
+
+class TestCommonParsing:
+    """共通処理のテスト"""
+
+    def test_parse_document_rejects_empty(self):
+        """空のHTMLはエラー"""
+        with pytest.raises(ValueError):
+            html_parser.parse_document("")
+
+    def test_parse_document_rejects_non_string(self):
+        """文字列以外（Mockなど）はエラー"""
+        with pytest.raises(ValueError):
+            html_parser.parse_document(Mock())
+
+    def test_text_without_spans(self):
+        """spanを除外して空白を正規化"""
+        cell = html_parser.parse_document("<td>第１練習室\n  <span>(15人)</span> </td>")
+        assert html_parser.text_without_spans(cell) == "第１練習室"
+
+    def test_time_to_slot(self):
+        """時刻文字列の変換"""
+        assert html_parser.time_to_slot("9:00〜12:00") == "morning"
+        assert html_parser.time_to_slot("13:00") == "afternoon"
+        assert html_parser.time_to_slot("18:00") == "evening"
+        assert html_parser.time_to_slot("20:00") is None
+        assert html_parser.time_to_slot("") is None
+
+
+class TestEnsembleParsing:
+    """あんさんぶるStudioカレンダーの解析テスト"""
+
+    def test_parse_calendar(self):
+        """日付ごとの時刻情報とキャプションを抽出"""
+        parsed = html_parser.parse_ensemble_calendar(ENSEMBLE_CALENDAR_HTML)
+
+        assert parsed["caption"] == "2025年8月"
+        assert parsed["days"][1] == {"morning": "available", "afternoon": "booked", "evening": "unknown"}
+        assert parsed["days"][2] == {"morning": "unknown", "afternoon": "unknown", "evening": "unknown"}
+        assert parsed["days"][3] == {"morning": "booked", "afternoon": "available", "evening": "unknown"}
+
+    def test_link_without_circle_is_booked(self):
+        """○以外（△など）のリンクは予約済みとして扱う"""
+        html = """
+        <div class="timetable-calendar">
+          <div class="calendar-caption">2025年8月</div>
+          <div class="day-box">
+            <div class="day-number">1</div>
+            <div class="calendar-time-mark"><span class="time-string">09:00</span><a>△</a></div>
+            <div class="calendar-time-mark"><span class="time-string">13:00</span><a>○</a></div>
+          </div>
+        </div>
+        """
+        parsed = html_parser.parse_ensemble_calendar(html)
+        assert parsed["days"][1]["morning"] == "booked"
+        assert parsed["days"][1]["afternoon"] == "available"
+
+    def test_parse_calendars_in_document_order(self):
+        """ページ内の複数カレンダーを文書順に解析"""
+        html = f"<html><body>{ENSEMBLE_CALENDAR_HTML}{ENSEMBLE_CALENDAR_HTML}</body></html>"
+        calendars = html_parser.parse_ensemble_calendars(html)
+        assert len(calendars) == 2
+        assert all(c["caption"] == "2025年8月" for c in calendars)
+
+    def test_scraper_uses_calendar_html(self, monkeypatch):
+        """lxmlバックエンドではカレンダーHTMLを一度だけ取得"""
+        monkeypatch.delenv("SCRAPER_EXTRACTION_BACKEND", raising=False)
+        scraper = EnsembleStudioScraper()
+        calendar = Mock()
+        calendar.evaluate.return_value = ENSEMBLE_CALENDAR_HTML
+
+        days = scraper.parse_calendar_days(calendar)
+
+        assert days[1]["morning"] == "available"
+        calendar.evaluate.assert_called_once()
+
+    def test_scraper_falls_back_on_invalid_html(self, monkeypatch):
+        """HTMLが取得できない場合はNone（locator抽出にフォールバック）"""
+        monkeypatch.delenv("SCRAPER_EXTRACTION_BACKEND", raising=False)
+        scraper = EnsembleStudioScraper()
+        calendar = Mock()
+        calendar.evaluate.side_effect = Exception("Target closed")
+
+        assert scraper.parse_calendar_days(calendar) is None
+
+    def test_scraper_locator_backend(self, monkeypatch):
+        """locatorバックエンド指定時はHTMLを取得しない"""
+        monkeypatch.setenv("SCRAPER_EXTRACTION_BACKEND", "locator")
+        scraper = EnsembleStudioScraper()
+        calendar = Mock()
+
+        assert scraper.parse_calendar_days(calendar) is None
+        calendar.evaluate.assert_not_called()
+
+
+class TestMeguroParsing:
+    """目黒区の時間帯別空き状況の解析テスト"""
+
+    def test_parse_time_slot_rows_from_fixture(self):
+        """保存済みページから全行を抽出"""
+        html = load_fixture("meguro/時間帯別空き状況.mhtml")
+        rows = html_parser.parse_meguro_time_slot_rows(html)
+
+        assert len(rows) == 10
+        assert all(row["date"] == "2025-10-05" for row in rows)
+
+        by_room = {(row["facilityName"], row["roomName"]): row["timeSlots"] for row in rows}
+        assert by_room[("めぐろパーシモンホール", "第１練習室")] == {
+            "morning": "booked", "afternoon": "booked", "evening": "available"
+        }
+        # 午後１・午後２は統合される
+        assert by_room[("田道住区センター三田分室", "別館Ｂ１０２（音楽室）")]["afternoon"] == "available"
+
+    def test_afternoon_merge(self):
+        """午後1のみ予約済みの場合はbooked_1"""
+        html = """
+        <div class="item"><h3><a>テスト施設</a></h3>
+          <table>
+            <thead><tr><th>2025年10月5日(日)</th><th>定員</th><th>午前</th><th>午後１</th><th>午後２</th><th>夜間</th></tr></thead>
+            <tbody><tr><td>音楽室<span>20人</span></td><td>20</td><td>－</td><td>×</td><td><input type="checkbox"/></td><td>△</td></tr></tbody>
+          </table>
+        </div>
+        """
+        rows = html_parser.parse_meguro_time_slot_rows(html)
+
+        assert rows == [{
+            "facilityName": "テスト施設",
+            "roomName": "音楽室",
+            "date": "2025-10-05",
+            "timeSlots": {"morning": "unknown", "afternoon": "booked_1", "evening": "available"}
+        }]
+
+    def test_scraper_extracts_from_html(self):
+        """クリックした部屋のみ結果に含め、休館はbooked・未検出はunknown"""
+        html = load_fixture("meguro/時間帯別空き状況.mhtml")
+        scraper = MeguroScraper()
+        scraper.clicked_rooms = {
+            ("めぐろパーシモンホール", "第１練習室"): {"table_idx": 0, "is_closed": False},
+            ("上目黒住区センター", "Ｂ１０３（音楽室）"): {"table_idx": 1, "is_closed": True},
+            ("存在しない施設", "存在しない部屋"): {"table_idx": 2, "is_closed": False},
+        }
+
+        results = scraper._extract_all_time_slots_from_html(html)
+
+        assert results["めぐろパーシモンホール"]["第１練習室"]["evening"] == "available"
+        assert results["上目黒住区センター"]["Ｂ１０３（音楽室）"] == {
+            "morning": "booked", "afternoon": "booked", "evening": "booked"
+        }
+        assert results["存在しない施設"]["存在しない部屋"] == {
+            "morning": "unknown", "afternoon": "unknown", "evening": "unknown"
+        }
+
+
+    def test_scraper_splits_rows_by_date(self):
+        """複数日付をまとめて選択した画面の行を、テーブルの日付ごとに振り分ける"""
+        html = """
+        <div class="item"><h3><a>テスト施設</a></h3>
+          <table>
+            <thead><tr><th>2025年10月5日(日)</th><th>定員</th><th>午前</th><th>午後</th><th>夜間</th></tr></thead>
+            <tbody><tr><td>音楽室</td><td>20</td><td>×</td><td>×</td><td>○</td></tr></tbody>
+          </table>
+          <table>
+            <thead><tr><th>2025年10月7日(火)</th><th>定員</th><th>午前</th><th>午後</th><th>夜間</th></tr></thead>
+            <tbody><tr><td>音楽室</td><td>20</td><td>○</td><td>×</td><td>×</td></tr></tbody>
+          </table>
+        </div>
+        """
+        page = MagicMock()
+        page.content.return_value = html
+        scraper = MeguroScraper()
+        scraper.clicked_rooms_by_date = {
+            "2025-10-05": {("テスト施設", "音楽室"): {"table_idx": 0, "is_closed": False}},
+            "2025-10-07": {("テスト施設", "音楽室"): {"table_idx": 0, "is_closed": False}},
+            "2025-10-09": {},
+        }
+
+        results = scraper.extract_time_slots_by_date(page)
+
+        assert set(results) == {"2025-10-05", "2025-10-07"}
+        assert results["2025-10-05"]["テスト施設"]["音楽室"]["evening"] == "available"
+        assert results["2025-10-07"]["テスト施設"]["音楽室"]["morning"] == "available"
+        assert results["2025-10-07"]["テスト施設"]["音楽室"]["evening"] == "booked"
+
+
+class TestShibuyaParsing:
+    """渋谷区の各部屋の空き状況モーダルの解析テスト"""
+
+    def test_parse_modal_from_fixture(self):
+        """表示されている時間帯のみavailableとして抽出"""
+        html = load_fixture("shibuya/各部屋の空き状況.mhtml")
+        rooms = html_parser.parse_shibuya_modal(html)
+
+        assert set(rooms) == {"大練習室", "練習室１", "練習室２", "練習室３", "練習室４"}
+        assert rooms["練習室３"] == {"morning": "available", "evening": "available"}
+
+    def test_parse_modal_missing(self):
+        """モーダルがない場合はNone"""
+        assert html_parser.parse_shibuya_modal("<html><body><div>検索結果</div></body></html>") is None
@@ -0,0 +1,97 @@
+"""
+セルの空き状況判定モジュールのテスト
+"""
+import pytest
+
+from src.scrapers.status_classifier import (
+    build_room_slots,
+    classify_cell,
+    classify_cells,
+    classify_text,
+    merge_afternoon,
+    strip_time_ranges,
+)
+
+
+class TestClassifyText:
+    """記号による判定のテスト"""
+
+    @pytest.mark.parametrize("text, expected", [
+        ("○", "available"),
+        ("◯", "available"),
+        ("×", "booked"),
+        ("✕", "booked"),
+        ("△", "available"),
+        ("－", "unknown"),
+        ("-", "unknown"),
+        ("−", "unknown"),
+        ("空き", "available"),
+        ("満室", "booked"),
+    ])
+    def test_single_mark(self, text, expected):
+        """各記号の判定"""
+        assert classify_text(text) == expected
+
+    def test_no_mark(self):
+        """記号がない場合はNone"""
+        assert classify_text("") is None
+        assert classify_text(None) is None
+        assert classify_text("受付期間外") is None
+
+    def test_dash_has_highest_priority(self):
+        """ハイフン類は他の記号より優先（判定不可）"""
+        assert classify_text("○－") == "unknown"
+        assert classify_text("×-") == "unknown"
+
+    def test_available_before_booked(self):
+        """○と×が混在する場合は○を優先"""
+        assert classify_text("× ○") == "available"
+
+
+class TestClassifyCell:
+    """チェックボックスを含むセル判定のテスト"""
+
+    def test_checkbox_fallback(self):
+        """記号がなくチェックボックスがあればavailable"""
+        assert classify_cell("", has_checkbox=True) == "available"
+        assert classify_cell("", has_checkbox=False) == "unknown"
+
+    def test_mark_overrides_checkbox(self):
+        """記号がある場合はチェックボックスより記号を優先"""
+        assert classify_cell("×", has_checkbox=True) == "booked"
+
+    def test_default(self):
+        """記号もチェックボックスもない場合の既定値"""
+        assert classify_cell("", default="booked") == "booked"
+
+    def test_batch(self):
+        """複数セルの一括判定"""
+        assert classify_cells(["○", "×", "", "－"], [False, False, True, True]) == [
+            "available", "booked", "available", "unknown"
+        ]
+        assert classify_cells(["○", ""]) == ["available", "unknown"]
+
+    def test_time_ranges_are_ignored(self):
+        """時刻表記のハイフンは記号として扱わない"""
+        assert strip_time_ranges("09:00-12:00 ○") == " ○"
+        assert classify_cell(strip_time_ranges("13:00〜17:00 ×")) == "booked"
+
+
+class TestAfternoonMerge:
+    """午後1・午後2の統合テスト"""
+
+    @pytest.mark.parametrize("first, second, expected", [
+        ("available", "available", "available"),
+        ("booked", "available", "booked_1"),
+        ("available", "booked", "booked_2"),
+        ("booked", "booked", "booked"),
+        ("unknown", "available", "unknown"),
+    ])
+    def test_merge(self, first, second, expected):
+        """統合規則"""
+        assert merge_afternoon(first, second) == expected
+
+    def test_build_room_slots(self):
+        """午後1・午後2を統合し、不足している時間帯を補完"""
+        slots = build_room_slots({"morning": "available", "afternoon_1": "booked", "afternoon_2": "available"})
+        assert slots == {"morning": "available", "afternoon": "booked_1", "evening": "unknown"}
@@ -0,0 +1,261 @@
+"""
+ステップ単位の再試行パイプラインのテスト
+"""
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper, NoSelectableCellsError
+from src.scrapers.shibuya import ShibuyaScraper
+from src.scrapers.step_pipeline import (
+    PipelineStep, RetryPolicy, StepAbortedError, StepFailedError, StepPipeline
+)
+
+
+class FakePage:
+    """画面状態だけを持つテスト用ページ"""
+
+    def __init__(self):
+        self.screen = "blank"
+
+
+def make_pipeline(steps, max_attempts=2):
+    return StepPipeline(steps, default_retry=RetryPolicy(max_attempts=max_attempts, backoff_ms=0), sleep=lambda _: None)
+
+
+def make_flow(calls, failures):
+    """
+    blank → top → search → result の3ステップを作成
+    failuresに指定したステップは残り回数だけ失敗する
+    """
+    def step(name, from_screen, to_screen):
+        def action(page):
+            calls.append(name)
+            if failures.get(name, 0) > 0:
+                failures[name] -= 1
+                return False
+            page.screen = to_screen
+            return name
+        precondition = (lambda page: page.screen == from_screen) if from_screen else None
+        return PipelineStep(name, action, precondition=precondition)
+
+    return [
+        step("open", None, "top"),
+        step("search", "top", "search"),
+        step("extract", "search", "result"),
+    ]
+
+
+class TestStepPipeline:
+    """StepPipelineのテスト"""
+
+    def test_all_steps_succeed(self):
+        """全ステップが成功した場合は各ステップの戻り値を返す"""
+        calls = []
+        results = make_pipeline(make_flow(calls, {})).run(FakePage())
+
+        assert calls == ["open", "search", "extract"]
+        assert results == {"open": "open", "search": "search", "extract": "extract"}
+
+    def test_failed_step_retries_from_current_state(self):
+        """失敗したステップの前提条件を満たしていれば、そのステップだけを再実行する"""
+        calls = []
+        make_pipeline(make_flow(calls, {"extract": 1})).run(FakePage())
+
+        assert calls == ["open", "search", "extract", "extract"]
+
+    def test_resumes_from_last_good_state(self):
+        """前提条件を満たさなくなった場合は、前提条件を満たす直近のステップから再開する"""
+        calls = []
+        steps = make_flow(calls, {})
+
+        def broken_extract(page, state={"failed": False}):
+            calls.append("extract")
+            if not state["failed"]:
+                state["failed"] = True
+                page.screen = "top"  # 途中で前の画面に戻された
+                return None
+            return "extract"
+
+        steps[2] = PipelineStep("extract", broken_extract, precondition=steps[2].precondition)
+        make_pipeline(steps).run(FakePage())
+
+        assert calls == ["open", "search", "extract", "search", "extract"]
+
+    def test_retry_from_forces_earlier_step(self):
+        """retry_fromを指定したステップは指定したステップからやり直す"""
+        calls = []
+        steps = make_flow(calls, {"search": 1})
+        steps[1].retry_from = "open"
+        make_pipeline(steps).run(FakePage())
+
+        assert calls == ["open", "search", "open", "search", "extract"]
+
+    def test_action_exception_counts_as_failure(self):
+        """ステップの例外は失敗として再試行される"""
+        calls = []
+        steps = make_flow(calls, {})
+        original = steps[1].action
+        state = {"raised": False}
+
+        def flaky(page):
+            if not state["raised"]:
+                state["raised"] = True
+                raise TimeoutError("timeout")
+            return original(page)
+
+        steps[1].action = flaky
+        results = make_pipeline(steps).run(FakePage())
+
+        assert results["search"] == "search"
+
+    def test_raises_after_max_attempts(self):
+        """再試行を使い切った場合はStepFailedErrorを送出する"""
+        calls = []
+        steps = make_flow(calls, {"search": 5})
+        steps[1].error_message = "Scraping failed - navigation error"
+
+        with pytest.raises(StepFailedError) as exc_info:
+            make_pipeline(steps, max_attempts=3).run(FakePage())
+
+        assert str(exc_info.value) == "Scraping failed - navigation error"
+        assert exc_info.value.step_name == "search"
+        assert exc_info.value.attempts == 3
+        assert isinstance(exc_info.value, RuntimeError)
+        assert calls.count("search") == 3
+
+    def test_aborted_step_is_not_retried(self):
+        """StepAbortedErrorは再試行せずにそのまま送出する"""
+        calls = []
+        steps = make_flow(calls, {})
+
+        def aborted(page):
+            calls.append("search")
+            raise StepAbortedError("no data")
+
+        steps[1].action = aborted
+
+        with pytest.raises(StepAbortedError):
+            make_pipeline(steps, max_attempts=3).run(FakePage())
+
+        assert calls == ["open", "search"]
+
+    def test_per_step_retry_policy(self):
+        """ステップごとの再試行ポリシーが優先される"""
+        calls = []
+        steps = make_flow(calls, {"extract": 1})
+        steps[2].retry = RetryPolicy(max_attempts=1, backoff_ms=0)
+
+        with pytest.raises(StepFailedError):
+            make_pipeline(steps, max_attempts=5).run(FakePage())
+
+    def test_backoff_grows_with_attempts(self):
+        """待機時間は失敗回数に比例して延びる"""
+        sleeps = []
+        steps = make_flow([], {"search": 2})
+        pipeline = StepPipeline(steps, default_retry=RetryPolicy(max_attempts=3, backoff_ms=500), sleep=sleeps.append)
+        pipeline.run(FakePage())
+
+        assert sleeps == [0.5, 1.0]
+
+    def test_observer_notifications(self):
+        """observerにステップの試行と実行結果を通知する（observerの例外は無視する）"""
+        events = []
+
+        class Observer:
+            def step_finished(self, name, page, error, duration_ms):
+                events.append((name, error))
+                raise RuntimeError("observer bug")
+
+            def run_failed(self, page, step_name):
+                events.append(("failed", step_name))
+
+            def run_finished(self, page, elapsed_ms):
+                events.append(("finished", None))
+
+        steps = make_flow([], {"search": 1})
+        StepPipeline(steps, default_retry=RetryPolicy(max_attempts=2, backoff_ms=0),
+                     sleep=lambda _: None, observer=Observer()).run(FakePage())
+        assert events == [("open", None), ("search", "no result"), ("search", None),
+                          ("extract", None), ("finished", None)]
+
+        events.clear()
+        steps = make_flow([], {"extract": 5})
+        with pytest.raises(StepFailedError):
+            StepPipeline(steps, default_retry=RetryPolicy(max_attempts=1, backoff_ms=0),
+                         sleep=lambda _: None, observer=Observer()).run(FakePage())
+        assert events[-1] == ("failed", "extract")
+
+    def test_invalid_retry_from(self):
+        """後続のステップをretry_fromに指定するとValueError"""
+        steps = make_flow([], {})
+        steps[0].retry_from = "extract"
+
+        with pytest.raises(ValueError):
+            make_pipeline(steps)
+
+    def test_retry_policy_from_env(self, monkeypatch):
+        """環境変数から再試行ポリシーを読み込む"""
+        monkeypatch.setenv('SCRAPER_STEP_MAX_ATTEMPTS', '4')
+        monkeypatch.setenv('SCRAPER_STEP_BACKOFF_MS', '250')
+
+        assert RetryPolicy.from_env() == RetryPolicy(max_attempts=4, backoff_ms=250)
+
+
+class TestScraperSteps:
+    """各スクレイパーのステップ定義のテスト"""
+
+    def test_meguro_steps(self):
+        """目黒区は選択操作の失敗時に前の画面からやり直す"""
+        pipeline = MeguroScraper().build_steps(datetime(2025, 10, 5))
+        steps = {step.name: step for step in pipeline.steps}
+
+        assert [step.name for step in pipeline.steps] == [
+            "open_top", "facility_search", "select_facilities",
+            "calendar", "target_month", "select_date", "extract"
+        ]
+        assert steps["select_facilities"].retry_from == "open_top"
+        assert steps["select_date"].retry_from == "target_month"
+        assert all(step.error_message == "Scraping failed - no default data should be saved" for step in pipeline.steps)
+
+    def test_meguro_park_and_date_steps(self):
+        """ページパーキング用に、施設別空き状況画面までと日付のステップに分けられる"""
+        scraper = MeguroScraper()
+
+        assert [step.name for step in scraper.build_park_steps()] == [
+            "open_top", "facility_search", "select_facilities", "calendar"
+        ]
+        assert [step.name for step in scraper.build_date_steps(datetime(2025, 10, 5))] == [
+            "target_month", "select_date", "extract"
+        ]
+
+    def test_shibuya_steps(self):
+        """渋谷区は検索実行までをパイプラインで扱う"""
+        pipeline = ShibuyaScraper().build_steps(datetime(2025, 10, 5))
+
+        assert [step.name for step in pipeline.steps] == ["open_top", "search", "criteria", "execute_search"]
+        assert pipeline.steps[-1].error_message == "Scraping failed - search execution error"
+
+    def test_meguro_no_selectable_cells_is_no_data(self, monkeypatch):
+        """目黒区で対象日付に選択できるセルがない場合は、ナビゲーションエラーではなくNO_DATA_FOUND"""
+        scraper = MeguroScraper()
+        calls = []
+
+        def select_date(page, target_date):
+            calls.append("select_date")
+            raise NoSelectableCellsError("No selectable cells for day(s) 5")
+
+        monkeypatch.setattr(scraper, "is_calendar_page", lambda page: True)
+        monkeypatch.setattr(scraper, "navigate_to_target_month", lambda page, target_date: True)
+        monkeypatch.setattr(scraper, "select_date_and_navigate", select_date)
+
+        class FakeParking:
+            def run(self, scraper, action):
+                return action(FakePage())
+
+        with patch("src.scrapers.meguro.get_page_parking", return_value=FakeParking()):
+            result = scraper.scrape_and_save("2099-10-05")
+
+        assert result["error_type"] == "NO_DATA_FOUND"
+        assert calls == ["select_date"]
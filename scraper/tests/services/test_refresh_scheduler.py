@@ -0,0 +1,240 @@
+"""
+RefreshSchedulerのテスト
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.repositories.checkpoint_repository import CheckpointRepository
+from src.services.refresh_scheduler import RefreshScheduler
+from src.utils.admission_control import AdmissionController
+from src.utils.deadlines import get_current_deadline
+
+
+NOW = datetime(2025, 10, 1, 3, 0, tzinfo=timezone.utc)
+
+
+def days_ahead(days):
+    return (NOW.astimezone().date() + timedelta(days=days)).isoformat()
+
+
+def rate_limits_store(already_running=False):
+    """create_or_update_recordが実行中かどうかを返すRate limitsのモック"""
+    store = Mock()
+    store.create_or_update_record.return_value = {
+        'is_already_running': already_running,
+        'record': {'id': 'record-1', 'date': '2025-10-01'}
+    }
+    return store
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """予算4件・3施設のスケジューラー（チェックポイントなし）"""
+    monkeypatch.setenv('AUTO_REFRESH_BUDGET_PER_CYCLE', '4')
+    monkeypatch.setenv('AUTO_REFRESH_STALE_MINUTES', '60')
+    monkeypatch.delenv('AUTO_REFRESH_FACILITIES', raising=False)
+    monkeypatch.delenv('SCRAPE_CHECKPOINT_ENABLED', raising=False)
+    monkeypatch.delenv('AUTO_REFRESH_ENABLED', raising=False)
+    monkeypatch.delenv('DISABLE_RATE_LIMITS', raising=False)
+    monkeypatch.delenv('ADMISSION_CONTROL_ENABLED', raising=False)
+    store = rate_limits_store()
+    with patch.object(RefreshScheduler, '_now', return_value=NOW):
+        yield RefreshScheduler(target_dates_provider=lambda: [], scraper_factory=Mock(),
+                               rate_limits_factory=lambda: store)
+
+
+class TestRefreshPlan:
+    """再取得対象の選定のテスト"""
+
+    def test_never_updated_first_and_nearest_first(self, scheduler):
+        """未取得の（施設, 日付）を日付が近い順に選ぶ"""
+        plan = scheduler.plan([days_ahead(10), days_ahead(1)])
+
+        assert [(p["facility"], p["date"]) for p in plan] == [
+            ("ensemble", days_ahead(1)),
+            ("meguro", days_ahead(1)),
+            ("shibuya", days_ahead(1)),
+            ("ensemble", days_ahead(10)),
+        ]
+
+    def test_fresh_and_past_dates_are_skipped(self, scheduler):
+        """最近更新されたものと過去日付は対象外"""
+        date = days_ahead(3)
+        for facility in scheduler.facilities:
+            scheduler._last_success[(facility, date)] = NOW - timedelta(minutes=10)
+
+        assert scheduler.plan([date, days_ahead(-1)]) == []
+
+    def test_stalest_weighted_by_distance(self, scheduler):
+        """経過時間を日付までの日数で割った優先度で並べる"""
+        scheduler.facilities = ['meguro']
+        near, far = days_ahead(0), days_ahead(9)
+        scheduler._last_success[('meguro', near)] = NOW - timedelta(minutes=120)
+        scheduler._last_success[('meguro', far)] = NOW - timedelta(minutes=600)
+
+        plan = scheduler.plan([far, near])
+        # near: 120/1 = 120, far: 600/10 = 60
+        assert [p["date"] for p in plan] == [near, far]
+        assert plan[0]["ageMinutes"] == 120
+
+    def test_uses_checkpoints(self, scheduler, tmp_path):
+        """チェックポイントの最終保存日時も参照する"""
+        scheduler.facilities = ['shibuya']
+        repo = CheckpointRepository(db_path=str(tmp_path / "cp.sqlite3"))
+        with patch.object(CheckpointRepository, '_now', return_value=NOW - timedelta(minutes=5)):
+            repo.mark_completed('shibuya', days_ahead(2))
+
+        with patch('src.services.refresh_scheduler.get_checkpoint_repository', return_value=repo):
+            assert scheduler.plan([days_ahead(2)]) == []
+
+
+class TestRefreshCycle:
+    """再取得サイクルのテスト"""
+
+    def test_run_cycle_groups_by_facility(self, scheduler):
+        """施設ごとにまとめてスクレイピングし、成功した日付を記録する"""
+        scheduler.facilities = ['ensemble', 'meguro']
+        dates = [days_ahead(1), days_ahead(2)]
+        scheduler._target_dates_provider = lambda: dates
+
+        ensemble = Mock()
+        ensemble.scrape_multiple_dates.return_value = {
+            "results": {dates[0]: {"status": "success"}, dates[1]: {"status": "error", "error_type": "TIMEOUT_ERROR"}}
+        }
+        meguro = Mock()
+        meguro.scrape_multiple_dates.return_value = {
+            "results": {dates[0]: {"status": "success"}, dates[1]: {"status": "success"}}
+        }
+        scheduler._scraper_factory = {'ensemble': ensemble, 'meguro': meguro}.get
+
+        result = scheduler.run_cycle()
+
+        ensemble.scrape_multiple_dates.assert_called_once_with(dates)
+        assert result["results"]["ensemble"] == {dates[0]: "success", dates[1]: "error"}
+        assert ('ensemble', dates[0]) in scheduler._last_success
+        assert ('ensemble', dates[1]) not in scheduler._last_success
+        # 成功した日付は次のサイクルでは対象外
+        assert [(p["facility"], p["date"]) for p in scheduler.plan()] == [('ensemble', dates[1])]
+
+    def test_single_date_uses_scrape_and_save(self, scheduler):
+        """1日付だけの場合はscrape_and_saveを使う"""
+        scheduler.facilities = ['meguro']
+        scheduler._target_dates_provider = lambda: [days_ahead(1)]
+        meguro = Mock()
+        meguro.scrape_and_save.return_value = {"status": "success"}
+        scheduler._scraper_factory = lambda facility: meguro
+
+        scheduler.run_cycle()
+
+        meguro.scrape_and_save.assert_called_once_with(days_ahead(1))
+
+    def test_scraper_exception_is_contained(self, scheduler):
+        """スクレイパーの例外でサイクルが止まらない"""
+        scheduler.facilities = ['shibuya']
+        scheduler._target_dates_provider = lambda: [days_ahead(1)]
+        scheduler._scraper_factory = Mock(side_effect=RuntimeError("boom"))
+
+        result = scheduler.run_cycle()
+
+        assert result["results"]["shibuya"] == {days_ahead(1): "error"}
+
+    def test_rate_limit_record_is_updated(self, scheduler):
+        """/scrape と同じrate_limitsのレコードを実行中にし、結果で完了・失敗にする"""
+        scheduler.facilities = ['meguro']
+        scheduler._target_dates_provider = lambda: [days_ahead(1)]
+        store = rate_limits_store()
+        scheduler._rate_limits_factory = lambda: store
+        meguro = Mock()
+        meguro.scrape_and_save.return_value = {"status": "error"}
+        scheduler._scraper_factory = lambda facility: meguro
+
+        scheduler.run_cycle()
+        store.create_or_update_record.assert_called_once_with('running')
+        store.update_status.assert_called_once_with('record-1', '2025-10-01', 'failed')
+
+        meguro.scrape_and_save.return_value = {"status": "success"}
+        store.reset_mock()
+        scheduler.run_cycle()
+        store.update_status.assert_called_once_with('record-1', '2025-10-01', 'completed')
+
+    def test_skips_while_scrape_is_running(self, scheduler):
+        """手動の実行が実行中の場合はスクレイピングしない"""
+        scheduler._target_dates_provider = lambda: [days_ahead(1)]
+        scheduler._rate_limits_factory = lambda: rate_limits_store(already_running=True)
+        scraper_factory = Mock()
+        scheduler._scraper_factory = scraper_factory
+
+        result = scheduler.run_cycle()
+
+        assert result["status"] == "skipped"
+        scraper_factory.assert_not_called()
+
+    def test_continues_without_rate_limits(self, scheduler, monkeypatch):
+        """Rate limitsが無効な場合はレコードを作らずに実行する"""
+        monkeypatch.setenv('DISABLE_RATE_LIMITS', 'true')
+        scheduler.facilities = ['meguro']
+        scheduler._target_dates_provider = lambda: [days_ahead(1)]
+        rate_limits_factory = Mock()
+        scheduler._rate_limits_factory = rate_limits_factory
+        meguro = Mock()
+        meguro.scrape_and_save.return_value = {"status": "success"}
+        scheduler._scraper_factory = lambda facility: meguro
+
+        assert scheduler.run_cycle()["results"]["meguro"] == {days_ahead(1): "success"}
+        rate_limits_factory.assert_not_called()
+
+    def test_runs_with_job_deadline(self, scheduler, monkeypatch):
+        """ジョブと同じ期限の中でスクレイピングする"""
+        monkeypatch.setenv('SCRAPE_JOB_TIMEOUT_SECONDS', '300')
+        scheduler.facilities = ['meguro']
+        scheduler._target_dates_provider = lambda: [days_ahead(1)]
+        deadlines = []
+        meguro = Mock()
+        meguro.scrape_and_save.side_effect = lambda date: deadlines.append(get_current_deadline()) or {"status": "success"}
+        scheduler._scraper_factory = lambda facility: meguro
+
+        scheduler.run_cycle()
+
+        assert deadlines[0] is not None
+        assert 0 < deadlines[0].remaining() <= 300
+        assert get_current_deadline() is None
+
+    def test_takes_admission_slot(self, scheduler):
+        """受付制御が有効な場合は実行枠を取ってからスクレイピングし、終了後に解放する"""
+        controller = AdmissionController(max_browsers=1, max_queued=0, memory_reader=lambda: None,
+                                         parked_browser_reader=lambda: 0)
+        scheduler.facilities = ['meguro']
+        scheduler._target_dates_provider = lambda: [days_ahead(1)]
+        active = []
+        meguro = Mock()
+        meguro.scrape_and_save.side_effect = lambda date: active.append(controller.get_stats()['active']) or {"status": "success"}
+        scheduler._scraper_factory = lambda facility: meguro
+
+        with patch('src.services.refresh_scheduler.get_admission_controller', return_value=controller):
+            result = scheduler.run_cycle()
+
+        assert result["results"]["meguro"] == {days_ahead(1): "success"}
+        assert active == [['refresh']]
+        assert controller.get_stats()['browsersInUse'] == 0
+
+    def test_skips_when_saturated(self, scheduler):
+        """実行枠・待ち行列が埋まっている場合はブラウザを開かない"""
+        controller = AdmissionController(max_browsers=1, max_queued=0, memory_reader=lambda: None,
+                                         parked_browser_reader=lambda: 1)
+        scheduler._target_dates_provider = lambda: [days_ahead(1)]
+        scraper_factory = Mock()
+        scheduler._scraper_factory = scraper_factory
+
+        with patch('src.services.refresh_scheduler.get_admission_controller', return_value=controller):
+            result = scheduler.run_cycle()
+
+        assert result["status"] == "skipped"
+        assert result["reason"] == "saturated"
+        scraper_factory.assert_not_called()
+
+    def test_disabled_by_default(self, scheduler):
+        """デフォルトでは起動しない"""
+        scheduler.start()
+        assert scheduler.running is False
@@ -101,6 +101,24 @@ class TestScrapeService:
         assert result['date'] == '2025-11-15'
         mock_scraper.scrape_and_save.assert_called_once_with('2025-11-15')
     
+    def test_scrape_facility_passes_deadline(self):
+        """deadline引数をスクレイパーの実行中の期限として渡す"""
+        from src.utils.deadlines import Deadline, get_current_deadline
+        deadline = Deadline(60)
+        seen = []
+        mock_scraper = Mock()
+        mock_scraper.scrape_and_save.side_effect = lambda date: seen.append(get_current_deadline()) or {'status': 'success'}
+        
+        mock_date_service = Mock()
+        mock_date_service.get_single_date_to_scrape.return_value = '2025-11-15'
+        service = ScrapeService(cosmos_writer=Mock(), target_date_service=mock_date_service)
+        
+        with patch.object(service, 'SCRAPERS', {'ensemble': Mock(return_value=mock_scraper)}):
+            service.scrape_facility('ensemble', '2025-11-15', deadline=deadline)
+        
+        assert seen == [deadline]
+        assert get_current_deadline() is None
+    
     def test_scrape_facility_unknown(self):
         """未知の施設スクレイピングテスト"""
         mock_writer = Mock()
@@ -178,6 +196,30 @@ class TestScrapeService:
         assert result['error_count'] == 0
         assert len(result['results']) == 2
     
+    def test_scrape_all_facilities_with_session_planner(self, monkeypatch):
+        """セッション計画が有効な場合は施設×日付のセッションに分けて実行し、同じ形式で結果を統合する"""
+        monkeypatch.setenv('SESSION_PLANNER_ENABLED', 'true')
+        mock_scraper = Mock()
+        mock_scraper.plan_sessions.side_effect = lambda dates, max_sessions=1: [[date] for date in dates]
+        mock_scraper.estimate_session_seconds.return_value = 10.0
+        mock_scraper.scrape_multiple_dates.side_effect = lambda dates: {
+            'results': {date: {'status': 'success', 'data': [{'facilityName': 'テストスタジオ', 'timeSlots': {}}]}
+                        for date in dates}
+        }
+        mock_scraper_class = Mock(return_value=mock_scraper)
+        
+        mock_date_service = Mock()
+        mock_date_service.get_dates_to_scrape.return_value = ['2025-11-15', '2025-11-16']
+        service = ScrapeService(cosmos_writer=Mock(), target_date_service=mock_date_service)
+        
+        with patch.object(service, 'SCRAPERS', {'ensemble': mock_scraper_class}):
+            result = service.scrape_all_facilities()
+        
+        assert mock_scraper.scrape_multiple_dates.call_count == 2
+        assert result['success_count'] == 2
+        assert result['error_count'] == 0
+        assert [r['date'] for r in result['results']] == ['2025-11-15', '2025-11-16']
+    
     def test_scrape_with_dates_specific_facility(self):
         """特定施設の複数日付スクレイピングテスト"""
         # モック設定
@@ -0,0 +1,183 @@
+"""
+施設×日付のセッション計画のテスト
+"""
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from src.scrapers.base import BaseScraper
+from src.scrapers.ensemble_studio import EnsembleStudioScraper
+from src.scrapers.meguro import MeguroScraper
+from src.scrapers.shibuya import ShibuyaScraper
+from src.services.session_planner import SessionPlanner
+
+
+class FakeScraper:
+    """日付ごとに1セッション・1日付あたり10秒のスクレイパー"""
+
+    calls: List[List[str]] = []
+    active: Dict[str, int] = {}
+    max_active: Dict[str, int] = {}
+    total_active = 0
+    max_total_active = 0
+    lock = threading.Lock()
+    FACILITY = "fake"
+
+    def plan_sessions(self, dates, max_sessions=1):
+        return [[date] for date in sorted(dates)]
+
+    def estimate_session_seconds(self, dates):
+        return 10.0 * len(dates)
+
+    def scrape_multiple_dates(self, dates):
+        cls = type(self)
+        with cls.lock:
+            cls.calls.append(dates)
+            cls.active[cls.FACILITY] = cls.active.get(cls.FACILITY, 0) + 1
+            cls.max_active[cls.FACILITY] = max(cls.max_active.get(cls.FACILITY, 0), cls.active[cls.FACILITY])
+            FakeScraper.total_active += 1
+            FakeScraper.max_total_active = max(FakeScraper.max_total_active, FakeScraper.total_active)
+        time.sleep(0.02)
+        with cls.lock:
+            cls.active[cls.FACILITY] -= 1
+            FakeScraper.total_active -= 1
+        return {'results': {date: {'status': 'success', 'data': {}} for date in dates},
+                'summary': {'total': len(dates), 'success': len(dates), 'failed': 0}}
+
+
+class FakeA(FakeScraper):
+    FACILITY = "a"
+
+
+class FakeB(FakeScraper):
+    FACILITY = "b"
+
+    def plan_sessions(self, dates, max_sessions=1):
+        return [sorted(dates)]
+
+    def estimate_session_seconds(self, dates):
+        return 5.0
+
+
+class BrokenScraper(FakeScraper):
+    def scrape_multiple_dates(self, dates):
+        raise RuntimeError("browser crashed")
+
+
+@pytest.fixture(autouse=True)
+def reset_fakes():
+    FakeScraper.calls = []
+    FakeScraper.active = {}
+    FakeScraper.max_active = {}
+    FakeScraper.total_active = 0
+    FakeScraper.max_total_active = 0
+
+
+class TestPlan:
+    """実行計画の作成のテスト"""
+
+    def test_sessions_sorted_by_cost(self):
+        """各スクレイパーの分け方でセッションを作り、推定所要時間の長い順に並べる"""
+        planner = SessionPlanner({'a': FakeA, 'b': FakeB}, max_concurrency=2, max_per_facility=1)
+        plan = planner.plan(['a', 'b'], ['2025-11-02', '2025-11-01'])
+
+        assert [(s.facility, s.dates) for s in plan.sessions] == [
+            ('a', ['2025-11-01']), ('a', ['2025-11-02']), ('b', ['2025-11-01', '2025-11-02'])
+        ]
+        assert plan.estimated_serial_seconds == 25.0
+        # aは1セッションずつなので20秒、bはその間に並行して終わる
+        assert plan.estimated_wall_seconds == 20.0
+
+    def test_concurrency_shortens_estimate(self):
+        """同じ施設に複数のセッションを開ける場合は推定所要時間が短くなる"""
+        planner = SessionPlanner({'a': FakeA}, max_concurrency=2, max_per_facility=2)
+        plan = planner.plan(['a'], ['2025-11-01', '2025-11-02', '2025-11-03', '2025-11-04'])
+
+        assert plan.estimated_wall_seconds == 20.0
+        assert plan.to_dict()['estimatedSerialSeconds'] == 40.0
+
+    def test_max_browsers(self):
+        """同時に開くブラウザの数は全体・施設ごとの上限とセッション数の小さい方"""
+        planner = SessionPlanner({'a': FakeA, 'b': FakeB}, max_concurrency=3, max_per_facility=2)
+
+        assert planner.plan(['a', 'b'], ['2025-11-01', '2025-11-02']).max_browsers == 3
+        assert planner.plan(['b'], ['2025-11-01', '2025-11-02']).max_browsers == 1
+
+    def test_unknown_facility(self):
+        """未知の施設はValueError"""
+        with pytest.raises(ValueError):
+            SessionPlanner({'a': FakeA}).plan(['unknown'], ['2025-11-01'])
+
+    def test_scraper_cost_models(self, monkeypatch):
+        """目黒区は表示期間ごと（複数日付無効時は日付ごと）、渋谷区は1回の検索にまとめる"""
+        dates = ['2025-11-01', '2025-11-05', '2025-11-30']
+        monkeypatch.setenv('MEGURO_MULTI_DATE_ENABLED', 'true')
+        assert MeguroScraper().plan_sessions(dates) == [['2025-11-01', '2025-11-05'], ['2025-11-30']]
+        monkeypatch.setenv('MEGURO_MULTI_DATE_ENABLED', 'false')
+        assert MeguroScraper().plan_sessions(dates) == [[date] for date in dates]
+        assert ShibuyaScraper().plan_sessions(dates) == [dates]
+
+        meguro = MeguroScraper()
+        assert meguro.estimate_session_seconds(dates[:2]) < 2 * meguro.estimate_session_seconds(dates[:1])
+
+    def test_ensemble_keeps_months_in_one_session(self):
+        """あんさんぶるStudioは1セッションで全月を処理し、同時に開けて短くなる場合だけ月ごとに分ける"""
+        scraper = EnsembleStudioScraper()
+        few = ['2025-11-01', '2025-12-01']
+        many = [f'2025-11-{day:02d}' for day in range(1, 21)] + [f'2025-12-{day:02d}' for day in range(1, 21)]
+
+        assert scraper.plan_sessions(few) == [few]
+        assert scraper.plan_sessions(few, max_sessions=2) == [few]
+        assert scraper.plan_sessions(many) == [many]
+        assert scraper.plan_sessions(many, max_sessions=2) == [many[:20], many[20:]]
+
+    def test_default_splits_months_only_with_concurrency(self):
+        """デフォルトは1セッションで、同時に開ける数まで連続した月のまとまりで分ける"""
+        dates = ['2025-11-01', '2025-11-02', '2025-12-01', '2026-01-01']
+        # 基底クラスの実装を呼ぶ
+        scraper = ShibuyaScraper()
+
+        assert BaseScraper.plan_sessions(scraper, dates) == [dates]
+        assert BaseScraper.plan_sessions(scraper, dates, max_sessions=2) == [dates[:2], dates[2:]]
+        assert len(BaseScraper.plan_sessions(scraper, dates, max_sessions=5)) == 3
+
+
+class TestExecute:
+    """計画の実行のテスト"""
+
+    def test_respects_concurrency_limits(self):
+        """全体・施設ごとの同時実行数を超えずに全セッションを実行し、施設ごとに結果をまとめる"""
+        planner = SessionPlanner({'a': FakeA, 'b': FakeB}, max_concurrency=2, max_per_facility=1)
+        dates = ['2025-11-01', '2025-11-02', '2025-11-03']
+        results = planner.run(['a', 'b'], dates)
+
+        assert FakeScraper.max_active == {'a': 1, 'b': 1}
+        assert FakeScraper.max_total_active <= 2
+        assert len(FakeScraper.calls) == 4
+        assert results['a']['summary'] == {'total': 3, 'success': 3, 'failed': 0}
+        assert list(results['a']['results']) == dates
+        assert results['b']['summary']['total'] == 3
+
+    def test_failed_session_marks_its_dates(self):
+        """例外を投げたセッションの日付はエラーとして返し、ほかのセッションは続ける"""
+        planner = SessionPlanner({'a': FakeA, 'broken': BrokenScraper}, max_concurrency=2)
+        results = planner.run(['a', 'broken'], ['2025-11-01'])
+
+        assert results['a']['summary']['success'] == 1
+        broken = results['broken']['results']['2025-11-01']
+        assert broken['status'] == 'error'
+        assert broken['error_type'] == 'SCRAPING_ERROR'
+        assert 'browser crashed' in broken['details']
+        assert results['broken']['summary']['failed'] == 1
+
+    def test_records_actual_seconds(self):
+        """セッションごとの実際の所要時間を記録し、コールバックに渡す"""
+        planner = SessionPlanner({'a': FakeA}, max_concurrency=1)
+        plan = planner.plan(['a'], ['2025-11-01'])
+        done = []
+        planner.execute(plan, on_session_done=lambda session, result: done.append(session))
+
+        assert done == plan.sessions
+        assert plan.sessions[0].actual_seconds > 0
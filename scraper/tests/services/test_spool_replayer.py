@@ -0,0 +1,70 @@
+"""
+SpoolReplayerのテスト
+"""
+from unittest.mock import Mock
+
+import pytest
+
+from src.repositories.availability_spool import AvailabilitySpool
+from src.services.spool_replayer import SpoolReplayer
+
+
+ROWS = [{"centerName": "Ensemble Studio", "facilityName": "本郷", "roomName": "A", "timeSlots": {}}]
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = AvailabilitySpool(db_path=str(tmp_path / "spool.sqlite3"))
+    for date in ["2025-11-15", "2025-11-16", "2025-11-17"]:
+        spool.complete(spool.append(date, ROWS), False, "Service Unavailable")
+    return spool
+
+
+@pytest.fixture
+def writer():
+    writer = Mock()
+    writer.save_availability.return_value = True
+    return writer
+
+
+class TestSpoolReplayer:
+    """SpoolReplayerのテスト"""
+
+    def test_replays_oldest_first(self, spool, writer):
+        """未送信の記録を古い順に送信して送信済みにする"""
+        replayer = SpoolReplayer(spool=spool, writer_factory=lambda: writer)
+
+        result = replayer.replay_once()
+
+        assert [c.args[0] for c in writer.save_availability.call_args_list] == ["2025-11-15", "2025-11-16", "2025-11-17"]
+        assert result["uploaded"] == 3
+        assert result["remaining"] == 0
+
+    def test_stops_at_first_failure(self, spool, writer):
+        """失敗したらそのサイクルを打ち切り、残りは次のサイクルで送る"""
+        writer.save_availability.side_effect = [True, False, True, True]
+        replayer = SpoolReplayer(spool=spool, writer_factory=lambda: writer)
+
+        first = replayer.replay_once()
+        assert (first["uploaded"], first["failed"], first["remaining"]) == (1, 1, 2)
+
+        second = replayer.replay_once()
+        assert (second["uploaded"], second["remaining"]) == (2, 0)
+        assert [c.args[0] for c in writer.save_availability.call_args_list[2:]] == ["2025-11-16", "2025-11-17"]
+
+    def test_writer_error_recreates_writer(self, spool, writer):
+        """ライターの作成・保存で例外が出た場合は次回作り直す"""
+        factory = Mock(side_effect=[ValueError("Cosmos DB connection settings are missing"), writer])
+        replayer = SpoolReplayer(spool=spool, writer_factory=factory)
+
+        assert replayer.replay_once()["failed"] == 1
+        assert replayer.replay_once()["uploaded"] == 3
+
+    def test_status(self, spool, writer):
+        """API用の状態にスプールの件数を含める"""
+        replayer = SpoolReplayer(spool=spool, writer_factory=lambda: writer)
+
+        status = replayer.get_status()
+
+        assert status["enabled"] is True
+        assert status["spool"]["pending"] == 3
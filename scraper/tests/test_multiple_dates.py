@@ -188,6 +188,48 @@ class TestMultipleDatesScraping(unittest.TestCase):
         self.assertEqual(result["summary"]["success"], 1)
         self.assertEqual(result["summary"]["failed"], 1)
     
+    def test_meguro_group_dates_by_display_period(self):
+        """目黒区: 表示開始日から14日間に収まる日付をまとめる"""
+        scraper = MeguroScraper()
+        
+        batches = scraper._group_dates_by_display_period(
+            ["2025-10-15", "2025-10-01", "2025-10-14", "2025-10-28", "2025-10-29"]
+        )
+        
+        self.assertEqual(batches, [
+            ["2025-10-01", "2025-10-14"],
+            ["2025-10-15", "2025-10-28"],
+            ["2025-10-29"]
+        ])
+    
+    @patch.dict('os.environ', {'MEGURO_MULTI_DATE_ENABLED': 'true'})
+    @patch('src.scrapers.meguro.time.sleep')
+    @patch.object(MeguroScraper, '_save_to_cosmos_immediately', return_value=True)
+    @patch.object(MeguroScraper, 'scrape_availability_batch')
+    def test_meguro_multiple_dates_batched(self, mock_batch, mock_save, mock_sleep):
+        """目黒区: 表示期間内の日付は1回のセッションでまとめて処理する"""
+        from src.scrapers.step_pipeline import StepFailedError
+        scraper = MeguroScraper()
+        
+        mock_batch.side_effect = [
+            {"2025-01-30": [{"facilityName": "テスト施設"}]},
+            StepFailedError("Scraping failed - no default data should be saved", "select_date", 2)
+        ]
+        
+        result = scraper.scrape_multiple_dates(["2025-02-05", "2025-01-30", "2025-02-20"])
+        
+        # 2つの表示期間に分けてセッションを実行
+        self.assertEqual(mock_batch.call_args_list[0].args[0], ["2025-01-30", "2025-02-05"])
+        self.assertEqual(mock_batch.call_args_list[1].args[0], ["2025-02-20"])
+        mock_save.assert_called_once_with("2025-01-30", [{"facilityName": "テスト施設"}])
+        
+        results = result["results"]
+        self.assertEqual(results["2025-01-30"]["status"], "success")
+        self.assertEqual(results["2025-02-05"]["error_type"], "NO_DATA_FOUND")
+        self.assertEqual(results["2025-02-20"]["error_type"], "NAVIGATION_ERROR")
+        self.assertEqual(result["summary"]["success"], 1)
+        self.assertEqual(result["summary"]["failed"], 2)
+    
     def test_invalid_date_format_handling(self):
         """不正な日付フォーマットのハンドリングテスト"""
         scraper = EnsembleStudioScraper()
@@ -0,0 +1,127 @@
+"""
+空き状況レコード（コンパクト表現）のテスト
+"""
+import json
+import sys
+import pytest
+
+from src.types.availability_record import AvailabilityBatch, AvailabilityRecord, json_default
+from src.types.time_slots import SlotStatus
+
+
+def make_row(room_name="練習室１", date=None, **slots):
+    """現行のJSON形式の結果行を作成"""
+    row = {
+        "centerName": "渋谷区民センター",
+        "facilityName": "文化総合センター大和田",
+        "roomName": room_name,
+        "timeSlots": {
+            "morning": slots.get("morning", "available"),
+            "afternoon": slots.get("afternoon", "booked_1"),
+            "evening": slots.get("evening", "unknown")
+        },
+        "lastUpdated": "2025-10-05T00:00:00Z"
+    }
+    if date:
+        row["date"] = date
+    return row
+
+
+class TestAvailabilityRecord:
+    """1部屋分のレコードのテスト"""
+
+    def test_round_trip(self):
+        """JSON形式との相互変換で内容が変わらない"""
+        row = make_row(date="2025-10-05")
+        assert AvailabilityRecord.from_dict(row).to_dict() == row
+
+    def test_date_omitted_when_missing(self):
+        """dateがない行はdateを含めずに出力"""
+        assert "date" not in AvailabilityRecord.from_dict(make_row()).to_dict()
+
+    def test_uses_slots(self):
+        """インスタンス辞書を持たない"""
+        record = AvailabilityRecord.from_dict(make_row())
+        assert not hasattr(record, "__dict__")
+
+    def test_names_are_interned(self):
+        """同じ名称は同一オブジェクトを共有"""
+        first = AvailabilityRecord.from_dict(make_row(room_name="".join(["練習", "室２"])))
+        second = AvailabilityRecord.from_dict(make_row(room_name="".join(["練習室", "２"])))
+        assert first.room_name is second.room_name
+        assert first.room_name is sys.intern("練習室２")
+
+    def test_invalid_status(self):
+        """無効なステータスはValueError"""
+        with pytest.raises(ValueError):
+            AvailabilityRecord.from_dict(make_row(morning="full"))
+
+
+class TestAvailabilityBatch:
+    """配列ベースのバッチのテスト"""
+
+    def test_round_trip(self):
+        """複数行を保持してJSON形式に戻せる"""
+        rows = [make_row(room_name=f"練習室{i}", date="2025-10-05") for i in range(5)]
+        batch = AvailabilityBatch.from_dicts(rows)
+
+        assert len(batch) == 5
+        assert batch.to_dicts() == rows
+        assert batch == rows
+
+    def test_deduplicates_strings(self):
+        """繰り返し出現する名称は1回だけ保持"""
+        batch = AvailabilityBatch([make_row(room_name="練習室１") for _ in range(100)])
+
+        assert len(batch) == 100
+        # centerName, facilityName, roomName, lastUpdated, date(None)
+        assert len(batch._strings) == 5
+
+    def test_rows_are_json_dicts(self):
+        """要素は現行のJSON形式の辞書として取り出せる"""
+        batch = AvailabilityBatch([make_row(room_name="A"), make_row(room_name="B", evening="lottery")])
+
+        assert batch[-1]["roomName"] == "B"
+        assert batch[1]["timeSlots"]["evening"] == "lottery"
+        assert [row["roomName"] for row in batch] == ["A", "B"]
+        assert batch[:1] == [make_row(room_name="A")]
+        assert batch.record(1).evening is SlotStatus.LOTTERY
+        with pytest.raises(IndexError):
+            batch[2]
+
+    def test_accepts_records(self):
+        """AvailabilityRecordもそのまま追加できる"""
+        record = AvailabilityRecord("目黒区民センター", "めぐろパーシモンホール", "第１練習室",
+                                    morning=SlotStatus.BOOKED)
+        batch = AvailabilityBatch([record])
+        assert list(batch.records()) == [record]
+
+    def test_invalid_status(self):
+        """無効なステータスの行は追加できない"""
+        with pytest.raises(ValueError):
+            AvailabilityBatch([make_row(morning="full")])
+
+    def test_from_dicts_keeps_batch(self):
+        """既にバッチの場合は変換しない"""
+        batch = AvailabilityBatch([make_row()])
+        assert AvailabilityBatch.from_dicts(batch) is batch
+
+    def test_json_default(self):
+        """json.dumpsではJSON形式のリストになる"""
+        rows = [make_row(date="2025-10-05")]
+        payload = {"data": AvailabilityBatch(rows)}
+
+        assert json.loads(json.dumps(payload, default=json_default)) == {"data": rows}
+        with pytest.raises(TypeError):
+            json.dumps({"value": object()}, default=json_default)
+
+    def test_compact_only_full_rows(self):
+        """結果行の形式の行だけをバッチにし、それ以外は元のリストのまま"""
+        rows = [make_row(date="2025-10-05")]
+        partial = [{"facilityName": "テスト施設", "timeSlots": {"morning": "available"}}]
+
+        assert isinstance(AvailabilityBatch.compact(rows), AvailabilityBatch)
+        assert AvailabilityBatch.compact(partial) == partial
+        assert not isinstance(AvailabilityBatch.compact(partial), AvailabilityBatch)
+        with pytest.raises(ValueError):
+            AvailabilityBatch.compact([make_row(morning="full")])
@@ -0,0 +1,32 @@
+"""
+タイムスロットの型定義のテスト
+"""
+import pytest
+
+from src.types.time_slots import SlotStatus, validate_time_slots
+
+
+class TestSlotStatus:
+    """ステータスの整数コードのテスト"""
+
+    def test_label_round_trip(self):
+        """文字列⇔整数コードの変換"""
+        for label in ["available", "booked", "booked_1", "booked_2", "lottery", "unknown"]:
+            assert SlotStatus.from_label(label).label == label
+
+    def test_invalid_label(self):
+        """無効なステータスはValueError"""
+        with pytest.raises(ValueError):
+            SlotStatus.from_label("vacant")
+        with pytest.raises(ValueError):
+            SlotStatus.from_label(None)
+
+    def test_validate_time_slots_unchanged(self):
+        """既存の検証関数の挙動は変わらない"""
+        assert validate_time_slots({"morning": "booked"}) == {
+            "morning": "booked", "afternoon": "unknown", "evening": "unknown"
+        }
+        with pytest.raises(ValueError):
+            validate_time_slots({"night": "booked"})
+        with pytest.raises(ValueError):
+            validate_time_slots({"morning": "full"})
@@ -0,0 +1,147 @@
+"""
+適応タイムアウトのテスト
+"""
+import logging
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper
+from src.utils.adaptive_timeouts import AdaptiveTimeouts, get_adaptive_timeouts, percentile
+
+
+@pytest.fixture
+def timeouts(tmp_path):
+    """一時ディレクトリのSQLiteを使う適応タイムアウト"""
+    return AdaptiveTimeouts(
+        db_path=str(tmp_path / "latencies.sqlite3"),
+        window=50, min_samples=5, percentile_ratio=0.95, margin=2.0, floor_ms=1000, drift_ratio=1.5
+    )
+
+
+class TestPercentile:
+    """パーセンタイル計算のテスト"""
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 0.95) == 95
+        assert percentile(values, 0.5) == 50
+        assert percentile([7], 0.95) == 7
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            percentile([], 0.5)
+
+
+class TestAdaptiveTimeouts:
+    """AdaptiveTimeoutsのテスト"""
+
+    def test_default_until_enough_samples(self, timeouts):
+        """サンプルが足りない間は従来のタイムアウトを使う"""
+        for _ in range(4):
+            timeouts.record("meguro", "goto", 2000)
+
+        assert timeouts.timeout_ms("meguro", "goto", 60000) == 60000
+
+    def test_percentile_with_margin(self, timeouts):
+        """パーセンタイル×マージンをタイムアウトにする"""
+        for duration in [1000, 1200, 1500, 1800, 2500]:
+            timeouts.record("meguro", "goto", duration)
+
+        assert timeouts.timeout_ms("meguro", "goto", 60000) == 5000
+
+    def test_floor_and_ceiling(self, timeouts):
+        """下限と上限（従来のタイムアウト）で丸める"""
+        for _ in range(5):
+            timeouts.record("shibuya", "modal", 100)
+            timeouts.record("shibuya", "goto", 40000)
+
+        assert timeouts.timeout_ms("shibuya", "modal", 5000) == 1000
+        assert timeouts.timeout_ms("shibuya", "goto", 60000) == 60000
+
+    def test_steps_are_independent(self, timeouts):
+        """施設・ステップごとに独立して記録する"""
+        for _ in range(5):
+            timeouts.record("meguro", "goto", 1000)
+
+        assert timeouts.timeout_ms("shibuya", "goto", 60000) == 60000
+        assert timeouts.timeout_ms("meguro", "calendar", 10000) == 10000
+
+    def test_persisted_across_instances(self, tmp_path):
+        """再起動後もSQLiteから直近のサンプルを読み込む"""
+        path = str(tmp_path / "latencies.sqlite3")
+        first = AdaptiveTimeouts(db_path=path, window=3, min_samples=3, margin=1.0, floor_ms=0)
+        for duration in [9000, 1000, 2000, 3000]:
+            first.record("ensemble", "goto", duration)
+        first.flush()
+
+        second = AdaptiveTimeouts(db_path=path, window=3, min_samples=3, margin=1.0, floor_ms=0)
+        # 保持件数を超えた古いサンプル（9000）は使われない
+        assert second.timeout_ms("ensemble", "goto", 60000) == 3000
+
+    def test_samples_buffered_until_flush_size(self, tmp_path):
+        """flush_size件溜まるまではSQLiteに書き込まず、溜まったらまとめて書き込む"""
+        path = str(tmp_path / "latencies.sqlite3")
+        timeouts = AdaptiveTimeouts(db_path=path, window=3, min_samples=3, margin=1.0, floor_ms=0, flush_size=4)
+        for duration in [9000, 1000, 2000]:
+            timeouts.record("ensemble", "goto", duration)
+
+        # 書き込み前でもメモリ上のサンプルでタイムアウトを算出する
+        assert timeouts.timeout_ms("ensemble", "goto", 60000) == 9000
+        assert timeouts._execute("SELECT COUNT(*) FROM step_latencies") == [(0,)]
+
+        timeouts.record("ensemble", "goto", 3000)
+
+        # 書き込み時に保持件数を超えた古いサンプルを削除する
+        rows = timeouts._execute("SELECT duration_ms FROM step_latencies ORDER BY id")
+        assert [row[0] for row in rows] == [1000, 2000, 3000]
+
+    def test_drift_warning(self, timeouts, caplog):
+        """直近の中央値が過去の中央値より明らかに遅くなったら警告する"""
+        for _ in range(5):
+            timeouts.record("meguro", "calendar", 1000)
+
+        with caplog.at_level(logging.WARNING, logger="src.utils.adaptive_timeouts"):
+            for _ in range(5):
+                timeouts.record("meguro", "calendar", 3000)
+
+        assert "drifting slower" in caplog.text
+        stats = timeouts.get_stats("meguro")
+        assert stats[0]["step"] == "calendar"
+        assert stats[0]["drifting"] is True
+        assert stats[0]["samples"] == 10
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトでは無効"""
+        monkeypatch.delenv('ADAPTIVE_TIMEOUTS_ENABLED', raising=False)
+        assert get_adaptive_timeouts() is None
+
+
+class TestScraperTimedStep:
+    """BaseScraper.timed_stepのテスト"""
+
+    def test_disabled_uses_default(self):
+        """無効時は従来のタイムアウトをそのまま渡す"""
+        scraper = MeguroScraper()
+        with patch('src.scrapers.base.get_adaptive_timeouts', return_value=None):
+            assert scraper.timed_step("goto", 60000, lambda timeout: timeout) == 60000
+
+    def test_records_successful_steps(self, timeouts):
+        """成功したステップの所要時間のみ記録する"""
+        scraper = MeguroScraper()
+        with patch('src.scrapers.base.get_adaptive_timeouts', return_value=timeouts):
+            scraper.timed_step("goto", 60000, lambda timeout: None)
+            with pytest.raises(TimeoutError):
+                scraper.timed_step("goto", 60000, lambda timeout: (_ for _ in ()).throw(TimeoutError()))
+
+        assert timeouts.get_stats("meguro")[0]["samples"] == 1
+
+    def test_close_browser_flushes_samples(self, timeouts):
+        """ブラウザのセッション終了時に溜めた所要時間を書き込む"""
+        scraper = MeguroScraper()
+        with patch('src.scrapers.base.get_adaptive_timeouts', return_value=timeouts):
+            scraper.timed_step("goto", 60000, lambda timeout: None)
+            assert timeouts._execute("SELECT COUNT(*) FROM step_latencies") == [(0,)]
+            scraper.close_browser(Mock())
+
+        assert timeouts._execute("SELECT COUNT(*) FROM step_latencies") == [(1,)]
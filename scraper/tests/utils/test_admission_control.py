@@ -0,0 +1,186 @@
+"""
+スクレイピングの受付制御のテスト
+"""
+import threading
+import time
+
+from src.utils.admission_control import (
+    AdmissionController,
+    admission_ticket,
+    admitted,
+)
+from src.utils.deadlines import Deadline
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestAdmissionController:
+    """AdmissionControllerのテスト"""
+
+    def test_rejects_when_queue_full(self):
+        """実行枠と待ち行列の合計を超えたら受け付けない"""
+        controller = AdmissionController(max_browsers=1, max_queued=1, min_free_memory_mb=0)
+
+        assert controller.try_admit('a') is not None
+        assert controller.try_admit('b') is not None
+        assert controller.try_admit('c') is None
+        assert controller.get_stats()['rejected'] == 1
+
+    def test_runs_in_order_within_limit(self):
+        """同時実行数を超えず、受け付けた順に開始する"""
+        controller = AdmissionController(max_browsers=1, max_queued=2, min_free_memory_mb=0)
+        release = threading.Event()
+        started = []
+
+        def work(name):
+            started.append(name)
+            release.wait(2)
+
+        tickets = [controller.try_admit(name) for name in ('a', 'b', 'c')]
+        threads = [threading.Thread(target=ticket.run, args=(work, ticket.label)) for ticket in tickets]
+        for thread in threads:
+            thread.start()
+            # 受け付けた順にスレッドが待ち始めることを確認してから次を開始
+            time.sleep(0.02)
+
+        assert wait_until(lambda: started == ['a'])
+        assert controller.get_stats()['queued'] == ['b', 'c']
+        release.set()
+        for thread in threads:
+            thread.join(2)
+
+        assert started == ['a', 'b', 'c']
+        assert controller.get_stats()['active'] == []
+
+    def test_low_memory_delays_start(self):
+        """空きメモリが足りない間は、実行中があれば次を開始しない"""
+        memory = {'mb': 100.0}
+        controller = AdmissionController(max_browsers=2, max_queued=0, min_free_memory_mb=400,
+                                         memory_reader=lambda: memory['mb'])
+        release = threading.Event()
+        started = []
+
+        def work(name):
+            started.append(name)
+            release.wait(2)
+
+        first = controller.try_admit('a')
+        second = controller.try_admit('b')
+        threading.Thread(target=first.run, args=(work, 'a')).start()
+        assert wait_until(lambda: started == ['a'])
+        thread = threading.Thread(target=second.run, args=(work, 'b'))
+        thread.start()
+
+        time.sleep(0.05)
+        assert started == ['a']
+        assert controller.get_stats()['memoryWaits'] == 1
+
+        memory['mb'] = 1000.0
+        assert wait_until(lambda: started == ['a', 'b'])
+        release.set()
+        thread.join(2)
+
+    def test_counts_planned_browsers_and_parked_pages(self):
+        """セッション計画で並行に開くブラウザと、実行に使われていない待機ページのブラウザを枠として数える"""
+        parked = {'count': 0}
+        controller = AdmissionController(max_browsers=3, max_queued=1, min_free_memory_mb=0,
+                                         parked_browser_reader=lambda: parked['count'])
+        planned = controller.try_admit('planned')
+        controller.set_browsers(planned, 2)
+        controller._acquire(planned)
+        single = controller.try_admit('single')
+
+        # 2 + 1 = 3 で開始できる
+        assert controller._can_start(single)
+        parked['count'] = 1
+        assert not controller._can_start(single)
+        assert controller.get_stats()['browsersInUse'] == 3
+
+        planned.release()
+        assert controller._can_start(single)
+
+    def test_browsers_clamped_to_limit(self):
+        """上限を超える数のブラウザを開く実行も、ほかに実行中がなければ開始する"""
+        controller = AdmissionController(max_browsers=2, max_queued=0, min_free_memory_mb=0)
+        ticket = controller.try_admit('a')
+        controller.set_browsers(ticket, 5)
+
+        assert ticket.browsers == 2
+        assert controller._acquire(ticket)
+
+    def test_retry_after_estimate(self):
+        """待ち時間は実行中の残り時間と待ち行列の長さから見積もる"""
+        controller = AdmissionController(max_browsers=1, max_queued=1, min_free_memory_mb=0, default_run_seconds=60)
+        running = controller.try_admit('a')
+        controller._acquire(running)
+        controller.try_admit('b')
+
+        assert 0 < controller.retry_after_seconds() <= 60
+        assert 60 < controller.estimated_wait_seconds() <= 120
+
+
+class TestAdmissionTicket:
+    """リクエストからスレッドへのチケットの引き渡しのテスト"""
+
+    def test_not_handed_off_is_released(self):
+        """admittedを通さなかったチケットはリクエストの終了時に解放する"""
+        controller = AdmissionController(max_browsers=1, max_queued=0, min_free_memory_mb=0)
+        with admission_ticket(controller.try_admit('a')):
+            pass
+
+        assert controller.get_stats()['queued'] == []
+        assert controller.try_admit('b') is not None
+
+    def test_handed_off_is_released_after_run(self):
+        """admittedで包んだtargetの実行後に枠を解放する"""
+        controller = AdmissionController(max_browsers=1, max_queued=0, min_free_memory_mb=0)
+        with admission_ticket(controller.try_admit('a')):
+            target = admitted(lambda value: value * 2)
+
+        assert controller.get_stats()['queued'] == ['a']
+        assert target(21) == 42
+        assert controller.get_stats()['active'] == []
+
+    def test_deadline_starts_when_slot_acquired(self):
+        """ジョブの期限は待ち行列で待った時間を含めず、実行枠を取得した時点から数える"""
+        controller = AdmissionController(max_browsers=1, max_queued=0, min_free_memory_mb=0)
+        deadline = Deadline(60)
+        deadline._expires_at -= 59
+        remaining = []
+        with admission_ticket(controller.try_admit('a')):
+            target = admitted(lambda: remaining.append(deadline.remaining()), deadline=deadline)
+        target()
+
+        assert remaining[0] > 59
+
+    def test_cancelled_while_queued_leaves_queue(self):
+        """待ち行列でキャンセルされたジョブは枠を取らずに離れ、targetで後処理を行う"""
+        controller = AdmissionController(max_browsers=1, max_queued=1, min_free_memory_mb=0)
+        running = controller.try_admit('a')
+        controller._acquire(running)
+        deadline = Deadline()
+        ran = []
+        with admission_ticket(controller.try_admit('b')):
+            target = admitted(lambda: ran.append(deadline.done), deadline=deadline)
+        thread = threading.Thread(target=target)
+        thread.start()
+
+        deadline.cancel('stop')
+        thread.join(3)
+
+        assert ran == [True]
+        assert controller.get_stats()['queued'] == []
+        assert controller.get_stats()['active'] == ['a']
+        assert controller.get_stats()['cancelledInQueue'] == 1
+
+    def test_without_ticket_returns_target(self):
+        """チケットがない場合はtargetをそのまま返す"""
+        def target():
+            return None
+
+        assert admitted(target) is target
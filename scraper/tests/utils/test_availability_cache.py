@@ -0,0 +1,125 @@
+"""
+空き状況キャッシュのテスト
+"""
+import gzip
+import json
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.utils.availability_cache import AvailabilityCache
+
+
+FACILITIES = [{"centerName": "Ensemble Studio", "roomName": "A", "timeSlots": {"morning": "available"}}]
+
+
+@pytest.fixture
+def cache():
+    return AvailabilityCache(ttl_seconds=60, max_entries=2)
+
+
+class TestAvailabilityCache:
+    """AvailabilityCacheのテスト"""
+
+    def test_second_read_uses_cache(self, cache):
+        """同じ日付の2回目以降はloaderを呼ばない"""
+        loader = Mock(return_value=FACILITIES)
+
+        first = cache.get("2025-11-15", loader)
+        second = cache.get("2025-11-15", loader)
+
+        loader.assert_called_once_with("2025-11-15")
+        assert second is first
+        assert json.loads(first.body) == {"date": "2025-11-15", "facilities": FACILITIES}
+        assert cache.get_stats()["hits"] == 1
+
+    def test_invalidate_reloads(self, cache):
+        """破棄した日付は次回読み込み直し、内容が変わればETagも変わる"""
+        cache.get("2025-11-15", Mock(return_value=FACILITIES))
+        cache.invalidate("2025-11-15")
+
+        entry = cache.get("2025-11-15", Mock(return_value=[]))
+
+        assert json.loads(entry.body)["facilities"] == []
+        assert entry.etag != cache.get("2025-11-16", Mock(return_value=FACILITIES)).etag
+
+    def test_same_content_same_etag(self, cache):
+        """内容が同じならETagは同じ"""
+        first = cache.get("2025-11-15", Mock(return_value=FACILITIES))
+        cache.invalidate()
+        second = cache.get("2025-11-15", Mock(return_value=list(FACILITIES)))
+
+        assert second is not first
+        assert second.etag == first.etag
+
+    def test_ttl_expiry(self, cache):
+        """TTLを過ぎたエントリは読み込み直す"""
+        loader = Mock(return_value=FACILITIES)
+        with patch.object(AvailabilityCache, "_monotonic", return_value=100.0):
+            cache.get("2025-11-15", loader)
+        with patch.object(AvailabilityCache, "_monotonic", return_value=161.0):
+            cache.get("2025-11-15", loader)
+
+        assert loader.call_count == 2
+
+    def test_max_entries_evicts_least_recent(self, cache):
+        """上限を超えたら最も使われていない日付から破棄する"""
+        loader = Mock(side_effect=lambda d: [])
+        cache.get("2025-11-15", loader)
+        cache.get("2025-11-16", loader)
+        cache.get("2025-11-15", loader)
+        cache.get("2025-11-17", loader)
+        cache.get("2025-11-15", loader)
+
+        assert [c.args[0] for c in loader.call_args_list] == ["2025-11-15", "2025-11-16", "2025-11-17"]
+
+    def test_invalidate_during_load_is_not_cached(self, cache):
+        """読み込み中に書き込みがあった場合、古い結果はキャッシュしない"""
+        def loader(date):
+            cache.invalidate(date)
+            return FACILITIES
+
+        cache.get("2025-11-15", loader)
+        second_loader = Mock(return_value=[])
+        cache.get("2025-11-15", second_loader)
+
+        second_loader.assert_called_once()
+
+    def test_concurrent_misses_load_once(self, cache):
+        """同じ日付への同時アクセスでもloaderは1回だけ"""
+        started = threading.Event()
+        release = threading.Event()
+        loader = Mock(side_effect=lambda d: (started.set(), release.wait(5), FACILITIES)[2])
+
+        threads = [threading.Thread(target=cache.get, args=("2025-11-15", loader)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        loader.assert_called_once()
+
+    def test_loader_error_is_not_cached(self, cache):
+        """読み込みエラーは呼び出し元に伝え、キャッシュしない"""
+        with pytest.raises(RuntimeError):
+            cache.get("2025-11-15", Mock(side_effect=RuntimeError("cosmos down")))
+
+        assert cache.get("2025-11-15", Mock(return_value=[])).payload["facilities"] == []
+
+    def test_zero_ttl_disables_caching(self):
+        """TTLが0の場合はキャッシュしない"""
+        cache = AvailabilityCache(ttl_seconds=0, max_entries=10)
+        loader = Mock(return_value=FACILITIES)
+        cache.get("2025-11-15", loader)
+        cache.get("2025-11-15", loader)
+
+        assert loader.call_count == 2
+
+    def test_gzipped_body(self, cache):
+        """gzip圧縮した本文は展開すると元の本文になる"""
+        entry = cache.get("2025-11-15", Mock(return_value=FACILITIES))
+
+        assert gzip.decompress(entry.gzipped_body) == entry.body
@@ -0,0 +1,180 @@
+"""
+ブラウザのプロファイル（ストレージの状態・HTTPキャッシュ）のテスト
+"""
+import json
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper
+from src.utils.browser_profile import BrowserProfiles, get_browser_profiles
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    """一時ディレクトリに保存するプロファイル"""
+    return BrowserProfiles(directory=str(tmp_path), max_age_seconds=3600,
+                           cache_max_mb=1, cache_max_age_seconds=600)
+
+
+def fake_context(cookies=None):
+    context = MagicMock()
+    context.storage_state.return_value = {"cookies": cookies or [], "origins": []}
+    return context
+
+
+def fake_route(url, resource_type="script", method="GET"):
+    route = MagicMock()
+    route.request.url = url
+    route.request.resource_type = resource_type
+    route.request.method = method
+    return route
+
+
+def fake_response(body=b"console.log('app')", status=200, headers=None):
+    response = MagicMock()
+    response.status = status
+    response.headers = headers or {"content-type": "application/javascript", "content-encoding": "gzip"}
+    response.body.return_value = body
+    return response
+
+
+class TestStorageState:
+    """ストレージの状態の保存・読み込みのテスト"""
+
+    def test_save_and_load(self, profiles):
+        """保存した状態を次のコンテキストに渡せる形で返す"""
+        cookie = {"name": "JSESSIONID", "value": "abc", "expires": -1}
+        profiles.save_state("meguro", fake_context([cookie]))
+
+        assert profiles.load_state("meguro") == {"cookies": [cookie], "origins": []}
+        assert profiles.load_state("shibuya") is None
+        assert profiles.get_stats()["storedStates"] == ["meguro"]
+
+    def test_expired_cookie_invalidates(self, profiles):
+        """期限切れのCookieを含む状態はセッション切れとして破棄する"""
+        cookie = {"name": "session", "value": "abc", "expires": time.time() - 10}
+        profiles.save_state("meguro", fake_context([cookie]))
+
+        assert profiles.load_state("meguro") is None
+        assert not profiles.state_path("meguro").exists()
+        assert profiles.invalidations == 1
+
+    def test_old_state_invalidates(self, profiles):
+        """最大秒数より古い状態は破棄する"""
+        profiles.save_state("meguro", fake_context())
+        old = time.time() - 7200
+        os.utime(profiles.state_path("meguro"), (old, old))
+
+        assert profiles.load_state("meguro") is None
+
+
+class TestHttpCache:
+    """静的リソースのディスクキャッシュのテスト"""
+
+    def test_miss_then_hit(self, profiles):
+        """初回は取得してキャッシュし、2回目はキャッシュから返す"""
+        first = fake_route("https://example.com/app.js")
+        first.fetch.return_value = fake_response()
+        profiles._handle_route(first)
+
+        first.fulfill.assert_called_once()
+        second = fake_route("https://example.com/app.js")
+        profiles._handle_route(second)
+
+        second.fetch.assert_not_called()
+        kwargs = second.fulfill.call_args.kwargs
+        assert kwargs["body"] == b"console.log('app')"
+        assert "content-encoding" not in kwargs["headers"]
+        assert (profiles.cache_hits, profiles.cache_misses) == (1, 1)
+
+    def test_documents_and_posts_bypass_cache(self, profiles):
+        """HTML・API呼び出しはキャッシュしない"""
+        for route in [fake_route("https://example.com/", resource_type="document"),
+                      fake_route("https://example.com/api", resource_type="xhr"),
+                      fake_route("https://example.com/app.js", method="POST")]:
+            profiles._handle_route(route)
+            route.fallback.assert_called_once()
+            route.fetch.assert_not_called()
+
+    def test_no_store_and_errors_not_cached(self, profiles):
+        """no-store・エラーのレスポンスは保存しない"""
+        for url, response in [
+            ("https://example.com/a.js", fake_response(headers={"cache-control": "no-store"})),
+            ("https://example.com/b.js", fake_response(status=404)),
+        ]:
+            route = fake_route(url)
+            route.fetch.return_value = response
+            profiles._handle_route(route)
+
+        assert profiles.get_stats()["cache"]["entries"] == 0
+
+    def test_expired_entry_is_refetched(self, profiles):
+        """最大秒数より古いキャッシュは使わない"""
+        route = fake_route("https://example.com/app.js")
+        route.fetch.return_value = fake_response()
+        profiles._handle_route(route)
+
+        key = profiles._cache_key("https://example.com/app.js")
+        meta_path = profiles.cache_directory / f"{key}.json"
+        meta = json.loads(meta_path.read_text())
+        meta["storedAt"] -= 3600
+        meta_path.write_text(json.dumps(meta))
+
+        again = fake_route("https://example.com/app.js")
+        again.fetch.return_value = fake_response()
+        profiles._handle_route(again)
+        again.fetch.assert_called_once()
+
+    def test_prunes_over_limit(self, profiles):
+        """上限を超えたら使われていないものから削除する"""
+        for index in range(12):
+            route = fake_route(f"https://example.com/{index}.png", resource_type="image")
+            route.fetch.return_value = fake_response(body=b"x" * 100_000)
+            profiles._handle_route(route)
+
+        stats = profiles.get_stats()["cache"]
+        assert stats["bytes"] <= stats["maxBytes"]
+        assert stats["entries"] < 12
+
+
+class TestScraperIntegration:
+    """スクレイパーとの連携のテスト"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトでは無効で、コンテキストに状態を渡さない"""
+        monkeypatch.delenv('BROWSER_PROFILE_ENABLED', raising=False)
+        assert get_browser_profiles() is None
+
+        browser = MagicMock()
+        MeguroScraper().create_browser_context(browser)
+        assert browser.new_context.call_args.kwargs["storage_state"] is None
+        browser.new_context.return_value.route.assert_not_called()
+
+    def test_context_loads_and_saves_state(self, profiles):
+        """保存済みの状態を読み込み、ブラウザを閉じるときに保存する"""
+        profiles.save_state("meguro", fake_context([{"name": "a", "value": "1", "expires": -1}]))
+        scraper = MeguroScraper()
+        browser = MagicMock()
+        with patch('src.scrapers.base.get_browser_profiles', return_value=profiles):
+            context = scraper.create_browser_context(browser)
+            context.storage_state.return_value = {"cookies": [], "origins": [{"origin": "https://example.com"}]}
+            scraper.close_browser(browser)
+
+        assert browser.new_context.call_args.kwargs["storage_state"]["cookies"][0]["name"] == "a"
+        context.route.assert_called_once_with("**/*", profiles._handle_route)
+        assert profiles.load_state("meguro")["origins"] == [{"origin": "https://example.com"}]
+        browser.close.assert_called_once()
+
+    def test_failed_run_invalidates_state(self, profiles):
+        """スクレイピングの失敗で保存済みの状態を破棄する（DB・検証のエラーでは破棄しない）"""
+        profiles.save_state("meguro", fake_context())
+        scraper = MeguroScraper()
+        with patch('src.scrapers.base.get_browser_profiles', return_value=profiles):
+            scraper._record_profile([{"status": "error", "error_type": "DATABASE_ERROR", "message": "down"}])
+            assert profiles.load_state("meguro") is not None
+            scraper._record_profile([{"status": "error", "error_type": "TIMEOUT_ERROR", "message": "timeout"}])
+
+        assert profiles.load_state("meguro") is None
@@ -0,0 +1,183 @@
+"""
+サーキットブレーカーのテスト
+"""
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper
+from src.utils.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    classify_error_type,
+    get_circuit_breaker,
+)
+
+
+class FakeClock:
+    """単調増加時計の代わり"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch.object(CircuitBreaker, "_monotonic", side_effect=lambda: fake()):
+        yield fake
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("meguro", failure_threshold=3, reset_timeout_seconds=60)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_result("error", "TIMEOUT_ERROR")
+
+
+class TestCircuitBreaker:
+    """CircuitBreakerの状態遷移のテスト"""
+
+    def test_trips_after_consecutive_failures(self, breaker):
+        """TIMEOUT/NAVIGATIONエラーが閾値回数続くとopenになる"""
+        breaker.record_result("error", "TIMEOUT_ERROR")
+        breaker.record_result("error", "NAVIGATION_ERROR")
+        assert breaker.state == CLOSED
+
+        breaker.record_result("error", "TIMEOUT_ERROR")
+        assert breaker.state == OPEN
+        assert not breaker.allow_request()
+
+    def test_success_resets_failures(self, breaker):
+        """成功すると連続失敗回数がリセットされる"""
+        breaker.record_result("error", "TIMEOUT_ERROR")
+        breaker.record_result("error", "TIMEOUT_ERROR")
+        breaker.record_result("success")
+        breaker.record_result("error", "TIMEOUT_ERROR")
+
+        assert breaker.state == CLOSED
+        assert breaker.consecutive_failures == 1
+
+    def test_other_errors_do_not_trip(self, breaker):
+        """DB保存失敗などサイト到達と無関係なエラーでは開かない"""
+        for _ in range(5):
+            breaker.record_result("error", "DATABASE_ERROR")
+
+        assert breaker.state == CLOSED
+
+    def test_half_open_probe_success(self, breaker, clock):
+        """reset_timeout経過後、プローブが成功すれば1回だけ実行を許可する"""
+        trip(breaker)
+        clock.now += 61
+
+        probe = Mock(return_value=True)
+        assert breaker.allow_request(probe)
+        assert breaker.state == HALF_OPEN
+        probe.assert_called_once()
+        # 試行中は他の実行を許可しない
+        assert not breaker.allow_request(probe)
+
+        breaker.record_result("success")
+        assert breaker.state == CLOSED
+        assert breaker.allow_request()
+
+    def test_half_open_probe_failure_reopens(self, breaker, clock):
+        """プローブが失敗した場合はopenに戻り、待機時間もリセットされる"""
+        trip(breaker)
+        clock.now += 61
+
+        assert not breaker.allow_request(Mock(return_value=False))
+        assert breaker.state == OPEN
+        assert breaker.retry_after_seconds() == pytest.approx(60)
+
+    def test_probe_exception_counts_as_failure(self, breaker, clock):
+        """プローブの例外は到達不可として扱う"""
+        trip(breaker)
+        clock.now += 61
+
+        assert not breaker.allow_request(Mock(side_effect=OSError("unreachable")))
+        assert breaker.state == OPEN
+
+    def test_half_open_failure_reopens_immediately(self, breaker, clock):
+        """half_openでの失敗は閾値に関係なく即座にopenに戻る"""
+        trip(breaker)
+        clock.now += 61
+        assert breaker.allow_request()
+
+        breaker.record_result("error", "NAVIGATION_ERROR")
+        assert breaker.state == OPEN
+
+    def test_record_results_for_session(self, breaker):
+        """複数日付の結果は1回の観測として記録し、スキップ済みの結果は無視する"""
+        breaker.record_results([
+            {"status": "success", "data": [], "skipped": True},
+            {"status": "error", "error_type": "FATAL_ERROR", "details": "Timeout 60000ms exceeded"},
+            {"status": "error", "error_type": "NO_DATA_FOUND"},
+        ])
+
+        assert breaker.consecutive_failures == 1
+        assert breaker.last_error_type == "TIMEOUT_ERROR"
+
+    def test_to_dict(self, breaker):
+        """API用の状態表現"""
+        trip(breaker)
+        state = breaker.to_dict()
+
+        assert state["facility"] == "meguro"
+        assert state["state"] == OPEN
+        assert state["consecutiveFailures"] == 3
+        assert state["lastErrorType"] == "TIMEOUT_ERROR"
+        assert state["retryAfterSeconds"] == 60
+        assert state["openedAt"] is not None
+
+    def test_classify_error_type(self):
+        """タイムアウトを含む汎用エラーはTIMEOUT_ERRORとして扱う"""
+        assert classify_error_type({"error_type": "SCRAPING_ERROR", "details": "Timeout 30000ms exceeded"}) == "TIMEOUT_ERROR"
+        assert classify_error_type({"error_type": "NAVIGATION_ERROR"}) == "NAVIGATION_ERROR"
+        assert classify_error_type({"error_type": "DATABASE_ERROR"}) == "DATABASE_ERROR"
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトでは無効"""
+        monkeypatch.delenv('CIRCUIT_BREAKER_ENABLED', raising=False)
+        assert get_circuit_breaker("meguro") is None
+
+
+class TestScraperCircuitBreakerIntegration:
+    """BaseScraper.scrape_and_saveとの連携のテスト"""
+
+    @patch('src.scrapers.base.get_circuit_breaker')
+    def test_open_circuit_skips_scraping(self, mock_get_breaker, breaker):
+        """openの間はscrape_availabilityを呼ばずにCIRCUIT_OPENを返す"""
+        trip(breaker)
+        mock_get_breaker.return_value = breaker
+        scraper = MeguroScraper()
+
+        with patch.object(scraper, 'scrape_availability') as mock_scrape:
+            result = scraper.scrape_and_save("2025-10-05")
+
+        mock_scrape.assert_not_called()
+        assert result["status"] == "error"
+        assert result["error_type"] == "CIRCUIT_OPEN"
+
+    @patch('src.scrapers.base.get_circuit_breaker')
+    def test_navigation_errors_trip_circuit(self, mock_get_breaker, breaker):
+        """scrape_and_saveのNAVIGATION_ERRORが続くとopenになる"""
+        mock_get_breaker.return_value = breaker
+        scraper = MeguroScraper()
+
+        with patch.object(scraper, 'scrape_availability',
+                          side_effect=RuntimeError("Scraping failed - no default data should be saved")):
+            results = [scraper.scrape_and_save("2025-10-05") for _ in range(4)]
+
+        assert [r["error_type"] for r in results] == [
+            "NAVIGATION_ERROR", "NAVIGATION_ERROR", "NAVIGATION_ERROR", "CIRCUIT_OPEN"
+        ]
+        assert breaker.state == OPEN
@@ -0,0 +1,155 @@
+"""
+スクレイピングの期限とキャンセルのテスト
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper
+from src.scrapers.step_pipeline import PipelineStep, RetryPolicy, StepPipeline
+from src.utils.deadlines import (
+    CANCELLED,
+    DEADLINE_EXCEEDED,
+    Deadline,
+    ScrapeCancelledError,
+    deadline_context,
+    get_current_deadline,
+)
+from src.utils.scrape_jobs import ScrapeJob
+
+
+class TestDeadline:
+    """Deadlineのテスト"""
+
+    def test_clamp_to_remaining(self):
+        """待機のタイムアウトを残り時間に収める（期限なしの場合はそのまま）"""
+        assert Deadline(2).clamp_ms(30000) <= 2000
+        assert Deadline(600).clamp_ms(30000) == 30000
+        assert Deadline().clamp_ms(30000) == 30000
+
+    def test_cancel(self):
+        """キャンセル後はcheckが例外を投げ、理由を保持する"""
+        deadline = Deadline()
+        deadline.check()
+        deadline.cancel("stop")
+
+        with pytest.raises(ScrapeCancelledError) as error:
+            deadline.check()
+        assert error.value.error_type == CANCELLED
+        assert error.value.to_result()["details"] == "stop"
+        assert deadline.to_dict()["cancelReason"] == "stop"
+
+    def test_expired(self):
+        """期限を過ぎたらDEADLINE_EXCEEDED"""
+        deadline = Deadline(0.001)
+        deadline._expires_at -= 1
+
+        assert deadline.done
+        assert deadline.error().error_type == DEADLINE_EXCEEDED
+        with pytest.raises(ScrapeCancelledError):
+            deadline.clamp_ms(1000)
+
+    def test_restart(self):
+        """restartで期限を今から数え直す（キャンセルは保持）"""
+        deadline = Deadline(60)
+        deadline._expires_at -= 59
+        deadline.restart()
+
+        assert deadline.remaining() > 59
+        deadline.cancel()
+        deadline.restart()
+        assert deadline.done
+
+    def test_context_inherits_when_none(self):
+        """Noneを渡した場合は呼び出し元の期限を引き継ぐ"""
+        outer = Deadline()
+        with deadline_context(outer):
+            with deadline_context(None):
+                assert get_current_deadline() is outer
+        assert get_current_deadline() is None
+
+
+class TestScraperCancellation:
+    """スクレイパーの中断のテスト"""
+
+    def test_pipeline_stops_between_steps_without_retry(self):
+        """キャンセルされたら次のステップを実行せず、再試行もしない"""
+        deadline = Deadline()
+        calls = []
+
+        def first(page):
+            calls.append("first")
+            deadline.cancel("stop")
+            return True
+
+        steps = [PipelineStep("first", first), PipelineStep("second", lambda page: calls.append("second") or True)]
+        pipeline = StepPipeline(steps, default_retry=RetryPolicy(max_attempts=3, backoff_ms=0), sleep=lambda _: None)
+        with deadline_context(deadline), pytest.raises(ScrapeCancelledError):
+            pipeline.run(MagicMock())
+
+        assert calls == ["first"]
+
+    def test_scrape_and_save_does_not_launch_browser(self):
+        """キャンセル済みの場合はブラウザを起動せずに中断の結果を返す"""
+        deadline = Deadline()
+        deadline.cancel()
+        scraper = MeguroScraper()
+        with deadline_context(deadline), patch.object(scraper, 'scrape_availability') as scrape_availability:
+            result = scraper.scrape_and_save("2025-10-05")
+
+        scrape_availability.assert_not_called()
+        assert result["error_type"] == CANCELLED
+
+    def test_step_cancelled_mid_scrape(self):
+        """スクレイピング中に中断した場合はSCRAPING_ERRORではなく中断の結果を返す"""
+        scraper = MeguroScraper()
+        error = ScrapeCancelledError("Deadline of 10s exceeded", DEADLINE_EXCEEDED)
+        with patch.object(scraper, 'scrape_availability', side_effect=error):
+            result = scraper.scrape_and_save("2025-10-05")
+
+        assert result["error_type"] == DEADLINE_EXCEEDED
+
+    def test_multiple_dates_keeps_saved_dates(self, monkeypatch):
+        """日付の間で止まり、保存済みの日付はそのまま、残りの日付は中断として返す"""
+        monkeypatch.setenv('MEGURO_MULTI_DATE_ENABLED', 'false')
+        deadline = Deadline()
+        scraper = MeguroScraper()
+
+        def scrape_and_save(date):
+            deadline.cancel("stop")
+            return {"status": "success", "data": {date: []}}
+
+        with deadline_context(deadline), patch.object(scraper, 'scrape_and_save', side_effect=scrape_and_save), \
+                patch('src.scrapers.meguro.time.sleep'):
+            summary = scraper.scrape_multiple_dates(["2025-10-05", "2025-10-06", "2025-10-07"])
+
+        results = summary["results"]
+        assert results["2025-10-05"]["status"] == "success"
+        assert results["2025-10-06"]["error_type"] == CANCELLED
+        assert results["2025-10-07"]["error_type"] == CANCELLED
+
+
+class TestJobCancellation:
+    """ジョブのキャンセルのテスト"""
+
+    def test_cancel_running_job(self):
+        """実行中のジョブは期限をキャンセルし、cancelイベントを送る"""
+        job = ScrapeJob("meguro", ["2025-10-05"], timeout_seconds=0)
+
+        assert job.cancel("stop") is True
+        assert job.deadline.cancelled
+        assert job.events_after(0)[-1]["type"] == "cancel"
+        assert job.to_dict()["deadline"]["timeoutSeconds"] is None
+
+    def test_cancel_finished_job(self):
+        """終了済みのジョブはキャンセルできない"""
+        job = ScrapeJob("meguro", ["2025-10-05"])
+        job.finish("completed")
+
+        assert job.cancel() is False
+        assert not job.deadline.cancelled
+
+    def test_default_timeout_from_env(self, monkeypatch):
+        """期限の秒数は SCRAPE_JOB_TIMEOUT_SECONDS"""
+        monkeypatch.setenv('SCRAPE_JOB_TIMEOUT_SECONDS', '120')
+        assert ScrapeJob("meguro", ["2025-10-05"]).deadline.timeout_seconds == 120
@@ -0,0 +1,104 @@
+"""
+デバッグ成果物の取得のテスト
+"""
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper
+from src.utils.debug_artifacts import DebugArtifacts, get_debug_artifacts
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    """一時ディレクトリに書き込むデバッグ成果物"""
+    return DebugArtifacts(directory=str(tmp_path / "artifacts"), ring_size=3, max_captures=2,
+                          slow_run_ms=1000, trace=False)
+
+
+def fake_page(url="https://example.com/top"):
+    page = MagicMock()
+    page.url = url
+    page.evaluate.return_value = "title|120|3000"
+    page.content.return_value = "<html><body>top</body></html>"
+    page.screenshot.return_value = b"png-bytes"
+    return page
+
+
+class TestArtifactRecorder:
+    """ArtifactRecorderのテスト"""
+
+    def test_markers_are_a_ring(self, artifacts):
+        """マーカーは直近ring_size件だけ保持し、スクリーンショットは撮らない"""
+        recorder = artifacts.recorder("meguro")
+        page = fake_page()
+        for step in ["open", "search", "calendar", "extract"]:
+            recorder.step_finished(step, page, None, 12.3)
+
+        assert [marker["step"] for marker in recorder.markers] == ["search", "calendar", "extract"]
+        assert recorder.markers[0]["url"] == "https://example.com/top"
+        assert len(recorder.markers[0]["domHash"]) == 12
+        page.screenshot.assert_not_called()
+
+    def test_capture_on_failure(self, artifacts):
+        """再試行を使い切った場合はスクリーンショット・HTML・マーカーを書き込む"""
+        recorder = artifacts.recorder("shibuya")
+        page = fake_page()
+        recorder.step_finished("criteria", page, "precondition not met", 5.0)
+        recorder.run_failed(page, "criteria")
+        assert artifacts.flush(timeout=5)
+
+        captures = artifacts.list_captures()
+        assert len(captures) == 1
+        assert captures[0].name.endswith("_shibuya_criteria_failed")
+        assert (captures[0] / "screenshot.png").read_bytes() == b"png-bytes"
+        assert "top" in (captures[0] / "page.html").read_text()
+        markers = json.loads((captures[0] / "markers.json").read_text())
+        assert markers["markers"][0]["error"] == "precondition not met"
+
+    def test_capture_only_slow_runs(self, artifacts):
+        """成功した実行は閾値より遅い場合のみ取得する"""
+        recorder = artifacts.recorder("meguro")
+        recorder.run_finished(fake_page(), 500)
+        recorder.run_finished(fake_page(), 1500)
+        assert artifacts.flush(timeout=5)
+
+        assert [path.name.split("_", 1)[1] for path in artifacts.list_captures()] == ["meguro_slow_run"]
+
+    def test_old_captures_are_pruned(self, artifacts):
+        """保存する取得結果はmax_captures件まで"""
+        recorder = artifacts.recorder("meguro")
+        for _ in range(4):
+            recorder.run_failed(fake_page(), "extract")
+            artifacts.flush(timeout=5)
+
+        assert len(artifacts.list_captures()) == 2
+        assert artifacts.get_stats()["captures"][0]["files"] == ["markers.json", "page.html", "screenshot.png"]
+
+    def test_trace_saved_with_capture(self, tmp_path):
+        """トレースが有効な場合は取得時に保存して記録をやり直す"""
+        artifacts = DebugArtifacts(directory=str(tmp_path), trace=True)
+        recorder = artifacts.recorder("meguro")
+        context = MagicMock()
+        recorder.start_trace(context)
+        page = fake_page()
+        page.context = context
+        directory = recorder.capture(page, "extract_failed")
+
+        context.tracing.stop.assert_called_once_with(path=f"{directory}/trace.zip")
+        assert context.tracing.start.call_count == 2
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトでは無効で、スクレイパーはobserverを渡さない"""
+        monkeypatch.delenv('DEBUG_ARTIFACTS_ENABLED', raising=False)
+        assert get_debug_artifacts() is None
+        assert MeguroScraper().debug_recorder() is None
+
+    def test_scraper_reuses_recorder(self, artifacts):
+        """スクレイパーは同じレコーダー（リングバッファ）を使い続ける"""
+        scraper = MeguroScraper()
+        with patch('src.scrapers.base.get_debug_artifacts', return_value=artifacts):
+            recorder = scraper.debug_recorder()
+            assert scraper.debug_recorder() is recorder
+            assert recorder.facility == "meguro"
@@ -0,0 +1,126 @@
+"""
+deep link（URLテンプレート）による画面遷移の短縮のテスト
+"""
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper
+from src.utils.deep_links import DeepLink, get_deep_link
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def deep_link(clock):
+    link = DeepLink("meguro", "https://example.com/calendar?start={date_slash}&y={year}&m={month}",
+                    max_consecutive_misses=2, retry_seconds=60)
+    link._monotonic = clock
+    return link
+
+
+class TestDeepLink:
+    """DeepLinkのテスト"""
+
+    def test_url_from_template(self, deep_link):
+        """テンプレートに日付を埋め込む"""
+        assert deep_link.url(datetime(2025, 10, 5)) == "https://example.com/calendar?start=2025/10/05&y=2025&m=10"
+
+    def test_hit_rate(self, deep_link):
+        """命中率を記録する"""
+        deep_link.record(True)
+        deep_link.record(True)
+        deep_link.record(False, "landed on an unexpected screen")
+
+        state = deep_link.to_dict()
+        assert (state["hits"], state["misses"]) == (2, 1)
+        assert state["hitRate"] == 0.667
+        assert state["lastError"] == "landed on an unexpected screen"
+
+    def test_suspended_after_consecutive_misses(self, deep_link, clock):
+        """外れが続いたらretry_secondsの間は試さず、経過後に1回だけ試す"""
+        deep_link.record(False, "miss")
+        assert deep_link.should_try()
+        deep_link.record(False, "miss")
+
+        assert not deep_link.should_try()
+        assert deep_link.to_dict()["suspended"] is True
+
+        clock.now += 61
+        assert deep_link.should_try()
+        deep_link.record(False, "miss")
+        assert not deep_link.should_try()
+
+    def test_hit_resets_consecutive_misses(self, deep_link):
+        """当たれば連続の外れ回数を戻す"""
+        deep_link.record(False, "miss")
+        deep_link.record(True)
+        deep_link.record(False, "miss")
+
+        assert deep_link.should_try()
+
+    def test_requires_template(self, monkeypatch):
+        """有効でもテンプレートが設定されていない施設はNone"""
+        monkeypatch.setenv('DEEP_LINKS_ENABLED', 'true')
+        monkeypatch.delenv('DEEP_LINK_TEMPLATE_SHIBUYA', raising=False)
+        assert get_deep_link("shibuya") is None
+
+        monkeypatch.delenv('DEEP_LINKS_ENABLED')
+        monkeypatch.setenv('DEEP_LINK_TEMPLATE_SHIBUYA', 'https://example.com/{date}')
+        assert get_deep_link("shibuya") is None
+
+
+class TestScraperDeepLink:
+    """スクレイパーのdeep linkの試行のテスト"""
+
+    def test_hit_skips_navigation(self, deep_link):
+        """期待する画面に着いた場合はTrueを返し、命中として記録する"""
+        scraper = MeguroScraper()
+        page = MagicMock()
+        with patch('src.scrapers.base.get_deep_link', return_value=deep_link):
+            assert scraper.try_deep_link(page, datetime(2025, 10, 5), lambda page: True) is True
+
+        assert page.goto.call_args[0][0] == "https://example.com/calendar?start=2025/10/05&y=2025&m=10"
+        assert deep_link.hits == 1
+
+    def test_miss_falls_back(self, deep_link):
+        """期待する画面に着かない・遷移に失敗した場合はFalseを返し、外れとして記録する"""
+        scraper = MeguroScraper()
+        page = MagicMock()
+        with patch('src.scrapers.base.get_deep_link', return_value=deep_link):
+            assert scraper.try_deep_link(page, datetime(2025, 10, 5), lambda page: False) is False
+            page.goto.side_effect = RuntimeError("net::ERR_ABORTED")
+            assert scraper.try_deep_link(page, datetime(2025, 10, 5), lambda page: True) is False
+
+        assert deep_link.misses == 2
+        assert deep_link.last_error == "net::ERR_ABORTED"
+
+    def test_not_configured(self, monkeypatch):
+        """設定されていない場合は遷移せずにFalseを返す"""
+        monkeypatch.delenv('DEEP_LINKS_ENABLED', raising=False)
+        page = MagicMock()
+
+        assert MeguroScraper().try_deep_link(page, datetime(2025, 10, 5), lambda page: True) is False
+        page.goto.assert_not_called()
+
+    def test_meguro_park_uses_deep_link(self):
+        """目黒区はdeep linkで施設別空き状況画面に着いた場合、クリック操作を行わない"""
+        scraper = MeguroScraper()
+        with patch.object(scraper, 'try_deep_link', return_value=True) as try_deep_link, \
+                patch.object(scraper, 'build_park_steps') as build_park_steps:
+            assert scraper.park_page(MagicMock()) is True
+
+        assert try_deep_link.call_args[0][2] == scraper.is_calendar_page
+        build_park_steps.assert_not_called()
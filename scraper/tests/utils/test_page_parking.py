@@ -0,0 +1,243 @@
+"""
+ページパーキング（施設ごとの待機ページ）のテスト
+"""
+import contextvars
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper
+from src.scrapers.shibuya import ShibuyaScraper
+from src.utils.deadlines import Deadline, ScrapeCancelledError, deadline_context
+from src.utils.page_parking import PageParking, get_page_parking
+
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class FakeScraper:
+    """待機ページのフックを実装したスクレイパーの代わり"""
+
+    FACILITY_KEY = "meguro"
+
+    def __init__(self, parked=True, returned=True):
+        self.parked = parked
+        self.returned = returned
+        self.parked_pages = []
+        self.closed_contexts = []
+        self.closed_browsers = []
+
+    def setup_browser(self, playwright):
+        browser = MagicMock()
+        browser.is_connected.return_value = True
+        browser.new_context.side_effect = lambda: self._new_context()
+        return browser
+
+    def _new_context(self):
+        context = MagicMock()
+        context.new_page.side_effect = lambda: self._new_page()
+        return context
+
+    def _new_page(self):
+        page = MagicMock()
+        page.is_closed.return_value = False
+        return page
+
+    def create_browser_context(self, browser):
+        return browser.new_context()
+
+    def close_browser_context(self, context):
+        self.closed_contexts.append(context)
+        context.close()
+
+    def close_browser(self, browser):
+        self.closed_browsers.append(browser)
+        browser.close()
+
+    def park_page(self, page):
+        self.parked_pages.append(page)
+        return True
+
+    def is_parked(self, page):
+        return self.parked
+
+    def return_to_parked(self, page):
+        return self.returned
+
+
+@pytest.fixture
+def parking():
+    with patch('playwright.sync_api.sync_playwright'):
+        yield PageParking(max_age_seconds=1800, idle_seconds=60)
+
+
+class TestPageParking:
+    """PageParkingのテスト"""
+
+    def test_reuses_parked_page(self, parking):
+        """2回目以降は待機中のページで日付の処理だけを実行する"""
+        scraper = FakeScraper()
+        pages = [parking.run(scraper, lambda page: page, timeout=5) for _ in range(3)]
+
+        assert pages[0] is pages[1] is pages[2]
+        assert len(scraper.parked_pages) == 1
+        stats = parking.get_stats()["facilities"][0]
+        assert stats["facility"] == "meguro"
+        assert stats["parked"] is True
+        assert (stats["parks"], stats["reuses"]) == (1, 2)
+
+    def test_idle_browsers(self, parking):
+        """依頼を処理中のブラウザはアイドルとして数えない"""
+        scraper = FakeScraper()
+        assert parking.idle_browsers() == 0
+
+        during = parking.run(scraper, lambda page: parking.idle_browsers(), timeout=5)
+
+        assert during == 0
+        assert parking.idle_browsers() == 1
+
+    def test_reparks_when_not_on_parked_screen(self, parking):
+        """待機画面にいない（セッション切れなど）場合は待機し直す"""
+        scraper = FakeScraper()
+        first = parking.run(scraper, lambda page: page, timeout=5)
+        scraper.parked = False
+        second = parking.run(scraper, lambda page: page, timeout=5)
+
+        assert first is not second
+        assert len(scraper.parked_pages) == 2
+        # 破棄したページのコンテキストはスクレイパーの後処理を通して閉じる
+        assert len(scraper.closed_contexts) == 1
+
+    def test_reparks_when_too_old(self):
+        """最大秒数を超えた待機ページは使わない"""
+        with patch('playwright.sync_api.sync_playwright'), patch('src.utils.page_parking.time.monotonic') as monotonic:
+            parking = PageParking(max_age_seconds=10, idle_seconds=60)
+            scraper = FakeScraper()
+            monotonic.return_value = 100.0
+            parking.run(scraper, lambda page: page, timeout=5)
+            monotonic.return_value = 111.0
+            parking.run(scraper, lambda page: page, timeout=5)
+
+        assert len(scraper.parked_pages) == 2
+
+    def test_retries_once_on_fresh_page(self, parking):
+        """再利用したページで失敗した場合は待機し直して1回だけやり直す"""
+        scraper = FakeScraper()
+        parking.run(scraper, lambda page: page, timeout=5)
+        attempts = []
+
+        def action(page):
+            attempts.append(page)
+            if len(attempts) == 1:
+                raise RuntimeError("stale page")
+            return "ok"
+
+        assert parking.run(scraper, action, timeout=5) == "ok"
+        assert attempts[0] is not attempts[1]
+        stats = parking.get_stats()["facilities"][0]
+        assert stats["discards"] == 1
+        assert stats["lastError"] == "stale page"
+
+    def test_failure_on_fresh_page_raises(self, parking):
+        """待機し直したばかりのページでの失敗はやり直さずに送出する"""
+        scraper = FakeScraper()
+        calls = []
+
+        def action(page):
+            calls.append(page)
+            raise RuntimeError("Scraping failed - no data extracted")
+
+        with pytest.raises(RuntimeError, match="no data extracted"):
+            parking.run(scraper, action, timeout=5)
+        assert len(calls) == 1
+        assert parking.get_stats()["facilities"][0]["parked"] is False
+
+    def test_discards_when_return_fails(self, parking):
+        """待機画面に戻れなかったページは破棄し、次の依頼で待機し直す"""
+        scraper = FakeScraper(returned=False)
+        assert parking.run(scraper, lambda page: "result", timeout=5) == "result"
+        assert parking.get_stats()["facilities"][0]["parked"] is False
+
+        scraper.returned = True
+        parking.run(scraper, lambda page: page, timeout=5)
+        assert len(scraper.parked_pages) == 2
+
+    def test_runs_in_callers_context(self, parking):
+        """処理は依頼した側のコンテキストで実行される"""
+        request_id.set("run-1")
+        assert parking.run(FakeScraper(), lambda page: request_id.get(), timeout=5) == "run-1"
+
+    def test_idle_close_uses_scraper_hooks(self):
+        """アイドル時のブラウザの停止はスクレイパーのclose_browserを通す（状態の保存・所要時間の書き込みのため）"""
+        with patch('playwright.sync_api.sync_playwright'):
+            parking = PageParking(max_age_seconds=1800, idle_seconds=0.05)
+            first, second = FakeScraper(), FakeScraper()
+            parking.run(first, lambda page: page, timeout=5)
+            second.parked = False
+            parking.run(second, lambda page: page, timeout=5)
+
+            started = time.monotonic()
+            while not second.closed_browsers and time.monotonic() - started < 5:
+                time.sleep(0.01)
+
+        # 最初のページの破棄は作成したスクレイパー、停止は最後にコンテキストを作成したスクレイパーが行う
+        assert len(first.closed_contexts) == 1
+        assert len(second.closed_contexts) == 1
+        assert len(second.closed_browsers) == 1
+        assert first.closed_browsers == []
+        assert parking.idle_browsers() == 0
+
+    def test_run_waits_until_deadline(self, parking):
+        """結果は実行の期限までしか待たない"""
+        release = threading.Event()
+        deadline = Deadline(0.2)
+        started = time.monotonic()
+        with deadline_context(deadline):
+            with pytest.raises(ScrapeCancelledError):
+                parking.run(FakeScraper(), lambda page: release.wait(5))
+        release.set()
+
+        assert time.monotonic() - started < 2
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトでは無効"""
+        monkeypatch.delenv('PAGE_PARKING_ENABLED', raising=False)
+        assert get_page_parking() is None
+
+
+class TestScraperParkingHooks:
+    """スクレイパーの待機ページのフックのテスト"""
+
+    def test_meguro_scrape_uses_parked_page(self):
+        """目黒区はパーキングが有効な場合、日付のステップだけを待機ページで実行する"""
+        scraper = MeguroScraper()
+        parking = MagicMock()
+        parking.run.side_effect = lambda scraper, action: {"region": {"studio": {
+            "morning": "available", "afternoon": "booked", "evening": "booked"
+        }}}
+        with patch('src.scrapers.meguro.get_page_parking', return_value=parking):
+            records = scraper.scrape_availability("2025-10-05")
+
+        assert parking.run.call_args[0][0] is scraper
+        assert records[0]["roomName"] == "studio"
+        assert records[0]["timeSlots"]["morning"] == "available"
+
+    def test_meguro_returns_to_calendar(self):
+        """時間帯別空き状況画面から「前に戻る」で施設別空き状況画面に戻る"""
+        scraper = MeguroScraper()
+        page = MagicMock()
+        with patch.object(scraper, 'is_calendar_page', side_effect=[False, True]):
+            assert scraper.return_to_parked(page) is True
+        page.locator.assert_called_with("a.btnBlue:has-text('前に戻る')")
+
+    def test_shibuya_returns_to_search_result(self):
+        """渋谷区はモーダルを閉じて検索結果のカレンダーに戻る"""
+        scraper = ShibuyaScraper()
+        page = MagicMock()
+        with patch.object(scraper, 'close_modal', return_value=True), \
+                patch.object(scraper, 'is_search_result', return_value=True):
+            assert scraper.return_to_parked(page) is True
+        with patch.object(scraper, 'close_modal', return_value=False):
+            assert scraper.return_to_parked(page) is False
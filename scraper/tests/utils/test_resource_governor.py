@@ -0,0 +1,145 @@
+"""
+ブラウザのリソース管理のテスト
+"""
+import logging
+from unittest.mock import Mock
+
+from src.scrapers.shibuya import ShibuyaScraper
+from src.utils import resource_governor
+from src.utils.resource_governor import ResourceGovernor, browser_rss_mb, playwright_driver_pid
+
+
+class TestResourceGovernor:
+    """ResourceGovernorのテスト"""
+
+    def test_recycle_by_step_count(self):
+        """操作回数がしきい値に達したら作り直しを指示する"""
+        governor = ResourceGovernor(max_rss_mb=0, max_steps=3, rss_reader=lambda: None)
+        governor.tick(2)
+        assert not governor.should_recycle()
+
+        governor.tick()
+        assert governor.should_recycle()
+        assert governor.last_reason == "steps 3 >= 3"
+
+        governor.recycled()
+        assert not governor.should_recycle()
+        assert governor.recycles == 1
+        assert governor.total_steps == 3
+
+    def test_recycle_by_rss(self):
+        """RSSがしきい値を超えたら作り直しを指示する"""
+        readings = iter([300.0, 900.0])
+        governor = ResourceGovernor(max_rss_mb=768, max_steps=0, rss_reader=lambda: next(readings))
+
+        assert not governor.should_recycle()
+        assert governor.should_recycle()
+        assert governor.last_reason == "rss 900MB >= 768MB"
+        assert governor.peak_rss_mb == 900.0
+
+    def test_without_rss(self):
+        """RSSが取得できない場合は操作回数のみで判定する"""
+        governor = ResourceGovernor(max_rss_mb=1, max_steps=100, rss_reader=lambda: None)
+        governor.tick(10)
+
+        assert not governor.should_recycle()
+        assert governor.summary()["peakRssMb"] is None
+
+    def test_summary(self):
+        """実行単位の集計"""
+        readings = iter([100.0, 250.5, 200.0])
+        governor = ResourceGovernor(max_rss_mb=768, max_steps=40, rss_reader=lambda: next(readings))
+        governor.tick(5)
+        governor.should_recycle()
+        governor.should_recycle()
+
+        summary = governor.summary()
+        assert summary["steps"] == 5
+        assert summary["rssSamples"] == 3
+        assert summary["peakRssMb"] == 250.5
+        assert summary["lastRssMb"] == 200.0
+
+    def test_defaults_from_env(self, monkeypatch):
+        """しきい値を環境変数から読み込む"""
+        monkeypatch.setenv('BROWSER_MAX_RSS_MB', '512')
+        monkeypatch.setenv('BROWSER_MAX_STEPS_PER_PAGE', '25')
+        governor = ResourceGovernor()
+
+        assert governor.max_rss_mb == 512
+        assert governor.max_steps == 25
+
+    def test_browser_rss_without_psutil(self, monkeypatch):
+        """psutilがない場合はNone"""
+        monkeypatch.setattr(resource_governor, "psutil", None)
+        assert browser_rss_mb(12345) is None
+
+    def test_browser_rss_without_pid(self):
+        """計測するPIDが未設定の場合はNone"""
+        assert browser_rss_mb(None) is None
+
+    def test_browser_rss_measures_only_given_tree(self, monkeypatch):
+        """指定したPIDのプロセスツリーのみを合計する"""
+        class FakeProcess:
+            def __init__(self, pid, rss, children=()):
+                self.pid = pid
+                self._rss = rss
+                self._children = list(children)
+
+            def children(self, recursive=False):
+                return self._children
+
+            def memory_info(self):
+                return type("MemoryInfo", (), {"rss": self._rss})()
+
+        mb = 1024 * 1024
+        trees = {
+            100: FakeProcess(100, 10 * mb, [FakeProcess(101, 200 * mb)]),
+            200: FakeProcess(200, 10 * mb, [FakeProcess(201, 500 * mb)]),
+        }
+        fake_psutil = type("FakePsutil", (), {"Process": staticmethod(lambda pid: trees[pid]), "Error": Exception})
+        monkeypatch.setattr(resource_governor, "psutil", fake_psutil)
+
+        assert browser_rss_mb(100) == 210
+        assert browser_rss_mb(200) == 510
+
+    def test_governor_reads_watched_pid(self, monkeypatch):
+        """watchで設定したPIDのRSSを計測する"""
+        pids = []
+        monkeypatch.setattr(resource_governor, "browser_rss_mb", lambda pid: pids.append(pid) or 100.0)
+        governor = ResourceGovernor(max_rss_mb=768, max_steps=0)
+
+        governor.watch(4321)
+        governor.should_recycle()
+
+        assert pids == [4321]
+        assert governor.peak_rss_mb == 100.0
+
+    def test_playwright_driver_pid(self):
+        """Playwrightの接続からドライバのPIDを取得（取得できない場合はNone）"""
+        playwright = Mock()
+        playwright._impl_obj._connection._transport._proc.pid = 4321
+        assert playwright_driver_pid(playwright) == 4321
+        assert playwright_driver_pid(object()) is None
+
+
+class TestMemoryTelemetry:
+    """メモリ使用量のログ出力のテスト"""
+
+    def test_log_memory_telemetry(self):
+        """集計をmemoryフィールド付きでログ出力する"""
+        scraper = ShibuyaScraper()
+        governor = ResourceGovernor(max_rss_mb=768, max_steps=40, rss_reader=lambda: 123.4)
+        governor.tick(7)
+
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        scraper.logger.addHandler(handler)
+        try:
+            scraper._log_memory_telemetry(governor)
+        finally:
+            scraper.logger.removeHandler(handler)
+
+        assert records[0].memory["steps"] == 7
+        assert records[0].memory["peakRssMb"] == 123.4
+        assert "peak 123.4 MB" in records[0].getMessage()
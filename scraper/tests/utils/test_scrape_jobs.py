@@ -0,0 +1,150 @@
+"""
+スクレイピングジョブの進捗管理のテスト
+"""
+import json
+import threading
+from unittest.mock import patch
+
+from src.scrapers.meguro import MeguroScraper
+from src.utils.scrape_jobs import (
+    COMPLETED,
+    JobRegistry,
+    ScrapeJob,
+    format_ndjson,
+    format_sse,
+    get_current_job,
+    job_context,
+    publish_progress,
+)
+
+
+class TestScrapeJob:
+    """ScrapeJobのテスト"""
+
+    def test_publish_assigns_sequential_ids(self):
+        """イベントには1からの連番IDが付く"""
+        job = ScrapeJob("meguro", ["2025-10-05"])
+        job.publish("date", date="2025-10-05", status="success")
+        job.publish("facility", facility="meguro")
+
+        events = job.events_after(0)
+        assert [e["id"] for e in events] == [1, 2]
+        assert events[0]["jobId"] == job.id
+        assert job.events_after(1)[0]["type"] == "facility"
+
+    def test_stream_ends_after_finish(self):
+        """ジョブ終了後、全イベントを返したらストリームが終わる"""
+        job = ScrapeJob("both", ["2025-10-05"])
+        job.publish("date", date="2025-10-05")
+        job.finish(COMPLETED)
+
+        events = list(job.stream())
+        assert [e["type"] for e in events] == ["date", "job"]
+        assert events[-1]["status"] == COMPLETED
+        assert job.to_dict()["status"] == COMPLETED
+
+    def test_stream_resumes_from_last_event_id(self):
+        """Last-Event-ID以降のイベントのみ返す"""
+        job = ScrapeJob("both", [])
+        for i in range(3):
+            job.publish("date", index=i)
+        job.finish(COMPLETED)
+
+        assert [e["id"] for e in job.stream(last_event_id=2)] == [3, 4]
+
+    def test_stream_receives_events_from_other_thread(self):
+        """別スレッドで発生したイベントを待ち受けて返す"""
+        job = ScrapeJob("meguro", ["2025-10-05"])
+
+        def worker():
+            job.publish("date", date="2025-10-05")
+            job.finish(COMPLETED)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        events = [e for e in job.stream(heartbeat_seconds=0.05) if e is not None]
+        thread.join()
+
+        assert [e["type"] for e in events] == ["date", "job"]
+
+    def test_heartbeat_while_idle(self):
+        """イベントがない間はNone（ハートビート）を返す"""
+        job = ScrapeJob("meguro", [])
+        stream = job.stream(heartbeat_seconds=0.01)
+        assert next(stream) is None
+
+
+class TestJobRegistry:
+    """JobRegistryのテスト"""
+
+    def test_evicts_oldest_finished_jobs(self):
+        """保持数を超えたら古い終了済みジョブから削除する"""
+        registry = JobRegistry(max_jobs=2)
+        running = registry.create("meguro", [])
+        finished = registry.create("shibuya", [])
+        finished.finish(COMPLETED)
+        newest = registry.create("ensemble", [])
+
+        assert registry.get(finished.id) is None
+        assert registry.get(running.id) is running
+        assert registry.get(newest.id) is newest
+
+
+class TestJobContext:
+    """スクレイパーからの進捗通知のテスト"""
+
+    def test_publish_outside_job_is_noop(self):
+        """ジョブ外では何もしない"""
+        assert get_current_job() is None
+        publish_progress("date", date="2025-10-05")
+
+    @patch('src.repositories.cosmos_repository.CosmosWriter')
+    def test_scraper_reports_saved_dates(self, mock_writer_class):
+        """保存に成功した日付がジョブに通知される"""
+        mock_writer_class.return_value.save_availability.return_value = True
+        scraper = MeguroScraper()
+        job = ScrapeJob("meguro", ["2025-10-05"])
+        rows = [{"facilityName": "A", "roomName": "B"}]
+
+        with job_context(job):
+            assert scraper._save_to_cosmos_immediately("2025-10-05", rows)
+
+        event = job.events_after(0)[0]
+        assert event["type"] == "date"
+        assert event["facility"] == "meguro"
+        assert event["status"] == "success"
+        assert event["data"] == rows
+
+    def test_scrape_and_save_reports_errors(self):
+        """scrape_and_saveの失敗もエラー種別付きで通知される"""
+        scraper = MeguroScraper()
+        job = ScrapeJob("meguro", ["2025-10-05"])
+
+        with job_context(job), patch.object(
+            scraper, 'scrape_availability',
+            side_effect=RuntimeError("Scraping failed - no default data should be saved")
+        ):
+            scraper.scrape_and_save("2025-10-05")
+
+        event = job.events_after(0)[0]
+        assert event["status"] == "error"
+        assert event["error_type"] == "NAVIGATION_ERROR"
+        assert event["data"] is None
+
+
+class TestFormatters:
+    """SSE/NDJSON形式のテスト"""
+
+    def test_format_sse(self):
+        event = {"id": 3, "type": "date", "date": "2025-10-05"}
+        text = format_sse(event)
+
+        assert text.startswith("id: 3\nevent: date\ndata: ")
+        assert text.endswith("\n\n")
+        assert json.loads(text.split("data: ", 1)[1]) == event
+        assert format_sse(None) == ": keep-alive\n\n"
+
+    def test_format_ndjson(self):
+        event = {"id": 1, "type": "job", "status": "completed"}
+        assert json.loads(format_ndjson(event)) == event
+        assert format_ndjson(None) == "\n"
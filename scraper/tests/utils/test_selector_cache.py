@@ -0,0 +1,121 @@
+"""
+セレクタキャッシュのテスト
+"""
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.scrapers.meguro import MeguroScraper
+from src.utils.selector_cache import SelectorCache, get_selector_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """一時ディレクトリのSQLiteを使うセレクタキャッシュ"""
+    return SelectorCache(db_path=str(tmp_path / "selectors.sqlite3"))
+
+
+def fake_page(matching):
+    """matchingに含まれるセレクタだけが一致するページ（問い合わせたセレクタを記録する）"""
+    page = MagicMock()
+    page.queried = []
+
+    def locator(selector):
+        page.queried.append(selector)
+        element = MagicMock()
+        element.first.count.return_value = 1 if selector in matching else 0
+        return element
+
+    page.locator.side_effect = locator
+    return page
+
+
+class TestSelectorCache:
+    """SelectorCacheのテスト"""
+
+    def test_order_without_record(self, cache):
+        """記録がない場合は元の順番のまま"""
+        assert cache.order("meguro", "search", ["a", "b", "c"]) == ["a", "b", "c"]
+
+    def test_order_puts_winner_first(self, cache):
+        """前回一致したセレクタを先頭にする"""
+        cache.record_match("meguro", "search", "c")
+
+        assert cache.order("meguro", "search", ["a", "b", "c"]) == ["c", "a", "b"]
+        # 候補にないセレクタは無視する
+        assert cache.order("meguro", "search", ["a", "b"]) == ["a", "b"]
+
+    def test_hits_and_misses(self, cache, caplog):
+        """同じセレクタならヒット、変わった場合はミスとして数えて警告する"""
+        cache.record_match("meguro", "search", "a")
+        cache.record_match("meguro", "search", "a")
+        with caplog.at_level(logging.WARNING, logger="src.utils.selector_cache"):
+            cache.record_match("meguro", "search", "b")
+
+        assert "no longer matched first" in caplog.text
+        stats = cache.get_stats("meguro")[0]
+        assert stats["selector"] == "b"
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["hitRate"] == pytest.approx(0.333)
+
+    def test_failure_keeps_winner(self, cache):
+        """どれも一致しなかった場合も記録済みのセレクタは残す"""
+        cache.record_match("shibuya", "purpose_select", "x")
+        cache.record_failure("shibuya", "purpose_select")
+
+        stats = cache.get_stats("shibuya")[0]
+        assert stats["selector"] == "x"
+        assert stats["failures"] == 1
+        assert cache.remembered("shibuya", "purpose_select") == "x"
+
+    def test_persisted_across_instances(self, tmp_path):
+        """再起動後もSQLiteから記録を読み込む"""
+        path = str(tmp_path / "selectors.sqlite3")
+        SelectorCache(db_path=path).record_match("meguro", "search", "b")
+
+        assert SelectorCache(db_path=path).order("meguro", "search", ["a", "b"]) == ["b", "a"]
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトでは無効"""
+        monkeypatch.delenv('SELECTOR_CACHE_ENABLED', raising=False)
+        assert get_selector_cache() is None
+
+
+class TestScraperResolveSelector:
+    """BaseScraper.resolve_selectorのテスト"""
+
+    def test_disabled_tries_in_order(self):
+        """無効時は元の順番で試す"""
+        scraper = MeguroScraper()
+        page = fake_page({"b", "c"})
+        with patch('src.scrapers.base.get_selector_cache', return_value=None):
+            element, selector = scraper.resolve_selector(page, "search", ["a", "b", "c"])
+
+        assert selector == "b"
+        assert element is not None
+        assert page.queried == ["a", "b"]
+
+    def test_learned_selector_is_tried_first(self, cache):
+        """2回目以降は前回一致したセレクタだけを問い合わせる"""
+        scraper = MeguroScraper()
+        with patch('src.scrapers.base.get_selector_cache', return_value=cache):
+            scraper.resolve_selector(fake_page({"c"}), "search", ["a", "b", "c"])
+            page = fake_page({"c"})
+            _, selector = scraper.resolve_selector(page, "search", ["a", "b", "c"])
+
+        assert selector == "c"
+        assert page.queried == ["c"]
+        assert cache.get_stats("meguro")[0]["hits"] == 1
+
+    def test_predicate_and_failure(self, cache):
+        """追加条件を満たさない要素は一致とみなさず、どれも一致しなければ失敗を記録する"""
+        scraper = MeguroScraper()
+        with patch('src.scrapers.base.get_selector_cache', return_value=cache):
+            element, selector = scraper.resolve_selector(
+                fake_page({"a"}), "search", ["a", "b"], predicate=lambda element: False
+            )
+
+        assert (element, selector) == (None, None)
+        assert cache.get_stats("meguro")[0]["failures"] == 1
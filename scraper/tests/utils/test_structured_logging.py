@@ -0,0 +1,115 @@
+"""
+構造化ログモジュールのテスト
+"""
+import json
+import logging
+
+import pytest
+
+from src.utils.structured_logging import (
+    ContextFilter,
+    JsonFormatter,
+    SamplingFilter,
+    StructuredLogPipeline,
+    get_log_context,
+    log_context,
+)
+
+
+def make_record(message="hello %s", args=("world",), **extra):
+    """テスト用のLogRecordを作成"""
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, message, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestLogContext:
+    """ログコンテキストのテスト"""
+
+    def test_nested_context(self):
+        """ネストしたコンテキストは外側の値を引き継ぎ、抜けると元に戻る"""
+        with log_context(run_id="run1", facility="meguro"):
+            with log_context(date="2025-10-05"):
+                assert get_log_context() == {"run_id": "run1", "facility": "meguro", "date": "2025-10-05"}
+            assert get_log_context() == {"run_id": "run1", "facility": "meguro"}
+        assert get_log_context() == {}
+
+    def test_none_values_are_ignored(self):
+        """Noneのフィールドは設定しない"""
+        with log_context(run_id="run1", date=None):
+            assert get_log_context() == {"run_id": "run1"}
+
+    def test_context_filter(self):
+        """レコードにコンテキストのフィールドを付与"""
+        record = make_record()
+        with log_context(run_id="run1", facility="shibuya"):
+            assert ContextFilter().filter(record)
+        assert record.run_id == "run1"
+        assert record.facility == "shibuya"
+
+
+class TestSamplingFilter:
+    """間引きフィルタのテスト"""
+
+    def test_only_sampled_records_are_thinned(self):
+        """sampled付きのレコードのみN件に1件通す"""
+        sampling = SamplingFilter(every=5)
+        passed = sum(sampling.filter(make_record(sampled=True)) for _ in range(20))
+        assert passed == 4
+        assert all(sampling.filter(make_record()) for _ in range(10))
+
+
+class TestJsonFormatter:
+    """JSON出力のテスト"""
+
+    def test_format_includes_context_fields(self):
+        """メッセージは遅延フォーマットされ、追加フィールドも出力される"""
+        record = make_record(run_id="run1", facility="ensemble", date="2025-10-05")
+        payload = json.loads(JsonFormatter().format(record))
+
+        assert payload["message"] == "hello world"
+        assert payload["level"] == "INFO"
+        assert payload["run_id"] == "run1"
+        assert payload["facility"] == "ensemble"
+        assert payload["date"] == "2025-10-05"
+        assert "args" not in payload
+
+
+class ListHandler(logging.Handler):
+    """出力されたレコードを保持するハンドラ"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestStructuredLogPipeline:
+    """キュー経由の出力のテスト"""
+
+    def test_records_are_written_by_listener(self):
+        """ロガーはキューに積むだけで、出力はリスナーが行う"""
+        sink = ListHandler()
+        pipeline = StructuredLogPipeline(handler=sink, sample_every=2)
+        logger = logging.getLogger("test_structured_logging_pipeline")
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        handler = pipeline.create_queue_handler(logging.DEBUG)
+        logger.addHandler(handler)
+
+        pipeline.start()
+        try:
+            with log_context(run_id="run1"):
+                logger.info("row %d", 1)
+                for i in range(4):
+                    logger.debug("cell %d", i, extra={"sampled": True})
+        finally:
+            pipeline.stop()
+            logger.removeHandler(handler)
+
+        messages = [record.getMessage() for record in sink.records]
+        assert messages == ["row 1", "cell 0", "cell 2"]
+        assert all(record.run_id == "run1" for record in sink.records)